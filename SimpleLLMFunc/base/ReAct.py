@@ -18,7 +18,7 @@ from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optiona
 
 from SimpleLLMFunc.interface.llm_interface import LLM_Interface
 from SimpleLLMFunc.type import MessageList, ToolDefinitionList, ToolCall, ToolCallArguments, ToolResult
-from SimpleLLMFunc.logger import app_log, push_debug
+from SimpleLLMFunc.logger import app_log, push_debug, push_warning
 from SimpleLLMFunc.logger.logger import get_current_context_attribute, get_location
 from SimpleLLMFunc.logger.context_manager import get_current_trace_id
 from SimpleLLMFunc.hooks.stream import EventYield, ReactOutput, ResponseYield
@@ -28,6 +28,7 @@ from SimpleLLMFunc.hooks.events import (
     ReactIterationStartEvent,
     LLMCallStartEvent,
     LLMChunkArriveEvent,
+    ToolCallArgumentsDeltaEvent,
     LLMCallEndEvent,
     ToolCallsBatchStartEvent,
     ToolCallStartEvent,
@@ -37,13 +38,17 @@ from SimpleLLMFunc.hooks.events import (
     ToolCallResult,
     ReactIterationEndEvent,
     ReactEndEvent,
+    StreamContentBuffer,
 )
-from SimpleLLMFunc.type.tool_call import dict_to_tool_call
+from SimpleLLMFunc.type.tool_call import ParsedToolCall, dict_to_tool_call
 from SimpleLLMFunc.base.messages import (
     build_assistant_response_message,
     build_assistant_tool_message,
     extract_usage_from_response,
 )
+from SimpleLLMFunc.base.budget import BudgetTracker, RunBudget
+from SimpleLLMFunc.base.checkpoint import CheckpointStore, ReActCheckpoint
+from SimpleLLMFunc.base.context import ContextBudget
 from SimpleLLMFunc.base.post_process import (
     extract_content_from_response,
     extract_content_from_stream_response,
@@ -56,8 +61,13 @@ from SimpleLLMFunc.base.tool_call import (
     extract_tool_calls_from_stream_response,
     process_tool_calls,
 )
+from SimpleLLMFunc.base.tool_call.output_store import ToolOutputStore
+from SimpleLLMFunc.base.tool_call.background import BackgroundJobManager
+from SimpleLLMFunc.base.tool_call.partial_json import PartialJSONParser
+from SimpleLLMFunc.base.type_resolve.xml_stream import XMLRootCloseDetector
 
 from SimpleLLMFunc.observability.langfuse_client import langfuse_client
+from SimpleLLMFunc.utils import aclosing_stream, check_deadline
 
 
 async def _process_tool_calls_with_events_gen(
@@ -68,6 +78,8 @@ async def _process_tool_calls_with_events_gen(
     trace_id: str,
     func_name: str,
     iteration: int,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    background_jobs: Optional[BackgroundJobManager] = None,
 ) -> AsyncGenerator[Union[EventYield, MessageList], None]:
     """处理工具调用并发射事件（异步生成器版本）
     
@@ -79,6 +91,8 @@ async def _process_tool_calls_with_events_gen(
         trace_id: 追踪ID
         func_name: 函数名
         iteration: 迭代次数
+        tool_output_store: 可选的工具输出存储，超长输出只以预览 + handle 的形式进入消息
+        background_jobs: 可选的后台任务管理器，后台工具立即返回 pending 消息
     
     Yields:
         EventYield: 事件对象
@@ -87,6 +101,9 @@ async def _process_tool_calls_with_events_gen(
     if not tool_calls:
         yield messages
         return
+
+    # 统一为 ParsedToolCall：事件、去重和执行共用同一次参数解析
+    tool_calls = [ParsedToolCall.from_dict(tool_call) for tool_call in tool_calls]
     
     # 发射工具调用批次开始事件
     if enable_event:
@@ -107,23 +124,25 @@ async def _process_tool_calls_with_events_gen(
             pass
     
     # 准备执行环境
-    from SimpleLLMFunc.base.tool_call.execution import _execute_single_tool_call
+    from SimpleLLMFunc.base.tool_call.execution import (
+        _execute_single_tool_call,
+        fan_out_tool_messages,
+        group_duplicate_tool_calls,
+    )
     import asyncio
     
     event_queue: asyncio.Queue[Optional[EventYield]] = asyncio.Queue()
     
-    async def _execute_with_events_task(tool_call: Dict[str, Any]) -> tuple[Dict[str, Any], List[Dict[str, Any]], bool, Optional[ToolResult], Optional[Exception], float]:
+    async def _execute_with_events_task(tool_call: ParsedToolCall) -> tuple[Dict[str, Any], List[Dict[str, Any]], bool, Optional[ToolResult], Optional[Exception], float]:
         """执行单个工具调用并将事件放入队列"""
-        tool_call_id = tool_call.get("id", "")
-        function_call = tool_call.get("function", {})
-        tool_name = function_call.get("name", "")
-        arguments_str = function_call.get("arguments", "{}")
+        tool_call_id = tool_call.id or ""
+        tool_name = tool_call.name or ""
         
         # 发射工具调用开始事件
         if enable_event:
             try:
-                arguments_start: ToolCallArguments = json.loads(arguments_str)
-                tool_call_typed_start = dict_to_tool_call(tool_call)
+                arguments_start: ToolCallArguments = tool_call.parse_arguments()
+                tool_call_typed_start = tool_call.to_tool_call()
                 event_queue.put_nowait(
                     EventYield(
                         event=ToolCallStartEvent(
@@ -149,7 +168,7 @@ async def _process_tool_calls_with_events_gen(
         
         try:
             tool_call_dict, messages_to_append, is_multimodal = await _execute_single_tool_call(
-                tool_call, tool_map
+                tool_call, tool_map, tool_output_store, background_jobs
             )
             
             # 从消息中提取工具结果
@@ -178,7 +197,7 @@ async def _process_tool_calls_with_events_gen(
         # 发射工具调用结束或错误事件
         if enable_event:
             try:
-                arguments_end: ToolCallArguments = json.loads(arguments_str)
+                arguments_end: ToolCallArguments = tool_call.parse_arguments()
                 if tool_error:
                     event_queue.put_nowait(
                         EventYield(
@@ -221,8 +240,12 @@ async def _process_tool_calls_with_events_gen(
         
         return (tool_call_dict, messages_to_append, is_multimodal, tool_result, tool_error, tool_execution_time)
     
+    # 合并重复调用：每组只启动代表调用的任务
+    groups = group_duplicate_tool_calls(tool_calls, tool_map)
+    deduplicated_count = len(tool_calls) - len(groups)
+
     # 启动所有任务
-    tasks = [asyncio.create_task(_execute_with_events_task(tc)) for tc in tool_calls]
+    tasks = [asyncio.create_task(_execute_with_events_task(tool_calls[group[0]])) for group in groups]
     batch_start_time = time.time()
     
     # 创建一个任务来监控所有工具任务的完成，并发送终止信号
@@ -235,19 +258,43 @@ async def _process_tool_calls_with_events_gen(
     
     # 实时消费事件流（与工具执行并发）
     # 当工具执行时，事件会被放入队列，我们立即 yield 出去
-    while True:
-        event = await event_queue.get()
-        if event is None:
-            break
-        yield event
-    
-    # 确保监控任务完成
-    await monitor_task
+    try:
+        while True:
+            event = await event_queue.get()
+            if event is None:
+                break
+            yield event
+
+        # 确保监控任务完成
+        await monitor_task
+    finally:
+        # 调用方取消或关闭生成器时，立即取消仍在运行的工具任务
+        for pending_task in (*tasks, monitor_task):
+            if not pending_task.done():
+                pending_task.cancel()
     
     # 收集结果
     tool_results: List[ToolCallResult] = []
-    # 这里我们只收集成功完成的结果，异常已经在 task 内部捕获
-    results = [t.result() for t in tasks if not t.cancelled() and not t.exception()]
+    # 这里我们只收集成功完成的结果，异常已经在 task 内部捕获；
+    # 重复调用按原始顺序展开，复用代表调用的结果（执行耗时记为 0）
+    indexed_results: Dict[int, tuple[Dict[str, Any], List[Dict[str, Any]], bool, Optional[ToolResult], Optional[Exception], float]] = {}
+    for group, task in zip(groups, tasks):
+        if task.cancelled() or task.exception():
+            continue
+        representative_result = task.result()
+        indexed_results[group[0]] = representative_result
+        _, rep_messages, rep_is_multimodal, rep_result, rep_error, _ = representative_result
+        for duplicate_index in group[1:]:
+            duplicate_call = tool_calls[duplicate_index]
+            indexed_results[duplicate_index] = (
+                duplicate_call,
+                fan_out_tool_messages(duplicate_call, rep_messages),
+                rep_is_multimodal,
+                rep_result,
+                rep_error,
+                0.0,
+            )
+    results = [indexed_results[index] for index in sorted(indexed_results)]
     
     # 收集工具调用结果用于批次结束事件
     for tool_call_dict, messages_to_append, is_multimodal, tool_result, tool_error, exec_time in results:
@@ -284,6 +331,7 @@ async def _process_tool_calls_with_events_gen(
                     total_execution_time=total_execution_time,
                     success_count=success_count,
                     error_count=error_count,
+                    deduplicated_count=deduplicated_count,
                 )
             )
         except Exception:
@@ -347,6 +395,58 @@ async def _process_tool_calls_with_events_gen(
     yield cast(MessageList, current_messages)
 
 
+def _tool_call_delta_events(
+    fragments: List[Dict[str, Any]],
+    delta_states: Dict[int, Dict[str, Any]],
+    trace_id: str,
+    func_name: str,
+    iteration: int,
+) -> List[EventYield]:
+    """把流式工具调用片段转换为参数增量事件
+
+    delta_states 按工具调用序号保存 id、名称和增量 JSON 解析器，同一次 LLM 调用内共享。
+    """
+    events: List[EventYield] = []
+    for fragment in fragments:
+        index = fragment.get("index")
+        if index is None:
+            continue
+        state = delta_states.get(index)
+        if state is None:
+            state = {"id": None, "name": None, "parser": PartialJSONParser()}
+            delta_states[index] = state
+        if fragment.get("id"):
+            state["id"] = fragment["id"]
+        function_fragment = fragment.get("function") or {}
+        if function_fragment.get("name"):
+            state["name"] = function_fragment["name"]
+
+        arguments_delta = function_fragment.get("arguments")
+        if not arguments_delta:
+            continue
+        parser: PartialJSONParser = state["parser"]
+        parser.feed(arguments_delta)
+        snapshot = parser.snapshot()
+        events.append(
+            EventYield(
+                event=ToolCallArgumentsDeltaEvent(
+                    event_type=ReActEventType.TOOL_CALL_ARGUMENTS_DELTA,
+                    timestamp=datetime.now(timezone.utc),
+                    trace_id=trace_id,
+                    func_name=func_name,
+                    iteration=iteration,
+                    tool_call_index=index,
+                    tool_call_id=state["id"],
+                    tool_name=state["name"],
+                    arguments_delta=arguments_delta,
+                    partial_arguments=snapshot,
+                    accumulated_arguments=snapshot,  # type: ignore[arg-type]
+                )
+            )
+        )
+    return events
+
+
 async def execute_llm(
     llm_interface: LLM_Interface,
     messages: MessageList,
@@ -357,6 +457,14 @@ async def execute_llm(
     enable_event: bool = False,
     trace_id: str = "",
     user_task_prompt: str = "",
+    context_budget: Optional[ContextBudget] = None,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    event_include_chunks: bool = True,
+    run_budget: Optional[RunBudget] = None,
+    stop_at_xml_root: Optional[str] = None,
+    copy_messages: bool = True,
+    budget_tracker: Optional[BudgetTracker] = None,
     **llm_kwargs,
 ) -> AsyncGenerator[Union[Tuple[Any, MessageList], ReactOutput], None]:
     """Execute LLM calls and orchestrate iterative tool usage.
@@ -375,6 +483,30 @@ async def execute_llm(
             tool_map: Mapping of tool names to their async callable implementations.
             max_tool_calls: Maximum number of tool call iterations before forcing termination.
             stream: Whether to stream responses or return complete responses.
+            context_budget: Optional token budget; the request sent to the LLM is compacted
+                when its estimated size exceeds it. The yielded history stays uncompacted.
+            tool_output_store: Optional store for oversized tool outputs; the model receives a
+                preview plus a handle readable via the `read_tool_output` tool.
+            checkpoint_store: Optional store that persists the loop state after every LLM
+                response with tool calls and every tool batch. If a checkpoint exists for the
+                trace_id, execution resumes from it and `messages` is ignored.
+            event_include_chunks: Whether LLMChunkArriveEvent carries the raw chunk object.
+                Disable it to keep retained events small; `accumulated_content` is always
+                available as a lazy view over a shared buffer.
+            run_budget: Optional token / cost budget for this run. Usage is accumulated after
+                every LLM response; when the next tool-enabled call would exceed the budget the
+                loop jumps to the final answer without tools. The state is reported in
+                `ReactEndEvent.budget`.
+            stop_at_xml_root: Optional XML root element name (`<ModelName>` / `<result>`). In
+                streaming mode, once the model's output closes this element (and no tool call
+                has started), reading stops and the HTTP stream is closed so trailing
+                commentary is never generated.
+            copy_messages: Whether every (response, updated_messages) tuple carries its own copy
+                of the message history (default: True). When False the live history list is
+                yielded instead; it is only valid until the generator resumes, so consumers that
+                only read the newly appended messages avoid an O(history) copy per chunk.
+            budget_tracker: Optional tracker shared by every LLM call of one decorated call
+                (retries, repairs). When omitted a new one is started from `run_budget`.
             **llm_kwargs: Additional keyword arguments to pass to the LLM interface.
 
     Yields:
@@ -393,320 +525,862 @@ async def execute_llm(
     total_tool_calls = 0
     start_time = time.time()
 
-    push_debug(
-        f"LLM 函数 '{func_name}' 开始执行，消息数: {len(current_messages)}",
-        location=get_location(),
-    )
+    # 检查点：存在同一 trace_id 的检查点时从中恢复
+    checkpoint: Optional[ReActCheckpoint] = None
+    if checkpoint_store is not None:
+        checkpoint = await checkpoint_store.load(current_trace_id)
+        if checkpoint is not None:
+            current_messages = cast(MessageList, list(checkpoint.messages))
+            call_count = checkpoint.call_count
+            total_llm_calls = checkpoint.total_llm_calls
+            total_tool_calls = checkpoint.total_tool_calls
+            app_log(
+                f"LLM 函数 '{func_name}' 从检查点恢复，已完成 {call_count} 轮工具调用",
+                location=get_location(),
+            )
 
-    # 发射 ReAct 开始事件
-    if enable_event:
+    def _snapshot() -> MessageList:
+        # 非事件模式下每个 chunk 附带的消息历史
+        return current_messages.copy() if copy_messages else current_messages
+
+    # 上一次压缩后的请求消息，以及它覆盖到的 current_messages 长度
+    compacted_messages: Optional[MessageList] = None
+    compacted_upto = 0
+
+    async def _request_payload() -> MessageList:
+        # 压缩只作用于发送给 LLM 的消息，current_messages 保留完整历史；
+        # 在上一次压缩结果的基础上追加新消息，避免每轮重复总结同一段历史
+        nonlocal compacted_messages, compacted_upto
+        if context_budget is None:
+            return current_messages
+        base = (
+            compacted_messages + current_messages[compacted_upto:]
+            if compacted_messages is not None
+            else current_messages
+        )
+        payload = await context_budget.compact(base)
+        if payload is not base:
+            compacted_messages = payload
+            compacted_upto = len(current_messages)
+        return payload
+
+    async def _save_checkpoint(pending_tool_calls: List[Dict[str, Any]]) -> None:
+        if checkpoint_store is None:
+            return
         try:
-            yield EventYield(
-                event=ReactStartEvent(
-                    event_type=ReActEventType.REACT_START,
-                    timestamp=datetime.now(timezone.utc),
+            await checkpoint_store.save(
+                ReActCheckpoint(
                     trace_id=current_trace_id,
-                    func_name=func_name,
-                    iteration=0,
-                    user_task_prompt=user_task_prompt,
-                    initial_messages=current_messages.copy(),
-                    available_tools=tools,
+                    messages=cast(List[Dict[str, Any]], list(current_messages)),
+                    call_count=call_count,
+                    total_llm_calls=total_llm_calls,
+                    total_tool_calls=total_tool_calls,
+                    pending_tool_calls=pending_tool_calls,
+                    budget=budget_tracker.snapshot() if budget_tracker is not None else None,
                 )
             )
-        except Exception:
-            # 事件发射失败不应影响主流程
-            pass
+        except Exception as exc:
+            # 检查点写入失败不应影响主流程
+            push_warning(f"保存检查点失败: {exc}", location=get_location())
 
-    # Phase 1: Initial LLM call
-    # 准备 Langfuse 观测数据
-    model_parameters = {k: v for k, v in llm_kwargs.items() if k not in ["retry_times"]}
-    model_name = llm_interface.model_name
+    async def _clear_checkpoint() -> None:
+        if checkpoint_store is None:
+            return
+        try:
+            await checkpoint_store.delete(current_trace_id)
+        except Exception as exc:
+            push_warning(f"删除检查点失败: {exc}", location=get_location())
 
-    # 声明变量
-    content = ""
-    tool_calls: List[Dict[str, Any]] = []
-    tool_call_chunks: List[Dict[str, Any]] = []
-    reasoning_details: List[Dict[str, Any]] = []
-    last_response: Any = None
+    # 后台工具：存在 background=True 的工具时为本次运行创建任务管理器，并提供查询工具
+    background_jobs = BackgroundJobManager.for_tool_map(tool_map, tool_output_store)
+    if background_jobs is not None:
+        background_tool = background_jobs.tool
+        tool_map = {**tool_map, background_tool.name: background_tool.run}
+        tools = [*(tools or []), background_tool.to_openai_tool()]
 
-    # 发射 LLM 调用开始事件
-    llm_call_start_time = time.time()
-    if enable_event:
-        try:
-            yield EventYield(
-                event=LLMCallStartEvent(
-                    event_type=ReActEventType.LLM_CALL_START,
-                    timestamp=datetime.now(timezone.utc),
-                    trace_id=current_trace_id,
-                    func_name=func_name,
-                    iteration=iteration,
-                    messages=current_messages.copy(),
-                    tools=tools,
-                    llm_kwargs=llm_kwargs,
-                    stream=stream,
+    # 无论正常结束、截止时间到达、LLM 报错还是调用方 aclose()，都取消仍在运行的后台任务
+    try:
+        push_debug(
+            f"LLM 函数 '{func_name}' 开始执行，消息数: {len(current_messages)}",
+            location=get_location(),
+        )
+
+        # 发射 ReAct 开始事件
+        if enable_event:
+            try:
+                yield EventYield(
+                    event=ReactStartEvent(
+                        event_type=ReActEventType.REACT_START,
+                        timestamp=datetime.now(timezone.utc),
+                        trace_id=current_trace_id,
+                        func_name=func_name,
+                        iteration=0,
+                        user_task_prompt=user_task_prompt,
+                        initial_messages=current_messages.copy(),
+                        available_tools=tools,
+                    )
                 )
-            )
-        except Exception:
-            pass
+            except Exception:
+                # 事件发射失败不应影响主流程
+                pass
 
-    total_llm_calls += 1
+        # 准备 Langfuse 观测数据
+        model_parameters = {k: v for k, v in llm_kwargs.items() if k not in ["retry_times"]}
+        model_name = llm_interface.model_name
 
-    # 如果没有tools，移除tool_choice参数（如果存在）
-    llm_kwargs_filtered = llm_kwargs.copy()
-    if not tools:
-        # 如果没有传递任何 tool，不应该设置 tool_choice
-        llm_kwargs_filtered.pop('tool_choice', None)
-    
-    with langfuse_client.start_as_current_observation(
-        as_type="generation",
-        name=f"{func_name}_initial_llm_call",
-        input=current_messages,
-        model=model_name,
-        model_parameters=model_parameters,
-        metadata={"stream": stream, "tools_available": len(tools) if tools else 0},
-        completion_start_time=datetime.now(timezone.utc),
-    ) as generation_span:
-        if stream:
-            # Handle streaming response
-            reasoning_details_list: List[Dict[str, Any]] = []
-            chunk_index = 0
-            accumulated_content = ""
-            async for chunk in llm_interface.chat_stream(
-                messages=cast(List[Dict[str, Any]], current_messages),
-                tools=tools,
-                **llm_kwargs_filtered,
-            ):
-                chunk_content = extract_content_from_stream_response(chunk, func_name)
-                content += chunk_content
-                accumulated_content += chunk_content
-                tool_call_chunks.extend(extract_tool_calls_from_stream_response(chunk))
-                reasoning_details_list.extend(extract_reasoning_details_from_stream(chunk))  # type: ignore
-                last_response = chunk
+        # 花费预算：记录每次响应的 usage，下一次调用会超出预算时提前给出最终回答
+        # 调用方传入 budget_tracker 时沿用它，空响应重试、输出修复等后续调用共用同一份花费记录
+        if budget_tracker is None and run_budget is not None:
+            budget_tracker = run_budget.start(model_name)
+        if budget_tracker is not None and checkpoint is not None and budget_tracker.llm_calls == 0:
+            # 从检查点恢复时接着崩溃前的花费继续计算
+            budget_tracker.restore(checkpoint.budget)
+        max_completion_tokens = llm_kwargs.get("max_tokens") or llm_kwargs.get("max_completion_tokens")
+
+        def _record_usage(response: Any, response_content: str) -> None:
+            if budget_tracker is not None:
+                budget_tracker.record(
+                    extract_usage_from_response(response),
+                    cast(List[Dict[str, Any]], current_messages),
+                    response_content,
+                )
+
+        # 如果没有tools，移除tool_choice参数（如果存在）
+        llm_kwargs_filtered = llm_kwargs.copy()
+        if not tools:
+            # 如果没有传递任何 tool，不应该设置 tool_choice
+            llm_kwargs_filtered.pop('tool_choice', None)
+
+        # 声明变量
+        content = ""
+        tool_calls: List[Dict[str, Any]] = []
+        tool_call_chunks: List[Dict[str, Any]] = []
+        reasoning_details: List[Dict[str, Any]] = []
+        last_response: Any = None
+
+        if checkpoint is not None:
+            # 从检查点恢复：跳过初始调用，先执行检查点中尚未完成的工具调用
+            tool_calls = list(checkpoint.pending_tool_calls)
+        else:
+            # Phase 1: Initial LLM call
+            # 整体截止时间已过时不再发起 LLM 调用
+            check_deadline(f"{func_name} LLM 调用")
+
+            # 上下文预算：超出时只压缩本次请求的消息，返回给调用方的历史保持完整
+            request_messages = await _request_payload()
+
+            # 发射 LLM 调用开始事件
+            llm_call_start_time = time.time()
+            if enable_event:
+                try:
+                    yield EventYield(
+                        event=LLMCallStartEvent(
+                            event_type=ReActEventType.LLM_CALL_START,
+                            timestamp=datetime.now(timezone.utc),
+                            trace_id=current_trace_id,
+                            func_name=func_name,
+                            iteration=iteration,
+                            messages=request_messages.copy(),
+                            tools=tools,
+                            llm_kwargs=llm_kwargs,
+                            stream=stream,
+                        )
+                    )
+                except Exception:
+                    pass
+
+            total_llm_calls += 1
+
+            with langfuse_client.start_as_current_observation(
+                as_type="generation",
+                name=f"{func_name}_initial_llm_call",
+                input=request_messages,
+                model=model_name,
+                model_parameters=model_parameters,
+                metadata={"stream": stream, "tools_available": len(tools) if tools else 0},
+                completion_start_time=datetime.now(timezone.utc),
+            ) as generation_span:
+                if stream:
+                    # Handle streaming response
+                    reasoning_details_list: List[Dict[str, Any]] = []
+                    chunk_index = 0
+                    content_buffer = StreamContentBuffer()
+                    xml_root_detector = (
+                        XMLRootCloseDetector(stop_at_xml_root) if stop_at_xml_root else None
+                    )
+                    tool_delta_states: Dict[int, Dict[str, Any]] = {}
+                    chunk_stream = llm_interface.chat_stream(
+                        messages=cast(List[Dict[str, Any]], request_messages),
+                        tools=tools,
+                        **llm_kwargs_filtered,
+                    )
+                    # 调用方提前关闭时立即关闭底层流并中止 HTTP 请求
+                    async with aclosing_stream(chunk_stream):
+                        async for chunk in chunk_stream:
+                            chunk_content = extract_content_from_stream_response(chunk, func_name)
+                            content_buffer.append(chunk_content)
+                            tool_call_fragments = extract_tool_calls_from_stream_response(chunk)
+                            tool_call_chunks.extend(tool_call_fragments)
+                            reasoning_details_list.extend(extract_reasoning_details_from_stream(chunk))  # type: ignore
+                            last_response = chunk
+                
+                            # 发射 chunk 事件
+                            if enable_event:
+                                try:
+                                    yield EventYield(
+                                        event=LLMChunkArriveEvent(
+                                            event_type=ReActEventType.LLM_CHUNK_ARRIVE,
+                                            timestamp=datetime.now(timezone.utc),
+                                            trace_id=current_trace_id,
+                                            func_name=func_name,
+                                            iteration=iteration,
+                                            chunk=chunk if event_include_chunks else None,
+                                            accumulated_content=content_buffer.view(),  # type: ignore[arg-type]
+                                            chunk_index=chunk_index,
+                                        )
+                                    )
+                                except Exception:
+                                    pass
+                                chunk_index += 1
+
+                                # 发射工具调用参数增量事件
+                                if tool_call_fragments:
+                                    try:
+                                        delta_events = _tool_call_delta_events(
+                                            tool_call_fragments,
+                                            tool_delta_states,
+                                            current_trace_id,
+                                            func_name,
+                                            iteration,
+                                        )
+                                    except Exception:
+                                        delta_events = []
+                                    for delta_event in delta_events:
+                                        yield delta_event
                 
-                # 发射 chunk 事件
+                            # 发射响应
+                            if enable_event:
+                                try:
+                                    yield ResponseYield(
+                                        type="response",
+                                        response=chunk,
+                                        messages=current_messages.copy(),
+                                    )
+                                except Exception:
+                                    pass
+                            else:
+                                yield chunk, _snapshot()
+
+                            # 结构化输出的根元素已闭合：停止读取，关闭流并取消请求
+                            if (
+                                xml_root_detector is not None
+                                and xml_root_detector.feed(chunk_content)
+                                and not tool_call_chunks
+                            ):
+                                push_debug(
+                                    f"LLM 函数 '{func_name}' 的 XML 根元素 <{stop_at_xml_root}> 已闭合，提前结束流式读取",
+                                    location=get_location(),
+                                )
+                                break
+
+                    content = content_buffer.text()
+                    tool_calls = accumulate_tool_calls_from_chunks(tool_call_chunks)
+                    reasoning_details = reasoning_details_list
+                else:
+                    # Handle non-streaming response
+                    initial_response = await llm_interface.chat(
+                        messages=cast(List[Dict[str, Any]], request_messages),
+                        tools=tools,
+                        **llm_kwargs_filtered,
+                    )
+
+                    content = extract_content_from_response(initial_response, func_name)
+                    tool_calls = extract_tool_calls(initial_response)
+                    reasoning_details = extract_reasoning_details(initial_response)  # type: ignore
+                    last_response = initial_response
+            
+                    # 发射响应
+                    if enable_event:
+                        try:
+                            yield ResponseYield(
+                                type="response",
+                                response=initial_response,
+                                messages=current_messages.copy(),
+                            )
+                        except Exception:
+                            pass
+                    else:
+                        yield initial_response, _snapshot()
+
+                # 发射 LLM 调用结束事件
+                llm_call_execution_time = time.time() - llm_call_start_time
                 if enable_event:
                     try:
+                        usage_info = extract_usage_from_response(last_response)
+                        tool_calls_typed_initial: List[ToolCall] = [dict_to_tool_call(tc) for tc in tool_calls] if tool_calls else []
+                
                         yield EventYield(
-                            event=LLMChunkArriveEvent(
-                                event_type=ReActEventType.LLM_CHUNK_ARRIVE,
+                            event=LLMCallEndEvent(
+                                event_type=ReActEventType.LLM_CALL_END,
                                 timestamp=datetime.now(timezone.utc),
                                 trace_id=current_trace_id,
                                 func_name=func_name,
                                 iteration=iteration,
-                                chunk=chunk,
-                                accumulated_content=accumulated_content,
-                                chunk_index=chunk_index,
+                                response=last_response,
+                                messages=current_messages.copy(),
+                                tool_calls=tool_calls_typed_initial,
+                                usage=usage_info,
+                                execution_time=llm_call_execution_time,
                             )
                         )
                     except Exception:
                         pass
-                    chunk_index += 1
-                
-                # 发射响应
-                if enable_event:
-                    try:
-                        yield ResponseYield(
-                            type="response",
-                            response=chunk,
-                            messages=current_messages.copy(),
-                        )
-                    except Exception:
-                        pass
-                else:
-                    yield chunk, cast(MessageList, current_messages.copy())
 
-            tool_calls = accumulate_tool_calls_from_chunks(tool_call_chunks)
-            reasoning_details = reasoning_details_list
-        else:
-            # Handle non-streaming response
-            initial_response = await llm_interface.chat(
-                messages=cast(List[Dict[str, Any]], current_messages),
-                tools=tools,
-                **llm_kwargs_filtered,
-            )
+                _record_usage(last_response, content)
+
+                push_debug(
+                    f"LLM 函数 '{func_name}' 初始响应已获取，工具调用数: {len(tool_calls)}",
+                    location=get_location(),
+                )
 
-            content = extract_content_from_response(initial_response, func_name)
-            tool_calls = extract_tool_calls(initial_response)
-            reasoning_details = extract_reasoning_details(initial_response)  # type: ignore
-            last_response = initial_response
+                # Append assistant response to message history
+                if content.strip() != "":
+                    assistant_message = build_assistant_response_message(content)
+                    current_messages.append(cast(Any, assistant_message))
+
+                if len(tool_calls) != 0:
+                    assistant_tool_call_message = build_assistant_tool_message(
+                        tool_calls, 
+                        reasoning_details if reasoning_details else None
+                    )
+                    current_messages.append(cast(Any, assistant_tool_call_message))
+                    await _save_checkpoint(tool_calls)
+                else:
+                    # No tool calls, return final result
+                    # 发射 ReAct 结束事件（无工具调用的情况）
+                    total_execution_time = time.time() - start_time
+                    if enable_event:
+                        try:
+                            usage_info = extract_usage_from_response(last_response)
+                            final_content = extract_content_from_response(last_response, func_name) if last_response else content
+                            yield EventYield(
+                                event=ReactEndEvent(
+                                    event_type=ReActEventType.REACT_END,
+                                    timestamp=datetime.now(timezone.utc),
+                                    trace_id=current_trace_id,
+                                    func_name=func_name,
+                                    iteration=0,
+                                    final_response=final_content,
+                                    final_messages=current_messages.copy(),
+                                    total_iterations=0,
+                                    total_execution_time=total_execution_time,
+                                    total_tool_calls=0,
+                                    total_llm_calls=total_llm_calls,
+                                    total_token_usage=usage_info,
+                                    budget=budget_tracker.snapshot() if budget_tracker is not None else None,
+                                )
+                            )
+                        except Exception:
+                            pass
             
-            # 发射响应
-            if enable_event:
-                try:
-                    yield ResponseYield(
-                        type="response",
-                        response=initial_response,
-                        messages=current_messages.copy(),
+                    app_log(
+                        f"LLM 函数 '{func_name}' 完成执行",
+                        location=get_location(),
                     )
-                except Exception:
-                    pass
-            else:
-                yield initial_response, cast(MessageList, current_messages.copy())
+            
+                    # 更新观测数据
+                    usage_info = extract_usage_from_response(last_response)
+                    usage_dict_no_tools: Optional[Dict[str, int]] = None
+                    if usage_info:
+                        usage_dict_no_tools = {
+                            "prompt_tokens": usage_info.prompt_tokens,
+                            "completion_tokens": usage_info.completion_tokens,
+                            "total_tokens": usage_info.total_tokens,
+                        }
+                    generation_span.update(
+                        output={"content": content, "tool_calls": []},
+                        usage_details=usage_dict_no_tools,
+                    )
+                    # 注意：响应已经在上面 yield 过了，这里直接 return
+                    return
 
-        # 发射 LLM 调用结束事件
-        llm_call_execution_time = time.time() - llm_call_start_time
-        if enable_event:
-            try:
+                # 更新观测数据
                 usage_info = extract_usage_from_response(last_response)
-                tool_calls_typed_initial: List[ToolCall] = [dict_to_tool_call(tc) for tc in tool_calls] if tool_calls else []
-                
-                yield EventYield(
-                    event=LLMCallEndEvent(
-                        event_type=ReActEventType.LLM_CALL_END,
-                        timestamp=datetime.now(timezone.utc),
-                        trace_id=current_trace_id,
-                        func_name=func_name,
-                        iteration=iteration,
-                        response=last_response,
-                        messages=current_messages.copy(),
-                        tool_calls=tool_calls_typed_initial,
-                        usage=usage_info,
-                        execution_time=llm_call_execution_time,
-                    )
+                usage_dict_with_tools: Optional[Dict[str, int]] = None
+                if usage_info:
+                    usage_dict_with_tools = {
+                        "prompt_tokens": usage_info.prompt_tokens,
+                        "completion_tokens": usage_info.completion_tokens,
+                        "total_tokens": usage_info.total_tokens,
+                    }
+                generation_span.update(
+                    output={"content": content, "tool_calls": tool_calls},
+                    usage_details=usage_dict_with_tools,
                 )
-            except Exception:
-                pass
 
-        push_debug(
-            f"LLM 函数 '{func_name}' 初始响应已获取，工具调用数: {len(tool_calls)}",
-            location=get_location(),
-        )
+        # Phase 2: Tool calling loop
+        # 恢复且检查点中没有待执行的工具调用时，直接进入迭代循环
+        if tool_calls:
+            push_debug(
+                f"LLM 函数 '{func_name}' 开始执行 {len(tool_calls)} 个工具调用",
+                location=get_location(),
+            )
 
-        # Append assistant response to message history
-        if content.strip() != "":
-            assistant_message = build_assistant_response_message(content)
-            current_messages.append(cast(Any, assistant_message))
+            call_count += 1
+            iteration = call_count
+            total_tool_calls += len(tool_calls)
 
-        if len(tool_calls) != 0:
-            assistant_tool_call_message = build_assistant_tool_message(
-                tool_calls, 
-                reasoning_details if reasoning_details else None
-            )
-            current_messages.append(cast(Any, assistant_tool_call_message))
-        else:
-            # No tool calls, return final result
-            # 发射 ReAct 结束事件（无工具调用的情况）
-            total_execution_time = time.time() - start_time
+            # 使用支持事件的工具调用处理函数
+            if enable_event:
+                # 使用异步生成器实时发射事件
+                tool_event_stream = _process_tool_calls_with_events_gen(
+                    tool_calls=tool_calls,
+                    messages=current_messages,
+                    tool_map=tool_map,
+                    tool_output_store=tool_output_store,
+                    background_jobs=background_jobs,
+                    enable_event=enable_event,
+                    trace_id=current_trace_id,
+                    func_name=func_name,
+                    iteration=iteration,
+                )
+                # 实时发射事件；调用方提前关闭时立即取消仍在运行的工具
+                async with aclosing_stream(tool_event_stream):
+                    async for item in tool_event_stream:
+                        if isinstance(item, EventYield):
+                            yield item
+                        else:
+                            # 最后一个 yield 是 MessageList
+                            current_messages = item
+            else:
+                result_messages_iteration = await process_tool_calls(
+                    tool_calls=tool_calls,
+                    messages=cast(List[Dict[str, Any]], current_messages),
+                    tool_map=tool_map,
+                    tool_output_store=tool_output_store,
+                    background_jobs=background_jobs,
+                )
+                current_messages = cast(MessageList, result_messages_iteration)
+
+            await _save_checkpoint([])
+
+        while call_count < max_tool_calls:
+            # Phase 3: Iterative LLM-tool interaction
+            iteration = call_count + 1
+
+            # 下一次调用会超出花费预算时，不再继续工具循环，直接进入最终回答
+            if budget_tracker is not None and budget_tracker.would_exceed(
+                cast(List[Dict[str, Any]], current_messages),
+                tools,
+                max_completion_tokens,
+                reserve_final_answer=True,
+            ):
+                push_warning(
+                    f"LLM 函数 '{func_name}' 即将超出花费预算，提前生成最终回答 "
+                    f"(已用 {budget_tracker.total_tokens} tokens)",
+                    location=get_location(),
+                )
+                break
+        
+            # 发射迭代开始事件
             if enable_event:
                 try:
-                    usage_info = extract_usage_from_response(last_response)
-                    final_content = extract_content_from_response(last_response, func_name) if last_response else content
                     yield EventYield(
-                        event=ReactEndEvent(
-                            event_type=ReActEventType.REACT_END,
+                        event=ReactIterationStartEvent(
+                            event_type=ReActEventType.REACT_ITERATION_START,
                             timestamp=datetime.now(timezone.utc),
                             trace_id=current_trace_id,
                             func_name=func_name,
-                            iteration=0,
-                            final_response=final_content,
-                            final_messages=current_messages.copy(),
-                            total_iterations=0,
-                            total_execution_time=total_execution_time,
-                            total_tool_calls=0,
-                            total_llm_calls=total_llm_calls,
-                            total_token_usage=usage_info,
+                            iteration=iteration,
+                            current_messages=current_messages.copy(),
                         )
                     )
                 except Exception:
                     pass
-            
-            app_log(
-                f"LLM 函数 '{func_name}' 完成执行",
+        
+            push_debug(
+                f"LLM 函数 '{func_name}' 工具调用循环 (次数: {call_count})",
                 location=get_location(),
             )
+
+            check_deadline(f"{func_name} LLM 调用")
+            if background_jobs is not None:
+                # 注入已完成的后台任务结果
+                current_messages.extend(cast(Any, background_jobs.drain_finished()))
+            request_messages = await _request_payload()
+
+            # 发射迭代中的 LLM 调用开始事件
+            iteration_llm_start_time = time.time()
+            if enable_event:
+                try:
+                    yield EventYield(
+                        event=LLMCallStartEvent(
+                            event_type=ReActEventType.LLM_CALL_START,
+                            timestamp=datetime.now(timezone.utc),
+                            trace_id=current_trace_id,
+                            func_name=func_name,
+                            iteration=iteration,
+                            messages=request_messages.copy(),
+                            tools=tools,
+                            llm_kwargs=llm_kwargs,
+                            stream=stream,
+                        )
+                    )
+                except Exception:
+                    pass
+
+            total_llm_calls += 1
+
+            # 为迭代调用创建新的观测
+            with langfuse_client.start_as_current_observation(
+                as_type="generation",
+                name=f"{func_name}_iteration_{call_count}_llm_call",
+                input=request_messages,
+                model=model_name,
+                model_parameters=model_parameters,
+                metadata={
+                    "stream": stream,
+                    "iteration": call_count,
+                    "tools_available": len(tools) if tools else 0,
+                },
+                completion_start_time=datetime.now(timezone.utc),
+            ) as iteration_generation_span:
+                last_response = None
             
-            # 更新观测数据
-            usage_info = extract_usage_from_response(last_response)
-            usage_dict_no_tools: Optional[Dict[str, int]] = None
-            if usage_info:
-                usage_dict_no_tools = {
-                    "prompt_tokens": usage_info.prompt_tokens,
-                    "completion_tokens": usage_info.completion_tokens,
-                    "total_tokens": usage_info.total_tokens,
-                }
-            generation_span.update(
-                output={"content": content, "tool_calls": []},
-                usage_details=usage_dict_no_tools,
-            )
-            # 注意：响应已经在上面 yield 过了，这里直接 return
-            return
+                if stream:
+                    # Handle streaming response after tool calls
+                    tool_call_chunks = []  # Reset for iteration
+                    reasoning_details_list = []  # Reset for iteration
+                    chunk_index = 0
+                    content_buffer = StreamContentBuffer()
+                    xml_root_detector = (
+                        XMLRootCloseDetector(stop_at_xml_root) if stop_at_xml_root else None
+                    )
+                    tool_delta_states = {}
+                    chunk_stream = llm_interface.chat_stream(
+                        messages=cast(List[Dict[str, Any]], request_messages),
+                        tools=tools,
+                        **llm_kwargs_filtered,
+                    )
+                    # 调用方提前关闭时立即关闭底层流并中止 HTTP 请求
+                    async with aclosing_stream(chunk_stream):
+                        async for chunk in chunk_stream:
+                            chunk_content = extract_content_from_stream_response(chunk, func_name)
+                            content_buffer.append(chunk_content)
+                            tool_call_fragments = extract_tool_calls_from_stream_response(chunk)
+                            tool_call_chunks.extend(tool_call_fragments)
+                            reasoning_details_list.extend(
+                                extract_reasoning_details_from_stream(chunk)  # type: ignore
+                            )
+                            last_response = chunk
+                    
+                            # 发射 chunk 事件
+                            if enable_event:
+                                try:
+                                    yield EventYield(
+                                        event=LLMChunkArriveEvent(
+                                            event_type=ReActEventType.LLM_CHUNK_ARRIVE,
+                                            timestamp=datetime.now(timezone.utc),
+                                            trace_id=current_trace_id,
+                                            func_name=func_name,
+                                            iteration=iteration,
+                                            chunk=chunk if event_include_chunks else None,
+                                            accumulated_content=content_buffer.view(),  # type: ignore[arg-type]
+                                            chunk_index=chunk_index,
+                                        )
+                                    )
+                                except Exception:
+                                    pass
+                                chunk_index += 1
 
-        # 更新观测数据
-        usage_info = extract_usage_from_response(last_response)
-        usage_dict_with_tools: Optional[Dict[str, int]] = None
-        if usage_info:
-            usage_dict_with_tools = {
-                "prompt_tokens": usage_info.prompt_tokens,
-                "completion_tokens": usage_info.completion_tokens,
-                "total_tokens": usage_info.total_tokens,
-            }
-        generation_span.update(
-            output={"content": content, "tool_calls": tool_calls},
-            usage_details=usage_dict_with_tools,
-        )
+                                # 发射工具调用参数增量事件
+                                if tool_call_fragments:
+                                    try:
+                                        delta_events = _tool_call_delta_events(
+                                            tool_call_fragments,
+                                            tool_delta_states,
+                                            current_trace_id,
+                                            func_name,
+                                            iteration,
+                                        )
+                                    except Exception:
+                                        delta_events = []
+                                    for delta_event in delta_events:
+                                        yield delta_event
+                    
+                            # 发射响应
+                            if enable_event:
+                                try:
+                                    yield ResponseYield(
+                                        type="response",
+                                        response=chunk,
+                                        messages=current_messages.copy(),
+                                    )
+                                except Exception:
+                                    pass
+                            else:
+                                yield chunk, _snapshot()
 
-    # Phase 2: Tool calling loop
-    push_debug(
-        f"LLM 函数 '{func_name}' 开始执行 {len(tool_calls)} 个工具调用",
-        location=get_location(),
-    )
+                            # 结构化输出的根元素已闭合：停止读取，关闭流并取消请求
+                            if (
+                                xml_root_detector is not None
+                                and xml_root_detector.feed(chunk_content)
+                                and not tool_call_chunks
+                            ):
+                                push_debug(
+                                    f"LLM 函数 '{func_name}' 的 XML 根元素 <{stop_at_xml_root}> 已闭合，提前结束流式读取",
+                                    location=get_location(),
+                                )
+                                break
+                    content = content_buffer.text()
+                    tool_calls = accumulate_tool_calls_from_chunks(tool_call_chunks)
+                    reasoning_details = reasoning_details_list
+                else:
+                    # Handle non-streaming response after tool calls
+                    response = await llm_interface.chat(
+                        messages=cast(List[Dict[str, Any]], request_messages),
+                        tools=tools,
+                        **llm_kwargs_filtered,
+                    )
+
+                    content = extract_content_from_response(response, func_name)
+                    tool_calls = extract_tool_calls(response)
+                    reasoning_details = extract_reasoning_details(response)  # type: ignore
+                    last_response = response
+                
+                    # 发射响应
+                    if enable_event:
+                        try:
+                            yield ResponseYield(
+                                type="response",
+                                response=response,
+                                messages=current_messages.copy(),
+                            )
+                        except Exception:
+                            pass
+                    else:
+                        yield response, _snapshot()
+            
+                # 发射迭代中的 LLM 调用结束事件
+                iteration_llm_execution_time = time.time() - iteration_llm_start_time
+                if enable_event:
+                    try:
+                        usage_info = extract_usage_from_response(last_response)
+                        tool_calls_typed_iteration: List[ToolCall] = [dict_to_tool_call(tc) for tc in tool_calls] if tool_calls else []
+                        yield EventYield(
+                            event=LLMCallEndEvent(
+                                event_type=ReActEventType.LLM_CALL_END,
+                                timestamp=datetime.now(timezone.utc),
+                                trace_id=current_trace_id,
+                                func_name=func_name,
+                                iteration=iteration,
+                                response=last_response,
+                                messages=current_messages.copy(),
+                                tool_calls=tool_calls_typed_iteration,
+                                usage=usage_info,
+                                execution_time=iteration_llm_execution_time,
+                            )
+                        )
+                    except Exception:
+                        pass
 
-    call_count += 1
-    iteration = 1
-    total_tool_calls += len(tool_calls)
+                # 更新迭代生成观测数据
+                usage_info = extract_usage_from_response(last_response)
+                usage_dict_iteration: Optional[Dict[str, int]] = None
+                if usage_info:
+                    usage_dict_iteration = {
+                        "prompt_tokens": usage_info.prompt_tokens,
+                        "completion_tokens": usage_info.completion_tokens,
+                        "total_tokens": usage_info.total_tokens,
+                    }
+                iteration_generation_span.update(
+                    output={"content": content, "tool_calls": tool_calls},
+                    usage_details=usage_dict_iteration,
+                )
 
-    # 使用支持事件的工具调用处理函数
-    if enable_event:
-        # 使用异步生成器实时发射事件
-        async for item in _process_tool_calls_with_events_gen(
-            tool_calls=tool_calls,
-            messages=current_messages,
-            tool_map=tool_map,
-            enable_event=enable_event,
-            trace_id=current_trace_id,
-            func_name=func_name,
-            iteration=iteration,
-        ):
-            if isinstance(item, EventYield):
-                yield item
-            else:
-                # 最后一个 yield 是 MessageList
-                current_messages = item
-    else:
-        result_messages_iteration = await process_tool_calls(
-            tool_calls=tool_calls,
-            messages=cast(List[Dict[str, Any]], current_messages),
-            tool_map=tool_map,
-        )
-        current_messages = cast(MessageList, result_messages_iteration)
+            _record_usage(last_response, content)
+
+            # Append new assistant response to message history
+            if content.strip() != "":
+                assistant_message = build_assistant_response_message(content)
+                current_messages.append(cast(Any, assistant_message))
+
+            if len(tool_calls) != 0:
+                assistant_tool_call_message = build_assistant_tool_message(
+                    tool_calls,
+                    reasoning_details if reasoning_details else None
+                )
+                current_messages.append(cast(Any, assistant_tool_call_message))
+                await _save_checkpoint(tool_calls)
+
+            if (
+                len(tool_calls) == 0
+                and background_jobs is not None
+                and background_jobs.pending_count
+                and await background_jobs.wait_pending()
+            ):
+                # 模型在后台任务完成前就给出了回答：结果已在等待后就绪，交给模型再回答一轮
+                push_debug(
+                    f"LLM 函数 '{func_name}' 在后台任务完成前给出回答，注入任务结果后继续",
+                    location=get_location(),
+                )
+                if enable_event:
+                    try:
+                        yield EventYield(
+                            event=ReactIterationEndEvent(
+                                event_type=ReActEventType.REACT_ITERATION_END,
+                                timestamp=datetime.now(timezone.utc),
+                                trace_id=current_trace_id,
+                                func_name=func_name,
+                                iteration=iteration,
+                                messages=current_messages.copy(),
+                                iteration_time=time.time() - iteration_llm_start_time,
+                                tool_calls_count=0,
+                            )
+                        )
+                    except Exception:
+                        pass
+                call_count += 1
+                await _save_checkpoint([])
+                continue
+
+            if len(tool_calls) == 0:
+                # No more tool calls, exit loop
+                push_debug(
+                    f"LLM 函数 '{func_name}' 无更多工具调用，返回最终结果",
+                    location=get_location(),
+                )
+            
+                # 发射迭代结束事件
+                iteration_time = time.time() - iteration_llm_start_time
+                if enable_event:
+                    try:
+                        yield EventYield(
+                            event=ReactIterationEndEvent(
+                                event_type=ReActEventType.REACT_ITERATION_END,
+                                timestamp=datetime.now(timezone.utc),
+                                trace_id=current_trace_id,
+                                func_name=func_name,
+                                iteration=iteration,
+                                messages=current_messages.copy(),
+                                iteration_time=iteration_time,
+                                tool_calls_count=0,
+                            )
+                        )
+                    except Exception:
+                        pass
+            
+                # 发射 ReAct 结束事件
+                total_execution_time = time.time() - start_time
+                if enable_event:
+                    try:
+                        usage_info = extract_usage_from_response(last_response)
+                        final_content = extract_content_from_response(last_response, func_name) if last_response else ""
+                        yield EventYield(
+                            event=ReactEndEvent(
+                                event_type=ReActEventType.REACT_END,
+                                timestamp=datetime.now(timezone.utc),
+                                trace_id=current_trace_id,
+                                func_name=func_name,
+                                iteration=iteration,
+                                final_response=final_content,
+                                final_messages=current_messages.copy(),
+                                total_iterations=iteration,
+                                total_execution_time=total_execution_time,
+                                total_tool_calls=total_tool_calls,
+                                total_llm_calls=total_llm_calls,
+                                total_token_usage=usage_info,
+                                budget=budget_tracker.snapshot() if budget_tracker is not None else None,
+                            )
+                        )
+                    except Exception:
+                        pass
+            
+                await _clear_checkpoint()
+                app_log(
+                    f"LLM 函数 '{func_name}' 完成执行",
+                    location=get_location(),
+                )
+                # 注意：响应已经在上面 yield 过了，这里直接 return
+                return
+
+            # Continue with next iteration of tool calls
+            push_debug(
+                f"LLM 函数 '{func_name}' 发现 {len(tool_calls)} 个工具调用",
+                location=get_location(),
+            )
 
-    while call_count < max_tool_calls:
-        # Phase 3: Iterative LLM-tool interaction
-        iteration = call_count + 1
+            total_tool_calls += len(tool_calls)
         
-        # 发射迭代开始事件
-        if enable_event:
-            try:
-                yield EventYield(
-                    event=ReactIterationStartEvent(
-                        event_type=ReActEventType.REACT_ITERATION_START,
-                        timestamp=datetime.now(timezone.utc),
-                        trace_id=current_trace_id,
-                        func_name=func_name,
-                        iteration=iteration,
-                        current_messages=current_messages.copy(),
-                    )
+            # 使用支持事件的工具调用处理函数
+            if enable_event:
+                # 使用异步生成器实时发射事件
+                tool_event_stream = _process_tool_calls_with_events_gen(
+                    tool_calls=tool_calls,
+                    messages=current_messages,
+                    tool_map=tool_map,
+                    tool_output_store=tool_output_store,
+                    background_jobs=background_jobs,
+                    enable_event=enable_event,
+                    trace_id=current_trace_id,
+                    func_name=func_name,
+                    iteration=iteration,
                 )
-            except Exception:
-                pass
+                # 实时发射事件；调用方提前关闭时立即取消仍在运行的工具
+                async with aclosing_stream(tool_event_stream):
+                    async for item in tool_event_stream:
+                        if isinstance(item, EventYield):
+                            yield item
+                        else:
+                            # 最后一个 yield 是 MessageList
+                            current_messages = item
+            else:
+                result_messages = await process_tool_calls(
+                    tool_calls=tool_calls,
+                    messages=cast(List[Dict[str, Any]], current_messages),
+                    tool_map=tool_map,
+                    tool_output_store=tool_output_store,
+                    background_jobs=background_jobs,
+                )
+                current_messages = cast(MessageList, result_messages)
         
-        push_debug(
-            f"LLM 函数 '{func_name}' 工具调用循环 (次数: {call_count})",
-            location=get_location(),
-        )
+            # 发射迭代结束事件
+            iteration_time = time.time() - iteration_llm_start_time
+            if enable_event:
+                try:
+                    yield EventYield(
+                        event=ReactIterationEndEvent(
+                            event_type=ReActEventType.REACT_ITERATION_END,
+                            timestamp=datetime.now(timezone.utc),
+                            trace_id=current_trace_id,
+                            func_name=func_name,
+                            iteration=iteration,
+                            messages=current_messages.copy(),
+                            iteration_time=iteration_time,
+                            tool_calls_count=len(tool_calls),
+                        )
+                    )
+                except Exception:
+                    pass
+
+            call_count += 1
+            await _save_checkpoint([])
+
+        # Phase 4: Handle max_tool_calls limit reached (or budget exhausted)
+        budget_exhausted = budget_tracker is not None and budget_tracker.exhausted
+        if not budget_exhausted:
+            push_debug(
+                f"LLM 函数 '{func_name}' 达到最大工具调用次数限制 ({max_tool_calls})",
+                location=get_location(),
+            )
 
-        # 发射迭代中的 LLM 调用开始事件
-        iteration_llm_start_time = time.time()
+        check_deadline(f"{func_name} LLM 调用")
+        if background_jobs is not None:
+            current_messages.extend(cast(Any, background_jobs.drain_finished()))
+        request_messages = await _request_payload()
+
+        # 发射最终 LLM 调用开始事件
+        final_llm_start_time = time.time()
         if enable_event:
             try:
                 yield EventYield(
@@ -715,11 +1389,11 @@ async def execute_llm(
                         timestamp=datetime.now(timezone.utc),
                         trace_id=current_trace_id,
                         func_name=func_name,
-                        iteration=iteration,
-                        messages=current_messages.copy(),
-                        tools=tools,
+                        iteration=call_count + 1,
+                        messages=request_messages.copy(),
+                        tools=None,
                         llm_kwargs=llm_kwargs,
-                        stream=stream,
+                        stream=False,
                     )
                 )
             except Exception:
@@ -727,394 +1401,113 @@ async def execute_llm(
 
         total_llm_calls += 1
 
-        # 为迭代调用创建新的观测
+        # 为最终调用创建观测
         with langfuse_client.start_as_current_observation(
             as_type="generation",
-            name=f"{func_name}_iteration_{call_count}_llm_call",
-            input=current_messages,
+            name=f"{func_name}_final_llm_call",
+            input=request_messages,
             model=model_name,
             model_parameters=model_parameters,
             metadata={
-                "stream": stream,
-                "iteration": call_count,
-                "tools_available": len(tools) if tools else 0,
+                "stream": False,
+                "reason": "budget_exhausted" if budget_exhausted else "max_tool_calls_reached",
+                "call_count": call_count,
             },
             completion_start_time=datetime.now(timezone.utc),
-        ) as iteration_generation_span:
-            last_response = None
-            
-            if stream:
-                # Handle streaming response after tool calls
-                content = ""
-                tool_call_chunks = []  # Reset for iteration
-                reasoning_details_list = []  # Reset for iteration
-                chunk_index = 0
-                accumulated_content = ""
-                async for chunk in llm_interface.chat_stream(
-                    messages=cast(List[Dict[str, Any]], current_messages),
-                    tools=tools,
-                    **llm_kwargs_filtered,
-                ):
-                    chunk_content = extract_content_from_stream_response(chunk, func_name)
-                    content += chunk_content
-                    accumulated_content += chunk_content
-                    tool_call_chunks.extend(
-                        extract_tool_calls_from_stream_response(chunk)
-                    )
-                    reasoning_details_list.extend(
-                        extract_reasoning_details_from_stream(chunk)  # type: ignore
-                    )
-                    last_response = chunk
-                    
-                    # 发射 chunk 事件
-                    if enable_event:
-                        try:
-                            yield EventYield(
-                                event=LLMChunkArriveEvent(
-                                    event_type=ReActEventType.LLM_CHUNK_ARRIVE,
-                                    timestamp=datetime.now(timezone.utc),
-                                    trace_id=current_trace_id,
-                                    func_name=func_name,
-                                    iteration=iteration,
-                                    chunk=chunk,
-                                    accumulated_content=accumulated_content,
-                                    chunk_index=chunk_index,
-                                )
-                            )
-                        except Exception:
-                            pass
-                        chunk_index += 1
-                    
-                    # 发射响应
-                    if enable_event:
-                        try:
-                            yield ResponseYield(
-                                type="response",
-                                response=chunk,
-                                messages=current_messages.copy(),
-                            )
-                        except Exception:
-                            pass
-                    else:
-                        yield chunk, cast(MessageList, current_messages.copy())
-                tool_calls = accumulate_tool_calls_from_chunks(tool_call_chunks)
-                reasoning_details = reasoning_details_list
-            else:
-                # Handle non-streaming response after tool calls
-                response = await llm_interface.chat(
-                    messages=cast(List[Dict[str, Any]], current_messages),
-                    tools=tools,
-                    **llm_kwargs_filtered,
-                )
+        ) as final_generation_span:
+            # 最终响应时不传递 tools，因为已经结束了
+            llm_kwargs_final = llm_kwargs.copy()
+            llm_kwargs_final.pop('tool_choice', None)
+        
+            final_response = await llm_interface.chat(
+                messages=cast(List[Dict[str, Any]], request_messages),
+                **llm_kwargs_final,
+            )
 
-                content = extract_content_from_response(response, func_name)
-                tool_calls = extract_tool_calls(response)
-                reasoning_details = extract_reasoning_details(response)  # type: ignore
-                last_response = response
-                
-                # 发射响应
-                if enable_event:
-                    try:
-                        yield ResponseYield(
-                            type="response",
-                            response=response,
-                            messages=current_messages.copy(),
-                        )
-                    except Exception:
-                        pass
-                else:
-                    yield response, cast(MessageList, current_messages.copy())
-            
-            # 发射迭代中的 LLM 调用结束事件
-            iteration_llm_execution_time = time.time() - iteration_llm_start_time
+            # 提取最终响应内容和用量
+            final_content = extract_content_from_response(final_response, func_name)
+            usage_info = extract_usage_from_response(final_response)
+            _record_usage(final_response, final_content)
+
+            # 发射最终 LLM 调用结束事件
+            final_llm_execution_time = time.time() - final_llm_start_time
             if enable_event:
                 try:
-                    usage_info = extract_usage_from_response(last_response)
-                    tool_calls_typed_iteration: List[ToolCall] = [dict_to_tool_call(tc) for tc in tool_calls] if tool_calls else []
                     yield EventYield(
                         event=LLMCallEndEvent(
                             event_type=ReActEventType.LLM_CALL_END,
                             timestamp=datetime.now(timezone.utc),
                             trace_id=current_trace_id,
                             func_name=func_name,
-                            iteration=iteration,
-                            response=last_response,
+                            iteration=call_count + 1,
+                            response=final_response,
                             messages=current_messages.copy(),
-                            tool_calls=tool_calls_typed_iteration,
+                            tool_calls=[],
                             usage=usage_info,
-                            execution_time=iteration_llm_execution_time,
+                            execution_time=final_llm_execution_time,
                         )
                     )
                 except Exception:
                     pass
 
-            # 更新迭代生成观测数据
-            usage_info = extract_usage_from_response(last_response)
-            usage_dict_iteration: Optional[Dict[str, int]] = None
+            # 更新最终观测数据
+            usage_dict_final: Optional[Dict[str, int]] = None
             if usage_info:
-                usage_dict_iteration = {
+                usage_dict_final = {
                     "prompt_tokens": usage_info.prompt_tokens,
                     "completion_tokens": usage_info.completion_tokens,
                     "total_tokens": usage_info.total_tokens,
                 }
-            iteration_generation_span.update(
-                output={"content": content, "tool_calls": tool_calls},
-                usage_details=usage_dict_iteration,
-            )
-
-        # Append new assistant response to message history
-        if content.strip() != "":
-            assistant_message = build_assistant_response_message(content)
-            current_messages.append(cast(Any, assistant_message))
-
-        if len(tool_calls) != 0:
-            assistant_tool_call_message = build_assistant_tool_message(
-                tool_calls,
-                reasoning_details if reasoning_details else None
+            final_generation_span.update(
+                output={"content": final_content, "tool_calls": []},
+                usage_details=usage_dict_final,
             )
-            current_messages.append(cast(Any, assistant_tool_call_message))
 
-        if len(tool_calls) == 0:
-            # No more tool calls, exit loop
-            push_debug(
-                f"LLM 函数 '{func_name}' 无更多工具调用，返回最终结果",
-                location=get_location(),
-            )
-            
-            # 发射迭代结束事件
-            iteration_time = time.time() - iteration_llm_start_time
+            # 发射响应
             if enable_event:
                 try:
-                    yield EventYield(
-                        event=ReactIterationEndEvent(
-                            event_type=ReActEventType.REACT_ITERATION_END,
-                            timestamp=datetime.now(timezone.utc),
-                            trace_id=current_trace_id,
-                            func_name=func_name,
-                            iteration=iteration,
-                            messages=current_messages.copy(),
-                            iteration_time=iteration_time,
-                            tool_calls_count=0,
-                        )
+                    yield ResponseYield(
+                        type="response",
+                        response=final_response,
+                        messages=current_messages.copy(),
                     )
                 except Exception:
                     pass
-            
+            else:
+                yield final_response, _snapshot()
+
             # 发射 ReAct 结束事件
             total_execution_time = time.time() - start_time
             if enable_event:
                 try:
-                    usage_info = extract_usage_from_response(last_response)
-                    final_content = extract_content_from_response(last_response, func_name) if last_response else ""
                     yield EventYield(
                         event=ReactEndEvent(
                             event_type=ReActEventType.REACT_END,
                             timestamp=datetime.now(timezone.utc),
                             trace_id=current_trace_id,
                             func_name=func_name,
-                            iteration=iteration,
+                            iteration=call_count + 1,
                             final_response=final_content,
                             final_messages=current_messages.copy(),
-                            total_iterations=iteration,
+                            total_iterations=call_count + 1,
                             total_execution_time=total_execution_time,
                             total_tool_calls=total_tool_calls,
                             total_llm_calls=total_llm_calls,
                             total_token_usage=usage_info,
+                            budget=budget_tracker.snapshot() if budget_tracker is not None else None,
                         )
                     )
                 except Exception:
                     pass
-            
+
+            await _clear_checkpoint()
             app_log(
                 f"LLM 函数 '{func_name}' 完成执行",
                 location=get_location(),
             )
-            # 注意：响应已经在上面 yield 过了，这里直接 return
-            return
-
-        # Continue with next iteration of tool calls
-        push_debug(
-            f"LLM 函数 '{func_name}' 发现 {len(tool_calls)} 个工具调用",
-            location=get_location(),
-        )
-
-        total_tool_calls += len(tool_calls)
-        
-        # 使用支持事件的工具调用处理函数
-        if enable_event:
-            # 使用异步生成器实时发射事件
-            async for item in _process_tool_calls_with_events_gen(
-                tool_calls=tool_calls,
-                messages=current_messages,
-                tool_map=tool_map,
-                enable_event=enable_event,
-                trace_id=current_trace_id,
-                func_name=func_name,
-                iteration=iteration,
-            ):
-                if isinstance(item, EventYield):
-                    yield item
-                else:
-                    # 最后一个 yield 是 MessageList
-                    current_messages = item
-        else:
-            result_messages = await process_tool_calls(
-                tool_calls=tool_calls,
-                messages=cast(List[Dict[str, Any]], current_messages),
-                tool_map=tool_map,
-            )
-            current_messages = cast(MessageList, result_messages)
-        
-        # 发射迭代结束事件
-        iteration_time = time.time() - iteration_llm_start_time
-        if enable_event:
-            try:
-                yield EventYield(
-                    event=ReactIterationEndEvent(
-                        event_type=ReActEventType.REACT_ITERATION_END,
-                        timestamp=datetime.now(timezone.utc),
-                        trace_id=current_trace_id,
-                        func_name=func_name,
-                        iteration=iteration,
-                        messages=current_messages.copy(),
-                        iteration_time=iteration_time,
-                        tool_calls_count=len(tool_calls),
-                    )
-                )
-            except Exception:
-                pass
-
-        call_count += 1
-
-    # Phase 4: Handle max_tool_calls limit reached
-    push_debug(
-        f"LLM 函数 '{func_name}' 达到最大工具调用次数限制 ({max_tool_calls})",
-        location=get_location(),
-    )
-
-    # 发射最终 LLM 调用开始事件
-    final_llm_start_time = time.time()
-    if enable_event:
-        try:
-            yield EventYield(
-                event=LLMCallStartEvent(
-                    event_type=ReActEventType.LLM_CALL_START,
-                    timestamp=datetime.now(timezone.utc),
-                    trace_id=current_trace_id,
-                    func_name=func_name,
-                    iteration=call_count + 1,
-                    messages=current_messages.copy(),
-                    tools=None,
-                    llm_kwargs=llm_kwargs,
-                    stream=False,
-                )
-            )
-        except Exception:
-            pass
-
-    total_llm_calls += 1
-
-    # 为最终调用创建观测
-    with langfuse_client.start_as_current_observation(
-        as_type="generation",
-        name=f"{func_name}_final_llm_call",
-        input=current_messages,
-        model=model_name,
-        model_parameters=model_parameters,
-        metadata={
-            "stream": False,
-            "reason": "max_tool_calls_reached",
-            "call_count": call_count,
-        },
-        completion_start_time=datetime.now(timezone.utc),
-    ) as final_generation_span:
-        # 最终响应时不传递 tools，因为已经结束了
-        llm_kwargs_final = llm_kwargs.copy()
-        llm_kwargs_final.pop('tool_choice', None)
-        
-        final_response = await llm_interface.chat(
-            messages=cast(List[Dict[str, Any]], current_messages),
-            **llm_kwargs_final,
-        )
-
-        # 提取最终响应内容和用量
-        final_content = extract_content_from_response(final_response, func_name)
-        usage_info = extract_usage_from_response(final_response)
-
-        # 发射最终 LLM 调用结束事件
-        final_llm_execution_time = time.time() - final_llm_start_time
-        if enable_event:
-            try:
-                yield EventYield(
-                    event=LLMCallEndEvent(
-                        event_type=ReActEventType.LLM_CALL_END,
-                        timestamp=datetime.now(timezone.utc),
-                        trace_id=current_trace_id,
-                        func_name=func_name,
-                        iteration=call_count + 1,
-                        response=final_response,
-                        messages=current_messages.copy(),
-                        tool_calls=[],
-                        usage=usage_info,
-                        execution_time=final_llm_execution_time,
-                    )
-                )
-            except Exception:
-                pass
-
-        # 更新最终观测数据
-        usage_dict_final: Optional[Dict[str, int]] = None
-        if usage_info:
-            usage_dict_final = {
-                "prompt_tokens": usage_info.prompt_tokens,
-                "completion_tokens": usage_info.completion_tokens,
-                "total_tokens": usage_info.total_tokens,
-            }
-        final_generation_span.update(
-            output={"content": final_content, "tool_calls": []},
-            usage_details=usage_dict_final,
-        )
-
-        # 发射响应
-        if enable_event:
-            try:
-                yield ResponseYield(
-                    type="response",
-                    response=final_response,
-                    messages=current_messages.copy(),
-                )
-            except Exception:
-                pass
-        else:
-            yield final_response, cast(MessageList, current_messages.copy())
-
-        # 发射 ReAct 结束事件
-        total_execution_time = time.time() - start_time
-        if enable_event:
-            try:
-                yield EventYield(
-                    event=ReactEndEvent(
-                        event_type=ReActEventType.REACT_END,
-                        timestamp=datetime.now(timezone.utc),
-                        trace_id=current_trace_id,
-                        func_name=func_name,
-                        iteration=call_count + 1,
-                        final_response=final_content,
-                        final_messages=current_messages.copy(),
-                        total_iterations=call_count + 1,
-                        total_execution_time=total_execution_time,
-                        total_tool_calls=total_tool_calls,
-                        total_llm_calls=total_llm_calls,
-                        total_token_usage=usage_info,
-                    )
-                )
-            except Exception:
-                pass
-
-        app_log(
-            f"LLM 函数 '{func_name}' 完成执行",
-            location=get_location(),
-        )
+    finally:
+        if background_jobs is not None:
+            background_jobs.cancel_all()
 
 
 __all__ = ["execute_llm"]
@@ -1,11 +1,16 @@
 """Baseline modules for SimpleLLMFunc internals."""
 
-from . import ReAct, messages, post_process, tool_call, type_resolve
+from . import ReAct, budget, checkpoint, context, memo, messages, post_process, session, tool_call, type_resolve
 
 __all__ = [
 	"ReAct",
+	"budget",
+	"checkpoint",
+	"context",
+	"memo",
 	"messages",
 	"post_process",
+	"session",
 	"tool_call",
 	"type_resolve",
 ]
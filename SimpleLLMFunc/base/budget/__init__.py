@@ -0,0 +1,25 @@
+"""Token and cost budgets for ReAct runs."""
+
+from SimpleLLMFunc.base.budget.pricing import (
+    MODEL_PRICES,
+    ModelPrice,
+    estimate_cost,
+    lookup_model_price,
+    register_model_price,
+)
+from SimpleLLMFunc.base.budget.tracker import (
+    BudgetTracker,
+    RunBudget,
+    resolve_run_budget,
+)
+
+__all__ = [
+    "MODEL_PRICES",
+    "ModelPrice",
+    "estimate_cost",
+    "lookup_model_price",
+    "register_model_price",
+    "BudgetTracker",
+    "RunBudget",
+    "resolve_run_budget",
+]
@@ -0,0 +1,92 @@
+"""Per-model token prices used for cost budgeting."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """模型单价，单位为美元 / 百万 token"""
+
+    input_per_million: float
+    output_per_million: float
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        """计算给定 token 数的费用（美元）"""
+        return (
+            prompt_tokens * self.input_per_million
+            + completion_tokens * self.output_per_million
+        ) / 1_000_000
+
+
+# 常见模型的参考价格（美元 / 百万 token）。价格会随供应商调整变化，
+# 可以通过 `register_model_price` 覆盖或补充
+MODEL_PRICES: Dict[str, ModelPrice] = {
+    "gpt-4o": ModelPrice(2.50, 10.00),
+    "gpt-4o-mini": ModelPrice(0.15, 0.60),
+    "gpt-4.1": ModelPrice(2.00, 8.00),
+    "gpt-4.1-mini": ModelPrice(0.40, 1.60),
+    "gpt-4.1-nano": ModelPrice(0.10, 0.40),
+    "o3-mini": ModelPrice(1.10, 4.40),
+    "o4-mini": ModelPrice(1.10, 4.40),
+    "deepseek-chat": ModelPrice(0.27, 1.10),
+    "deepseek-reasoner": ModelPrice(0.55, 2.19),
+    "claude-3-5-haiku": ModelPrice(0.80, 4.00),
+    "claude-3-5-sonnet": ModelPrice(3.00, 15.00),
+    "claude-sonnet-4": ModelPrice(3.00, 15.00),
+}
+
+
+def register_model_price(
+    model_name: str, input_per_million: float, output_per_million: float
+) -> None:
+    """注册或覆盖一个模型的单价"""
+    MODEL_PRICES[model_name] = ModelPrice(input_per_million, output_per_million)
+
+
+def lookup_model_price(
+    model_name: str, prices: Optional[Dict[str, ModelPrice]] = None
+) -> Optional[ModelPrice]:
+    """查找模型单价
+
+    先按完整名称匹配，再按最长前缀匹配（如 `gpt-4o-2024-08-06` 匹配 `gpt-4o`）；
+    带供应商前缀的名称（如 `openai/gpt-4o`）会去掉前缀后再查找。
+    """
+    table = MODEL_PRICES if prices is None else prices
+    if not model_name:
+        return None
+    candidates = [model_name]
+    if "/" in model_name:
+        candidates.append(model_name.rsplit("/", 1)[-1])
+    for name in candidates:
+        if name in table:
+            return table[name]
+    for name in candidates:
+        matches = [key for key in table if name.startswith(key)]
+        if matches:
+            return table[max(matches, key=len)]
+    return None
+
+
+def estimate_cost(
+    model_name: str, usage: Any, prices: Optional[Dict[str, ModelPrice]] = None
+) -> Optional[float]:
+    """根据 usage（含 prompt_tokens / completion_tokens）估算费用，未知模型返回 None"""
+    price = lookup_model_price(model_name, prices)
+    if price is None or usage is None:
+        return None
+    return price.cost(
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+    )
+
+
+__all__ = [
+    "MODEL_PRICES",
+    "ModelPrice",
+    "estimate_cost",
+    "lookup_model_price",
+    "register_model_price",
+]
@@ -0,0 +1,201 @@
+"""Per-run token and cost budgets for the ReAct loop.
+
+`max_tool_calls` 只限制迭代次数，不限制花费：一次带大工具输出的运行可能消耗数十万 token。
+`RunBudget` 为单次运行设置 token 和/或费用上限：
+
+- 每次 LLM 响应后，用 `extract_usage_from_response` 得到的 usage 累计花费
+  （响应不带 usage 时按消息估算）
+- 下一次带工具的 LLM 调用前，估算这次调用的花费；会超出预算时，
+  ReAct 循环提前进入不带工具的最终回答阶段
+- 预算状态通过 `ReactEndEvent.budget` 报告
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from SimpleLLMFunc.base.budget.pricing import ModelPrice, lookup_model_price
+from SimpleLLMFunc.base.context.estimation import (
+    estimate_messages_tokens,
+    estimate_text_tokens,
+)
+from SimpleLLMFunc.logger import push_warning
+from SimpleLLMFunc.logger.logger import get_location
+
+
+class RunBudget:
+    """单次 ReAct 运行的 token / 费用预算
+
+    Example:
+        ```python
+        @llm_function(llm_interface=llm, toolkit=[...], token_budget=200_000, cost_budget=0.5)
+        async def research(topic: str) -> str:
+            ...
+        ```
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        cost_budget: Optional[float] = None,
+        prices: Optional[Dict[str, ModelPrice]] = None,
+        token_estimator: Callable[[List[Dict[str, Any]]], int] = estimate_messages_tokens,
+    ):
+        """
+        Args:
+            token_budget: 本次运行允许消耗的总 token 数（prompt + completion）
+            cost_budget: 本次运行允许花费的金额（美元），按模型单价计算
+            prices: 自定义单价表，默认使用 `MODEL_PRICES`
+            token_estimator: 响应不带 usage 或预估下一次调用时使用的 token 估算函数
+        """
+        if token_budget is not None and token_budget <= 0:
+            raise ValueError("token_budget 必须为正整数")
+        if cost_budget is not None and cost_budget <= 0:
+            raise ValueError("cost_budget 必须为正数")
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.prices = prices
+        self.token_estimator = token_estimator
+
+    def start(self, model_name: str) -> "BudgetTracker":
+        """为一次运行创建花费记录"""
+        return BudgetTracker(self, model_name)
+
+
+class BudgetTracker:
+    """记录一次运行的累计花费，并判断下一次 LLM 调用是否会超出预算"""
+
+    def __init__(self, budget: RunBudget, model_name: str):
+        self.budget = budget
+        self.model_name = model_name
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.llm_calls = 0
+        self.estimated_calls = 0
+        self.exhausted = False
+        self._max_completion_tokens = 0
+        self._price = lookup_model_price(model_name, budget.prices)
+        if budget.cost_budget is not None and self._price is None:
+            push_warning(
+                f"未找到模型 '{model_name}' 的单价，cost_budget 不会生效；"
+                "可以通过 register_model_price 注册",
+                location=get_location(),
+            )
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def _cost_of(self, prompt_tokens: int, completion_tokens: int) -> float:
+        if self._price is None:
+            return 0.0
+        return self._price.cost(prompt_tokens, completion_tokens)
+
+    def record(
+        self,
+        usage: Any,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        content: str = "",
+    ) -> None:
+        """累计一次 LLM 响应的花费；usage 为空时按发送的消息和响应内容估算"""
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        else:
+            prompt_tokens = self.budget.token_estimator(messages or [])
+            completion_tokens = estimate_text_tokens(content)
+            self.estimated_calls += 1
+
+        self.llm_calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += self._cost_of(prompt_tokens, completion_tokens)
+        self._max_completion_tokens = max(self._max_completion_tokens, completion_tokens)
+
+    def restore(self, snapshot: Optional[Dict[str, Any]]) -> None:
+        """从 `snapshot()` 的结果恢复累计花费（从检查点恢复运行时使用）"""
+        if not snapshot:
+            return
+        self.prompt_tokens = snapshot.get("prompt_tokens") or 0
+        self.completion_tokens = snapshot.get("completion_tokens") or 0
+        self.cost = snapshot.get("cost") or 0.0
+        self.llm_calls = snapshot.get("llm_calls") or 0
+        self.estimated_calls = snapshot.get("estimated_calls") or 0
+        self._max_completion_tokens = max(
+            self._max_completion_tokens, snapshot.get("max_completion_tokens") or 0
+        )
+
+    def would_exceed(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        max_completion_tokens: Optional[int] = None,
+        reserve_final_answer: bool = False,
+    ) -> bool:
+        """估算以 messages 发起下一次调用后是否会超出预算
+
+        prompt 部分按消息和工具定义估算；completion 部分优先使用调用参数中的
+        `max_tokens`，否则取本次运行中出现过的最大 completion token 数。
+        `reserve_final_answer=True` 时同时为之后不带工具的最终回答调用预留花费，
+        保证提前结束工具循环后最终回答本身也在预算以内。
+        """
+        if self.budget.token_budget is None and self.budget.cost_budget is None:
+            return False
+
+        next_prompt = self.budget.token_estimator(messages)
+        next_completion = (
+            max_completion_tokens
+            if max_completion_tokens is not None
+            else self._max_completion_tokens
+        )
+        if reserve_final_answer:
+            # 最终回答的 prompt 至少包含本次调用的消息和本次调用的输出
+            next_prompt += next_prompt + next_completion
+            next_completion *= 2
+        if tools:
+            next_prompt += estimate_text_tokens(json.dumps(tools, ensure_ascii=False))
+
+        exceeded = False
+        if self.budget.token_budget is not None:
+            exceeded = self.total_tokens + next_prompt + next_completion > self.budget.token_budget
+        if not exceeded and self.budget.cost_budget is not None and self._price is not None:
+            next_cost = self._cost_of(next_prompt, next_completion)
+            exceeded = self.cost + next_cost > self.budget.cost_budget
+
+        if exceeded:
+            self.exhausted = True
+        return exceeded
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前预算状态，用于 ReactEndEvent"""
+        return {
+            "token_budget": self.budget.token_budget,
+            "cost_budget": self.budget.cost_budget,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost": self.cost if self._price is not None else None,
+            "llm_calls": self.llm_calls,
+            "estimated_calls": self.estimated_calls,
+            "max_completion_tokens": self._max_completion_tokens,
+            "exhausted": self.exhausted,
+        }
+
+
+def resolve_run_budget(
+    token_budget: Optional[int] = None,
+    cost_budget: Optional[float] = None,
+) -> Optional[RunBudget]:
+    """将装饰器的 `token_budget=` / `cost_budget=` 参数转换为 RunBudget"""
+    if token_budget is None and cost_budget is None:
+        return None
+    return RunBudget(token_budget=token_budget, cost_budget=cost_budget)
+
+
+__all__ = [
+    "BudgetTracker",
+    "RunBudget",
+    "resolve_run_budget",
+]
@@ -0,0 +1,15 @@
+"""Checkpoint and resume support for ReAct runs."""
+
+from SimpleLLMFunc.base.checkpoint.store import (
+    CheckpointStore,
+    JSONLCheckpointStore,
+    ReActCheckpoint,
+    SQLiteCheckpointStore,
+)
+
+__all__ = [
+    "CheckpointStore",
+    "JSONLCheckpointStore",
+    "ReActCheckpoint",
+    "SQLiteCheckpointStore",
+]
@@ -0,0 +1,185 @@
+"""Checkpoint stores for resumable ReAct runs.
+
+`execute_llm` 在每次 LLM 响应（包含工具调用时）和每个工具批次完成后保存检查点，
+内容包括消息历史、已完成的工具调用轮次以及统计计数。使用相同的 `trace_id`
+重新调用时，会从最近的检查点继续，而不是重新执行已完成（并已付费）的 LLM 和工具调用。
+运行正常结束后检查点会被删除。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+
+@dataclass
+class ReActCheckpoint:
+    """ReAct 循环的可恢复状态
+
+    Attributes:
+        trace_id: 运行的追踪 ID，作为检查点的键
+        messages: 截至检查点的完整消息历史
+        call_count: 已完成（或正在执行）的工具调用轮次
+        total_llm_calls: 已完成的 LLM 调用次数
+        total_tool_calls: 已执行的工具调用总数
+        pending_tool_calls: LLM 已请求但尚未执行完成的工具调用；恢复时会先执行它们
+        budget: 截至检查点的花费记录（`BudgetTracker.snapshot()`），恢复时继续累计
+        updated_at: 检查点写入时间（Unix 时间戳）
+    """
+
+    trace_id: str
+    messages: List[Dict[str, Any]]
+    call_count: int = 0
+    total_llm_calls: int = 0
+    total_tool_calls: int = 0
+    pending_tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    budget: Optional[Dict[str, Any]] = None
+    updated_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, default=str)
+
+    @classmethod
+    def from_json(cls, data: str) -> "ReActCheckpoint":
+        return cls(**json.loads(data))
+
+
+class CheckpointStore(ABC):
+    """检查点存储基类"""
+
+    @abstractmethod
+    async def load(self, trace_id: str) -> Optional[ReActCheckpoint]:
+        """读取 trace_id 对应的最新检查点，不存在时返回 None"""
+
+    @abstractmethod
+    async def save(self, checkpoint: ReActCheckpoint) -> None:
+        """保存（覆盖）检查点"""
+
+    @abstractmethod
+    async def delete(self, trace_id: str) -> None:
+        """删除 trace_id 对应的检查点"""
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """基于本地 SQLite 文件的检查点存储，每个 trace_id 只保留最新状态"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        if not self._initialized:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS react_checkpoints ("
+                "trace_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _load_sync(self, trace_id: str) -> Optional[ReActCheckpoint]:
+        with self._lock:
+            connection = self._connect()
+            try:
+                row = connection.execute(
+                    "SELECT state FROM react_checkpoints WHERE trace_id = ?", (trace_id,)
+                ).fetchone()
+            finally:
+                connection.close()
+        return ReActCheckpoint.from_json(row[0]) if row else None
+
+    def _save_sync(self, checkpoint: ReActCheckpoint) -> None:
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO react_checkpoints (trace_id, state, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (checkpoint.trace_id, checkpoint.to_json(), checkpoint.updated_at),
+                )
+                connection.commit()
+            finally:
+                connection.close()
+
+    def _delete_sync(self, trace_id: str) -> None:
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "DELETE FROM react_checkpoints WHERE trace_id = ?", (trace_id,)
+                )
+                connection.commit()
+            finally:
+                connection.close()
+
+    async def load(self, trace_id: str) -> Optional[ReActCheckpoint]:
+        return await asyncio.to_thread(self._load_sync, trace_id)
+
+    async def save(self, checkpoint: ReActCheckpoint) -> None:
+        await asyncio.to_thread(self._save_sync, checkpoint)
+
+    async def delete(self, trace_id: str) -> None:
+        await asyncio.to_thread(self._delete_sync, trace_id)
+
+
+class JSONLCheckpointStore(CheckpointStore):
+    """基于追加写 JSONL 文件的检查点存储
+
+    每次保存追加一行，读取时取该 trace_id 的最后一行；删除通过追加墓碑记录实现。
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def _load_sync(self, trace_id: str) -> Optional[ReActCheckpoint]:
+        if not self.path.exists():
+            return None
+        latest: Optional[Dict[str, Any]] = None
+        with self._lock, self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程在写入中途退出时最后一行可能不完整
+                    continue
+                if record.get("trace_id") == trace_id:
+                    latest = record
+        if latest is None or latest.get("deleted"):
+            return None
+        return ReActCheckpoint(**latest)
+
+    async def load(self, trace_id: str) -> Optional[ReActCheckpoint]:
+        return await asyncio.to_thread(self._load_sync, trace_id)
+
+    async def save(self, checkpoint: ReActCheckpoint) -> None:
+        await asyncio.to_thread(self._append, asdict(checkpoint))
+
+    async def delete(self, trace_id: str) -> None:
+        await asyncio.to_thread(self._append, {"trace_id": trace_id, "deleted": True})
+
+
+__all__ = [
+    "ReActCheckpoint",
+    "CheckpointStore",
+    "SQLiteCheckpointStore",
+    "JSONLCheckpointStore",
+]
@@ -0,0 +1,27 @@
+"""Context window budgeting and compaction helpers."""
+
+from SimpleLLMFunc.base.context.compaction import (
+    ContextBudget,
+    ContextCompactionStrategy,
+    DropOldToolResults,
+    SummarizeOldTurns,
+    TruncateToolOutputs,
+    resolve_context_budget,
+)
+from SimpleLLMFunc.base.context.estimation import (
+    estimate_message_tokens,
+    estimate_messages_tokens,
+    estimate_text_tokens,
+)
+
+__all__ = [
+    "ContextBudget",
+    "ContextCompactionStrategy",
+    "TruncateToolOutputs",
+    "DropOldToolResults",
+    "SummarizeOldTurns",
+    "resolve_context_budget",
+    "estimate_text_tokens",
+    "estimate_message_tokens",
+    "estimate_messages_tokens",
+]
@@ -0,0 +1,274 @@
+"""Token-budgeted context compaction for the ReAct loop.
+
+`execute_llm` 在每次 LLM 调用前把当前消息交给 `ContextBudget.compact`。
+当估算的 token 数超过预算时，按顺序应用压缩策略，直到回到预算以内：
+
+1. `TruncateToolOutputs`: 截断较早的超长工具输出
+2. `DropOldToolResults`: 用占位符替换较早的工具结果
+3. `SummarizeOldTurns`: 用（更便宜的）模型把较早的轮次总结为一条消息
+
+开头的 system 消息、首条用户任务消息以及最近的若干条消息始终保留。
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from SimpleLLMFunc.base.context.estimation import estimate_messages_tokens
+from SimpleLLMFunc.base.post_process import extract_content_from_response
+from SimpleLLMFunc.interface.llm_interface import LLM_Interface
+from SimpleLLMFunc.logger import push_debug, push_warning
+from SimpleLLMFunc.logger.logger import get_location
+from SimpleLLMFunc.type import MessageList
+
+DEFAULT_KEEP_LAST_MESSAGES: int = 6
+
+DROPPED_TOOL_RESULT_PLACEHOLDER = "[earlier tool result omitted to save context]"
+
+DEFAULT_SUMMARY_PROMPT = """
+You compress the earlier part of a conversation between a user, an assistant and its tools.
+Write a concise summary that preserves every fact, decision, intermediate result and open
+question the assistant needs to continue the task. Do not add commentary.
+"""
+
+
+class ContextCompactionStrategy(ABC):
+    """上下文压缩策略基类
+
+    子类实现 `apply`，返回新的消息列表；不得原地修改传入的消息字典。
+    """
+
+    @abstractmethod
+    async def apply(self, messages: MessageList, budget: "ContextBudget") -> MessageList:
+        """对消息列表应用压缩，返回新的消息列表"""
+
+
+class TruncateToolOutputs(ContextCompactionStrategy):
+    """截断受保护区域之外的超长工具输出"""
+
+    def __init__(self, max_chars: int = 2000):
+        self.max_chars = max_chars
+
+    async def apply(self, messages: MessageList, budget: "ContextBudget") -> MessageList:
+        head, middle, tail = budget.split(messages)
+        compacted: List[Any] = []
+        for message in middle:
+            content = message.get("content")
+            if (
+                message.get("role") == "tool"
+                and isinstance(content, str)
+                and len(content) > self.max_chars
+            ):
+                omitted = len(content) - self.max_chars
+                message = {
+                    **message,
+                    "content": f"{content[: self.max_chars]}\n...[truncated {omitted} chars]",
+                }
+            compacted.append(message)
+        return head + compacted + tail
+
+
+class DropOldToolResults(ContextCompactionStrategy):
+    """用占位符替换受保护区域之外的工具结果
+
+    工具消息本身必须保留，否则 assistant 消息中的 tool_calls 会失去对应的响应。
+    """
+
+    async def apply(self, messages: MessageList, budget: "ContextBudget") -> MessageList:
+        head, middle, tail = budget.split(messages)
+        compacted: List[Any] = [
+            {**message, "content": DROPPED_TOOL_RESULT_PLACEHOLDER}
+            if message.get("role") == "tool"
+            else message
+            for message in middle
+        ]
+        return head + compacted + tail
+
+
+class SummarizeOldTurns(ContextCompactionStrategy):
+    """用 LLM 将受保护区域之外的轮次总结为一条消息"""
+
+    def __init__(
+        self,
+        llm_interface: LLM_Interface,
+        prompt: str = DEFAULT_SUMMARY_PROMPT,
+        **llm_kwargs: Any,
+    ):
+        """
+        Args:
+            llm_interface: 用于生成总结的 LLM 接口，通常是更便宜的模型
+            prompt: 总结使用的 system prompt
+            **llm_kwargs: 传递给 `llm_interface.chat` 的额外参数
+        """
+        self.llm_interface = llm_interface
+        self.prompt = prompt
+        self.llm_kwargs = llm_kwargs
+
+    @staticmethod
+    def _render_transcript(messages: MessageList) -> str:
+        lines: List[str] = []
+        for message in messages:
+            role = message.get("role", "unknown")
+            content = message.get("content")
+            if not isinstance(content, str):
+                content = str(content) if content else ""
+            if message.get("tool_calls"):
+                calls = ", ".join(
+                    f"{tc.get('function', {}).get('name')}({tc.get('function', {}).get('arguments')})"
+                    for tc in message.get("tool_calls") or []
+                )
+                content = f"{content}\n[calls tools: {calls}]".strip()
+            lines.append(f"{role}: {content}")
+        return "\n\n".join(lines)
+
+    async def apply(self, messages: MessageList, budget: "ContextBudget") -> MessageList:
+        head, middle, tail = budget.split(messages)
+        if not middle:
+            return messages
+
+        response = await self.llm_interface.chat(
+            messages=[
+                {"role": "system", "content": self.prompt.strip()},
+                {"role": "user", "content": self._render_transcript(middle)},
+            ],
+            **self.llm_kwargs,
+        )
+        summary = extract_content_from_response(response, "context_summary")
+        if not summary:
+            push_warning("上下文总结返回空内容，保持原消息不变", location=get_location())
+            return messages
+
+        summary_message: Any = {
+            "role": "user",
+            "content": f"[Summary of the earlier conversation]\n{summary}",
+        }
+        return head + [summary_message] + tail
+
+
+class ContextBudget:
+    """ReAct 循环的上下文 token 预算
+
+    Example:
+        ```python
+        budget = ContextBudget(
+            max_tokens=32_000,
+            strategies=[
+                TruncateToolOutputs(max_chars=4000),
+                DropOldToolResults(),
+                SummarizeOldTurns(cheap_llm),
+            ],
+        )
+
+        @llm_function(llm_interface=llm, toolkit=[...], context_budget=budget)
+        async def research(topic: str) -> str:
+            ...
+        ```
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        strategies: Optional[Sequence[ContextCompactionStrategy]] = None,
+        keep_last_messages: int = DEFAULT_KEEP_LAST_MESSAGES,
+        pin_first_user_message: bool = True,
+        token_estimator: Callable[[List[Dict[str, Any]]], int] = estimate_messages_tokens,
+    ):
+        """
+        Args:
+            max_tokens: 发送给 LLM 的消息允许的最大（估算）token 数
+            strategies: 按顺序尝试的压缩策略，默认为截断工具输出 + 替换旧工具结果
+            keep_last_messages: 始终保留的最近消息条数
+            pin_first_user_message: 是否始终保留首条用户消息（通常是任务描述）
+            token_estimator: token 估算函数，可替换为基于 tokenizer 的精确实现
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens 必须为正整数")
+        self.max_tokens = max_tokens
+        self.strategies: List[ContextCompactionStrategy] = (
+            list(strategies)
+            if strategies is not None
+            else [TruncateToolOutputs(), DropOldToolResults()]
+        )
+        self.keep_last_messages = keep_last_messages
+        self.pin_first_user_message = pin_first_user_message
+        self.token_estimator = token_estimator
+
+    def estimate(self, messages: MessageList) -> int:
+        """估算消息列表的 token 数"""
+        return self.token_estimator(messages)  # type: ignore[arg-type]
+
+    def split(self, messages: MessageList) -> Tuple[MessageList, MessageList, MessageList]:
+        """把消息划分为 (受保护的开头, 可压缩的中间, 受保护的结尾)
+
+        结尾不会从 tool 消息开始：边界会向前移动到发起这些调用的 assistant 消息，
+        保证 tool_calls 与其响应不被拆开。
+        """
+        head_end = 0
+        while head_end < len(messages) and messages[head_end].get("role") == "system":
+            head_end += 1
+        if (
+            self.pin_first_user_message
+            and head_end < len(messages)
+            and messages[head_end].get("role") == "user"
+        ):
+            head_end += 1
+
+        tail_start = max(head_end, len(messages) - self.keep_last_messages)
+        while (
+            head_end < tail_start < len(messages)
+            and messages[tail_start].get("role") == "tool"
+        ):
+            tail_start -= 1
+
+        return (
+            list(messages[:head_end]),
+            list(messages[head_end:tail_start]),
+            list(messages[tail_start:]),
+        )
+
+    async def compact(self, messages: MessageList) -> MessageList:
+        """在超出预算时压缩消息，否则原样返回"""
+        estimated = self.estimate(messages)
+        if estimated <= self.max_tokens:
+            return messages
+
+        compacted = messages
+        for strategy in self.strategies:
+            compacted = await strategy.apply(compacted, self)
+            estimated = self.estimate(compacted)
+            push_debug(
+                f"上下文压缩策略 {type(strategy).__name__} 执行后估算 token 数: {estimated}",
+                location=get_location(),
+            )
+            if estimated <= self.max_tokens:
+                return compacted
+
+        push_warning(
+            f"上下文压缩后估算 token 数 {estimated} 仍超过预算 {self.max_tokens}",
+            location=get_location(),
+        )
+        return compacted
+
+
+def resolve_context_budget(
+    context_budget: Union[int, ContextBudget, None],
+) -> Optional[ContextBudget]:
+    """将装饰器的 `context_budget=` 参数统一转换为 ContextBudget"""
+    if context_budget is None or isinstance(context_budget, ContextBudget):
+        return context_budget
+    if isinstance(context_budget, int):
+        return ContextBudget(max_tokens=context_budget)
+    raise TypeError(
+        f"context_budget 必须是 int 或 ContextBudget，收到: {type(context_budget)}"
+    )
+
+
+__all__ = [
+    "ContextBudget",
+    "ContextCompactionStrategy",
+    "TruncateToolOutputs",
+    "DropOldToolResults",
+    "SummarizeOldTurns",
+    "resolve_context_budget",
+]
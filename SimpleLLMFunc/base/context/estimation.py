@@ -0,0 +1,64 @@
+"""Token estimation helpers for context budgeting."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List
+
+# 每条消息的格式开销（role、分隔符等）的经验值
+MESSAGE_OVERHEAD_TOKENS: int = 4
+# 单张图片按低清晰度计费的经验值
+IMAGE_CONTENT_TOKENS: int = 85
+
+
+def estimate_text_tokens(text: str) -> int:
+    """粗略估算一段文本的 token 数。
+
+    不依赖具体 tokenizer：ASCII 字符按约 4 个字符 1 个 token 计算，
+    非 ASCII 字符（如中文）按 1 个字符 1 个 token 计算。
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_count = len(text) - non_ascii
+    return non_ascii + (ascii_count + 3) // 4
+
+
+def _estimate_content_tokens(content: Any) -> int:
+    """估算单条消息 content 字段的 token 数"""
+    if content is None:
+        return 0
+    if isinstance(content, str):
+        return estimate_text_tokens(content)
+    if isinstance(content, list):
+        total = 0
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "text":
+                total += estimate_text_tokens(str(part.get("text", "")))
+            elif isinstance(part, dict) and part.get("type") == "image_url":
+                total += IMAGE_CONTENT_TOKENS
+            else:
+                total += estimate_text_tokens(str(part))
+        return total
+    return estimate_text_tokens(str(content))
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """估算单条消息的 token 数（包含 tool_calls 参数）"""
+    total = MESSAGE_OVERHEAD_TOKENS + _estimate_content_tokens(message.get("content"))
+    tool_calls = message.get("tool_calls")
+    if tool_calls:
+        total += estimate_text_tokens(json.dumps(tool_calls, ensure_ascii=False, default=str))
+    return total
+
+
+def estimate_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    """估算消息列表的 token 总数"""
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+__all__ = [
+    "estimate_text_tokens",
+    "estimate_message_tokens",
+    "estimate_messages_tokens",
+]
@@ -0,0 +1,19 @@
+"""Memoization of llm_function results."""
+
+from SimpleLLMFunc.base.memo.key import memo_key
+from SimpleLLMFunc.base.memo.store import (
+    InMemoryMemoStore,
+    MemoStats,
+    MemoStore,
+    SQLiteMemoStore,
+    resolve_memo_store,
+)
+
+__all__ = [
+    "InMemoryMemoStore",
+    "MemoStats",
+    "MemoStore",
+    "SQLiteMemoStore",
+    "memo_key",
+    "resolve_memo_store",
+]
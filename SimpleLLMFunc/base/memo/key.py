@@ -0,0 +1,70 @@
+"""Cache keys for memoized llm_function calls."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+# 默认的 object.__repr__ 形如 `<Foo object at 0x7f...>`，地址每次运行都不同
+_ADDRESS_PATTERN = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def _stable_repr(value: Any) -> str:
+    text = repr(value)
+    if _ADDRESS_PATTERN.search(text):
+        raise TypeError(f"参数 {text} 的 repr() 包含对象地址，无法生成稳定的缓存键")
+    return text
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return {"__model__": type(value).__qualname__, **value.model_dump(mode="json")}
+    if isinstance(value, (set, frozenset)):
+        return sorted(_stable_repr(item) for item in value)
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    return _stable_repr(value)
+
+
+def memo_key(
+    docstring: str,
+    template_params: Optional[Dict[str, Any]],
+    arguments: Dict[str, Any],
+    return_type: Any,
+    model: str,
+    extra: Optional[Dict[str, Any]] = None,
+) -> str:
+    """计算一次调用的缓存键
+
+    键由函数描述、docstring 模板参数、绑定后的参数、返回类型和模型名称决定；
+    `extra` 用于加入其他会影响输出的配置（提示模板、temperature 等 LLM 参数）。
+    无法 JSON 序列化的参数使用 `repr()`。
+
+    Raises:
+        TypeError: 参数的 `repr()` 包含对象地址（默认的 `object.__repr__`），
+            这样的键每次运行都不同，调用方应跳过缓存
+    """
+    payload = json.dumps(
+        {
+            "docstring": docstring,
+            "template_params": template_params or {},
+            "arguments": arguments,
+            "return_type": repr(return_type),
+            "model": model,
+            "extra": extra or {},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=_default,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+__all__ = [
+    "memo_key",
+]
@@ -0,0 +1,229 @@
+"""Memoization stores for llm_function results.
+
+温度为 0 的分类、抽取等确定性调用，相同输入的结果可以直接复用。`llm_function(memoize=...)`
+以函数描述、模板参数、绑定后的参数、返回类型和模型计算键，命中时跳过提示构建、网络请求和
+XML / Pydantic 解析，直接返回缓存的解析结果。
+
+- `InMemoryMemoStore`：进程内 LRU，写入和命中时都深拷贝结果，调用方修改返回值不会影响缓存
+- `SQLiteMemoStore`：本地 SQLite 文件，结果按返回类型序列化为 JSON，跨进程复用
+
+两种存储都支持 TTL，命中率等统计信息见 `store.stats`。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Tuple, Union
+
+from pydantic import TypeAdapter
+
+
+@dataclass
+class MemoStats:
+    """缓存统计信息"""
+
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+    writes: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率（0 ~ 1），尚无查询时为 0"""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def summary(self) -> str:
+        """单行统计摘要"""
+        return (
+            f"命中 {self.hits} / {self.lookups}（{self.hit_rate:.1%}），"
+            f"过期 {self.expired}，淘汰 {self.evictions}，写入 {self.writes}"
+        )
+
+
+class MemoStore(ABC):
+    """llm_function 结果缓存的存储基类
+
+    Args:
+        ttl: 条目的有效期（秒），None 表示永不过期
+    """
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl 必须为正数")
+        self.ttl = ttl
+        self.stats = MemoStats()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    @abstractmethod
+    async def get(self, key: str, return_type: Any) -> Tuple[bool, Any]:
+        """读取缓存，返回 `(是否命中, 结果)`"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, return_type: Any) -> None:
+        """写入缓存"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """清空缓存"""
+
+
+class InMemoryMemoStore(MemoStore):
+    """进程内 LRU 缓存
+
+    写入与命中时都深拷贝结果（如可变的 Pydantic 模型、列表），每次命中得到独立的对象。
+
+    Args:
+        max_entries: 最多保留的条目数，超出时淘汰最久未使用的条目
+        ttl: 条目的有效期（秒），None 表示永不过期
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None) -> None:
+        super().__init__(ttl)
+        if max_entries < 1:
+            raise ValueError("max_entries 必须为正整数")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str, return_type: Any) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return False, None
+        created_at, value = entry
+        if self._is_expired(created_at):
+            del self._entries[key]
+            self.stats.expired += 1
+            self.stats.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return True, copy.deepcopy(value)
+
+    async def set(self, key: str, value: Any, return_type: Any) -> None:
+        self._entries[key] = (time.time(), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        self.stats.writes += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteMemoStore(MemoStore):
+    """基于本地 SQLite 文件的缓存，结果按返回类型序列化为 JSON
+
+    读取时按返回类型反序列化；返回类型变化导致无法反序列化的条目视为未命中并删除。
+
+    Args:
+        path: SQLite 文件路径
+        ttl: 条目的有效期（秒），None 表示永不过期
+    """
+
+    def __init__(self, path: Union[str, Path], ttl: Optional[float] = None) -> None:
+        super().__init__(ttl)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        if not self._initialized:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_function_memo ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _execute(self, sql: str, params: Tuple[Any, ...] = ()) -> Optional[Tuple[Any, ...]]:
+        with self._lock:
+            connection = self._connect()
+            try:
+                row = connection.execute(sql, params).fetchone()
+                connection.commit()
+            finally:
+                connection.close()
+        return row
+
+    def _get_sync(self, key: str, return_type: Any) -> Tuple[bool, Any, bool]:
+        """在线程中读取，返回 `(是否命中, 结果, 是否过期)`；统计信息由调用方在事件循环中更新"""
+        row = self._execute(
+            "SELECT value, created_at FROM llm_function_memo WHERE key = ?", (key,)
+        )
+        if row is None:
+            return False, None, False
+        value, created_at = row
+        if self._is_expired(created_at):
+            self._execute("DELETE FROM llm_function_memo WHERE key = ?", (key,))
+            return False, None, True
+        try:
+            result = TypeAdapter(return_type).validate_json(value)
+        except Exception:
+            self._execute("DELETE FROM llm_function_memo WHERE key = ?", (key,))
+            return False, None, False
+        return True, result, False
+
+    def _set_sync(self, key: str, value: Any, return_type: Any) -> None:
+        data = TypeAdapter(return_type).dump_json(value).decode("utf-8")
+        self._execute(
+            "INSERT OR REPLACE INTO llm_function_memo (key, value, created_at) VALUES (?, ?, ?)",
+            (key, data, time.time()),
+        )
+
+    async def get(self, key: str, return_type: Any) -> Tuple[bool, Any]:
+        hit, result, expired = await asyncio.to_thread(self._get_sync, key, return_type)
+        if hit:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+            if expired:
+                self.stats.expired += 1
+        return hit, result
+
+    async def set(self, key: str, value: Any, return_type: Any) -> None:
+        await asyncio.to_thread(self._set_sync, key, value, return_type)
+        self.stats.writes += 1
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM llm_function_memo")
+
+
+def resolve_memo_store(memoize: Union[bool, MemoStore, None]) -> Optional[MemoStore]:
+    """将装饰器的 `memoize=` 参数转换为 MemoStore（True 使用默认的进程内 LRU）"""
+    if memoize is None or memoize is False:
+        return None
+    if memoize is True:
+        return InMemoryMemoStore()
+    if isinstance(memoize, MemoStore):
+        return memoize
+    raise TypeError(f"不支持的 memoize 参数: {memoize!r}")
+
+
+__all__ = [
+    "InMemoryMemoStore",
+    "MemoStats",
+    "MemoStore",
+    "SQLiteMemoStore",
+    "resolve_memo_store",
+]
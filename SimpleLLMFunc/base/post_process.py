@@ -16,6 +16,13 @@ def process_response(response: Any, return_type: Optional[Type[T]]) -> T:
 
     func_name = get_current_context_attribute("function_name") or "Unknown Function"
     content = extract_content_from_response(response, func_name)
+    return convert_content_to_type(content, return_type, func_name)
+
+
+def convert_content_to_type(
+    content: Optional[str], return_type: Optional[Type[T]], func_name: str
+) -> T:
+    """Convert textual LLM output into the expected return type."""
 
     if content is None:
         content = ""
@@ -246,6 +253,7 @@ def _convert_xml_to_pydantic(content: str, model_class: Type, func_name: str) ->
 
 __all__ = [
     "process_response",
+    "convert_content_to_type",
     "extract_content_from_response",
     "extract_content_from_stream_response",
 ]
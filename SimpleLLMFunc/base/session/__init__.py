@@ -0,0 +1,13 @@
+"""Persistent message stores for llm_chat sessions."""
+
+from SimpleLLMFunc.base.session.store import (
+    ChatSessionStore,
+    JSONLChatSessionStore,
+    SQLiteChatSessionStore,
+)
+
+__all__ = [
+    "ChatSessionStore",
+    "JSONLChatSessionStore",
+    "SQLiteChatSessionStore",
+]
@@ -0,0 +1,170 @@
+"""Message stores for persistent chat sessions.
+
+`ChatSession` 每轮对话结束后只把本轮新增的消息（用户消息、工具调用与结果、最终回复）
+追加到存储中；重新打开同一个 `session_id` 时从存储读取完整历史。系统提示由被装饰的
+函数决定，不写入存储。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class ChatSessionStore(ABC):
+    """会话消息存储基类"""
+
+    @abstractmethod
+    async def load(self, session_id: str) -> List[Dict[str, Any]]:
+        """按写入顺序读取会话的全部消息，不存在时返回空列表"""
+
+    @abstractmethod
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """追加一轮对话新增的消息"""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """删除会话的全部消息"""
+
+
+class SQLiteChatSessionStore(ChatSessionStore):
+    """基于本地 SQLite 文件的会话存储，每条消息一行"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        if not self._initialized:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS chat_session_messages ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "session_id TEXT NOT NULL, message TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS chat_session_messages_session "
+                "ON chat_session_messages (session_id, id)"
+            )
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _load_sync(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            connection = self._connect()
+            try:
+                rows = connection.execute(
+                    "SELECT message FROM chat_session_messages WHERE session_id = ? ORDER BY id",
+                    (session_id,),
+                ).fetchall()
+            finally:
+                connection.close()
+        return [json.loads(row[0]) for row in rows]
+
+    def _append_sync(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.executemany(
+                    "INSERT INTO chat_session_messages (session_id, message) VALUES (?, ?)",
+                    [
+                        (session_id, json.dumps(message, ensure_ascii=False, default=str))
+                        for message in messages
+                    ],
+                )
+                connection.commit()
+            finally:
+                connection.close()
+
+    def _delete_sync(self, session_id: str) -> None:
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "DELETE FROM chat_session_messages WHERE session_id = ?", (session_id,)
+                )
+                connection.commit()
+            finally:
+                connection.close()
+
+    async def load(self, session_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._load_sync, session_id)
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        if messages:
+            await asyncio.to_thread(self._append_sync, session_id, messages)
+
+    async def delete(self, session_id: str) -> None:
+        await asyncio.to_thread(self._delete_sync, session_id)
+
+
+class JSONLChatSessionStore(ChatSessionStore):
+    """基于目录的会话存储，每个会话一个追加写的 JSONL 文件，每行一条消息
+
+    文件名由替换掉不安全字符的 session_id 加上原始 session_id 的短哈希组成，
+    替换后相同的不同 id（如 "a/b" 与 "a_b"）不会写入同一个文件。
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> Path:
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:12]
+        return self.directory / f"{_UNSAFE_FILENAME.sub('_', session_id)}-{digest}.jsonl"
+
+    def _load_sync(self, session_id: str) -> List[Dict[str, Any]]:
+        path = self._path(session_id)
+        if not path.exists():
+            return []
+        messages: List[Dict[str, Any]] = []
+        with self._lock, path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    messages.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 进程在写入中途退出时最后一行可能不完整
+                    continue
+        return messages
+
+    def _append_sync(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with self._path(session_id).open("a", encoding="utf-8") as f:
+                for message in messages:
+                    f.write(json.dumps(message, ensure_ascii=False, default=str) + "\n")
+
+    def _delete_sync(self, session_id: str) -> None:
+        with self._lock:
+            self._path(session_id).unlink(missing_ok=True)
+
+    async def load(self, session_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._load_sync, session_id)
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        if messages:
+            await asyncio.to_thread(self._append_sync, session_id, messages)
+
+    async def delete(self, session_id: str) -> None:
+        await asyncio.to_thread(self._delete_sync, session_id)
+
+
+__all__ = [
+    "ChatSessionStore",
+    "JSONLChatSessionStore",
+    "SQLiteChatSessionStore",
+]
@@ -2,8 +2,14 @@
 
 from SimpleLLMFunc.base.tool_call.execution import (
     _execute_single_tool_call,
+    fan_out_tool_messages,
+    group_duplicate_tool_calls,
     process_tool_calls,
 )
+from SimpleLLMFunc.base.tool_call.background import (
+    BACKGROUND_JOBS_TOOL_NAME,
+    BackgroundJobManager,
+)
 from SimpleLLMFunc.base.tool_call.extraction import (
     AccumulatedToolCall,
     ToolCallFunctionInfo,
@@ -13,6 +19,11 @@ from SimpleLLMFunc.base.tool_call.extraction import (
     extract_tool_calls,
     extract_tool_calls_from_stream_response,
 )
+from SimpleLLMFunc.base.tool_call.output_store import (
+    READ_TOOL_OUTPUT_NAME,
+    ToolOutputStore,
+    with_tool_output_reader,
+)
 # 从统一类型系统导入 ReasoningDetail（向后兼容）
 from SimpleLLMFunc.type.message import ReasoningDetail
 from SimpleLLMFunc.base.tool_call.validation import (
@@ -24,6 +35,13 @@ __all__ = [
     "serialize_tool_output_for_langfuse",
     "is_valid_tool_result",
     "process_tool_calls",
+    "group_duplicate_tool_calls",
+    "fan_out_tool_messages",
+    "ToolOutputStore",
+    "READ_TOOL_OUTPUT_NAME",
+    "with_tool_output_reader",
+    "BackgroundJobManager",
+    "BACKGROUND_JOBS_TOOL_NAME",
     "extract_tool_calls",
     "accumulate_tool_calls_from_chunks",
     "extract_tool_calls_from_stream_response",
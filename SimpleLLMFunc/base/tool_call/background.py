@@ -0,0 +1,259 @@
+"""Background tool jobs for the ReAct loop.
+
+耗时很长的工具（长时间爬取、报告生成等）如果同步执行，整个工具批次都要等待最慢的工具，
+模型在此期间无法继续处理其他子任务。使用 `@tool(background=True)` 声明的工具：
+
+- 调用立即返回一个 "pending + job id" 的 tool message
+- 工具在后台继续执行
+- 完成后的结果会在下一次 LLM 调用前以消息形式注入对话
+- 模型可以通过内置工具 `check_background_jobs(job_ids, wait, timeout)` 查询或等待指定任务
+
+模型在后台任务完成前就给出最终回答时，ReAct 循环会先等待这些任务（受调用截止时间约束），
+把结果交给模型再回答一轮。每次 ReAct 运行使用独立的 `BackgroundJobManager`，
+运行结束时仍未完成的任务（截止时间已到或达到工具调用次数上限）会被取消。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from SimpleLLMFunc.base.tool_call.execution import (
+    _execute_single_tool_call,
+    _resolve_tool_object,
+)
+from SimpleLLMFunc.base.tool_call.output_store import ToolOutputStore
+from SimpleLLMFunc.logger import push_debug, push_warning
+from SimpleLLMFunc.logger.logger import get_location
+from SimpleLLMFunc.tool import Tool
+from SimpleLLMFunc.utils import clamp_timeout
+
+BACKGROUND_JOBS_TOOL_NAME = "check_background_jobs"
+
+DEFAULT_WAIT_TIMEOUT: float = 30.0
+
+
+@dataclass
+class BackgroundJob:
+    """一个后台工具调用"""
+
+    job_id: str
+    tool_name: str
+    tool_call: Dict[str, Any]
+    task: "asyncio.Task[tuple[Dict[str, Any], List[Dict[str, Any]], bool]]"
+    started_at: float = field(default_factory=time.time)
+    delivered: bool = False
+
+    @property
+    def status(self) -> str:
+        if not self.task.done():
+            return "running"
+        if self.task.cancelled():
+            return "cancelled"
+        return "failed" if self.task.exception() is not None else "done"
+
+
+class BackgroundJobManager:
+    """管理一次 ReAct 运行中的后台工具任务"""
+
+    def __init__(
+        self,
+        tool_map: Dict[str, Callable[..., Awaitable[Any]]],
+        tool_output_store: Optional[ToolOutputStore] = None,
+    ):
+        self._tool_map = tool_map
+        self._tool_output_store = tool_output_store
+        self._jobs: Dict[str, BackgroundJob] = {}
+        self._tool: Optional[Tool] = None
+
+    @classmethod
+    def for_tool_map(
+        cls,
+        tool_map: Dict[str, Callable[..., Awaitable[Any]]],
+        tool_output_store: Optional[ToolOutputStore] = None,
+    ) -> Optional["BackgroundJobManager"]:
+        """工具集中存在后台工具时创建管理器，否则返回 None"""
+        if any(cls._is_background_func(func) for func in tool_map.values()):
+            return cls(tool_map, tool_output_store)
+        return None
+
+    @staticmethod
+    def _is_background_func(tool_func: Callable[..., Awaitable[Any]]) -> bool:
+        tool_obj = _resolve_tool_object(tool_func)
+        # 未调用 Tool.__init__ 的旧式子类没有 background 属性，按普通工具处理
+        return tool_obj is not None and getattr(tool_obj, "background", False)
+
+    def is_background(self, tool_name: Optional[str]) -> bool:
+        tool_func = self._tool_map.get(tool_name) if tool_name else None
+        return tool_func is not None and self._is_background_func(tool_func)
+
+    @property
+    def pending_count(self) -> int:
+        """尚未把结果交给模型的任务数"""
+        return sum(1 for job in self._jobs.values() if not job.delivered)
+
+    def submit(self, tool_call: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """在后台启动工具调用，返回应立即放入对话的 pending tool message"""
+        tool_name = tool_call.get("function", {}).get("name") or ""
+        job_id = f"job_{uuid.uuid4().hex[:12]}"
+        task = asyncio.create_task(
+            _execute_single_tool_call(tool_call, self._tool_map, self._tool_output_store),
+            name=f"background_tool_{tool_name}_{job_id}",
+        )
+        self._jobs[job_id] = BackgroundJob(
+            job_id=job_id, tool_name=tool_name, tool_call=tool_call, task=task
+        )
+        push_debug(f"后台工具 '{tool_name}' 已启动，job_id={job_id}", location=get_location())
+        return [
+            {
+                "role": "tool",
+                "tool_call_id": tool_call.get("id"),
+                "content": json.dumps(
+                    {
+                        "status": "pending",
+                        "job_id": job_id,
+                        "message": (
+                            f"Tool '{tool_name}' is running in the background. Its result will be "
+                            "added to the conversation when it finishes; call "
+                            f"{BACKGROUND_JOBS_TOOL_NAME} to check or wait for it."
+                        ),
+                    },
+                    ensure_ascii=False,
+                ),
+            }
+        ]
+
+    def _job_report(self, job: BackgroundJob) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            "job_id": job.job_id,
+            "tool": job.tool_name,
+            "status": job.status,
+        }
+        if job.status == "running":
+            report["elapsed_seconds"] = round(time.time() - job.started_at, 1)
+        elif job.status == "failed":
+            report["error"] = str(job.task.exception())
+        elif job.status == "done":
+            _, messages, _ = job.task.result()
+            tool_contents = [m.get("content") for m in messages if m.get("role") == "tool"]
+            report["result"] = tool_contents[0] if tool_contents else None
+        return report
+
+    def drain_finished(self) -> List[Dict[str, Any]]:
+        """取出已完成但尚未交给模型的任务结果，构造成要注入对话的消息"""
+        injected: List[Dict[str, Any]] = []
+        for job in self._jobs.values():
+            if job.delivered or not job.task.done():
+                continue
+            job.delivered = True
+            report = self._job_report(job)
+            injected.append(
+                {
+                    "role": "user",
+                    "content": (
+                        f"[Background job {job.job_id} ({job.tool_name}) finished]\n"
+                        + json.dumps(report, ensure_ascii=False)
+                    ),
+                }
+            )
+            if job.status == "done":
+                # 多模态结果（图片等）以 user message 形式原样附上
+                _, messages, _ = job.task.result()
+                injected.extend(m for m in messages if m.get("role") != "tool")
+        return injected
+
+    async def check(
+        self,
+        job_ids: Optional[List[str]] = None,
+        wait: bool = False,
+        timeout: float = DEFAULT_WAIT_TIMEOUT,
+    ) -> Dict[str, Any]:
+        """查询（可选等待）任务状态；已完成任务的结果随之交付并标记为已交付"""
+        if job_ids:
+            unknown = [job_id for job_id in job_ids if job_id not in self._jobs]
+            jobs = [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+        else:
+            unknown = []
+            jobs = [job for job in self._jobs.values() if not job.delivered]
+
+        running = [job.task for job in jobs if not job.task.done()]
+        if wait and running:
+            await asyncio.wait(running, timeout=clamp_timeout(max(0.0, timeout)))
+
+        reports = []
+        for job in jobs:
+            reports.append(self._job_report(job))
+            if job.task.done():
+                job.delivered = True
+        result: Dict[str, Any] = {"jobs": reports}
+        if unknown:
+            result["unknown_job_ids"] = unknown
+        return result
+
+    async def wait_pending(self) -> bool:
+        """等待所有尚未交付的任务完成（受调用截止时间约束）
+
+        返回是否有已完成但尚未交给模型的结果。
+        """
+        running = [
+            job.task for job in self._jobs.values() if not job.delivered and not job.task.done()
+        ]
+        if running:
+            await asyncio.wait(running, timeout=clamp_timeout(None))
+        return any(not job.delivered and job.task.done() for job in self._jobs.values())
+
+    def cancel_all(self) -> int:
+        """取消所有仍在运行的任务，返回取消的数量"""
+        cancelled = 0
+        for job in self._jobs.values():
+            if not job.task.done():
+                job.task.cancel()
+                cancelled += 1
+        if cancelled:
+            push_warning(
+                f"ReAct 运行结束时仍有 {cancelled} 个后台工具任务未完成，已取消",
+                location=get_location(),
+            )
+        return cancelled
+
+    @property
+    def tool(self) -> Tool:
+        """供模型查询或等待后台任务的内置工具"""
+        if self._tool is None:
+            manager = self
+
+            async def check_background_jobs(
+                job_ids: Optional[List[str]] = None,
+                wait: bool = False,
+                timeout: float = DEFAULT_WAIT_TIMEOUT,
+            ) -> Dict[str, Any]:
+                """
+                Args:
+                    job_ids: 要查询的 job id 列表，留空表示所有尚未交付结果的任务
+                    wait: 是否等待这些任务完成
+                    timeout: 等待的最长秒数
+                """
+                return await manager.check(job_ids, wait, timeout)
+
+            self._tool = Tool(
+                name=BACKGROUND_JOBS_TOOL_NAME,
+                description=(
+                    "Check the status of background tool jobs and collect the results of "
+                    "finished ones. Set wait=true to block until the given jobs finish or the "
+                    "timeout expires."
+                ),
+                func=check_background_jobs,
+                dedupe=False,
+            )
+        return self._tool
+
+
+__all__ = [
+    "BACKGROUND_JOBS_TOOL_NAME",
+    "BackgroundJob",
+    "BackgroundJobManager",
+]
@@ -5,12 +5,19 @@ from __future__ import annotations
 import asyncio
 import inspect
 import json
-from typing import Any, Awaitable, Callable, Dict, List, get_type_hints, get_origin, get_args, Union as TypingUnion
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple, get_type_hints, get_origin, get_args, Union as TypingUnion
 
 from SimpleLLMFunc.logger import push_debug, push_error, push_warning
 from SimpleLLMFunc.logger.logger import get_location
+from SimpleLLMFunc.tool import Tool
+from SimpleLLMFunc.base.tool_call.output_store import ToolOutputStore
 from SimpleLLMFunc.type.multimodal import ImgPath, ImgUrl, Text
+from SimpleLLMFunc.type.tool_call import ParsedToolCall
 from SimpleLLMFunc.observability.langfuse_client import langfuse_client
+from SimpleLLMFunc.utils import DeadlineExceededError, clamp_timeout
+
+if TYPE_CHECKING:
+    from SimpleLLMFunc.base.tool_call.background import BackgroundJobManager
 
 
 def _convert_tool_arguments(
@@ -164,11 +171,131 @@ def _convert_tool_arguments(
         return arguments
 
 
+def _resolve_tool_object(tool_func: Callable[..., Awaitable[Any]]) -> Optional[Tool]:
+    """从 tool_map 中的可调用对象反查其 Tool 对象。
+
+    tool_map 中保存的是 `Tool.run` 绑定方法，也兼容直接放入被 @tool 装饰的函数。
+    """
+    for candidate in (getattr(tool_func, "__self__", None), getattr(tool_func, "_tool", None)):
+        if isinstance(candidate, Tool):
+            return candidate
+    return None
+
+
+def _canonical_tool_call_key(tool_call: Dict[str, Any]) -> Tuple[str, str]:
+    """计算工具调用的去重键：(工具名, 规范化后的参数 JSON)。
+
+    参数无法解析为 JSON 时退化为原始字符串比较。
+    """
+    parsed_call = ParsedToolCall.from_dict(tool_call)
+    tool_name = parsed_call.name or ""
+    if parsed_call.arguments_error is not None:
+        return tool_name, parsed_call.arguments_str
+    canonical_arguments = json.dumps(
+        parsed_call.arguments,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return tool_name, canonical_arguments
+
+
+def group_duplicate_tool_calls(
+    tool_calls: List[Dict[str, Any]],
+    tool_map: Dict[str, Callable[..., Awaitable[Any]]],
+) -> List[List[int]]:
+    """将同一批次中名称和参数相同的工具调用分组。
+
+    每组是 `tool_calls` 中的下标列表，第一个下标为实际执行的代表调用，
+    其余调用直接复用代表调用的结果。`dedupe=False` 的工具和未知工具不参与分组。
+
+    Args:
+        tool_calls: 本批次的工具调用列表
+        tool_map: 工具名称到函数的映射字典
+
+    Returns:
+        按代表调用出现顺序排列的下标分组
+    """
+    groups: List[List[int]] = []
+    group_by_key: Dict[Tuple[str, str], List[int]] = {}
+
+    for index, tool_call in enumerate(tool_calls):
+        tool_name = tool_call.get("function", {}).get("name")
+        tool_func = tool_map.get(tool_name) if tool_name else None
+        tool_obj = _resolve_tool_object(tool_func) if tool_func else None
+        # 未调用 Tool.__init__ 的旧式子类没有 dedupe 属性，按不去重处理
+        dedupe = tool_obj is None or getattr(tool_obj, "dedupe", False)
+        if tool_func is None or not dedupe:
+            groups.append([index])
+            continue
+
+        key = _canonical_tool_call_key(tool_call)
+        if key in group_by_key:
+            group_by_key[key].append(index)
+        else:
+            group = [index]
+            group_by_key[key] = group
+            groups.append(group)
+
+    return groups
+
+
+def fan_out_tool_messages(
+    tool_call: Dict[str, Any],
+    messages_to_append: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """把代表调用的结果消息复制给一个重复调用（替换 tool_call_id）。"""
+    tool_call_id = tool_call.get("id")
+    fanned_messages: List[Dict[str, Any]] = []
+    for message in messages_to_append:
+        copied = dict(message)
+        if copied.get("role") == "tool":
+            copied["tool_call_id"] = tool_call_id
+        fanned_messages.append(copied)
+    return fanned_messages
+
+
 async def _execute_single_tool_call(
     tool_call: Dict[str, Any],
     tool_map: Dict[str, Callable[..., Awaitable[Any]]],
+    tool_output_store: Optional[ToolOutputStore] = None,
+    background_jobs: Optional["BackgroundJobManager"] = None,
 ) -> tuple[Dict[str, Any], List[Dict[str, Any]], bool]:
-    """Execute a single tool call and return its results.
+    """Execute a single tool call and apply the output-size policy.
+
+    提供 `tool_output_store` 时，超过阈值的 tool message 内容会被写入存储，
+    消息中只保留预览和 handle，模型可通过 `read_tool_output` 分页读取。
+
+    提供 `background_jobs` 且工具声明为 `background=True` 时，工具在后台启动，
+    立即返回 pending 消息。
+
+    Returns:
+        Tuple of (tool_call_dict, list_of_messages_to_append, is_multimodal)
+    """
+    if background_jobs is not None and background_jobs.is_background(
+        tool_call.get("function", {}).get("name")
+    ):
+        return (tool_call, background_jobs.submit(tool_call), False)
+
+    tool_call, messages_to_append, is_multimodal = await _invoke_single_tool_call(
+        tool_call, tool_map
+    )
+    if tool_output_store is None or is_multimodal:
+        return (tool_call, messages_to_append, is_multimodal)
+
+    tool_name = tool_call.get("function", {}).get("name") or ""
+    for message in messages_to_append:
+        content = message.get("content")
+        if message.get("role") == "tool" and isinstance(content, str):
+            message["content"] = await tool_output_store.spill(tool_name, content)
+    return (tool_call, messages_to_append, is_multimodal)
+
+
+async def _invoke_single_tool_call(
+    tool_call: Dict[str, Any],
+    tool_map: Dict[str, Callable[..., Awaitable[Any]]],
+) -> tuple[Dict[str, Any], List[Dict[str, Any]], bool]:
+    """Invoke a single tool and convert its result into messages.
 
     处理两类工具调用结果：
     1. 普通工具调用（返回 JSON 可序列化的文本/对象）
@@ -188,10 +315,10 @@ async def _execute_single_tool_call(
         其中 is_multimodal 指示是否为多模态结果
     """
 
-    tool_call_id = tool_call.get("id")
-    function_call = tool_call.get("function", {})
-    tool_name = function_call.get("name")
-    arguments_str = function_call.get("arguments", "{}")
+    parsed_call = ParsedToolCall.from_dict(tool_call)
+    tool_call_id = parsed_call.id
+    tool_name = parsed_call.name
+    arguments_str = parsed_call.arguments_str
     messages_to_append: List[Dict[str, Any]] = []
 
     if tool_name not in tool_map:
@@ -214,7 +341,8 @@ async def _execute_single_tool_call(
         metadata={"tool_call_id": tool_call_id},
     ) as tool_span:
         try:
-            arguments = json.loads(arguments_str)
+            # 参数在提取工具调用时只解析一次，这里复用缓存的结果
+            arguments = parsed_call.parse_arguments()
 
             # 更新为解析后的参数
             tool_span.update(input=arguments)
@@ -226,7 +354,17 @@ async def _execute_single_tool_call(
             # 转换参数：将字符串列表转换为多模态对象列表
             converted_arguments = _convert_tool_arguments(arguments, tool_func)
             
-            tool_result = await tool_func(**converted_arguments)
+            # 设置了整体截止时间时，工具执行时间不超过剩余时间
+            try:
+                async with asyncio.timeout(clamp_timeout(None)) as tool_scope:
+                    tool_result = await tool_func(**converted_arguments)
+            except TimeoutError as exc:
+                # 只有截止时间本身到达时才转换；工具自己抛出的超时（如 HTTP 超时）按普通工具错误处理
+                if not tool_scope.expired():
+                    raise
+                raise DeadlineExceededError(
+                    f"工具 '{tool_name}' 执行超过调用截止时间"
+                ) from exc
 
             # 更新工具调用观测数据，序列化输出以便langfuse记录
             from SimpleLLMFunc.base.tool_call.validation import (
@@ -422,11 +560,16 @@ async def process_tool_calls(
     tool_calls: List[Dict[str, Any]],
     messages: List[Dict[str, Any]],
     tool_map: Dict[str, Callable[..., Awaitable[Any]]],
+    tool_output_store: Optional[ToolOutputStore] = None,
+    background_jobs: Optional["BackgroundJobManager"] = None,
 ) -> List[Dict[str, Any]]:
     """Execute tool calls concurrently and append results to the message history.
 
     All tool calls are executed in parallel using structured concurrency with asyncio.gather(),
     then results are appended to messages in the original order.
+
+    同一批次中名称和参数完全相同的调用只执行一次，结果分发给每个 tool_call_id
+    （可通过 `@tool(dedupe=False)` 对有副作用的工具关闭）。
     
     对于多模态工具调用，会先插入一个 assistant message 说明将使用该工具，
     然后再插入工具结果的 user message。
@@ -450,6 +593,8 @@ async def process_tool_calls(
         tool_calls: 要执行的工具调用列表
         messages: 消息历史列表。**会被就地修改**（仅修改 assistant message，不改变列表本身）
         tool_map: 工具名称到函数的映射字典
+        tool_output_store: 可选的工具输出存储，超长输出只以预览 + handle 的形式进入消息
+        background_jobs: 可选的后台任务管理器，`background=True` 的工具会在后台启动并立即返回 pending 消息
 
     Returns:
         修改后的完整消息列表，包含原始消息、工具调用结果和多模态替代消息
@@ -458,9 +603,38 @@ async def process_tool_calls(
     if not tool_calls:
         return messages
 
+    # 统一为 ParsedToolCall，去重、执行共用同一次参数解析
+    tool_calls = [ParsedToolCall.from_dict(tool_call) for tool_call in tool_calls]
+
+    # 合并重复调用，每组只执行一次
+    groups = group_duplicate_tool_calls(tool_calls, tool_map)
+    deduplicated_count = len(tool_calls) - len(groups)
+    if deduplicated_count:
+        push_debug(
+            f"工具调用批次中合并了 {deduplicated_count} 个重复调用",
+            location=get_location(),
+        )
+
     # Execute all tool calls concurrently
-    tasks = [_execute_single_tool_call(tool_call, tool_map) for tool_call in tool_calls]
-    results = await asyncio.gather(*tasks)
+    tasks = [
+        _execute_single_tool_call(
+            tool_calls[group[0]], tool_map, tool_output_store, background_jobs
+        )
+        for group in groups
+    ]
+    group_results = await asyncio.gather(*tasks)
+
+    # 按原始顺序展开结果，重复调用复用代表调用的结果消息
+    results: List[tuple[Dict[str, Any], List[Dict[str, Any]], bool]] = [None] * len(tool_calls)  # type: ignore
+    for group, (tool_call_dict, messages_to_append, is_multimodal) in zip(groups, group_results):
+        results[group[0]] = (tool_call_dict, messages_to_append, is_multimodal)
+        for duplicate_index in group[1:]:
+            duplicate_call = tool_calls[duplicate_index]
+            results[duplicate_index] = (
+                duplicate_call,
+                fan_out_tool_messages(duplicate_call, messages_to_append),
+                is_multimodal,
+            )
 
     # 分类结果：普通工具调用和多模态工具调用
     normal_results: List[List[Dict[str, Any]]] = []
@@ -11,12 +11,16 @@ from SimpleLLMFunc.logger.logger import get_location
 from SimpleLLMFunc.type.message import ReasoningDetail
 from SimpleLLMFunc.type.tool_call import (
     AccumulatedToolCall,
+    ParsedToolCall,
     ToolCallFunctionInfo,
 )
 
 
 def extract_tool_calls(response: Any) -> List[Dict[str, Any]]:
-    """Extract tool-call metadata from a synchronous response."""
+    """Extract tool-call metadata from a synchronous response.
+
+    返回的每个工具调用都是 `ParsedToolCall`，参数在后续使用时只解析一次。
+    """
 
     tool_calls: List[Dict[str, Any]] = []
 
@@ -26,14 +30,14 @@ def extract_tool_calls(response: Any) -> List[Dict[str, Any]]:
             if hasattr(message, "tool_calls") and message.tool_calls:
                 for tool_call in message.tool_calls:
                     tool_calls.append(
-                        {
-                            "id": tool_call.id,
-                            "type": getattr(tool_call, "type", "function"),
-                            "function": {
+                        ParsedToolCall(
+                            id=tool_call.id,
+                            type=getattr(tool_call, "type", "function"),
+                            function={
                                 "name": tool_call.function.name,
                                 "arguments": tool_call.function.arguments,
                             },
-                        }
+                        )
                     )
     except Exception as exc:
         push_error(f"提取工具调用时出错: {str(exc)}")
@@ -44,7 +48,7 @@ def extract_tool_calls(response: Any) -> List[Dict[str, Any]]:
 def accumulate_tool_calls_from_chunks(
     tool_call_chunks: List[Dict[str, Any]],
 ) -> List[Dict[str, Any]]:
-    """Merge tool-call chunks emitted during streaming responses."""
+    """Merge tool-call chunks emitted during streaming responses into `ParsedToolCall` objects."""
 
     accumulated_calls: Dict[int, AccumulatedToolCall] = {}
 
@@ -83,14 +87,14 @@ def accumulate_tool_calls_from_chunks(
             if not call["type"]:
                 call["type"] = "function"
             complete_tool_calls.append(
-                {
-                    "id": call["id"],
-                    "type": call["type"],
-                    "function": {
+                ParsedToolCall(
+                    id=call["id"],
+                    type=call["type"],
+                    function={
                         "name": call["function"]["name"],
                         "arguments": call["function"]["arguments"],
                     },
-                }
+                )
             )
 
     return complete_tool_calls
@@ -0,0 +1,182 @@
+"""Content-addressed store for oversized tool outputs.
+
+超大的工具输出（文件内容、查询结果等）如果直接放进 tool message，会在之后的每一轮迭代中
+被重复发送，并被复制进每一个事件。`ToolOutputStore` 为工具输出设置大小上限：
+
+- 超过 `max_inline_chars` 的输出按内容哈希写入本地目录
+- 模型只收到截断的预览以及一个 handle
+- 模型可以通过内置工具 `read_tool_output(handle, offset, length)` 分页读取完整内容
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from SimpleLLMFunc.logger import push_debug
+from SimpleLLMFunc.logger.logger import get_location
+from SimpleLLMFunc.tool import Tool
+
+READ_TOOL_OUTPUT_NAME = "read_tool_output"
+
+DEFAULT_MAX_INLINE_CHARS: int = 8000
+DEFAULT_PREVIEW_CHARS: int = 2000
+DEFAULT_READ_LENGTH: int = 4000
+
+_HANDLE_PATTERN = re.compile(r"^[0-9a-f]{16,64}$")
+
+
+class ToolOutputStore:
+    """工具输出的内容寻址存储
+
+    Example:
+        ```python
+        store = ToolOutputStore(max_inline_chars=4000)
+
+        @llm_function(llm_interface=llm, toolkit=[dump_table], tool_output_store=store)
+        async def analyze(table: str) -> str:
+            ...
+        ```
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        max_inline_chars: int = DEFAULT_MAX_INLINE_CHARS,
+        preview_chars: int = DEFAULT_PREVIEW_CHARS,
+        max_read_length: int = DEFAULT_READ_LENGTH,
+    ):
+        """
+        Args:
+            directory: 存储目录，默认为系统临时目录下的 `simplellmfunc_tool_outputs`
+            max_inline_chars: 工具输出超过该字符数时写入存储，只向模型发送预览
+            preview_chars: 预览保留的字符数
+            max_read_length: `read_tool_output` 单次最多返回的字符数
+        """
+        if preview_chars > max_inline_chars:
+            raise ValueError("preview_chars 不能大于 max_inline_chars")
+        self.directory = Path(
+            directory
+            if directory is not None
+            else os.path.join(tempfile.gettempdir(), "simplellmfunc_tool_outputs")
+        )
+        self.max_inline_chars = max_inline_chars
+        self.preview_chars = preview_chars
+        self.max_read_length = max_read_length
+        self._read_tool: Optional[Tool] = None
+
+    def _path_for(self, handle: str) -> Path:
+        if not _HANDLE_PATTERN.match(handle):
+            raise ValueError(f"无效的工具输出 handle: {handle!r}")
+        return self.directory / f"{handle}.txt"
+
+    def put(self, content: str) -> str:
+        """写入内容并返回 handle；相同内容只存储一次"""
+        handle = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        path = self._path_for(handle)
+        if not path.exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再原子替换，避免并发读到半个文件；
+            # 临时文件名唯一，同一进程内的并发写入不会互相覆盖
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=self.directory,
+                prefix=f"{handle}.",
+                suffix=".tmp",
+                delete=False,
+            ) as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_file.name, path)
+        return handle
+
+    def read(self, handle: str, offset: int = 0, length: Optional[int] = None) -> str:
+        """按字符偏移读取已存储的内容"""
+        content = self._path_for(handle).read_text(encoding="utf-8")
+        offset = max(0, offset)
+        if length is None:
+            return content[offset:]
+        return content[offset : offset + max(0, length)]
+
+    async def spill(self, tool_name: str, content: str) -> str:
+        """对超长内容执行落盘，返回应放入 tool message 的内容
+
+        未超过阈值的内容原样返回；`read_tool_output` 自身的输出从不落盘。
+        """
+        if tool_name == READ_TOOL_OUTPUT_NAME or len(content) <= self.max_inline_chars:
+            return content
+
+        handle = await asyncio.to_thread(self.put, content)
+        push_debug(
+            f"工具 '{tool_name}' 输出 {len(content)} 字符，已写入存储 handle={handle}",
+            location=get_location(),
+        )
+        return (
+            f"[Output of tool '{tool_name}' is {len(content)} characters and was stored "
+            f"with handle '{handle}'. Showing the first {self.preview_chars} characters. "
+            f"Call {READ_TOOL_OUTPUT_NAME}(handle, offset, length) to read the rest.]\n"
+            f"{content[: self.preview_chars]}"
+        )
+
+    @property
+    def read_tool(self) -> Tool:
+        """供模型分页读取已存储输出的内置工具"""
+        if self._read_tool is None:
+            store = self
+
+            async def read_tool_output(
+                handle: str, offset: int = 0, length: int = DEFAULT_READ_LENGTH
+            ) -> Dict[str, Any]:
+                """
+                Args:
+                    handle: 工具输出预览中给出的 handle
+                    offset: 起始字符偏移
+                    length: 读取的字符数
+                """
+                try:
+                    content = await asyncio.to_thread(store.read, handle)
+                except (OSError, ValueError) as exc:
+                    return {"error": f"无法读取工具输出 {handle!r}: {exc}"}
+                length = min(max(0, length), store.max_read_length)
+                offset = max(0, offset)
+                end = min(len(content), offset + length)
+                return {
+                    "handle": handle,
+                    "offset": offset,
+                    "end": end,
+                    "total_chars": len(content),
+                    "content": content[offset:end],
+                }
+
+            self._read_tool = Tool(
+                name=READ_TOOL_OUTPUT_NAME,
+                description=(
+                    "Read a slice of a large tool output that was stored instead of being "
+                    "returned inline. Use the handle from the truncated preview and page "
+                    f"through it with offset/length (at most {self.max_read_length} characters per call)."
+                ),
+                func=read_tool_output,
+            )
+        return self._read_tool
+
+
+def with_tool_output_reader(
+    toolkit: Optional[List[Any]],
+    tool_output_store: Optional[ToolOutputStore],
+) -> Optional[List[Any]]:
+    """启用输出存储时，把 `read_tool_output` 追加到工具列表中"""
+    if tool_output_store is None:
+        return toolkit
+    return [*(toolkit or []), tool_output_store.read_tool]
+
+
+__all__ = [
+    "ToolOutputStore",
+    "READ_TOOL_OUTPUT_NAME",
+    "with_tool_output_reader",
+]
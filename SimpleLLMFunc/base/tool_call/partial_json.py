@@ -0,0 +1,273 @@
+"""Incremental JSON parser for streamed tool-call arguments.
+
+模型流式输出工具调用时，参数 JSON 以片段形式到达。`PartialJSONParser` 在每个片段到达时
+只扫描新增的字符，维护容器栈和字符串/标量状态；需要时才把当前前缀补全为合法 JSON
+（闭合未结束的字符串和容器，丢弃不完整的键或标量）并解析出部分结果。
+
+Example:
+    ```python
+    parser = PartialJSONParser()
+    parser.feed('{"path": "a.py", "content": "print(')
+    parser.partial()  # {"path": "a.py", "content": "print("}
+    ```
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, List, Optional
+
+_WHITESPACE = frozenset(" \t\r\n")
+_SCALAR_START = frozenset("-0123456789tfn")
+_SCALAR_END = frozenset(" \t\r\n,]}")
+
+
+def _closers(stack: List[List[str]]) -> str:
+    return "".join("}" if frame[0] == "{" else "]" for frame in reversed(stack))
+
+
+class PartialJSONSnapshot:
+    """解析器在某一时刻的快照，访问 `value` 时才补全并解析"""
+
+    __slots__ = (
+        "_parser",
+        "_length",
+        "_string_end",
+        "_token_start",
+        "_closers",
+        "_safe_end",
+        "_safe_closers",
+        "_value",
+        "_resolved",
+    )
+
+    def __init__(
+        self,
+        parser: "PartialJSONParser",
+        length: int,
+        string_end: Optional[int],
+        token_start: Optional[int],
+        closers: str,
+        safe_end: int,
+        safe_closers: str,
+    ) -> None:
+        self._parser = parser
+        self._length = length
+        self._string_end = string_end
+        self._token_start = token_start
+        self._closers = closers
+        self._safe_end = safe_end
+        self._safe_closers = safe_closers
+        self._value: Any = None
+        self._resolved = False
+
+    @property
+    def text(self) -> str:
+        """快照时刻累积的原始文本"""
+        return self._parser.text(self._length)
+
+    def _candidate(self) -> Optional[str]:
+        text = self._parser.text(self._length)
+        if self._string_end is not None:
+            # 正在输出字符串值：截掉不完整的转义后闭合字符串
+            return text[: self._string_end] + '"' + self._closers
+        if self._token_start is not None:
+            # 正在输出数字或字面量：只有本身已是合法 JSON 时才保留
+            try:
+                json.loads(text[self._token_start :])
+            except ValueError:
+                pass
+            else:
+                return text + self._closers
+        if self._safe_end == 0:
+            return None
+        return text[: self._safe_end] + self._safe_closers
+
+    @property
+    def value(self) -> Any:
+        """补全后的部分结果，尚无可解析内容时为 None"""
+        if not self._resolved:
+            candidate = self._candidate()
+            try:
+                self._value = json.loads(candidate) if candidate else None
+            except ValueError:
+                self._value = None
+            self._resolved = True
+        return self._value
+
+
+class PartialJSONParser:
+    """增量 JSON 解析器，`feed()` 的开销只与新增片段长度有关"""
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self._length = 0
+        self._cached_text = ""
+        # 容器栈：每一层为 [容器符号, 状态]，状态取值 key / colon / value / comma
+        self._stack: List[List[str]] = []
+        self._root_state = "value"
+        self._in_string = False
+        self._string_is_key = False
+        self._escape_start: Optional[int] = None
+        self._escape_remaining = 0
+        self._token_start: Optional[int] = None
+        # 最近一个"截断后补上闭合符号即为合法 JSON"的位置
+        self._safe_end = 0
+        self._safe_closers = ""
+        self.error: Optional[str] = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def is_complete(self) -> bool:
+        """根值是否已经完整结束"""
+        return self._root_state == "done" and self._token_start is None
+
+    def text(self, length: Optional[int] = None) -> str:
+        """累积的原始文本（可指定前缀长度）"""
+        if len(self._cached_text) != self._length:
+            self._cached_text = "".join(self._parts)
+            self._parts = [self._cached_text]
+        if length is None or length == self._length:
+            return self._cached_text
+        return self._cached_text[:length]
+
+    def feed(self, delta: str) -> None:
+        """追加一个片段；出现非法 JSON 时记录 error 并停止扫描"""
+        if not delta:
+            return
+        offset = self._length
+        self._parts.append(delta)
+        self._length += len(delta)
+        if self.error is not None:
+            return
+        for position, char in enumerate(delta, offset):
+            self._consume(char, position)
+            if self.error is not None:
+                return
+
+    def snapshot(self) -> PartialJSONSnapshot:
+        """记录当前状态，结果在访问时才计算"""
+        in_value_string = self._in_string and not self._string_is_key
+        string_end: Optional[int] = None
+        if in_value_string:
+            string_end = self._escape_start if self._escape_start is not None else self._length
+        return PartialJSONSnapshot(
+            parser=self,
+            length=self._length,
+            string_end=string_end,
+            token_start=self._token_start,
+            closers=_closers(self._stack) if (in_value_string or self._token_start is not None) else "",
+            safe_end=self._safe_end,
+            safe_closers=self._safe_closers,
+        )
+
+    def partial(self) -> Any:
+        """当前前缀补全后的部分结果"""
+        return self.snapshot().value
+
+    # ------------------------------------------------------------------
+    # 扫描状态机
+    # ------------------------------------------------------------------
+
+    def _state(self) -> str:
+        return self._stack[-1][1] if self._stack else self._root_state
+
+    def _set_state(self, state: str) -> None:
+        if self._stack:
+            self._stack[-1][1] = state
+        else:
+            self._root_state = state
+
+    def _mark_safe(self, end: int) -> None:
+        self._safe_end = end
+        self._safe_closers = _closers(self._stack)
+
+    def _value_done(self, end: int) -> None:
+        self._set_state("comma" if self._stack else "done")
+        self._mark_safe(end)
+
+    def _close(self, char: str, position: int) -> None:
+        expected = "{" if char == "}" else "["
+        if not self._stack or self._stack[-1][0] != expected:
+            self.error = f"位置 {position} 处的 '{char}' 不匹配"
+            return
+        self._stack.pop()
+        self._value_done(position + 1)
+
+    def _consume(self, char: str, position: int) -> None:
+        if self._in_string:
+            if self._escape_remaining:
+                self._escape_remaining -= 1
+                if not self._escape_remaining:
+                    self._escape_start = None
+            elif self._escape_start is not None:
+                if char == "u":
+                    self._escape_remaining = 4
+                else:
+                    self._escape_start = None
+            elif char == "\\":
+                self._escape_start = position
+            elif char == '"':
+                self._in_string = False
+                if self._string_is_key:
+                    self._set_state("colon")
+                else:
+                    self._value_done(position + 1)
+            return
+
+        if self._token_start is not None:
+            if char not in _SCALAR_END:
+                return
+            self._token_start = None
+            self._value_done(position)
+
+        if char in _WHITESPACE:
+            return
+
+        state = self._state()
+        if state == "value":
+            if char == "{":
+                self._stack.append(["{", "key"])
+                self._mark_safe(position + 1)
+            elif char == "[":
+                self._stack.append(["[", "value"])
+                self._mark_safe(position + 1)
+            elif char == '"':
+                self._in_string = True
+                self._string_is_key = False
+            elif char in _SCALAR_START:
+                self._token_start = position
+            elif char == "]":
+                self._close(char, position)
+            else:
+                self.error = f"位置 {position} 处出现意外的字符 '{char}'"
+        elif state == "key":
+            if char == '"':
+                self._in_string = True
+                self._string_is_key = True
+            elif char == "}":
+                self._close(char, position)
+            else:
+                self.error = f"位置 {position} 处应为键名，实际为 '{char}'"
+        elif state == "colon":
+            if char == ":":
+                self._set_state("value")
+            else:
+                self.error = f"位置 {position} 处应为 ':'，实际为 '{char}'"
+        elif state == "comma":
+            if char == ",":
+                self._set_state("key" if self._stack[-1][0] == "{" else "value")
+            elif char in "}]":
+                self._close(char, position)
+            else:
+                self.error = f"位置 {position} 处应为 ',' 或闭合符号，实际为 '{char}'"
+        else:
+            self.error = f"位置 {position} 处在 JSON 结束后仍有内容"
+
+
+__all__ = [
+    "PartialJSONParser",
+    "PartialJSONSnapshot",
+]
@@ -0,0 +1,73 @@
+"""JSON-schema structured outputs.
+
+`llm_function(output_mode="json_schema")` 不在 prompt 中放入 XML Schema 和示例，而是通过
+`response_format` 把返回类型的 JSON Schema 交给支持结构化输出的服务端，再用 Pydantic 的
+`model_validate_json` 直接解析响应。
+
+OpenAI 的 `json_schema` 要求根节点是对象：Pydantic 模型直接使用自身的 schema，
+`List[...]` / `Dict[...]` / `Union[...]` 等类型包装在 `{"result": ...}` 中。
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel, create_model
+
+OUTPUT_MODES = ("xml", "json_schema")
+"""llm_function 支持的结构化输出模式"""
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*([\s\S]*?)\s*```$")
+
+
+def _is_model(return_type: Any) -> bool:
+    return isinstance(return_type, type) and issubclass(return_type, BaseModel)
+
+
+@lru_cache(maxsize=None)
+def json_output_model(return_type: Any) -> Type[BaseModel]:
+    """返回类型对应的 Pydantic 模型：模型本身，或包装为 `{"result": ...}` 的模型"""
+    if _is_model(return_type):
+        return return_type
+    return create_model("result", result=(return_type, ...))
+
+
+def build_response_format(return_type: Any) -> Dict[str, Any]:
+    """构建 OpenAI 兼容的 `response_format` 参数"""
+    model = json_output_model(return_type)
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": re.sub(r"[^a-zA-Z0-9_-]", "_", model.__name__)[:64],
+            "schema": model.model_json_schema(),
+        },
+    }
+
+
+def parse_json_output(content: str, return_type: Any) -> Any:
+    """用 `model_validate_json` 解析 JSON 输出（兼容被 ```json 代码块包裹的响应）"""
+    text = content.strip()
+    match = _CODE_FENCE.match(text)
+    if match:
+        text = match.group(1)
+    model = json_output_model(return_type)
+    result = model.model_validate_json(text)
+    return result if _is_model(return_type) else getattr(result, "result")
+
+
+def validate_output_mode(output_mode: str) -> str:
+    """校验 output_mode 参数"""
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"不支持的 output_mode: {output_mode!r}，可选值为 {OUTPUT_MODES}")
+    return output_mode
+
+
+__all__ = [
+    "OUTPUT_MODES",
+    "build_response_format",
+    "json_output_model",
+    "parse_json_output",
+    "validate_output_mode",
+]
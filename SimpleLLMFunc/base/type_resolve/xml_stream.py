@@ -0,0 +1,192 @@
+"""Streaming helpers for XML structured outputs.
+
+复杂返回类型要求模型输出以 `<ModelName>` 或 `<result>` 为根的 XML。模型经常在根元素闭合后
+继续输出解释性文字；流式模式下 `XMLRootCloseDetector` 逐片段扫描输出，根元素闭合时立即
+报告，调用方可以停止读取并取消请求，节省输出 token 和等待时间。
+
+Example:
+    ```python
+    detector = XMLRootCloseDetector("result")
+    detector.feed("<result><item>a</item>")  # False
+    detector.feed("</result>\\nHope this helps!")  # True
+    detector.trim(text)  # "<result><item>a</item></result>"
+    ```
+
+`XMLElementStream` 在此基础上用 `xml.etree.ElementTree.XMLPullParser` 增量解析根元素，
+每当根元素的一个直接子元素（列表的 `<item>`、模型的字段）闭合时立即返回该元素，
+用于在完整响应到达之前产出部分结果。
+"""
+
+from __future__ import annotations
+
+import copy
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, get_origin
+
+from pydantic import BaseModel
+
+
+def expected_xml_root(return_type: Any) -> Optional[str]:
+    """返回类型对应的 XML 根元素名称；无法确定唯一根元素时返回 None
+
+    与 `generate_xml_example` 的约定一致：Pydantic 模型使用模型类名，List / Dict 使用 `result`。
+    Union 等可能有多个根元素的类型不做提前结束。
+    """
+    if isinstance(return_type, type) and issubclass(return_type, BaseModel):
+        return return_type.__name__
+    origin = get_origin(return_type)
+    if origin in (list, List, dict, Dict) or return_type in (list, dict):
+        return "result"
+    return None
+
+
+class XMLRootCloseDetector:
+    """增量检测 XML 根元素是否已经闭合
+
+    每次 `feed()` 只扫描新增片段（以及上一片段末尾可能被截断的标签），
+    通过同名标签的嵌套深度判断根元素的闭合位置。
+    """
+
+    def __init__(self, root_name: str) -> None:
+        self.root_name = root_name
+        self._pattern = re.compile(rf"<(/?){re.escape(root_name)}(?=[\s/>])")
+        # 片段末尾可能是被截断的标签，保留到下一次扫描
+        self._keep = len(root_name) + 2
+        self._tail = ""
+        self._offset = 0
+        self._depth = 0
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+
+    @property
+    def closed(self) -> bool:
+        """根元素是否已经闭合"""
+        return self.end is not None
+
+    def feed(self, text: str) -> bool:
+        """追加一个片段，返回根元素是否已经闭合"""
+        if self.end is not None or not text:
+            return self.end is not None
+
+        buffer = self._tail + text
+        base = self._offset - len(self._tail)
+        self._offset += len(text)
+        scanned = 0
+        pending: Optional[int] = None
+
+        for match in self._pattern.finditer(buffer):
+            scanned = match.end()
+            if match.group(1) and self._depth == 0:
+                continue
+            close = buffer.find(">", match.end())
+            if close < 0:
+                # 标签的 '>' 还没到达，从该标签开始等待下一个片段
+                pending = match.start()
+                break
+            if not match.group(1):
+                scanned = close + 1
+                if buffer[close - 1] == "/":
+                    # 自闭合标签 <root/>：不改变嵌套深度，位于最外层时即为完整的根元素
+                    if self._depth == 0:
+                        self.start = base + match.start()
+                        self.end = base + close + 1
+                        return True
+                    continue
+                if self._depth == 0 and self.start is None:
+                    self.start = base + match.start()
+                self._depth += 1
+                continue
+            self._depth -= 1
+            scanned = close + 1
+            if self._depth == 0:
+                self.end = base + close + 1
+                return True
+
+        if pending is None:
+            pending = max(scanned, len(buffer) - self._keep)
+        self._tail = buffer[pending:]
+        return False
+
+    def trim(self, text: str) -> str:
+        """截取根元素部分（根元素尚未闭合时原样返回）"""
+        if self.start is None or self.end is None:
+            return text
+        return text[self.start : self.end]
+
+
+class XMLElementStream:
+    """增量解析 XML 根元素，返回已经闭合的根元素直接子元素
+
+    根元素之前的文字（如 "```xml"）被跳过，根元素闭合之后的内容不再解析。
+    XML 不合法时记录 `error` 并停止解析，由调用方回退到完整响应的解析。
+    """
+
+    def __init__(self, root_name: str) -> None:
+        self.root_name = root_name
+        self._detector = XMLRootCloseDetector(root_name)
+        self._parser: Optional[ET.XMLPullParser] = None
+        self._pending: List[str] = []
+        self._pending_offset = 0
+        self._root: Optional[ET.Element] = None
+        self._depth = 0
+        self.error: Optional[str] = None
+
+    @property
+    def closed(self) -> bool:
+        """根元素是否已经闭合"""
+        return self._detector.closed
+
+    def feed(self, text: str) -> List[ET.Element]:
+        """追加一个片段，返回本次新闭合的根元素直接子元素（按出现顺序）"""
+        if self.error is not None or not text or self._detector.closed:
+            return []
+
+        self._detector.feed(text)
+        self._pending.append(text)
+        start, end = self._detector.start, self._detector.end
+        if start is None:
+            return []
+
+        pending = "".join(self._pending)
+        self._pending = []
+        if self._parser is None:
+            self._parser = ET.XMLPullParser(events=("start", "end"))
+            pending = pending[start - self._pending_offset :]
+            self._pending_offset = start
+        if end is not None:
+            pending = pending[: end - self._pending_offset]
+        self._pending_offset += len(pending)
+
+        try:
+            self._parser.feed(pending)
+            return self._read_events()
+        except ET.ParseError as exc:
+            self.error = str(exc)
+            return []
+
+    def _read_events(self) -> List[ET.Element]:
+        assert self._parser is not None
+        completed: List[ET.Element] = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                self._depth += 1
+                continue
+            self._depth -= 1
+            if self._depth == 1 and self._root is not None:
+                # 已返回的子元素不再保留在根元素中，避免长列表占用内存；
+                # 解析器之后还会写入原元素的 tail，因此返回不带 tail 的副本
+                self._root.remove(element)
+                element = copy.copy(element)
+                element.tail = None
+                completed.append(element)
+        return completed
+
+
+__all__ = [
+    "XMLElementStream",
+    "XMLRootCloseDetector",
+    "expected_xml_root",
+]
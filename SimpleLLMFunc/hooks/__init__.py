@@ -10,6 +10,7 @@ from SimpleLLMFunc.hooks.events import (
     ReactIterationStartEvent,
     LLMCallStartEvent,
     LLMChunkArriveEvent,
+    ToolCallArgumentsDeltaEvent,
     LLMCallEndEvent,
     LLMCallErrorEvent,
     ToolCallsBatchStartEvent,
@@ -19,6 +20,8 @@ from SimpleLLMFunc.hooks.events import (
     ToolCallsBatchEndEvent,
     ReactIterationEndEvent,
     ReactEndEvent,
+    StreamContentBuffer,
+    AccumulatedContent,
 )
 from SimpleLLMFunc.hooks.stream import (
     EventYield,
@@ -41,6 +44,7 @@ __all__ = [
     "ReactIterationStartEvent",
     "LLMCallStartEvent",
     "LLMChunkArriveEvent",
+    "ToolCallArgumentsDeltaEvent",
     "LLMCallEndEvent",
     "LLMCallErrorEvent",
     "ToolCallsBatchStartEvent",
@@ -50,6 +54,9 @@ __all__ = [
     "ToolCallsBatchEndEvent",
     "ReactIterationEndEvent",
     "ReactEndEvent",
+    # 流式内容缓冲
+    "StreamContentBuffer",
+    "AccumulatedContent",
     # Stream 类型
     "ResponseYield",
     "EventYield",
@@ -8,7 +8,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, TypedDict, NotRequired
+from typing import Any, Callable, Dict, List, Optional, TypedDict, NotRequired, Union
 
 # 导入类型系统
 from SimpleLLMFunc.type.message import MessageList
@@ -35,6 +35,7 @@ class ReActEventType(str, Enum):
     REACT_ITERATION_START = "react_iteration_start"
     LLM_CALL_START = "llm_call_start"
     LLM_CHUNK_ARRIVE = "llm_chunk_arrive"
+    TOOL_CALL_ARGUMENTS_DELTA = "tool_call_arguments_delta"
     LLM_CALL_END = "llm_call_end"
     LLM_CALL_ERROR = "llm_call_error"
     TOOL_CALLS_BATCH_START = "tool_calls_batch_start"
@@ -135,18 +136,136 @@ class LLMCallStartEvent(ReActEvent):
     stream: bool  # 是否流式调用
 
 
+class StreamContentBuffer:
+    """流式内容缓冲区
+
+    chunk 内容以列表形式追加，物化时一次 `join` 后合并为单个片段，
+    避免 `+=` 字符串拼接带来的平方级复制。
+    同一次 LLM 调用的所有 chunk 事件共享一个缓冲区，事件只保存一个轻量的视图。
+    """
+
+    __slots__ = ("_parts", "_count", "_length", "_cached_text")
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self._count = 0
+        self._length = 0
+        self._cached_text = ""
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, text: str) -> None:
+        if text:
+            self._parts.append(text)
+            self._count += 1
+            self._length += len(text)
+
+    def text(self, length: Optional[int] = None) -> str:
+        """物化前 length 个字符（默认全部）"""
+        if len(self._cached_text) != self._length:
+            self._cached_text = "".join(self._parts)
+            self._parts = [self._cached_text]
+        if length is None or length == self._length:
+            return self._cached_text
+        return self._cached_text[:length]
+
+    def view(self) -> "AccumulatedContent":
+        """当前内容的快照视图"""
+        return AccumulatedContent(self, self._length)
+
+
+class AccumulatedContent:
+    """StreamContentBuffer 前缀的惰性视图，访问时才物化为字符串"""
+
+    __slots__ = ("_buffer", "_length")
+
+    def __init__(self, buffer: StreamContentBuffer, length: int) -> None:
+        self._buffer = buffer
+        self._length = length
+
+    def __str__(self) -> str:
+        return self._buffer.text(self._length)
+
+
+def _lazy_fields(**materializers: Callable[[Any], Any]) -> Callable[[type], type]:
+    """在 dataclass 生成之后，把指定字段的类属性替换为 property
+
+    字段仍是普通的 dataclass 字段（构造参数、`fields()`、`asdict()`、`replace()` 不变），
+    传入的原始值（字符串或惰性视图）保存在实例的 `_<name>` 中，读取属性时才物化。
+    """
+
+    def install(cls: type) -> type:
+        for name, materialize in materializers.items():
+            attr = f"_{name}"
+
+            def getter(self: Any, _attr: str = attr, _materialize: Any = materialize) -> Any:
+                return _materialize(self.__dict__[_attr])
+
+            def setter(self: Any, value: Any, _attr: str = attr) -> None:
+                self.__dict__[_attr] = value
+
+            setattr(cls, name, property(getter, setter))
+        return cls
+
+    return install
+
+
+def _materialize_text(value: Union[str, AccumulatedContent]) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+@_lazy_fields(accumulated_content=_materialize_text)
 @dataclass
 class LLMChunkArriveEvent(ReActEvent):
     """LLM chunk 到达事件（仅 streaming）
     
     触发时机：流式调用时，每个 chunk 到达时（仅在 streaming 模式下触发）
+
+    `accumulated_content` 可以传入字符串，也可以传入 `AccumulatedContent` 视图；
+    后者在访问属性时才物化，多个事件共享同一个缓冲区。
     """
     # Chunk 数据
-    chunk: LLMStreamChunk  # LLM 返回的 chunk 对象
-    accumulated_content: str  # 累积的内容（从开始到当前 chunk）
+    chunk: Optional[LLMStreamChunk]  # LLM 返回的 chunk 对象（关闭原始 chunk 时为 None）
+    # 累积的内容（从开始到当前 chunk）
+    accumulated_content: str
     chunk_index: int  # Chunk 序号（从 0 开始）
 
 
+def _materialize_partial_arguments(value: Any) -> Any:
+    from SimpleLLMFunc.base.tool_call.partial_json import PartialJSONSnapshot
+
+    return value.value if isinstance(value, PartialJSONSnapshot) else value
+
+
+def _materialize_accumulated_arguments(value: Any) -> str:
+    # 传入 PartialJSONSnapshot 时读取快照时刻的原始文本
+    return value if isinstance(value, str) else value.text
+
+
+@_lazy_fields(
+    partial_arguments=_materialize_partial_arguments,
+    accumulated_arguments=_materialize_accumulated_arguments,
+)
+@dataclass
+class ToolCallArgumentsDeltaEvent(ReActEvent):
+    """工具调用参数增量事件（仅 streaming）
+
+    触发时机：流式调用时，每个工具调用参数片段到达时
+
+    `partial_arguments` 是到当前片段为止补全后的部分参数（未闭合的字符串和容器会被闭合，
+    不完整的键会被丢弃）。两个字段都可以传入 `PartialJSONSnapshot`，在访问属性时才解析/物化。
+    """
+    tool_call_index: int  # 工具调用在本次响应中的序号
+    tool_call_id: Optional[str]  # 工具调用 ID（首个片段到达后可用）
+    tool_name: Optional[str]  # 工具名称（首个片段到达后可用）
+    arguments_delta: str  # 本次到达的参数片段
+    # 部分解析的参数（尚无可解析内容时为 None）
+    partial_arguments: Any = None
+    # 累积的参数原始文本
+    accumulated_arguments: str = ""
+
+
 @dataclass
 class LLMCallEndEvent(ReActEvent):
     """LLM 调用结束事件
@@ -248,6 +367,7 @@ class ToolCallsBatchEndEvent(ReActEvent):
     total_execution_time: float  # 总执行时间（秒）
     success_count: int  # 成功数量
     error_count: int  # 失败数量
+    deduplicated_count: int = 0  # 因与同批次调用重复而未实际执行的调用数量
 
 
 @dataclass
@@ -276,6 +396,7 @@ class ReactEndEvent(ReActEvent):
     total_tool_calls: int  # 总工具调用次数
     total_llm_calls: int  # 总 LLM 调用次数
     total_token_usage: Optional[LLMUsage] = None  # 总 token 使用统计（如果可用）
+    budget: Optional[Dict[str, Any]] = None  # token / 费用预算状态（设置了预算时）
 
 
 __all__ = [
@@ -290,6 +411,7 @@ __all__ = [
     "ReactIterationStartEvent",
     "LLMCallStartEvent",
     "LLMChunkArriveEvent",
+    "ToolCallArgumentsDeltaEvent",
     "LLMCallEndEvent",
     "LLMCallErrorEvent",
     "ToolCallsBatchStartEvent",
@@ -299,6 +421,9 @@ __all__ = [
     "ToolCallsBatchEndEvent",
     "ReactIterationEndEvent",
     "ReactEndEvent",
+    # 流式内容缓冲
+    "StreamContentBuffer",
+    "AccumulatedContent",
 ]
 
 
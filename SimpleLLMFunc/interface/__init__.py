@@ -1,4 +1,12 @@
 from SimpleLLMFunc.interface.key_pool import APIKeyPool
+from SimpleLLMFunc.interface.cassette import (
+    Cassette,
+    CassetteMissError,
+    RecordingLLMInterface,
+    ReplayLLMInterface,
+    record_tool_map,
+    replay_tool_map,
+)
 from SimpleLLMFunc.interface.openai_compatible import OpenAICompatible
 from SimpleLLMFunc.interface.token_bucket import TokenBucket, RateLimitManager, rate_limit_manager
 
@@ -8,4 +16,10 @@ __all__ = [
     "TokenBucket",
     "RateLimitManager", 
     "rate_limit_manager",
+    "Cassette",
+    "CassetteMissError",
+    "RecordingLLMInterface",
+    "ReplayLLMInterface",
+    "record_tool_map",
+    "replay_tool_map",
 ]
@@ -0,0 +1,392 @@
+"""Record/replay cassettes for LLM and tool traffic.
+
+录制模式下，`RecordingLLMInterface` 包装真实的 LLM 接口，把每一对请求/响应
+（包括流式响应中每个 chunk 的到达时间）写入一个紧凑的 JSONL 磁带文件；
+`record_tool_map` 以同样方式包装 `execute_llm` 使用的 tool_map。
+
+回放模式下，`ReplayLLMInterface` 与 `replay_tool_map` 按请求内容匹配并返回录制的响应，
+可以按录制时的速度回放，也可以不等待、尽可能快地回放。这样基于 `execute_llm`
+的流水线可以在没有网络的机器上离线测试、做回归基准测试，而不消耗 token。
+
+Example:
+    ```python
+    # 录制
+    cassette = Cassette("agent.cassette.jsonl")
+    llm = RecordingLLMInterface(real_llm, cassette)
+    tool_map = record_tool_map(tool_map, cassette)
+
+    # 回放（尽可能快）
+    cassette = Cassette.load("agent.cassette.jsonl")
+    llm = ReplayLLMInterface(cassette)
+    tool_map = replay_tool_map(cassette, tool_map)
+    ```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import json
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from openai.types.chat.chat_completion import ChatCompletion
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+
+from SimpleLLMFunc.interface.llm_interface import LLM_Interface
+from SimpleLLMFunc.logger import get_current_trace_id, push_debug, push_warning
+from SimpleLLMFunc.logger.logger import get_location
+
+InteractionKind = Literal["chat", "chat_stream", "tool"]
+
+# 不参与请求匹配的参数：每次调用都会变化，且不影响响应内容
+_IGNORED_REQUEST_KWARGS = {"trace_id", "timeout", "stream"}
+
+
+class CassetteMissError(LookupError):
+    """回放时磁带中没有与请求匹配的录制记录"""
+
+
+def _request_key(kind: str, payload: Dict[str, Any]) -> str:
+    """计算请求的匹配键：对规范化后的请求内容取哈希"""
+    canonical = json.dumps(
+        {"kind": kind, **payload},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def _llm_request_payload(messages: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "messages": list(messages),
+        "kwargs": {k: v for k, v in kwargs.items() if k not in _IGNORED_REQUEST_KWARGS},
+    }
+
+
+class Cassette:
+    """一盘磁带：按顺序保存的请求/响应记录
+
+    每条记录是一行 JSON。相同请求被录制多次时，回放按录制顺序依次返回。
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            path: 磁带文件路径。提供时，录制的记录会立即追加写入该文件
+        """
+        self.path = Path(path) if path is not None else None
+        self.interactions: List[Dict[str, Any]] = []
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Cassette":
+        """从文件加载磁带（用于回放，加载后的磁带不会再写入文件）"""
+        cassette = cls()
+        with Path(path).open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    cassette._index(json.loads(line))
+        return cassette
+
+    def _index(self, interaction: Dict[str, Any]) -> None:
+        self.interactions.append(interaction)
+        self._queues[interaction["key"]].append(interaction)
+
+    def record(self, interaction: Dict[str, Any]) -> None:
+        """添加一条记录，并在设置了 path 时追加写入文件"""
+        self._index(interaction)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(
+                    json.dumps(
+                        interaction, ensure_ascii=False, separators=(",", ":"), default=str
+                    )
+                    + "\n"
+                )
+
+    def take(self, kind: InteractionKind, key: str) -> Dict[str, Any]:
+        """取出下一条匹配的记录"""
+        queue = self._queues.get(key)
+        if not queue:
+            raise CassetteMissError(f"磁带中没有匹配的 {kind} 记录 (key={key})")
+        return queue.popleft()
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+
+async def _replay_delay(seconds: float, replay_speed: Optional[float]) -> None:
+    """按回放速度等待；replay_speed 为 None 时不等待"""
+    if replay_speed is not None and seconds > 0:
+        await asyncio.sleep(seconds / replay_speed)
+
+
+class RecordingLLMInterface(LLM_Interface):
+    """录制模式：转发到真实接口，并把请求/响应写入磁带"""
+
+    def __init__(self, inner: LLM_Interface, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+        self.model_name = inner.model_name
+        self.input_token_count = 0
+        self.output_token_count = 0
+
+    async def chat(
+        self,
+        trace_id: str = get_current_trace_id(),
+        stream: Literal[False] = False,
+        messages: Iterable[Dict[str, str]] = [{"role": "user", "content": ""}],
+        timeout: Optional[int] = None,
+        *args,
+        **kwargs,
+    ) -> ChatCompletion:
+        messages = list(messages)
+        start = time.perf_counter()
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        response = await self.inner.chat(trace_id=trace_id, messages=messages, **kwargs)
+        payload = _llm_request_payload(messages, kwargs)
+        self.cassette.record(
+            {
+                "kind": "chat",
+                "key": _request_key("chat", payload),
+                "model": self.model_name,
+                "latency": time.perf_counter() - start,
+                "response": response.model_dump(mode="json"),
+            }
+        )
+        return response
+
+    async def chat_stream(
+        self,
+        trace_id: str = get_current_trace_id(),
+        stream: Literal[True] = True,
+        messages: Iterable[Dict[str, str]] = [{"role": "user", "content": ""}],
+        timeout: Optional[int] = None,
+        *args,
+        **kwargs,
+    ) -> AsyncGenerator[ChatCompletionChunk, None]:
+        messages = list(messages)
+        start = time.perf_counter()
+        chunks: List[Tuple[float, Dict[str, Any]]] = []
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        payload = _llm_request_payload(messages, kwargs)
+
+        def record() -> None:
+            self.cassette.record(
+                {
+                    "kind": "chat_stream",
+                    "key": _request_key("chat_stream", payload),
+                    "model": self.model_name,
+                    "latency": time.perf_counter() - start,
+                    "chunks": chunks,
+                }
+            )
+
+        try:
+            async for chunk in self.inner.chat_stream(
+                trace_id=trace_id, messages=messages, **kwargs
+            ):
+                chunks.append((time.perf_counter() - start, chunk.model_dump(mode="json")))
+                yield chunk
+        except GeneratorExit:
+            # 调用方提前关闭流（如 stop_at_xml_root）时录制已收到的 chunk，回放时在同一位置结束
+            record()
+            raise
+        record()
+
+
+class ReplayLLMInterface(LLM_Interface):
+    """回放模式：从磁带返回录制的响应，不发起任何网络请求"""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        model_name: Optional[str] = None,
+        replay_speed: Optional[float] = None,
+    ):
+        """
+        Args:
+            cassette: 录制好的磁带
+            model_name: 接口的模型名称，默认取磁带中第一条记录的模型
+            replay_speed: 回放速度倍率。None 表示不等待、尽可能快地回放；
+                1.0 表示按录制时的耗时与 chunk 间隔回放
+        """
+        if replay_speed is not None and replay_speed <= 0:
+            raise ValueError("replay_speed 必须为正数或 None")
+        self.cassette = cassette
+        self.replay_speed = replay_speed
+        recorded_model = next(
+            (i.get("model") for i in cassette.interactions if i.get("model")), None
+        )
+        self.model_name = model_name or recorded_model or "cassette-replay"
+        self.input_token_count = 0
+        self.output_token_count = 0
+
+    async def chat(
+        self,
+        trace_id: str = get_current_trace_id(),
+        stream: Literal[False] = False,
+        messages: Iterable[Dict[str, str]] = [{"role": "user", "content": ""}],
+        timeout: Optional[int] = None,
+        *args,
+        **kwargs,
+    ) -> ChatCompletion:
+        key = _request_key("chat", _llm_request_payload(messages, kwargs))
+        interaction = self.cassette.take("chat", key)
+        await _replay_delay(interaction.get("latency", 0.0), self.replay_speed)
+        return ChatCompletion.model_validate(interaction["response"])
+
+    async def chat_stream(
+        self,
+        trace_id: str = get_current_trace_id(),
+        stream: Literal[True] = True,
+        messages: Iterable[Dict[str, str]] = [{"role": "user", "content": ""}],
+        timeout: Optional[int] = None,
+        *args,
+        **kwargs,
+    ) -> AsyncGenerator[ChatCompletionChunk, None]:
+        key = _request_key("chat_stream", _llm_request_payload(messages, kwargs))
+        interaction = self.cassette.take("chat_stream", key)
+        previous_offset = 0.0
+        for offset, chunk_data in interaction["chunks"]:
+            await _replay_delay(offset - previous_offset, self.replay_speed)
+            previous_offset = offset
+            yield ChatCompletionChunk.model_validate(chunk_data)
+
+
+def _tool_request_payload(tool_name: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {"tool": tool_name, "arguments": kwargs}
+
+
+def _copy_tool_identity(
+    source: Callable[..., Awaitable[Any]], wrapper: Callable[..., Awaitable[Any]]
+) -> None:
+    """保留 Tool 对象引用，使批次去重等逻辑对包装后的函数仍然生效"""
+    for attr in ("__self__", "_tool"):
+        tool_obj = getattr(source, attr, None)
+        if tool_obj is not None:
+            setattr(wrapper, "_tool", tool_obj)
+            return
+
+
+def record_tool_map(
+    tool_map: Dict[str, Callable[..., Awaitable[Any]]],
+    cassette: Cassette,
+) -> Dict[str, Callable[..., Awaitable[Any]]]:
+    """包装 tool_map，把每次工具调用的参数与结果写入磁带
+
+    结果按 JSON 录制；无法 JSON 序列化的结果（如图像）会以字符串形式录制。
+    """
+
+    def _wrap(
+        tool_name: str, func: Callable[..., Awaitable[Any]]
+    ) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def recorded_tool(**kwargs: Any) -> Any:
+            start = time.perf_counter()
+            key = _request_key("tool", _tool_request_payload(tool_name, kwargs))
+            try:
+                result = await func(**kwargs)
+            except Exception as exc:
+                cassette.record(
+                    {
+                        "kind": "tool",
+                        "key": key,
+                        "name": tool_name,
+                        "latency": time.perf_counter() - start,
+                        "error": f"{type(exc).__name__}: {exc}",
+                    }
+                )
+                raise
+            recorded_result = result
+            try:
+                json.dumps(result)
+            except (TypeError, ValueError):
+                push_warning(
+                    f"工具 '{tool_name}' 的结果无法 JSON 序列化，将以字符串形式录制",
+                    location=get_location(),
+                )
+                # 内存中的磁带与写入文件的内容保持一致，回放时都得到字符串
+                recorded_result = str(result)
+            cassette.record(
+                {
+                    "kind": "tool",
+                    "key": key,
+                    "name": tool_name,
+                    "latency": time.perf_counter() - start,
+                    "result": recorded_result,
+                }
+            )
+            return result
+
+        _copy_tool_identity(func, recorded_tool)
+        return recorded_tool
+
+    return {name: _wrap(name, func) for name, func in tool_map.items()}
+
+
+def replay_tool_map(
+    cassette: Cassette,
+    tool_names: Union[Iterable[str], Mapping[str, Callable[..., Awaitable[Any]]]],
+    replay_speed: Optional[float] = None,
+) -> Dict[str, Callable[..., Awaitable[Any]]]:
+    """构建从磁带回放工具结果的 tool_map
+
+    Args:
+        cassette: 录制好的磁带
+        tool_names: 需要回放的工具名称；传入原始 tool_map 时保留各工具的 Tool 对象，
+            使批次去重等按工具生效的配置与录制时一致
+        replay_speed: 回放速度倍率，含义同 `ReplayLLMInterface`
+    """
+    originals: Mapping[str, Callable[..., Awaitable[Any]]] = (
+        tool_names if isinstance(tool_names, Mapping) else {}
+    )
+
+    def _make(tool_name: str) -> Callable[..., Awaitable[Any]]:
+        async def replayed_tool(**kwargs: Any) -> Any:
+            key = _request_key("tool", _tool_request_payload(tool_name, kwargs))
+            interaction = cassette.take("tool", key)
+            await _replay_delay(interaction.get("latency", 0.0), replay_speed)
+            if "error" in interaction:
+                raise RuntimeError(interaction["error"])
+            push_debug(f"回放工具 '{tool_name}' 的录制结果", location=get_location())
+            return interaction.get("result")
+
+        if tool_name in originals:
+            _copy_tool_identity(originals[tool_name], replayed_tool)
+        return replayed_tool
+
+    return {name: _make(name) for name in tool_names}
+
+
+__all__ = [
+    "Cassette",
+    "CassetteMissError",
+    "RecordingLLMInterface",
+    "ReplayLLMInterface",
+    "record_tool_map",
+    "replay_tool_map",
+]
@@ -10,6 +10,7 @@ from openai.types.chat.chat_completion import ChatCompletion
 from SimpleLLMFunc.interface.llm_interface import LLM_Interface
 from SimpleLLMFunc.interface.key_pool import APIKeyPool
 from SimpleLLMFunc.interface.token_bucket import rate_limit_manager
+from SimpleLLMFunc.utils import check_deadline, clamp_timeout, remaining_time
 from SimpleLLMFunc.logger import (
     app_log,
     push_warning,
@@ -325,10 +326,13 @@ class OpenAICompatible(LLM_Interface):
 
         attempt = 0
         while attempt < self.max_retries:
+            # 整体截止时间已过时不再发起新的尝试
+            check_deadline(f"{self.model_name} 请求")
+            task_counted = False
             try:
-                # 获取令牌桶令牌，设置30秒超时
+                # 获取令牌桶令牌，设置30秒超时（不超过剩余的截止时间）
                 token_acquired = await self.token_bucket.acquire(
-                    tokens_needed=1, timeout=30.0
+                    tokens_needed=1, timeout=clamp_timeout(30.0)
                 )
                 if not token_acquired:
                     push_warning(
@@ -338,6 +342,7 @@ class OpenAICompatible(LLM_Interface):
                     raise Exception("Rate limit: 令牌桶获取令牌超时")
 
                 self.key_pool.increment_task_count(key)
+                task_counted = True
                 data = json.dumps(messages, ensure_ascii=False, indent=4)
                 push_debug(
                     f"OpenAICompatible::chat: {self.model_name} request with API key: {key}, and message: {data}",
@@ -347,7 +352,7 @@ class OpenAICompatible(LLM_Interface):
                     messages=messages,  # type: ignore
                     model=self.model_name,
                     stream=stream,
-                    timeout=timeout,
+                    timeout=clamp_timeout(timeout),
                     *args,
                     **kwargs,
                 )
@@ -370,6 +375,11 @@ class OpenAICompatible(LLM_Interface):
                 self.key_pool.decrement_task_count(key)
                 return response  # 请求成功，返回结果
 
+            except asyncio.CancelledError:
+                # 调用方取消：in-flight 的 HTTP 请求随之取消，不再重试
+                if task_counted:
+                    self.key_pool.decrement_task_count(key)
+                raise
             except Exception as e:
                 self.key_pool.decrement_task_count(key)
                 attempt += 1
@@ -389,6 +399,10 @@ class OpenAICompatible(LLM_Interface):
                         location=location,
                     )
                     raise e  # 达到最大重试次数后抛出异常
+                remaining = remaining_time()
+                if remaining is not None and remaining <= self.retry_delay:
+                    # 剩余时间不足以等待下一次重试
+                    raise e
                 await asyncio.sleep(self.retry_delay)  # 重试前等待一段时间
         return ChatCompletion(id="", choices=[], created=0, model="", object='chat.completion', usage=None)  # 添加默认返回以满足类型检查，实际上这行代码永远不会执行
 
@@ -425,10 +439,13 @@ class OpenAICompatible(LLM_Interface):
 
         attempt = 0
         while attempt < self.max_retries:
+            # 整体截止时间已过时不再发起新的尝试
+            check_deadline(f"{self.model_name} 请求")
+            task_counted = False
             try:
-                # 获取令牌桶令牌，设置30秒超时
+                # 获取令牌桶令牌，设置30秒超时（不超过剩余的截止时间）
                 token_acquired = await self.token_bucket.acquire(
-                    tokens_needed=1, timeout=30.0
+                    tokens_needed=1, timeout=clamp_timeout(30.0)
                 )
                 if not token_acquired:
                     push_warning(
@@ -438,6 +455,7 @@ class OpenAICompatible(LLM_Interface):
                     raise Exception("Rate limit: 令牌桶获取令牌超时")
 
                 self.key_pool.increment_task_count(key)
+                task_counted = True
                 data = json.dumps(messages, ensure_ascii=False, indent=4)
                 push_debug(
                     f"OpenAICompatible::chat_stream: {self.model_name} request with API key: {key}, and message: {data}",
@@ -448,7 +466,7 @@ class OpenAICompatible(LLM_Interface):
                     messages=messages,  # type: ignore
                     model=self.model_name,
                     stream=stream,
-                    timeout=timeout,
+                    timeout=clamp_timeout(timeout),
                     *args,
                     **kwargs,
                 )
@@ -456,13 +474,27 @@ class OpenAICompatible(LLM_Interface):
                 total_prompt_tokens = 0
                 total_completion_tokens = 0
 
-                async for chunk in response:
-                    yield chunk  # 按块返回生成器中的数据
-                    if chunk.choices and chunk.choices[0].delta:  # type: ignore
-                        if not chunk.choices[0].delta.tool_calls:  # type: ignore
-                            prompt_tokens, completion_tokens = self._count_tokens(chunk)
-                            total_prompt_tokens += prompt_tokens
-                            total_completion_tokens += completion_tokens
+                chunk_iterator = response.__aiter__()
+                try:
+                    while True:
+                        try:
+                            # 设置了截止时间时，等待下一个 chunk 的时间不超过剩余时间
+                            chunk = await asyncio.wait_for(
+                                anext(chunk_iterator), clamp_timeout(None)
+                            )
+                        except StopAsyncIteration:
+                            break
+                        yield chunk  # 按块返回生成器中的数据
+                        if chunk.choices and chunk.choices[0].delta:  # type: ignore
+                            if not chunk.choices[0].delta.tool_calls:  # type: ignore
+                                prompt_tokens, completion_tokens = self._count_tokens(chunk)
+                                total_prompt_tokens += prompt_tokens
+                                total_completion_tokens += completion_tokens
+                finally:
+                    # 流被取消、关闭或超时时立即关闭底层 HTTP 连接
+                    close = getattr(response, "close", None)
+                    if close is not None:
+                        await close()
 
                 # 在整个流结束后统计token
                 input_tokens = get_current_context_attribute("input_tokens") or 0
@@ -477,6 +509,11 @@ class OpenAICompatible(LLM_Interface):
 
                 self.key_pool.decrement_task_count(key)
                 break  # 如果成功，跳出重试循环
+            except (asyncio.CancelledError, GeneratorExit):
+                # 调用方取消或提前关闭流：不再重试
+                if task_counted:
+                    self.key_pool.decrement_task_count(key)
+                raise
             except Exception as e:
                 self.key_pool.decrement_task_count(key)
                 attempt += 1
@@ -495,6 +532,9 @@ class OpenAICompatible(LLM_Interface):
                         location=get_location(),
                     )
                     raise e
+                remaining = remaining_time()
+                if remaining is not None and remaining <= self.retry_delay:
+                    raise e
                 await asyncio.sleep(self.retry_delay)
 
         # 下面是一个空生成器，用于满足类型检查，实际上永远不会执行到这里
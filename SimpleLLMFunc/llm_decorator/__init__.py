@@ -1,9 +1,17 @@
 from SimpleLLMFunc.llm_decorator.llm_function_decorator import llm_function, async_llm_function
 from SimpleLLMFunc.llm_decorator.llm_chat_decorator import llm_chat, async_llm_chat
+from SimpleLLMFunc.llm_decorator.batch import CallArgs, MapRun, MapStats
+from SimpleLLMFunc.llm_decorator.chat_session import ChatSession
+from SimpleLLMFunc.llm_decorator.packing import PackConfig
 
 __all__ = [
     "llm_function",
     "async_llm_function",
     "llm_chat",
     "async_llm_chat",
+    "CallArgs",
+    "ChatSession",
+    "MapRun",
+    "MapStats",
+    "PackConfig",
 ]
\ No newline at end of file
@@ -0,0 +1,355 @@
+"""Batch / map helpers attached to llm_function decorated functions.
+
+被 `llm_function` 装饰的函数会获得两个方法：
+
+- `func.map(iterable, concurrency=, ordered=, return_exceptions=, retries=)`：
+  以有界并发调用函数，结果以异步迭代器的形式流式返回
+- `func.batch(iterable, ...)`：同样的调度，返回按输入顺序排列的结果列表
+
+并发默认取 LLM 接口令牌桶的容量，避免大量调用同时排队等待令牌；
+失败的条目按指数退避重试；运行结束后通过 `MapRun.stats` 报告吞吐量和延迟统计。
+
+Example:
+    ```python
+    @llm_function(llm_interface=llm)
+    async def translate(text: str) -> str:
+        \"\"\"Translate the text into English.\"\"\"
+
+    run = translate.map(texts, concurrency=8, retries=2)
+    async for translated in run:
+        print(translated)
+    print(run.stats.summary())
+
+    # 需要传入多个参数时使用 CallArgs
+    results = await translate.batch(CallArgs(text, target="French") for text in texts)
+    ```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from SimpleLLMFunc.hooks.stream import is_response_yield
+from SimpleLLMFunc.interface.llm_interface import LLM_Interface
+from SimpleLLMFunc.logger import app_log, push_warning
+from SimpleLLMFunc.logger.logger import get_location
+from SimpleLLMFunc.utils import aclosing_stream
+
+DEFAULT_MAP_CONCURRENCY = 8
+"""LLM 接口没有令牌桶时使用的默认并发数"""
+
+
+class CallArgs:
+    """map / batch 中一次调用的参数（需要传入多个参数或关键字参数时使用）"""
+
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.args = args
+        self.kwargs = kwargs
+
+    def __repr__(self) -> str:
+        return f"CallArgs(args={self.args!r}, kwargs={self.kwargs!r})"
+
+
+@dataclass
+class MapStats:
+    """一次 map / batch 运行的统计信息"""
+
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """每秒完成的条目数"""
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """成功条目的平均延迟（秒，包含重试）"""
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        """成功条目延迟的百分位数（秒）"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> str:
+        """单行统计摘要"""
+        return (
+            f"{self.total} 条，成功 {self.succeeded}，失败 {self.failed}，重试 {self.retries} 次；"
+            f"耗时 {self.elapsed:.2f}s，吞吐 {self.throughput:.2f} 条/s；"
+            f"延迟 平均 {self.mean_latency:.2f}s / p50 {self.latency_percentile(50):.2f}s"
+            f" / p95 {self.latency_percentile(95):.2f}s"
+        )
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+_DONE = object()
+
+
+async def _invoke(func: Callable[..., Any], item: Any) -> Any:
+    """调用一次被装饰函数；事件模式的函数取最后一个 ResponseYield 的结果"""
+    if isinstance(item, CallArgs):
+        result = func(*item.args, **item.kwargs)
+    else:
+        result = func(item)
+
+    if inspect.isasyncgen(result):
+        value = None
+        async with aclosing_stream(result):
+            async for output in result:
+                if is_response_yield(output):
+                    value = output.response
+        return value
+    return await result
+
+
+class MapRun:
+    """一次 map 运行：异步迭代得到结果，结束后读取 `stats`
+
+    ordered=True 时按输入顺序 yield 结果；ordered=False 时按完成顺序 yield `(index, result)`。
+    return_exceptions=True 时重试耗尽的条目以异常对象代替结果；否则第一个失败的条目会抛出异常，
+    并取消其余仍在运行的调用。
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        iterable: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency: int,
+        ordered: bool = True,
+        return_exceptions: bool = False,
+        retries: int = 0,
+        retry_delay: float = 1.0,
+        name: str = "",
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency 必须为正整数")
+        if retries < 0:
+            raise ValueError("retries 不能为负数")
+        self.func = func
+        self.iterable = iterable
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self.return_exceptions = return_exceptions
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.name = name or getattr(func, "__name__", "function")
+        self.stats = MapStats()
+        self._started = False
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        if self._started:
+            raise RuntimeError("MapRun 只能迭代一次")
+        self._started = True
+        return self._run()
+
+    async def _call_with_retry(self, index: int, item: Any) -> Any:
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                value = await _invoke(self.func, item)
+            except Exception as exc:
+                if attempt >= self.retries:
+                    self.stats.failed += 1
+                    return _Failure(exc)
+                attempt += 1
+                self.stats.retries += 1
+                push_warning(
+                    f"'{self.name}' 第 {index} 个条目调用失败，{attempt}/{self.retries} 次重试: {exc}",
+                    location=get_location(),
+                )
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+                continue
+            self.stats.succeeded += 1
+            self.stats.latencies.append(time.perf_counter() - start)
+            return value
+
+    async def _run(self) -> AsyncIterator[Any]:
+        queue: asyncio.Queue[Any] = asyncio.Queue()
+        lock = asyncio.Lock()
+        counter = [0]
+
+        if isinstance(self.iterable, AsyncIterable):
+            source_async: Optional[AsyncIterator[Any]] = self.iterable.__aiter__()
+            source_sync: Optional[Iterator[Any]] = None
+        else:
+            source_async = None
+            source_sync = iter(self.iterable)
+
+        async def next_item() -> Optional[Tuple[int, Any]]:
+            async with lock:
+                try:
+                    if source_async is not None:
+                        item = await source_async.__anext__()
+                    else:
+                        item = next(source_sync)  # type: ignore[arg-type]
+                except (StopIteration, StopAsyncIteration):
+                    return None
+                index = counter[0]
+                counter[0] += 1
+                self.stats.total += 1
+                return index, item
+
+        async def worker() -> None:
+            try:
+                while True:
+                    entry = await next_item()
+                    if entry is None:
+                        return
+                    index, item = entry
+                    await queue.put((index, await self._call_with_retry(index, item)))
+            finally:
+                queue.put_nowait(_DONE)
+
+        start = time.perf_counter()
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        pending: Dict[int, Any] = {}
+        next_index = 0
+        finished = 0
+
+        try:
+            while finished < len(workers):
+                entry = await queue.get()
+                if entry is _DONE:
+                    finished += 1
+                    continue
+                index, outcome = entry
+                if isinstance(outcome, _Failure):
+                    if not self.return_exceptions:
+                        raise outcome.error
+                    outcome = outcome.error
+                if not self.ordered:
+                    yield index, outcome
+                    continue
+                pending[index] = outcome
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+            # worker 自身出错（如迭代输入时抛出异常）时向调用方报告
+            for task in workers:
+                error = task.exception()
+                if error is not None:
+                    raise error
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.stats.elapsed = time.perf_counter() - start
+            app_log(f"'{self.name}' map 完成：{self.stats.summary()}", location=get_location())
+
+
+def default_concurrency(llm_interface: Optional[LLM_Interface]) -> int:
+    """默认并发数：LLM 接口令牌桶的容量"""
+    bucket = getattr(llm_interface, "token_bucket", None)
+    capacity = getattr(bucket, "capacity", None)
+    if isinstance(capacity, int) and capacity > 0:
+        return capacity
+    return DEFAULT_MAP_CONCURRENCY
+
+
+def attach_batch_methods(
+    wrapper: Callable[..., Any],
+    llm_interface: Optional[LLM_Interface] = None,
+    call: Optional[Callable[..., Any]] = None,
+) -> None:
+    """为被装饰函数添加 `map()` 和 `batch()` 方法
+
+    Args:
+        wrapper: 被装饰函数，方法挂载在它上面
+        llm_interface: 用于推断默认并发数的 LLM 接口
+        call: 每个条目实际调用的函数，默认为 `wrapper` 本身
+    """
+    fallback_concurrency = default_concurrency(llm_interface)
+    target = call or wrapper
+
+    def map_(
+        iterable: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency: Optional[int] = None,
+        ordered: bool = True,
+        return_exceptions: bool = False,
+        retries: int = 0,
+        retry_delay: float = 1.0,
+    ) -> MapRun:
+        """以有界并发调用函数，返回可异步迭代的 MapRun
+
+        Args:
+            iterable: 输入条目（同步或异步可迭代对象）；每个条目作为唯一的位置参数，
+                需要多个参数时使用 `CallArgs(...)`
+            concurrency: 最大并发数，默认为 LLM 接口令牌桶的容量
+            ordered: True 时按输入顺序 yield 结果，False 时按完成顺序 yield `(index, result)`
+            return_exceptions: True 时失败条目以异常对象代替结果，否则直接抛出
+            retries: 每个条目失败后的重试次数
+            retry_delay: 第一次重试前的等待秒数，之后按指数增长
+        """
+        return MapRun(
+            target,
+            iterable,
+            concurrency=concurrency or fallback_concurrency,
+            ordered=ordered,
+            return_exceptions=return_exceptions,
+            retries=retries,
+            retry_delay=retry_delay,
+            name=getattr(wrapper, "__name__", ""),
+        )
+
+    async def batch(
+        iterable: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+        retries: int = 0,
+        retry_delay: float = 1.0,
+    ) -> List[Any]:
+        """与 `map()` 相同的调度，返回按输入顺序排列的结果列表"""
+        run = map_(
+            iterable,
+            concurrency=concurrency,
+            ordered=True,
+            return_exceptions=return_exceptions,
+            retries=retries,
+            retry_delay=retry_delay,
+        )
+        return [result async for result in run]
+
+    setattr(wrapper, "map", map_)
+    setattr(wrapper, "batch", batch)
+
+
+__all__ = [
+    "CallArgs",
+    "MapRun",
+    "MapStats",
+    "attach_batch_methods",
+    "default_concurrency",
+]
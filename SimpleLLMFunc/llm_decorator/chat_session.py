@@ -0,0 +1,144 @@
+"""Persistent chat sessions for llm_chat decorated functions.
+
+被 `llm_chat` 装饰的函数会获得 `func.session(session_id=, history=, store=)` 方法，
+返回一个 `ChatSession`：
+
+- 系统提示（包括工具描述）和工具定义在创建会话时生成一次，之后每轮复用
+- 会话自己维护对话历史，每轮只追加本轮新增的消息，不再需要调用方传入完整的 `history`
+  并在每轮重新过滤、复制
+- `send()` 只产出响应内容（`enable_event=True` 时为 ReactOutput），不再在每个 chunk
+  附带完整历史的副本；需要时通过 `session.history` / `session.last_turn` 读取
+- 提供 `store` 时，每轮结束后只把新增消息追加写入存储，重新打开同一个 `session_id`
+  时从存储恢复历史
+- 构造时传入的 `history` 是会话的固定前缀（如示例对话），不会写入存储；重新打开会话时
+  需要再次传入，存储中的历史接在它之后
+
+Example:
+    ```python
+    @llm_chat(llm_interface=llm, stream=True)
+    async def assistant(message: str, history: List[Dict[str, str]]):
+        \"\"\"You are a helpful assistant.\"\"\"
+
+    session = assistant.session(session_id="user-42", store=JSONLChatSessionStore("sessions"))
+    async for chunk in session.send("Hello"):
+        print(chunk, end="")
+    print(session.last_turn)
+    ```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, Tuple
+
+from SimpleLLMFunc.base.session import ChatSessionStore
+from SimpleLLMFunc.llm_decorator.steps.chat.message import (
+    HISTORY_PARAM_NAMES,
+    filter_history_messages,
+)
+from SimpleLLMFunc.llm_decorator.steps.chat.response import ChatTurn
+from SimpleLLMFunc.type import HistoryList
+from SimpleLLMFunc.utils import aclosing_stream
+
+TurnRunner = Callable[
+    ["ChatSession", Tuple[Any, ...], Dict[str, Any]], AsyncGenerator[Any, None]
+]
+"""执行一轮会话的函数，由 llm_chat 在装饰时提供"""
+
+
+class ChatSession:
+    """绑定到一个 llm_chat 函数的持久会话，通过 `func.session(...)` 创建"""
+
+    def __init__(
+        self,
+        run_turn: TurnRunner,
+        system_prompt: Optional[str],
+        func_name: str,
+        session_id: Optional[str] = None,
+        history: Optional[HistoryList] = None,
+        store: Optional[ChatSessionStore] = None,
+    ) -> None:
+        self.session_id = session_id or uuid.uuid4().hex
+        self.system_prompt = system_prompt
+        self.func_name = func_name
+        self.store = store
+        self._run_turn = run_turn
+        self._messages: HistoryList = (
+            [{"role": "system", "content": system_prompt}] if system_prompt else []
+        )
+        self._offset = len(self._messages)
+        if history:
+            self._messages.extend(filter_history_messages(history, func_name))
+        self._loaded = store is None
+        self._last_turn: HistoryList = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def history(self) -> HistoryList:
+        """完整的对话历史（不包含系统提示）"""
+        return self._messages[self._offset :]
+
+    @property
+    def last_turn(self) -> HistoryList:
+        """最近一轮新增的消息"""
+        return list(self._last_turn)
+
+    async def load(self) -> None:
+        """从存储中读取历史并追加在构造时传入的历史之后（只在第一次调用时读取）"""
+        if self._loaded:
+            return
+        assert self.store is not None
+        stored = await self.store.load(self.session_id)
+        # 第一轮开始前调用，此时会话中只有系统提示和构造时传入的历史
+        self._messages.extend(filter_history_messages(stored, self.func_name))
+        self._loaded = True
+
+    async def clear(self) -> None:
+        """清空对话历史（包括存储中的消息）"""
+        async with self._lock:
+            del self._messages[self._offset :]
+            self._last_turn = []
+            if self.store is not None:
+                await self.store.delete(self.session_id)
+            self._loaded = True
+
+    async def send(self, *args: Any, **kwargs: Any) -> AsyncGenerator[Any, None]:
+        """发送一轮消息，参数与被装饰函数相同（不需要传入 history）"""
+        for name in HISTORY_PARAM_NAMES:
+            if name in kwargs:
+                raise ValueError(f"ChatSession 自行维护对话历史，send() 不接受 '{name}' 参数")
+        async with self._lock:
+            await self.load()
+            turn_stream = self._run_turn(self, args, kwargs)
+            async with aclosing_stream(turn_stream):
+                async for output in turn_stream:
+                    yield output
+
+    def _begin_turn(
+        self, user_message: Optional[Dict[str, Any]], stream: bool
+    ) -> Tuple[HistoryList, ChatTurn]:
+        """返回本轮发送给 LLM 的消息列表（会话历史 + 用户消息）"""
+        if user_message is None:
+            raise ValueError(f"ChatSession '{self.func_name}' 的本轮调用没有生成用户消息")
+        self._messages.append(user_message)
+        return self._messages, ChatTurn(self._messages, user_message, self.func_name, stream)
+
+    async def _commit_turn(self, turn: ChatTurn) -> None:
+        """把本轮新增的消息追加到会话历史和存储中"""
+        added = turn.new_messages()
+        # 用户消息已经在 _begin_turn 中加入
+        self._messages.extend(added[1:])
+        self._last_turn = added
+        if self.store is not None:
+            await self.store.append(self.session_id, added)
+
+    def _abort_turn(self, turn: ChatTurn) -> None:
+        """本轮失败或被中止时撤销已加入的用户消息"""
+        if self._messages and self._messages[-1] is turn.user_message:
+            self._messages.pop()
+
+
+__all__ = [
+    "ChatSession",
+]
@@ -6,6 +6,7 @@ from typing import (
     AsyncGenerator,
     Awaitable,
     Callable,
+    Dict,
     List,
     Optional,
     ParamSpec,
@@ -16,7 +17,10 @@ from typing import (
     Literal,
 )
 
+from SimpleLLMFunc.llm_decorator.utils import ToolkitCache
+from SimpleLLMFunc.llm_decorator.chat_session import ChatSession, ChatTurn
 from SimpleLLMFunc.llm_decorator.steps.common import (
+    compile_function_metadata,
     parse_function_signature,
     setup_log_context,
 )
@@ -25,12 +29,26 @@ from SimpleLLMFunc.llm_decorator.steps.chat import (
     execute_react_loop_streaming,
     process_chat_response_stream,
 )
-from SimpleLLMFunc.llm_decorator.steps.chat.message import HISTORY_PARAM_NAMES
+from SimpleLLMFunc.llm_decorator.steps.chat.message import (
+    HISTORY_PARAM_NAMES,
+    build_chat_system_prompt,
+    build_chat_user_message,
+)
+from SimpleLLMFunc.llm_decorator.steps.chat.response import (
+    HISTORY_MODES,
+    process_single_chat_response,
+)
+from SimpleLLMFunc.base.checkpoint import CheckpointStore
+from SimpleLLMFunc.base.budget import resolve_run_budget
+from SimpleLLMFunc.base.context import ContextBudget, resolve_context_budget
+from SimpleLLMFunc.base.session import ChatSessionStore
+from SimpleLLMFunc.base.tool_call import ToolOutputStore, with_tool_output_reader
 from SimpleLLMFunc.interface.llm_interface import LLM_Interface
 from SimpleLLMFunc.tool import Tool
 from SimpleLLMFunc.type import HistoryList, MessageList
-from SimpleLLMFunc.hooks.stream import ReactOutput
+from SimpleLLMFunc.hooks.stream import ReactOutput, is_response_yield
 from SimpleLLMFunc.observability.langfuse_client import langfuse_client
+from SimpleLLMFunc.utils import aclosing_stream, deadline_stream
 
 # Type aliases
 ToolkitList = List[Union[Tool, Callable[..., Awaitable[Any]]]]  # List of Tool objects or async functions
@@ -52,6 +70,15 @@ def llm_chat(
     stream: bool = False,
     return_mode: Literal["text", "raw"] = "text",
     enable_event: bool = False,
+    context_budget: Optional[Union[int, ContextBudget]] = None,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    event_include_chunks: bool = True,
+    token_budget: Optional[int] = None,
+    cost_budget: Optional[float] = None,
+    history_mode: Literal["full", "final", "delta"] = "full",
     **llm_kwargs: Any,
 ) -> Callable[
     [Union[Callable[P, Any], Callable[P, Awaitable[Any]]]],
@@ -92,6 +119,16 @@ def llm_chat(
     - `str`: Assistant's response content
     - `List[Dict[str, str]]`: Filtered conversation history (excluding tool call information)
 
+    ## Sessions
+    `func.session(session_id=None, history=None, store=None)` returns a `ChatSession` that keeps
+    the conversation itself. The system prompt and tool definitions are built once when the
+    session is created; each `session.send(...)` appends only the new turn and yields response
+    content (or ReactOutput when enable_event=True) without per-chunk history copies. With a
+    `ChatSessionStore` (`SimpleLLMFunc.base.session`) every turn's new messages are appended to
+    the store, and reopening the same `session_id` restores the history. The `history=` passed
+    to `session()` is a fixed prefix that is not written to the store; pass it again when
+    reopening, the stored turns follow it.
+
     Args:
         llm_interface: LLM interface instance for communicating with the language model
         toolkit: Optional list of tools, can be Tool objects or functions decorated with @tool
@@ -103,6 +140,38 @@ def llm_chat(
         enable_event: Whether to enable event stream (default: False)
             - False: yields (response, messages) tuples (backward compatible)
             - True: yields ReactOutput (ResponseYield or EventYield)
+        context_budget: Optional token budget (int or ContextBudget). Before every LLM call the
+            message history is compacted when its estimated size exceeds the budget; the system
+            prompt and the latest turns are always kept
+        tool_output_store: Optional ToolOutputStore. Tool outputs above its threshold are stored
+            on disk and replaced by a preview plus a handle; the built-in `read_tool_output`
+            tool is added to the toolkit so the model can page through them
+        checkpoint_store: Optional CheckpointStore. The ReAct loop state is persisted after every
+            LLM response with tool calls and every tool batch; calling again with the same
+            `_trace_id=` keyword resumes from the last checkpoint
+        timeout: Optional overall time budget in seconds for one chat call. It propagates to the
+            ReAct loop, interface retries, HTTP requests and tool executions; exceeding it raises
+            `DeadlineExceededError`
+        deadline: Optional absolute deadline as a `time.time()` timestamp, combined with `timeout`
+            (the earlier one wins)
+        event_include_chunks: Whether LLMChunkArriveEvent carries the raw chunk object
+            (default: True). Its `accumulated_content` is a lazy view over a buffer shared by
+            all chunk events of one LLM call, so retained events stay small when this is off
+        token_budget: Optional cap on the total tokens (prompt + completion) of one chat call.
+            When the next tool-enabled LLM call would exceed it, the loop skips to a final
+            answer without tools; the state is reported in `ReactEndEvent.budget`
+        cost_budget: Optional cap in USD for one chat call, priced with `MODEL_PRICES`
+        history_mode: How the history is attached to (response, history) tuples when
+            enable_event=False (default: "full")
+            - "full": every response carries a copy of the full message history
+            - "final": responses carry None; one extra ("", history) tuple at the end carries
+              the full history including the final assistant reply (content is None in
+              "raw" mode)
+            - "delta": responses carry the messages appended since the previous tuple (usually
+              an empty list; the first one starts with the user message); the extra tuple at
+              the end carries the final assistant reply. Appending every delta to the history
+              passed in gives the history for the next turn
+            "final" and "delta" skip the per-chunk O(history) copies
         **llm_kwargs: Additional keyword arguments passed directly to the LLM interface
 
     Returns:
@@ -121,17 +190,78 @@ def llm_chat(
         ```
     """
 
+    if history_mode not in HISTORY_MODES:
+        raise ValueError(f"不支持的 history_mode: {history_mode!r}，可选值为 {HISTORY_MODES}")
+    if enable_event and history_mode != "full":
+        raise ValueError("history_mode 只作用于非事件模式，不能与 enable_event=True 同时使用")
+
     def decorator(
         func: Union[Callable[P, Any], Callable[P, Awaitable[Any]]],
     ) -> Callable[P, AsyncGenerator[Union[Tuple[Any, HistoryList], ReactOutput], None]]:
         signature_meta = inspect.signature(func)
         docstring = func.__doc__ or ""
         func_name = func.__name__
+        resolved_context_budget = resolve_context_budget(context_budget)
+        run_budget = resolve_run_budget(token_budget, cost_budget)
+        effective_toolkit = with_tool_output_reader(toolkit, tool_output_store)
+        # 工具定义和工具映射在首次调用时生成，之后复用；工具列表变化时重新生成
+        tool_cache = ToolkitCache(effective_toolkit, func_name)
+
+        # 函数元数据只依赖函数本身，装饰时编译一次
+        compiled: Dict[str, Any] = {}
+
+        def ensure_metadata() -> Any:
+            if not compiled:
+                compiled["metadata"] = compile_function_metadata(func)
+            return compiled["metadata"]
+
+        try:
+            ensure_metadata()
+        except Exception:
+            # 注解引用了尚未定义的名称（前向引用）等情况：推迟到第一次调用时编译，错误也在调用时抛出
+            pass
+
+        session_history_defaults = [
+            name for name in HISTORY_PARAM_NAMES if name in signature_meta.parameters
+        ]
+
+        def _scoped(chat_stream):
+            # 未设置截止时间时直接返回对话生成器，不再额外包一层转发
+            if timeout is None and deadline is None:
+                return chat_stream
+            # 截止时间在整个对话调用期间生效；调用方关闭生成器时 in-flight 请求和工具会被一并清理
+            return deadline_stream(chat_stream, timeout=timeout, deadline=deadline)
 
         @wraps(func)
-        async def wrapper(*args, **kwargs):
+        def wrapper(*args, **kwargs):
+            return _scoped(_chat_call(args, kwargs))
+
+        def _session_turn(session: ChatSession, args, kwargs):
+            # 会话自行维护历史，被装饰函数的 history 参数只需要占位
+            kwargs = {**{name: [] for name in session_history_defaults}, **kwargs}
+            return _scoped(_chat_call(args, kwargs, session))
+
+        def open_session(
+            session_id: Optional[str] = None,
+            history: Optional[HistoryList] = None,
+            store: Optional[ChatSessionStore] = None,
+        ) -> ChatSession:
+            """创建绑定到该对话函数的会话，系统提示和工具定义只在这里生成一次"""
+            tool_param, _ = tool_cache.get()
+            return ChatSession(
+                run_turn=_session_turn,
+                system_prompt=build_chat_system_prompt(docstring, tool_param),
+                func_name=func_name,
+                session_id=session_id,
+                history=history,
+                store=store,
+            )
+
+        async def _chat_call(args, kwargs, session: Optional[ChatSession] = None):
             # Step 1: 解析函数签名
-            function_signature, _ = parse_function_signature(func, args, kwargs)
+            function_signature, _ = parse_function_signature(
+                func, args, kwargs, ensure_metadata()
+            )
 
             # 构建用户任务提示（用于事件）
             user_task_prompt = json.dumps(
@@ -154,26 +284,35 @@ def llm_chat(
                     metadata={
                         "function_name": function_signature.func_name,
                         "trace_id": function_signature.trace_id,
-                        "tools_available": len(toolkit) if toolkit else 0,
+                        "tools_available": len(effective_toolkit) if effective_toolkit else 0,
                         "max_tool_calls": max_tool_calls,
                         "stream": stream,
                         "return_mode": return_mode,
                         "enable_event": enable_event,
+                        "session_id": session.session_id if session is not None else None,
                     },
                 ) as chat_span:
+                    turn: Optional[ChatTurn] = None
                     try:
-                        # Step 3: 构建聊天消息
-                        messages = build_chat_messages(
-                            signature=function_signature,
-                            toolkit=toolkit,
-                            exclude_params=HISTORY_PARAM_NAMES,
-                        )
+                        # Step 3: 构建聊天消息（会话模式下只追加本轮的用户消息）
+                        if session is None:
+                            messages = build_chat_messages(
+                                signature=function_signature,
+                                toolkit=effective_toolkit,
+                                exclude_params=HISTORY_PARAM_NAMES,
+                                tool_cache=tool_cache,
+                            )
+                        else:
+                            messages, turn = session._begin_turn(
+                                build_chat_user_message(function_signature, HISTORY_PARAM_NAMES),
+                                stream,
+                            )
 
                         # Step 4: 执行 ReAct 循环（流式）
                         response_stream = execute_react_loop_streaming(
                             llm_interface=llm_interface,
                             messages=messages,
-                            toolkit=toolkit,
+                            toolkit=effective_toolkit,
                             max_tool_calls=max_tool_calls,
                             stream=stream,
                             llm_kwargs=llm_kwargs,
@@ -181,15 +320,47 @@ def llm_chat(
                             enable_event=enable_event,
                             trace_id=function_signature.trace_id,
                             user_task_prompt=user_task_prompt,
+                            context_budget=resolved_context_budget,
+                            tool_output_store=tool_output_store,
+                            checkpoint_store=checkpoint_store,
+                            event_include_chunks=event_include_chunks,
+                            run_budget=run_budget,
+                            tool_cache=tool_cache,
+                            # 只读取新增消息时不需要每个 chunk 复制一次完整历史
+                            copy_messages=(
+                                enable_event or (session is None and history_mode == "full")
+                            ),
                         )
 
                         collected_responses = []
                         final_history = None
+                        # delta 模式下每次只附带新增消息，累积后即为本轮新增的全部消息
+                        turn_messages: HistoryList = []
 
                         if enable_event:
                             # 事件模式：直接 yield ReactOutput
-                            async for output in response_stream:
-                                yield output
+                            async with aclosing_stream(response_stream):
+                                async for output in response_stream:
+                                    if turn is not None and is_response_yield(output):
+                                        turn.observe(output.response, output.messages)
+                                    yield output
+                        elif turn is not None:
+                            # 会话模式：只产出响应内容，新增消息在本轮结束后一次性追加到会话
+                            typed_response_stream = cast(
+                                AsyncGenerator[Tuple[Any, MessageList], None],
+                                response_stream,
+                            )
+                            async with aclosing_stream(typed_response_stream):
+                                async for response, updated_messages in typed_response_stream:
+                                    turn.observe(response, updated_messages)
+                                    content = process_single_chat_response(
+                                        response,
+                                        return_mode,
+                                        stream,
+                                        function_signature.func_name,
+                                    )
+                                    collected_responses.append(content)
+                                    yield content
                         else:
                             # 向后兼容模式：处理响应流
                             # 类型断言：当 enable_event=False 时，response_stream 只包含 Tuple[Any, MessageList]
@@ -197,16 +368,28 @@ def llm_chat(
                                 AsyncGenerator[Tuple[Any, MessageList], None],
                                 response_stream,
                             )
-                            async for content, history in process_chat_response_stream(
+                            content_stream = process_chat_response_stream(
                                 response_stream=typed_response_stream,
                                 return_mode=return_mode,
                                 messages=messages,
                                 func_name=function_signature.func_name,
                                 stream=stream,
-                            ):
-                                collected_responses.append(content)
-                                final_history = history
-                                yield content, history
+                                history_mode=history_mode,
+                            )
+                            async with aclosing_stream(content_stream):
+                                async for content, history in content_stream:
+                                    collected_responses.append(content)
+                                    if history_mode == "delta":
+                                        turn_messages.extend(history)
+                                        final_history = turn_messages
+                                    elif history is not None:
+                                        final_history = history
+                                    yield content, history
+
+                        if session is not None and turn is not None:
+                            await session._commit_turn(turn)
+                            final_history = session.last_turn
+                            turn = None
 
                         # 更新 Langfuse span（仅在非事件模式或收集到响应时）
                         if not enable_event or collected_responses:
@@ -223,12 +406,17 @@ def llm_chat(
                             output={"error": str(exc)},
                         )
                         raise
+                    finally:
+                        # 本轮失败或被调用方中止时，撤销已加入会话的用户消息
+                        if session is not None and turn is not None:
+                            session._abort_turn(turn)
 
         # Preserve original function metadata
         wrapper.__name__ = func.__name__
         wrapper.__doc__ = func.__doc__
         wrapper.__annotations__ = func.__annotations__
         wrapper.__signature__ = signature_meta  # type: ignore
+        wrapper.session = open_session  # type: ignore[attr-defined]
 
         return cast(
             Callable[P, AsyncGenerator[Union[Tuple[Any, HistoryList], ReactOutput], None]],
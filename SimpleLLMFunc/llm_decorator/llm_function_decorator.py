@@ -23,6 +23,7 @@ async def generate_summary(text: str) -> str:
 ```
 """
 
+import asyncio
 import inspect
 import json
 from functools import wraps
@@ -34,27 +35,75 @@ from typing import (
     Any,
     cast,
     Optional,
+    Tuple,
     Union,
     Awaitable,
     AsyncGenerator,
     overload,
 )
 
+from SimpleLLMFunc.llm_decorator.batch import attach_batch_methods
+from SimpleLLMFunc.llm_decorator.packing import (
+    MicroBatcher,
+    PackConfig,
+    PackedCall,
+    build_packed_messages,
+    parse_packed_content,
+    resolve_pack_config,
+    resolve_packed_calls,
+)
+from SimpleLLMFunc.llm_decorator.utils import ToolkitCache
 from SimpleLLMFunc.llm_decorator.steps.common import (
+    DROP,
+    OutputPipeline,
+    compile_function_metadata,
+    generate_trace_id,
     parse_function_signature,
     setup_log_context,
 )
+from SimpleLLMFunc.llm_decorator.steps.function.prompt import _is_complex_return_type
 from SimpleLLMFunc.llm_decorator.steps.function import (
+    PartialResultBuilder,
     build_initial_prompts,
+    compile_function_prompt,
     execute_react_loop,
     parse_and_validate_response,
+    repair_response,
+)
+from SimpleLLMFunc.base.budget import resolve_run_budget
+from SimpleLLMFunc.base.checkpoint import CheckpointStore
+from SimpleLLMFunc.base.post_process import (
+    extract_content_from_response,
+    extract_content_from_stream_response,
+)
+from SimpleLLMFunc.base.context import ContextBudget, resolve_context_budget
+from SimpleLLMFunc.base.memo import MemoStore, memo_key, resolve_memo_store
+from SimpleLLMFunc.base.tool_call import ToolOutputStore, with_tool_output_reader
+from SimpleLLMFunc.base.type_resolve.json_schema import (
+    build_response_format,
+    validate_output_mode,
 )
+from SimpleLLMFunc.base.type_resolve.multimodal import has_multimodal_content
+from SimpleLLMFunc.base.type_resolve.xml_stream import expected_xml_root
 from SimpleLLMFunc.interface.llm_interface import LLM_Interface
-from SimpleLLMFunc.logger import push_error
+from SimpleLLMFunc.logger import push_debug, push_error, push_warning
 from SimpleLLMFunc.logger.logger import get_location
 from SimpleLLMFunc.tool import Tool
 from SimpleLLMFunc.observability.langfuse_client import langfuse_client
-from SimpleLLMFunc.hooks.stream import ReactOutput, is_response_yield
+from SimpleLLMFunc.hooks.events import LLMChunkArriveEvent
+from SimpleLLMFunc.hooks.stream import (
+    ReactOutput,
+    ResponseYield,
+    is_event_yield,
+    is_response_yield,
+)
+from SimpleLLMFunc.utils import (
+    DeadlineExceededError,
+    aclosing_stream,
+    clamp_timeout,
+    deadline_scope,
+    deadline_stream,
+)
 
 T = TypeVar("T")
 
@@ -66,6 +115,21 @@ def llm_function(
     system_prompt_template: Optional[str] = None,
     user_prompt_template: Optional[str] = None,
     enable_event: bool = False,
+    context_budget: Optional[Union[int, ContextBudget]] = None,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    retry_nudge: Optional[str] = None,
+    token_budget: Optional[int] = None,
+    cost_budget: Optional[float] = None,
+    stream: bool = False,
+    pack: Optional[Union[bool, int, PackConfig]] = None,
+    memoize: Optional[Union[bool, MemoStore]] = None,
+    stream_partial: bool = False,
+    output_mode: str = "xml",
+    repair_attempts: int = 0,
+    repair_prompt: Optional[str] = None,
     **llm_kwargs: Any,
 ) -> Any:  # type: ignore
     """
@@ -107,6 +171,109 @@ def llm_function(
     - Response result is automatically converted based on return type annotation
     - Supports basic types, dictionaries, and Pydantic models
 
+    ## Context Budget
+    - `context_budget` accepts a token count or a `ContextBudget`; before every LLM call in the
+      ReAct loop the message history is compacted when its estimated size exceeds the budget
+
+    ## Tool Output Store
+    - `tool_output_store` accepts a `ToolOutputStore`; tool outputs above its threshold are written
+      to a content-addressed local store and the model receives a preview plus a handle that the
+      built-in `read_tool_output` tool can page through
+
+    ## Checkpoint & Resume
+    - `checkpoint_store` accepts a `CheckpointStore` (e.g. `SQLiteCheckpointStore`); the ReAct loop
+      state is persisted after every LLM response with tool calls and every tool batch
+    - Calling the function again with the same `_trace_id=` keyword resumes from the last checkpoint
+
+    ## Deadline & Cancellation
+    - `timeout` bounds the whole call in seconds; `deadline` is an absolute `time.time()` timestamp
+    - The deadline propagates to the ReAct loop, interface retries, token bucket waits, HTTP requests
+      and tool executions; exceeding it raises `DeadlineExceededError`
+    - Cancelling the caller cancels the in-flight HTTP request and running tools immediately
+
+    ## Empty Response Retry
+    - When the final response content is empty, the retry reuses the message history accumulated
+      so far (including all tool results) and re-issues only the final LLM call
+    - `retry_nudge` optionally appends a user message to the retry request, e.g.
+      `DEFAULT_EMPTY_RESPONSE_NUDGE` from `SimpleLLMFunc.llm_decorator.steps.function.react`
+
+    ## Token & Cost Budget
+    - `token_budget` caps the total tokens (prompt + completion) of one call; `cost_budget` caps its
+      cost in USD, priced with `MODEL_PRICES` (extend it via `register_model_price`)
+    - Usage is accumulated from every LLM response; when the next tool-enabled LLM call would exceed
+      the budget, the loop skips straight to the final answer without tools
+    - The budget state is reported in `ReactEndEvent.budget`
+
+    ## Streaming & Early Termination
+    - `stream=True` requests the LLM in streaming mode; in event mode `LLMChunkArriveEvent`s are
+      emitted as the answer is generated, and the chunks are assembled before parsing
+    - For XML return types (Pydantic models, `List[...]`, `Dict[...]`), reading stops as soon as
+      the root element (`<ModelName>` or `<result>`) closes: the HTTP stream is closed, trailing
+      commentary is never generated, and only the root element is parsed
+
+    ## Partial Structured Outputs
+    - `stream_partial=True` streams the LLM response and the decorated function returns an async
+      iterator instead of a coroutine; consume it with `async for`
+    - For `List[T]` returns every item is yielded as soon as its `<item>` element closes; for
+      Pydantic returns a progressively filled object is yielded whenever a top-level field closes
+      (built with `model_construct()` until all required fields are present), and the final
+      validated object is always the last value. Other return types yield the final value once
+    - Elements are parsed incrementally with `XMLPullParser`; if the partial XML is malformed the
+      remaining values come from parsing the complete response
+    - A later LLM round (after a tool call or retry) only yields items that differ from the ones
+      already yielded; when the final (possibly repaired) list differs from the yielded items, the
+      items from the first difference onwards are yielded again and a warning is logged
+    - `func.map()` / `func.batch()` are still available; they do not yield partial values and
+      collect the final parsed result of each call
+    - Not available together with `enable_event=True` or `pack`
+
+    ## JSON Schema Output Mode
+    - `output_mode="json_schema"` sends the return type's JSON schema through `response_format`
+      instead of putting an XML schema and example in the prompt, and parses the response with
+      `model_validate_json`; `List[...]` / `Dict[...]` / `Union[...]` returns are wrapped in a
+      `{"result": ...}` object because the schema root must be an object
+    - Requires a provider that supports structured outputs; simple return types (str, int, ...)
+      are unaffected. Not available together with `stream_partial` or `pack`
+
+    ## Structured Output Repair
+    - `repair_attempts=N` retries a failed parse (malformed XML / JSON, Pydantic validation
+      errors) with a short follow-up request containing only the output format requirements,
+      the failing output and the exact parser or validation error, up to N times
+    - This recovers most parse failures for a fraction of the tokens and latency of re-running
+      the whole function; `repair_prompt` overrides the follow-up message (`{error}` placeholder,
+      default `DEFAULT_REPAIR_PROMPT` from `SimpleLLMFunc.llm_decorator.steps.function.repair`;
+      other braces in the template are kept as-is)
+    - Repair requests are traced in Langfuse and count towards `token_budget` / `cost_budget`;
+      no further repair is attempted once the next one would exceed the budget
+
+    ## Batch / Map
+    - Every decorated function gets `.map(iterable, concurrency=, ordered=, return_exceptions=,
+      retries=)`, which streams results as an async iterator, and `.batch(...)`, which returns
+      the results as a list in input order
+    - Each item is passed as the single positional argument; use `CallArgs(*args, **kwargs)`
+      for several arguments. Concurrency defaults to the interface's token bucket capacity
+    - Failed items are retried with exponential backoff; throughput and latency statistics are
+      logged at the end and available as `MapRun.stats`
+
+    ## Request Packing
+    - `pack=True` (or a max batch size, or a `PackConfig(max_items=, max_wait=)`) collects
+      concurrent calls arriving within a short window and sends them as one request: the system
+      prompt is sent once and the model returns `<results><item index="i">...</item></results>`
+    - Each item is parsed with the function's return type and handed to its caller; when the packed
+      request fails or an item is missing or malformed, those calls fall back to individual calls
+    - Calls with `_template_params`, `_trace_id` or multimodal arguments are never packed;
+      packing is not available together with `enable_event=True`
+    - The packed request runs in the context (deadline, trace, budget) of the first call in the
+      batch; calls that fall back run in their own caller's context
+
+    ## Memoization
+    - `memoize=True` (an in-memory LRU) or a `MemoStore` (`InMemoryMemoStore(max_entries=, ttl=)`,
+      `SQLiteMemoStore(path, ttl=)`) caches parsed results, keyed on the docstring, template
+      params, bound arguments, return type, model and LLM parameters
+    - A hit skips prompt building, the LLM request and parsing; in event mode only the final
+      `ResponseYield` is emitted. Hit rates are available as `func.memo_store.stats`
+    - Intended for deterministic calls (e.g. temperature 0 classification and extraction)
+
     ## LLM Interface Parameters
     - Settings passed via `**llm_kwargs` are directly forwarded to the underlying LLM interface
 
@@ -134,6 +301,18 @@ def llm_function(
         )
         ```
     """
+    pack_config = resolve_pack_config(pack)
+    memo_store = resolve_memo_store(memoize)
+    if stream_partial and (enable_event or pack_config is not None):
+        raise ValueError("stream_partial 不能与 enable_event=True 或 pack 同时使用")
+    stream_response = stream or stream_partial
+    validate_output_mode(output_mode)
+    if repair_attempts < 0:
+        raise ValueError("repair_attempts 不能为负数")
+    if output_mode == "json_schema" and (stream_partial or pack_config is not None):
+        raise ValueError("output_mode='json_schema' 不能与 stream_partial 或 pack 同时使用")
+    if pack_config is not None and enable_event:
+        raise ValueError("pack 不能与 enable_event=True 同时使用")
 
     def decorator(
         func: Union[Callable[..., T], Callable[..., Awaitable[T]]],
@@ -141,151 +320,463 @@ def llm_function(
         signature = inspect.signature(func)
         docstring = func.__doc__ or ""
         func_name = func.__name__
-
-        # 统一的内部执行逻辑
-        # 使用闭包变量来传递解析后的结果（避免重复解析）
-        parsed_result: List[Optional[T]] = [None]  # 使用列表以便在闭包中修改
-        
-        async def _execute_function_with_events(
-            *args: Any, **kwargs: Any
-        ) -> AsyncGenerator[ReactOutput, None]:
-            """统一的执行逻辑，总是返回事件流
-            
-            解析后的结果会存储在外层的 parsed_result 变量中
-            """
-            # Step 1: 解析函数签名
-            sig, template_params = parse_function_signature(func, args, kwargs)
-
-            # Step 2: 设置日志上下文
-            async with setup_log_context(
-                func_name=sig.func_name,
-                trace_id=sig.trace_id,
-                arguments=sig.bound_args.arguments,
-            ):
-                # 创建 Langfuse parent span
-                with langfuse_client.start_as_current_observation(
-                    as_type="span",
-                    name=f"{sig.func_name}_function_call",
-                    input=sig.bound_args.arguments,
-                    metadata={
-                        "function_name": sig.func_name,
-                        "trace_id": sig.trace_id,
-                        "tools_available": len(toolkit) if toolkit else 0,
-                        "max_tool_calls": max_tool_calls,
-                        "enable_event": enable_event,
+        resolved_context_budget = resolve_context_budget(context_budget)
+        run_budget = resolve_run_budget(token_budget, cost_budget)
+        effective_toolkit = with_tool_output_reader(toolkit, tool_output_store)
+        # 工具定义和工具映射在首次调用时生成，之后复用；工具列表变化时重新生成
+        tool_cache = ToolkitCache(effective_toolkit, func_name)
+
+        # 函数元数据和提示骨架只依赖函数本身，装饰时编译一次
+        compiled: Dict[str, Any] = {}
+
+        def ensure_compiled() -> Dict[str, Any]:
+            if not compiled:
+                metadata = compile_function_metadata(func)
+                compiled["prompt"] = compile_function_prompt(
+                    metadata, system_prompt_template, user_prompt_template, output_mode
+                )
+                json_output = output_mode == "json_schema" and _is_complex_return_type(
+                    metadata.return_type
+                )
+                # JSON Schema 模式下通过 response_format 传递 schema（调用方显式传入的优先）
+                compiled["llm_kwargs"] = (
+                    {"response_format": build_response_format(metadata.return_type), **llm_kwargs}
+                    if json_output
+                    else llm_kwargs
+                )
+                compiled["xml_output"] = not json_output
+                compiled["metadata"] = metadata
+            return compiled
+
+        try:
+            ensure_compiled()
+        except Exception:
+            # 注解引用了尚未定义的名称（前向引用）等情况：推迟到第一次调用时编译，错误也在调用时抛出
+            pass
+
+        def _memo_key(sig: Any, template_params: Optional[Dict[str, Any]]) -> Optional[str]:
+            """计算缓存键；参数无法生成稳定的键时返回 None，本次调用不使用缓存"""
+            try:
+                return memo_key(
+                    docstring=sig.docstring,
+                    template_params=template_params,
+                    arguments=sig.bound_args.arguments,
+                    return_type=sig.return_type,
+                    model=getattr(llm_interface, "model_name", ""),
+                    extra={
+                        "system_prompt_template": system_prompt_template,
+                        "user_prompt_template": user_prompt_template,
+                        "llm_kwargs": llm_kwargs,
+                        "output_mode": output_mode,
                     },
-                ) as function_span:
-                    try:
-                        # Step 3: 构建初始提示
-                        messages = build_initial_prompts(
-                            signature=sig,
-                            system_prompt_template=system_prompt_template,
-                            user_prompt_template=user_prompt_template,
-                            template_params=template_params,
-                        )
+                )
+            except TypeError as exc:
+                push_debug(
+                    f"LLM 函数 '{func_name}' 跳过缓存: {exc}", location=get_location()
+                )
+                return None
+
+        async def _memo_lookup(key: str, return_type: Any) -> Tuple[bool, Any]:
+            assert memo_store is not None
+            try:
+                hit, value = await memo_store.get(key, return_type)
+            except Exception as exc:
+                push_warning(
+                    f"LLM 函数 '{func_name}' 读取缓存失败: {exc}", location=get_location()
+                )
+                return False, None
+            if hit:
+                push_debug(f"LLM 函数 '{func_name}' 命中缓存", location=get_location())
+            return hit, value
+
+        async def _memo_save(key: str, value: Any, return_type: Any) -> None:
+            assert memo_store is not None
+            try:
+                await memo_store.set(key, value, return_type)
+            except Exception as exc:
+                push_warning(
+                    f"LLM 函数 '{func_name}' 写入缓存失败: {exc}", location=get_location()
+                )
 
-                        # Step 4: 执行 ReAct 循环（返回事件流）
-                        user_task_prompt = json.dumps(
-                            sig.bound_args.arguments,
-                            default=str,
-                            ensure_ascii=False,
-                        )
-                        
-                        event_stream = await execute_react_loop(
-                            llm_interface=llm_interface,
-                            messages=messages,
-                            toolkit=toolkit,
-                            max_tool_calls=max_tool_calls,
-                            llm_kwargs=llm_kwargs,
-                            func_name=sig.func_name,
-                            enable_event=True,
-                            trace_id=sig.trace_id,
-                            user_task_prompt=user_task_prompt,
-                        )
+        # 统一的内部执行逻辑
+        def _event_runner(use_memo: bool) -> Callable[..., AsyncGenerator[ReactOutput, None]]:
+            """构造统一的执行逻辑；`use_memo=False` 时跳过缓存读写（调用方已经自行处理缓存）"""
+
+            async def run(*args: Any, **kwargs: Any) -> AsyncGenerator[ReactOutput, None]:
+                """统一的执行逻辑，总是返回事件流
+
+                事件原样透传，最后 yield 一个包含解析后结果的 ResponseYield。
+                ReAct 循环与本函数的处理都注册为同一个 OutputPipeline 上的阶段，
+                本函数是整条链路上唯一转发条目的生成器。
+                """
+                # Step 1: 解析函数签名
+                compiled_parts = ensure_compiled()
+                sig, template_params = parse_function_signature(
+                    func, args, kwargs, metadata=compiled_parts["metadata"]
+                )
+
+                # 命中缓存时跳过提示构建、LLM 请求和解析
+                cache_key: Optional[str] = None
+                if memo_store is not None and use_memo:
+                    cache_key = _memo_key(sig, template_params)
+                if cache_key is not None:
+                    hit, cached = await _memo_lookup(cache_key, sig.return_type)
+                    if hit:
+                        yield ResponseYield(type="response", response=cached, messages=[])
+                        return
+
+                # Step 2: 设置日志上下文
+                async with setup_log_context(
+                    func_name=sig.func_name,
+                    trace_id=sig.trace_id,
+                    arguments=sig.bound_args.arguments,
+                ):
+                    # 创建 Langfuse parent span
+                    with langfuse_client.start_as_current_observation(
+                        as_type="span",
+                        name=f"{sig.func_name}_function_call",
+                        input=sig.bound_args.arguments,
+                        metadata={
+                            "function_name": sig.func_name,
+                            "trace_id": sig.trace_id,
+                            "tools_available": len(effective_toolkit) if effective_toolkit else 0,
+                            "max_tool_calls": max_tool_calls,
+                            "enable_event": enable_event,
+                        },
+                    ) as function_span:
+                        try:
+                            # Step 3: 构建初始提示
+                            messages = build_initial_prompts(
+                                signature=sig,
+                                system_prompt_template=system_prompt_template,
+                                user_prompt_template=user_prompt_template,
+                                template_params=template_params,
+                                compiled_prompt=compiled_parts["prompt"],
+                            )
 
-                        # Step 5: 处理事件流，解析响应后再 yield
-                        last_response = None
-                        last_messages = None
-                        async for output in event_stream:
-                            if is_response_yield(output):
-                                # 收集原始响应和消息历史
-                                last_response = output.response
-                                last_messages = output.messages
-                                # 不立即 yield ResponseYield，等解析完成后再 yield
-                            else:
-                                # EventYield 直接透传
-                                yield output
+                            # Step 4: 执行 ReAct 循环（返回事件流）
+                            user_task_prompt = json.dumps(
+                                sig.bound_args.arguments,
+                                default=str,
+                                ensure_ascii=False,
+                            )
 
-                        # 解析和验证最终响应
-                        if last_response:
-                            result = parse_and_validate_response(
-                                response=last_response,
-                                return_type=sig.return_type,
+                            # 本次调用的所有 LLM 请求（含重试和输出修复）共用一份花费记录
+                            budget_tracker = (
+                                run_budget.start(llm_interface.model_name)
+                                if run_budget is not None
+                                else None
+                            )
+                            pipeline = OutputPipeline()
+                            event_stream = await execute_react_loop(
+                                llm_interface=llm_interface,
+                                messages=messages,
+                                toolkit=effective_toolkit,
+                                tool_cache=tool_cache,
+                                max_tool_calls=max_tool_calls,
+                                llm_kwargs=compiled_parts["llm_kwargs"],
                                 func_name=sig.func_name,
+                                enable_event=True,
+                                trace_id=sig.trace_id,
+                                user_task_prompt=user_task_prompt,
+                                context_budget=resolved_context_budget,
+                                tool_output_store=tool_output_store,
+                                checkpoint_store=checkpoint_store,
+                                retry_nudge=retry_nudge,
+                                run_budget=run_budget,
+                                budget_tracker=budget_tracker,
+                                pipeline=pipeline,
+                                stream=stream_response,
+                                stop_at_xml_root=(
+                                    expected_xml_root(sig.return_type)
+                                    if stream_response and compiled_parts["xml_output"]
+                                    else None
+                                ),
                             )
 
-                            # 存储结果到闭包变量，供外层使用
-                            parsed_result[0] = result
+                            # Step 5: 收集原始响应（不立即 yield），EventYield 直接透传
+                            last_response: List[Any] = [None]
+                            last_messages: List[Any] = [None]
 
-                            # Yield 解析后的响应（而不是原始的 LLM 响应）
-                            from SimpleLLMFunc.hooks.stream import ResponseYield
-                            yield ResponseYield(
-                                type="response",
-                                response=result,  # 解析后的结果（str, Pydantic 对象等）
-                                messages=last_messages if last_messages else [],
-                        )
+                            def capture_response(output: ReactOutput) -> Any:
+                                if is_response_yield(output):
+                                    last_response[0] = output.response
+                                    last_messages[0] = output.messages
+                                    return DROP
+                                return output
 
-                        # 更新 Langfuse span
-                        function_span.update(
-                            output={
-                                "result": result,
+                            pipeline.add_stage(on_item=capture_response)
+
+                            async for output in event_stream:
+                                yield output
+
+                            # 解析和验证最终响应
+                            result = None
+                            if last_response[0]:
+                                try:
+                                    result = parse_and_validate_response(
+                                        response=last_response[0],
+                                        return_type=sig.return_type,
+                                        func_name=sig.func_name,
+                                        output_mode=output_mode,
+                                    )
+                                except Exception as parse_error:
+                                    if not repair_attempts:
+                                        raise
+                                    # 只把失败的输出和错误发回修复，而不是重新执行整个函数
+                                    result = await repair_response(
+                                        llm_interface=llm_interface,
+                                        system_prompt=(
+                                            messages[0].get("content")
+                                            if messages and messages[0].get("role") == "system"
+                                            else None
+                                        ),
+                                        response=last_response[0],
+                                        error=parse_error,
+                                        return_type=sig.return_type,
+                                        func_name=sig.func_name,
+                                        attempts=repair_attempts,
+                                        llm_kwargs=compiled_parts["llm_kwargs"],
+                                        output_mode=output_mode,
+                                        repair_prompt=repair_prompt,
+                                        budget_tracker=budget_tracker,
+                                    )
+                                if cache_key is not None and result is not None:
+                                    await _memo_save(cache_key, result, sig.return_type)
+
+                                # Yield 解析后的响应（而不是原始的 LLM 响应）
+                                yield ResponseYield(
+                                    type="response",
+                                    response=result,  # 解析后的结果（str, Pydantic 对象等）
+                                    messages=last_messages[0] if last_messages[0] else [],
+                                )
+
+                            # 更新 Langfuse span
+                            function_span.update(
+                                output={
+                                    "result": result,
                                     "return_type": str(sig.return_type),
-                            },
-                        )
-                    except Exception as exc:
-                        # 更新 span 错误信息
-                        function_span.update(
-                            output={"error": str(exc)},
-                        )
-                        push_error(
-                            f"Async LLM function '{sig.func_name}' execution failed: {str(exc)}",
-                            location=get_location(),
-                        )
-                        raise
+                                },
+                            )
+                        except Exception as exc:
+                            # 更新 span 错误信息
+                            function_span.update(
+                                output={"error": str(exc)},
+                            )
+                            push_error(
+                                f"Async LLM function '{sig.func_name}' execution failed: {str(exc)}",
+                                location=get_location(),
+                            )
+                            raise
 
-        if enable_event:
-            # 事件模式：直接返回生成器
+            return run
+
+        _execute_function_with_events = _event_runner(use_memo=True)
+        _execute_function_without_memo = _event_runner(use_memo=False)
+
+        if stream_partial:
+            # 部分结果模式：边接收 chunk 边增量解析，产出已经闭合的列表元素或部分对象
             @wraps(func)
-            async def async_wrapper_event(*args: Any, **kwargs: Any) -> AsyncGenerator[ReactOutput, None]:
-                async for output in _execute_function_with_events(*args, **kwargs):
-                    yield output
+            async def partial_wrapper(*args: Any, **kwargs: Any) -> AsyncGenerator[Any, None]:
+                return_type = ensure_compiled()["metadata"].return_type
+                builder = PartialResultBuilder(return_type, func_name)
+                result: Any = None
+                async with aclosing_stream(
+                    deadline_stream(
+                        _execute_function_with_events(*args, **kwargs),
+                        timeout=timeout,
+                        deadline=deadline,
+                    )
+                ) as outputs:
+                    async for output in outputs:
+                        if is_response_yield(output):
+                            result = output.response
+                        elif is_event_yield(output) and isinstance(
+                            output.event, LLMChunkArriveEvent
+                        ):
+                            event = output.event
+                            if event.chunk is None:
+                                continue
+                            text = extract_content_from_stream_response(event.chunk, func_name)
+                            for value in builder.feed(text, event.iteration):
+                                yield value
+
+                if result is None:
+                    raise ValueError("No response received from LLM")
+                for value in builder.finish(result):
+                    yield value
+
+            partial_wrapper.__name__ = func_name
+            partial_wrapper.__doc__ = docstring
+            partial_wrapper.__annotations__ = func.__annotations__
+            setattr(partial_wrapper, "__signature__", signature)
+            # map()/batch() 不产出部分结果，每个条目收集最终解析好的完整结果
+            attach_batch_methods(
+                partial_wrapper,
+                llm_interface,
+                call=lambda *args, **kwargs: deadline_stream(
+                    _execute_function_with_events(*args, **kwargs),
+                    timeout=timeout,
+                    deadline=deadline,
+                ),
+            )
+            setattr(partial_wrapper, "memo_store", memo_store)
+
+            return cast(Callable[..., AsyncGenerator[Any, None]], partial_wrapper)
+
+        if enable_event:
+            # 事件模式：未设置截止时间时直接返回生成器，不再额外包一层转发
+            if timeout is None and deadline is None:
+                async_wrapper_event = wraps(func)(_execute_function_with_events)
+            else:
+
+                @wraps(func)
+                async def async_wrapper_event(
+                    *args: Any, **kwargs: Any
+                ) -> AsyncGenerator[ReactOutput, None]:
+                    # 截止时间只作用于本次调用的事件流，不泄漏给迭代事件流的调用方
+                    async with aclosing_stream(
+                        deadline_stream(
+                            _execute_function_with_events(*args, **kwargs),
+                            timeout=timeout,
+                            deadline=deadline,
+                        )
+                    ) as outputs:
+                        async for output in outputs:
+                            yield output
 
             # Preserve original function metadata
             async_wrapper_event.__name__ = func_name
             async_wrapper_event.__doc__ = docstring
             async_wrapper_event.__annotations__ = func.__annotations__
             setattr(async_wrapper_event, "__signature__", signature)
+            attach_batch_methods(async_wrapper_event, llm_interface)
+            setattr(async_wrapper_event, "memo_store", memo_store)
 
             return cast(Callable[..., AsyncGenerator[ReactOutput, None]], async_wrapper_event)
         else:
             # 非事件模式：消费生成器并返回最终结果
-            @wraps(func)
-            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
-                # 消费事件流（内部会自动解析并存储结果到 parsed_result）
-                async for output in _execute_function_with_events(*args, **kwargs):
-                    pass  # 在非事件模式下，我们不关心事件，只要最终结果
+            async def _call_single(
+                args: Tuple[Any, ...], kwargs: Dict[str, Any], use_memo: bool = True
+            ) -> Any:
+                result: Any = None
+                with deadline_scope(timeout=timeout, deadline=deadline):
+                    # 截止时间到达时直接取消整个调用（包括 in-flight 的 HTTP 请求和工具）
+                    try:
+                        async with asyncio.timeout(clamp_timeout(None)):
+                            # 消费事件流，只保留最后一个 ResponseYield 中解析好的结果
+                            execute = (
+                                _execute_function_with_events
+                                if use_memo
+                                else _execute_function_without_memo
+                            )
+                            async for output in execute(*args, **kwargs):
+                                if is_response_yield(output):
+                                    result = output.response
+                    except TimeoutError as exc:
+                        if isinstance(exc, DeadlineExceededError):
+                            raise
+                        raise DeadlineExceededError(
+                            f"LLM 函数 '{func_name}' 超过调用截止时间"
+                        ) from exc
                 
                 # 返回内部已经解析好的结果（避免重复解析）
-                if parsed_result[0] is not None:
-                    return parsed_result[0]
+                if result is not None:
+                    return result
                 else:
                     raise ValueError("No response received from LLM")
 
+            async def _call_packed(calls: List[PackedCall]) -> Dict[int, Any]:
+                """把一批调用合并为一次 LLM 请求，返回按序号解析出的结果"""
+                compiled_parts = ensure_compiled()
+                return_type = compiled_parts["metadata"].return_type
+                messages = build_packed_messages(
+                    compiled_parts["prompt"], [call.arguments for call in calls]
+                )
+                with deadline_scope(timeout=timeout, deadline=deadline):
+                    async with setup_log_context(
+                        func_name=func_name,
+                        trace_id=generate_trace_id(func_name),
+                        arguments={"packed_calls": len(calls)},
+                    ):
+                        async with asyncio.timeout(clamp_timeout(None)):
+                            response = await execute_react_loop(
+                                llm_interface=llm_interface,
+                                messages=messages,
+                                toolkit=effective_toolkit,
+                                tool_cache=tool_cache,
+                                max_tool_calls=max_tool_calls,
+                                llm_kwargs=llm_kwargs,
+                                func_name=func_name,
+                                enable_event=False,
+                                context_budget=resolved_context_budget,
+                                tool_output_store=tool_output_store,
+                                run_budget=run_budget,
+                                retry_nudge=retry_nudge,
+                                stream=stream,
+                                stop_at_xml_root="results" if stream else None,
+                            )
+                        content = extract_content_from_response(response, func_name)
+                        return parse_packed_content(
+                            content or "", len(calls), return_type, func_name
+                        )
+
+            async def _flush_packed(calls: List[PackedCall]) -> None:
+                await resolve_packed_calls(
+                    calls,
+                    call_packed=_call_packed,
+                    # 打包路径已经在入队前查过缓存，并在拿到结果后写入
+                    call_single=lambda call: _call_single(
+                        call.args, call.kwargs, use_memo=False
+                    ),
+                    func_name=func_name,
+                )
+
+            batcher = MicroBatcher(pack_config, _flush_packed) if pack_config else None
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                if batcher is None or "_template_params" in kwargs or "_trace_id" in kwargs:
+                    return cast(T, await _call_single(args, kwargs))
+
+                # 先绑定参数，参数错误直接抛给调用方
+                compiled_parts = ensure_compiled()
+                sig, _ = parse_function_signature(
+                    func, args, dict(kwargs), metadata=compiled_parts["metadata"]
+                )
+                arguments = sig.bound_args.arguments
+                if has_multimodal_content(arguments, sig.type_hints):
+                    return cast(T, await _call_single(args, kwargs))
+
+                cache_key: Optional[str] = None
+                if memo_store is not None:
+                    cache_key = _memo_key(sig, None)
+                if cache_key is not None:
+                    hit, cached = await _memo_lookup(cache_key, sig.return_type)
+                    if hit:
+                        return cast(T, cached)
+
+                with deadline_scope(timeout=timeout, deadline=deadline):
+                    try:
+                        async with asyncio.timeout(clamp_timeout(None)):
+                            result = await batcher.submit(args, kwargs, arguments)
+                    except TimeoutError as exc:
+                        if isinstance(exc, DeadlineExceededError):
+                            raise
+                        raise DeadlineExceededError(
+                            f"LLM 函数 '{func_name}' 超过调用截止时间"
+                        ) from exc
+                if cache_key is not None and result is not None:
+                    await _memo_save(cache_key, result, sig.return_type)
+                return cast(T, result)
+
         # Preserve original function metadata
         async_wrapper.__name__ = func_name
         async_wrapper.__doc__ = docstring
         async_wrapper.__annotations__ = func.__annotations__
         setattr(async_wrapper, "__signature__", signature)
+        attach_batch_methods(async_wrapper, llm_interface)
+        setattr(async_wrapper, "memo_store", memo_store)
 
         return cast(Callable[..., Awaitable[T]], async_wrapper)
 
@@ -0,0 +1,293 @@
+"""Request packing for llm_function.
+
+对很短的输入（如 `.po` 词条翻译），每次请求重复发送的 system prompt 和网络往返占了大部分开销。
+开启 `llm_function(pack=...)` 后：
+
+1. `MicroBatcher` 收集一个时间窗口（`max_wait`）内、最多 `max_items` 个并发调用
+2. 这些调用合并为一次请求：system prompt 只发送一次，各调用的参数按序号列出，
+   要求模型返回以 `<results>` 为根、每个调用一个 `<item index="...">` 的 XML
+3. 按序号解析每个结果并转换为函数的返回类型，分别交给对应的调用方
+4. 合并请求失败或解析失败时，缺失结果的调用回退为逐个单独调用
+
+每个调用在加入窗口时记录调用方的上下文（截止时间、trace、预算等 ContextVar）。
+合并请求在批次中第一个调用的上下文中执行；回退的单独调用在各自调用方的上下文中执行。
+
+Example:
+    ```python
+    @llm_function(llm_interface=llm, pack=PackConfig(max_items=20, max_wait=0.05))
+    async def translate(text: str) -> str:
+        \"\"\"Translate the text into English.\"\"\"
+
+    results = await asyncio.gather(*(translate(text) for text in texts))
+    ```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import xml.etree.ElementTree as ET
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from SimpleLLMFunc.base.post_process import convert_content_to_type
+from SimpleLLMFunc.base.type_resolve.xml_stream import XMLRootCloseDetector
+from SimpleLLMFunc.llm_decorator.steps.function.prompt import (
+    CompiledFunctionPrompt,
+    _is_complex_return_type,
+)
+from SimpleLLMFunc.logger import push_debug, push_warning
+from SimpleLLMFunc.logger.logger import get_location
+from SimpleLLMFunc.type.message import MessageList
+
+PACKED_OUTPUT_INSTRUCTIONS = """
+- Batch mode:
+    You will receive {count} independent requests, each marked with an index. Handle every
+    request on its own according to the function description above, then return all results
+    in one XML document and nothing else:
+    <results>
+      <item index="0">result of request 0</item>
+      <item index="1">result of request 1</item>
+    </results>
+    Each <item> contains exactly what you would return for that single request, in the format
+    described above. Return exactly one <item> per request. {text_hint}
+"""
+
+_TEXT_RESULT_HINT = (
+    "Wrap plain-text results in <![CDATA[ ... ]]> so they are not parsed as XML."
+)
+
+
+class PackConfig:
+    """请求合并的窗口配置"""
+
+    def __init__(self, max_items: int = 16, max_wait: float = 0.05):
+        """
+        Args:
+            max_items: 一次合并请求最多包含的调用数，达到后立即发送
+            max_wait: 第一个调用到达后最多等待的秒数
+        """
+        if max_items < 2:
+            raise ValueError("max_items 至少为 2")
+        if max_wait < 0:
+            raise ValueError("max_wait 不能为负数")
+        self.max_items = max_items
+        self.max_wait = max_wait
+
+
+def resolve_pack_config(pack: Union[bool, int, PackConfig, None]) -> Optional[PackConfig]:
+    """将装饰器的 `pack=` 参数转换为 PackConfig（True 使用默认配置，int 表示 max_items）"""
+    if pack is None or pack is False:
+        return None
+    if pack is True:
+        return PackConfig()
+    if isinstance(pack, PackConfig):
+        return pack
+    if isinstance(pack, int):
+        return PackConfig(max_items=pack)
+    raise TypeError(f"不支持的 pack 参数: {pack!r}")
+
+
+def build_packed_messages(
+    compiled_prompt: CompiledFunctionPrompt,
+    arguments_list: List[Dict[str, Any]],
+) -> MessageList:
+    """构建合并请求的消息：system prompt 只出现一次，各调用的参数按序号列出"""
+    text_hint = "" if _is_complex_return_type(compiled_prompt.return_type) else _TEXT_RESULT_HINT
+    system_prompt = compiled_prompt.system_prompt() + PACKED_OUTPUT_INSTRUCTIONS.format(
+        count=len(arguments_list), text_hint=text_hint
+    ).rstrip()
+
+    requests = []
+    for index, arguments in enumerate(arguments_list):
+        lines = "\n".join(f"  - {name}: {value}" for name, value in arguments.items())
+        requests.append(f"[request {index}]\n{lines}")
+    user_prompt = "The requests are:\n\n" + "\n\n".join(requests)
+
+    push_debug(f"Packed system prompt: {system_prompt}", location=get_location())
+    push_debug(f"Packed user prompt: {user_prompt}", location=get_location())
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def parse_packed_content(
+    content: str,
+    count: int,
+    return_type: Any,
+    func_name: str,
+) -> Dict[int, Any]:
+    """按序号解析合并请求的输出；无法解析的条目不出现在结果中"""
+    detector = XMLRootCloseDetector("results")
+    detector.feed(content)
+    if detector.start is None:
+        raise ValueError("合并请求的输出中没有 <results> 根元素")
+    root = ET.fromstring(detector.trim(content))
+
+    complex_type = _is_complex_return_type(return_type)
+    results: Dict[int, Any] = {}
+    for item in root.findall("item"):
+        try:
+            index = int(item.get("index", ""))
+        except ValueError:
+            continue
+        if not 0 <= index < count or index in results:
+            continue
+
+        if complex_type:
+            children = list(item)
+            if len(children) != 1:
+                continue
+            item_content = ET.tostring(children[0], encoding="unicode")
+        else:
+            item_content = "".join(item.itertext()).strip()
+
+        try:
+            results[index] = convert_content_to_type(item_content, return_type, func_name)
+        except Exception as exc:
+            push_warning(
+                f"LLM 函数 '{func_name}' 合并请求中第 {index} 个结果解析失败: {exc}",
+                location=get_location(),
+            )
+    return results
+
+
+class PackedCall:
+    """等待合并发送的一次调用，`context` 是调用方在加入窗口时的上下文"""
+
+    __slots__ = ("args", "kwargs", "arguments", "future", "context")
+
+    def __init__(
+        self,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        arguments: Dict[str, Any],
+        future: "asyncio.Future[Any]",
+    ) -> None:
+        self.args = args
+        self.kwargs = kwargs
+        self.arguments = arguments
+        self.future = future
+        self.context = contextvars.copy_context()
+
+
+class MicroBatcher:
+    """收集时间窗口内的并发调用并一次性交给 flush 回调"""
+
+    def __init__(
+        self,
+        config: PackConfig,
+        flush: Callable[[List[PackedCall]], Awaitable[None]],
+    ) -> None:
+        self.config = config
+        self._flush = flush
+        self._pending: List[PackedCall] = []
+        self._timer: Optional[asyncio.Task[None]] = None
+        self._tasks: set = set()
+
+    async def submit(
+        self,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        arguments: Dict[str, Any],
+    ) -> Any:
+        """加入当前窗口并等待结果"""
+        loop = asyncio.get_running_loop()
+        call = PackedCall(args, kwargs, arguments, loop.create_future())
+        self._pending.append(call)
+
+        if len(self._pending) >= self.config.max_items:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.create_task(self._wait_and_dispatch())
+
+        return await asyncio.shield(call.future)
+
+    async def _wait_and_dispatch(self) -> None:
+        await asyncio.sleep(self.config.max_wait)
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        calls, self._pending = self._pending, []
+        if not calls:
+            return
+        # 合并请求总是在批次第一个调用的上下文中执行，与由哪个调用触发发送无关
+        task = asyncio.get_running_loop().create_task(
+            self._run(calls), context=calls[0].context.copy()
+        )
+        # 保持引用，避免任务在完成前被垃圾回收
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, calls: List[PackedCall]) -> None:
+        try:
+            await self._flush(calls)
+        except BaseException as exc:
+            for call in calls:
+                if not call.future.done():
+                    call.future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+
+
+async def resolve_packed_calls(
+    calls: List[PackedCall],
+    call_packed: Callable[[List[PackedCall]], Awaitable[Dict[int, Any]]],
+    call_single: Callable[[PackedCall], Awaitable[Any]],
+    func_name: str,
+) -> None:
+    """发送合并请求并分发结果；缺失结果的调用回退为单独调用"""
+    results: Dict[int, Any] = {}
+    if len(calls) > 1:
+        try:
+            results = await call_packed(calls)
+        except Exception as exc:
+            push_warning(
+                f"LLM 函数 '{func_name}' 合并请求失败，回退为逐个调用: {exc}",
+                location=get_location(),
+            )
+
+    fallback: List[PackedCall] = []
+    for index, call in enumerate(calls):
+        if index in results:
+            if not call.future.done():
+                call.future.set_result(results[index])
+        else:
+            fallback.append(call)
+
+    if results and fallback:
+        push_warning(
+            f"LLM 函数 '{func_name}' 合并请求缺少 {len(fallback)} 个结果，回退为单独调用",
+            location=get_location(),
+        )
+
+    async def run_single(call: PackedCall) -> None:
+        try:
+            # 在调用方自己的上下文中执行，而不是合并请求的上下文
+            result = await asyncio.get_running_loop().create_task(
+                call_single(call), context=call.context
+            )
+        except Exception as exc:
+            if not call.future.done():
+                call.future.set_exception(exc)
+        else:
+            if not call.future.done():
+                call.future.set_result(result)
+
+    await asyncio.gather(*(run_single(call) for call in fallback))
+
+
+__all__ = [
+    "MicroBatcher",
+    "PackConfig",
+    "PackedCall",
+    "build_packed_messages",
+    "parse_packed_content",
+    "resolve_pack_config",
+    "resolve_packed_calls",
+]
@@ -11,7 +11,7 @@ from SimpleLLMFunc.logger.logger import get_location
 from SimpleLLMFunc.tool import Tool
 from SimpleLLMFunc.type import HistoryList
 from SimpleLLMFunc.llm_decorator.steps.common.types import FunctionSignature
-from SimpleLLMFunc.llm_decorator.utils import process_tools
+from SimpleLLMFunc.llm_decorator.utils import ToolkitCache, process_tools
 
 # Constants
 HISTORY_PARAM_NAMES: List[str] = ["history", "chat_history"]
@@ -126,16 +126,41 @@ def filter_history_messages(
     return filtered
 
 
+def build_chat_user_message(
+    signature: FunctionSignature,
+    exclude_params: List[str],
+) -> Optional[Dict[str, Any]]:
+    """根据调用参数构建本轮的用户消息，没有内容时返回 None"""
+    has_multimodal = has_multimodal_content(
+        signature.bound_args.arguments,
+        signature.type_hints,
+        exclude_params=exclude_params,
+    )
+    user_message_content = build_chat_user_message_content(
+        signature.bound_args.arguments,
+        signature.type_hints,
+        has_multimodal,
+        exclude_params,
+    )
+    if not user_message_content:
+        return None
+    return {"role": "user", "content": user_message_content}
+
+
 def build_chat_messages(
     signature: FunctionSignature,
     toolkit: Optional[List[Union[Tool, Any]]],
     exclude_params: List[str],
+    tool_cache: Optional[ToolkitCache] = None,
 ) -> HistoryList:
     """构建聊天消息列表的完整流程"""
     messages: HistoryList = []
 
     # 1. 准备工具
-    tool_param, tool_map = process_tools(toolkit, signature.func_name)
+    if tool_cache is not None:
+        tool_param, tool_map = tool_cache.get()
+    else:
+        tool_param, tool_map = process_tools(toolkit, signature.func_name)
 
     # 2. 构建系统提示
     system_content = build_chat_system_prompt(
@@ -156,24 +181,10 @@ def build_chat_messages(
         filtered_history = filter_history_messages(custom_history, signature.func_name)
         messages.extend(filtered_history)
 
-    # 5. 检查多模态内容
-    has_multimodal = has_multimodal_content(
-        signature.bound_args.arguments,
-        signature.type_hints,
-        exclude_params=exclude_params,
-    )
-
-    # 6. 构建用户消息内容
-    user_message_content = build_chat_user_message_content(
-        signature.bound_args.arguments,
-        signature.type_hints,
-        has_multimodal,
-        exclude_params,
-    )
-
-    # 7. 添加用户消息
-    if user_message_content:
-        messages.append({"role": "user", "content": user_message_content})
+    # 5. 构建并添加用户消息
+    user_message = build_chat_user_message(signature, exclude_params)
+    if user_message is not None:
+        messages.append(user_message)
 
     return messages
 
@@ -5,20 +5,28 @@ from __future__ import annotations
 from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple, Union, cast
 
 from SimpleLLMFunc.base.ReAct import execute_llm
+from SimpleLLMFunc.base.budget import RunBudget
+from SimpleLLMFunc.base.checkpoint import CheckpointStore
+from SimpleLLMFunc.base.context import ContextBudget
+from SimpleLLMFunc.base.tool_call import ToolOutputStore
 from SimpleLLMFunc.interface.llm_interface import LLM_Interface
 from SimpleLLMFunc.tool import Tool
-from SimpleLLMFunc.llm_decorator.utils import process_tools
+from SimpleLLMFunc.llm_decorator.utils import ToolkitCache, process_tools
 from SimpleLLMFunc.type import MessageList, ToolDefinitionList
 from SimpleLLMFunc.hooks.stream import ReactOutput, ResponseYield, is_response_yield
 from SimpleLLMFunc.logger.logger import get_current_context_attribute
 from SimpleLLMFunc.logger.context_manager import get_current_trace_id
+from SimpleLLMFunc.utils import aclosing_stream
 
 
 def prepare_tools_for_execution(
     toolkit: Optional[List[Union[Tool, Callable[..., Awaitable[Any]]]]],
     func_name: str,
+    tool_cache: Optional[ToolkitCache] = None,
 ) -> tuple[ToolDefinitionList, Dict[str, Callable[..., Awaitable[Any]]]]:
-    """准备工具供执行使用"""
+    """准备工具供执行使用，提供 tool_cache 时复用装饰时生成的工具定义"""
+    if tool_cache is not None:
+        return tool_cache.get()
     return process_tools(toolkit, func_name)
 
 
@@ -32,13 +40,19 @@ async def execute_llm_call(
     enable_event: bool = False,
     trace_id: str = "",
     user_task_prompt: str = "",
+    context_budget: Optional[ContextBudget] = None,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    run_budget: Optional[RunBudget] = None,
+    event_include_chunks: bool = True,
+    copy_messages: bool = True,
     **llm_kwargs: Any,
 ) -> AsyncGenerator[Union[Tuple[Any, MessageList], ReactOutput], None]:
     """执行 LLM 调用，返回响应和更新后的消息（或 ReactOutput）"""
     func_name = get_current_context_attribute("function_name") or "Unknown Function"
     current_trace_id = trace_id or get_current_trace_id() or ""
     
-    async for output in execute_llm(
+    llm_stream = execute_llm(
         llm_interface=llm_interface,
         messages=messages,
         tools=tools,
@@ -48,16 +62,25 @@ async def execute_llm_call(
         enable_event=enable_event,
         trace_id=current_trace_id,
         user_task_prompt=user_task_prompt,
+        context_budget=context_budget,
+        tool_output_store=tool_output_store,
+        checkpoint_store=checkpoint_store,
+        run_budget=run_budget,
+        event_include_chunks=event_include_chunks,
+        copy_messages=copy_messages,
         **llm_kwargs,
-    ):
-        if enable_event:
-            # 事件模式：直接 yield ReactOutput
-            yield output
-        else:
-            # 向后兼容模式：yield (response, messages) 元组
-            # 类型断言：当 enable_event=False 时，output 一定是 Tuple[Any, MessageList]
-            response, updated_messages = cast(Tuple[Any, MessageList], output)
-            yield response, updated_messages
+    )
+    # 调用方提前关闭时立即关闭 execute_llm（进而中止 HTTP 流、取消工具任务）
+    async with aclosing_stream(llm_stream):
+        async for output in llm_stream:
+            if enable_event:
+                # 事件模式：直接 yield ReactOutput
+                yield output
+            else:
+                # 向后兼容模式：yield (response, messages) 元组
+                # 类型断言：当 enable_event=False 时，output 一定是 Tuple[Any, MessageList]
+                response, updated_messages = cast(Tuple[Any, MessageList], output)
+                yield response, updated_messages
 
 
 async def execute_react_loop_streaming(
@@ -71,10 +94,21 @@ async def execute_react_loop_streaming(
     enable_event: bool = False,
     trace_id: str = "",
     user_task_prompt: str = "",
+    context_budget: Optional[ContextBudget] = None,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    run_budget: Optional[RunBudget] = None,
+    event_include_chunks: bool = True,
+    tool_cache: Optional[ToolkitCache] = None,
+    copy_messages: bool = True,
 ) -> AsyncGenerator[Union[Tuple[Any, MessageList], ReactOutput], None]:
-    """执行 ReAct 循环的流式版本（无重试），返回响应和更新后的消息（或 ReactOutput）"""
+    """执行 ReAct 循环的流式版本（无重试），返回响应和更新后的消息（或 ReactOutput）
+
+    copy_messages=False 时每个响应附带的是实时的消息列表（只在下一次迭代前有效），
+    只读取新增消息的调用方可以避免每个 chunk 复制一次完整历史。
+    """
     # 1. 准备工具
-    tool_param, tool_map = prepare_tools_for_execution(toolkit, func_name)
+    tool_param, tool_map = prepare_tools_for_execution(toolkit, func_name, tool_cache)
 
     # 2. 执行 LLM 调用（流式）
     response_stream = execute_llm_call(
@@ -87,10 +121,17 @@ async def execute_react_loop_streaming(
         enable_event=enable_event,
         trace_id=trace_id,
         user_task_prompt=user_task_prompt,
+        context_budget=context_budget,
+        tool_output_store=tool_output_store,
+        checkpoint_store=checkpoint_store,
+        run_budget=run_budget,
+        event_include_chunks=event_include_chunks,
+        copy_messages=copy_messages,
         **llm_kwargs,
     )
 
     # 3. 返回响应流和更新后的消息（或 ReactOutput）
-    async for output in response_stream:
-        yield output
+    async with aclosing_stream(response_stream):
+        async for output in response_stream:
+            yield output
 
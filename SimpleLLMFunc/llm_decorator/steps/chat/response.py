@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 import json
-from typing import Any, AsyncGenerator, Dict, List, Literal, Tuple
+from typing import Any, AsyncGenerator, Dict, List, Literal, Optional, Tuple
 
+from SimpleLLMFunc.base.messages.assistant import build_assistant_response_message
 from SimpleLLMFunc.base.post_process import (
     extract_content_from_response,
     extract_content_from_stream_response,
@@ -12,6 +13,76 @@ from SimpleLLMFunc.base.post_process import (
 from SimpleLLMFunc.logger import app_log
 from SimpleLLMFunc.logger.logger import get_location
 from SimpleLLMFunc.type import HistoryList, MessageList
+from SimpleLLMFunc.utils import aclosing_stream
+
+
+HISTORY_MODES = ("full", "final", "delta")
+"""llm_chat 支持的历史产出模式"""
+
+
+class ChatTurn:
+    """跟踪一次对话调用中新增的消息
+
+    ReAct 循环产出的消息快照中，初始消息之后的部分是本次调用新增的工具调用与结果；
+    最终回复不在快照中，由最后一次 LLM 调用的内容拼接而成。快照的最后一条消息变化时
+    说明开始了新一轮 LLM 调用（工具调用之后），只有这时才需要查找新增的消息。
+    """
+
+    def __init__(
+        self,
+        initial_messages: MessageList,
+        user_message: Optional[Dict[str, Any]],
+        func_name: str,
+        stream: bool,
+    ) -> None:
+        self.user_message = user_message
+        self.func_name = func_name
+        self.stream = stream
+        self._anchor: Any = initial_messages[-1] if initial_messages else None
+        self._base = len(initial_messages)
+        self._tail: Any = self._anchor
+        self._added: HistoryList = []
+        self._parts: List[str] = []
+
+    def _turn_start(self, messages: MessageList) -> int:
+        # 按对象身份从末尾查找初始消息的最后一条，兼容上下文压缩改变了较早消息的情况；
+        # 找不到时（如从检查点恢复）按初始消息数量定位
+        if self._anchor is not None:
+            for index in range(len(messages) - 1, -1, -1):
+                if messages[index] is self._anchor:
+                    return index + 1
+        return self._base
+
+    def observe(self, response: Any, messages: MessageList) -> HistoryList:
+        """记录一次响应（完整响应或流式 chunk）和对应的消息快照，返回新增的消息"""
+        added: HistoryList = []
+        tail = messages[-1] if messages else None
+        if tail is not self._tail:
+            self._tail = tail
+            self._parts = []
+            added = list(messages[self._turn_start(messages) + len(self._added) :])
+            self._added.extend(added)
+        if self.stream:
+            content = extract_content_from_stream_response(response, self.func_name)
+        else:
+            content = extract_content_from_response(response, self.func_name)
+        if content:
+            self._parts.append(content)
+        return added
+
+    def final_reply(self) -> HistoryList:
+        """最后一次 LLM 调用的回复消息（内容为空时为空列表）"""
+        content = "".join(self._parts)
+        return [build_assistant_response_message(content)] if content.strip() else []
+
+    def appended(self) -> HistoryList:
+        """初始消息之后新增的消息：工具调用与结果以及最终回复"""
+        return self._added + self.final_reply()
+
+    def new_messages(self) -> HistoryList:
+        """本次调用新增的全部消息：用户消息、工具调用与结果以及最终回复"""
+        leading = [self.user_message] if self.user_message is not None else []
+        return leading + self.appended()
 
 
 def extract_stream_response_content(chunk: Any, func_name: str) -> str:
@@ -42,33 +113,83 @@ async def process_chat_response_stream(
     messages: MessageList,  # 初始消息，用于兼容性
     func_name: str,
     stream: bool,
-) -> AsyncGenerator[Tuple[Any, MessageList], None]:
-    """处理流式响应的完整流程"""
+    history_mode: Literal["full", "final", "delta"] = "full",
+) -> AsyncGenerator[Tuple[Any, Any], None]:
+    """处理流式响应的完整流程
+
+    history_mode 决定每次 yield 附带的历史：
+    - "full"：每个响应附带一份完整历史的副本
+    - "final"：响应附带 None，结束时额外 yield 一次包含最终回复的完整历史
+    - "delta"：响应附带自上次 yield 以来新增的消息（通常为空列表），结束时额外 yield
+      最终回复；所有增量依次追加到调用方传入的历史上即为下一轮的历史
+    """
+    if history_mode != "full":
+        async for output in _process_chat_response_deltas(
+            response_stream, return_mode, messages, func_name, stream, history_mode
+        ):
+            yield output
+        return
+
     current_messages = messages.copy()  # 初始消息
-    
-    async for response, updated_messages in response_stream:
-        # 更新当前消息为最新版本（包含工具调用结果）
-        current_messages = updated_messages
-        
-        # 记录响应日志
-        app_log(
-            f"LLM Chat '{func_name}' received response:"
-            f"\n{json.dumps(response, default=str, ensure_ascii=False, indent=2)}",
-            location=get_location(),
-        )
-
-        # 处理单个响应
-        content = process_single_chat_response(
-            response,
-            return_mode,
-            stream,
-            func_name,
-        )
-
-        # Yield 响应和更新后的历史（包含工具调用结果）
-        yield content, current_messages.copy()
+
+    # 调用方提前关闭时立即关闭上游响应流
+    async with aclosing_stream(response_stream):
+        async for response, updated_messages in response_stream:
+            # 更新当前消息为最新版本（包含工具调用结果）
+            current_messages = updated_messages
+
+            # 记录响应日志
+            app_log(
+                f"LLM Chat '{func_name}' received response:"
+                f"\n{json.dumps(response, default=str, ensure_ascii=False, indent=2)}",
+                location=get_location(),
+            )
+
+            # 处理单个响应
+            content = process_single_chat_response(
+                response,
+                return_mode,
+                stream,
+                func_name,
+            )
+
+            # Yield 响应和更新后的历史（包含工具调用结果）
+            yield content, current_messages.copy()
 
     # 流结束标记（text 模式）
     if return_mode == "text":
         yield "", current_messages.copy()
 
+
+async def _process_chat_response_deltas(
+    response_stream: AsyncGenerator[Tuple[Any, MessageList], None],
+    return_mode: Literal["text", "raw"],
+    messages: MessageList,
+    func_name: str,
+    stream: bool,
+    history_mode: Literal["final", "delta"],
+) -> AsyncGenerator[Tuple[Any, Any], None]:
+    """history_mode 为 "final" / "delta" 时的响应处理，每个 chunk 不再复制完整历史"""
+    # build_chat_messages 把本轮的用户消息放在最后
+    user_message = messages[-1] if messages and messages[-1].get("role") == "user" else None
+    turn = ChatTurn(messages, user_message, func_name, stream)
+    pending: HistoryList = [user_message] if user_message is not None else []
+
+    async with aclosing_stream(response_stream):
+        async for response, updated_messages in response_stream:
+            added = turn.observe(response, updated_messages)
+            content = process_single_chat_response(response, return_mode, stream, func_name)
+            if history_mode == "final":
+                yield content, None
+            else:
+                if pending:
+                    added = pending + added
+                    pending = []
+                yield content, added
+
+    end_content = "" if return_mode == "text" else None
+    if history_mode == "final":
+        # 初始消息已经包含本轮的用户消息
+        yield end_content, [*messages, *turn.appended()]
+    else:
+        yield end_content, pending + turn.final_reply()
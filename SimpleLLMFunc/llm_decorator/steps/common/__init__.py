@@ -1,9 +1,18 @@
 """Common steps shared by llm_function and llm_chat decorators."""
 
 from SimpleLLMFunc.llm_decorator.steps.common.log_context import setup_log_context
-from SimpleLLMFunc.llm_decorator.steps.common.signature import parse_function_signature
+from SimpleLLMFunc.llm_decorator.steps.common.pipeline import DROP, OutputPipeline
+from SimpleLLMFunc.llm_decorator.steps.common.signature import (
+    compile_function_metadata,
+    generate_trace_id,
+    parse_function_signature,
+)
 
 __all__ = [
+    "DROP",
+    "OutputPipeline",
+    "compile_function_metadata",
+    "generate_trace_id",
     "parse_function_signature",
     "setup_log_context",
 ]
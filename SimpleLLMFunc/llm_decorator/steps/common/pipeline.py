@@ -0,0 +1,102 @@
+"""Single-driver pipeline for ReAct output streams.
+
+decorator → ReAct 的调用链上原本每一层都用 `async for ... yield` 把输出再转发一遍，
+每个条目（流式时是每个 chunk）都要穿过多层生成器帧。`OutputPipeline` 改为由一个驱动循环
+消费底层生成器，各层以阶段（stage）的形式注册回调：
+
+- `on_item(item)`：同步处理每个条目，返回要继续传递的条目；返回 `DROP` 表示丢弃
+- `on_complete()`：源生成器耗尽后调用，可以返回一个异步迭代器产生追加条目（如重试、
+  解析后的最终结果），这些条目只会经过注册在该阶段之后的阶段
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, List, Optional
+
+DROP: Any = object()
+"""`on_item` 返回该值时丢弃当前条目"""
+
+ItemHandler = Callable[[Any], Any]
+CompletionHandler = Callable[[], Optional[AsyncIterator[Any]]]
+
+
+@dataclass
+class PipelineStage:
+    """流水线中的一个阶段"""
+
+    on_item: Optional[ItemHandler] = None
+    on_complete: Optional[CompletionHandler] = None
+
+
+class OutputPipeline:
+    """由单个驱动循环执行的输出流水线
+
+    Example:
+        ```python
+        pipeline = OutputPipeline()
+        pipeline.add_stage(on_item=lambda item: item if keep(item) else DROP)
+        async for item in pipeline.run(source):
+            ...
+        ```
+    """
+
+    def __init__(self) -> None:
+        self._stages: List[PipelineStage] = []
+
+    def add_stage(
+        self,
+        on_item: Optional[ItemHandler] = None,
+        on_complete: Optional[CompletionHandler] = None,
+    ) -> None:
+        """注册阶段；`run()` 开始迭代时读取已注册的阶段"""
+        self._stages.append(PipelineStage(on_item=on_item, on_complete=on_complete))
+
+    async def run(self, source: AsyncIterator[Any]) -> AsyncGenerator[Any, None]:
+        """驱动源生成器，把每个条目依次交给各阶段处理后 yield 出去"""
+        stages = list(self._stages)
+        handlers = [stage.on_item for stage in stages if stage.on_item is not None]
+
+        try:
+            # 热路径：每个条目只经过一次循环和若干次函数调用
+            async for item in source:
+                for handler in handlers:
+                    item = handler(item)
+                    if item is DROP:
+                        break
+                else:
+                    yield item
+        finally:
+            # 调用方提前关闭时，立即关闭底层生成器，释放其中的请求和工具任务
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        for index, stage in enumerate(stages):
+            if stage.on_complete is None:
+                continue
+            follow_up = stage.on_complete()
+            if follow_up is None:
+                continue
+            downstream = [
+                later.on_item for later in stages[index + 1 :] if later.on_item is not None
+            ]
+            try:
+                async for item in follow_up:
+                    for handler in downstream:
+                        item = handler(item)
+                        if item is DROP:
+                            break
+                    else:
+                        yield item
+            finally:
+                aclose = getattr(follow_up, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+
+__all__ = [
+    "DROP",
+    "OutputPipeline",
+    "PipelineStage",
+]
@@ -7,7 +7,10 @@ import uuid
 from typing import Any, Callable, Dict, Optional, Tuple, get_type_hints
 
 from SimpleLLMFunc.logger.logger import get_current_trace_id
-from SimpleLLMFunc.llm_decorator.steps.common.types import FunctionSignature
+from SimpleLLMFunc.llm_decorator.steps.common.types import (
+    FunctionMetadata,
+    FunctionSignature,
+)
 
 
 def extract_template_params(kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -15,6 +18,11 @@ def extract_template_params(kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     return kwargs.pop("_template_params", None)
 
 
+def extract_trace_id(kwargs: Dict[str, Any]) -> Optional[str]:
+    """从 kwargs 中提取调用方指定的追踪 ID（用于从检查点恢复）"""
+    return kwargs.pop("_trace_id", None)
+
+
 def extract_function_metadata(
     func: Callable,
 ) -> Tuple[inspect.Signature, Dict[str, Any], Any, str, str]:
@@ -28,6 +36,18 @@ def extract_function_metadata(
     return signature, type_hints, return_type, docstring, func_name
 
 
+def compile_function_metadata(func: Callable) -> FunctionMetadata:
+    """在装饰时解析函数元数据，避免每次调用都执行 `inspect.signature` / `get_type_hints`"""
+    signature, type_hints, return_type, docstring, func_name = extract_function_metadata(func)
+    return FunctionMetadata(
+        func_name=func_name,
+        signature=signature,
+        type_hints=type_hints,
+        return_type=return_type,
+        docstring=docstring,
+    )
+
+
 def generate_trace_id(func_name: str) -> str:
     """生成唯一的追踪 ID"""
     context_trace_id = get_current_trace_id()
@@ -73,18 +93,23 @@ def parse_function_signature(
     func: Callable,
     args: Tuple[Any, ...],
     kwargs: Dict[str, Any],
+    metadata: Optional[FunctionMetadata] = None,
 ) -> Tuple[FunctionSignature, Optional[Dict[str, Any]]]:
-    """解析函数签名的完整流程"""
+    """解析函数签名的完整流程
+
+    传入装饰时编译好的 metadata 时，每次调用只需要绑定参数。
+    """
     # 1. 提取模板参数
     template_params = extract_template_params(kwargs)
+    requested_trace_id = extract_trace_id(kwargs)
 
     # 2. 提取函数元数据
-    signature, type_hints, return_type, docstring, func_name = extract_function_metadata(
-        func
-    )
+    if metadata is None:
+        metadata = compile_function_metadata(func)
+    func_name, signature, type_hints, return_type, docstring = metadata
 
-    # 3. 生成追踪 ID
-    trace_id = generate_trace_id(func_name)
+    # 3. 生成追踪 ID（调用方通过 `_trace_id` 指定时沿用，以便从检查点恢复）
+    trace_id = requested_trace_id or generate_trace_id(func_name)
 
     # 4. 绑定函数参数
     bound_args = bind_function_arguments(signature, args, kwargs)
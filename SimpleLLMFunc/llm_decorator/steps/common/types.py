@@ -4,6 +4,16 @@ from typing import Any, Dict, NamedTuple
 import inspect
 
 
+class FunctionMetadata(NamedTuple):
+    """只依赖被装饰函数本身的元数据，装饰时解析一次（内部使用）"""
+
+    func_name: str
+    signature: inspect.Signature
+    type_hints: Dict[str, Any]
+    return_type: Any
+    docstring: str
+
+
 class FunctionSignature(NamedTuple):
     """函数签名信息（内部使用）"""
 
@@ -1,14 +1,24 @@
 """Steps specific to llm_function decorator."""
 
-from SimpleLLMFunc.llm_decorator.steps.function.prompt import build_initial_prompts
+from SimpleLLMFunc.llm_decorator.steps.function.prompt import (
+    CompiledFunctionPrompt,
+    build_initial_prompts,
+    compile_function_prompt,
+)
+from SimpleLLMFunc.llm_decorator.steps.function.partial import PartialResultBuilder
 from SimpleLLMFunc.llm_decorator.steps.function.react import execute_react_loop
+from SimpleLLMFunc.llm_decorator.steps.function.repair import repair_response
 from SimpleLLMFunc.llm_decorator.steps.function.response import (
     parse_and_validate_response,
 )
 
 __all__ = [
+    "CompiledFunctionPrompt",
+    "PartialResultBuilder",
     "build_initial_prompts",
+    "compile_function_prompt",
     "execute_react_loop",
     "parse_and_validate_response",
+    "repair_response",
 ]
 
@@ -0,0 +1,158 @@
+"""Partial structured outputs for llm_function(stream_partial=True)."""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+from SimpleLLMFunc.base.post_process import convert_content_to_type
+from SimpleLLMFunc.base.type_resolve.xml_stream import XMLElementStream, expected_xml_root
+from SimpleLLMFunc.base.type_resolve.xml_utils import dict_to_pydantic, xml_to_dict
+from SimpleLLMFunc.logger import push_debug, push_warning
+from SimpleLLMFunc.logger.logger import get_location
+
+
+def _is_list_type(return_type: Any) -> bool:
+    return get_origin(return_type) in (list, List) or return_type is list
+
+
+def _is_model_type(return_type: Any) -> bool:
+    return isinstance(return_type, type) and issubclass(return_type, BaseModel)
+
+
+def _partial_field_value(annotation: Any, raw: Any) -> Any:
+    """按字段类型校验单个字段的值，无法校验时保留原始值"""
+    if isinstance(raw, dict) and set(raw) == {"_text"}:
+        raw = raw["_text"]
+    elif isinstance(raw, dict) and set(raw) == {"item"} and _is_list_type(annotation):
+        raw = raw["item"] if isinstance(raw["item"], list) else [raw["item"]]
+    try:
+        return TypeAdapter(annotation).validate_python(raw)
+    except Exception:
+        return raw
+
+
+class PartialResultBuilder:
+    """把流式输出的片段转换为部分结果
+
+    - `List[T]`：每个 `<item>` 闭合时产出该元素（转换方式与完整解析相同）
+    - Pydantic 模型：每个字段闭合时产出一个新的部分对象；必填字段尚未齐全时为
+      `model_construct()` 构造的对象，可以通过 `model_fields_set` 查看已有字段
+    - 其他返回类型不产出部分结果
+
+    `finish()` 用完整解析（或修复后）的结果补齐：列表产出尚未产出的元素，模型产出最终校验过的对象。
+    新一轮 LLM 调用（工具调用、重试之后）重新解析时，与已产出元素相同的元素不再重复产出，
+    从第一个不同的元素开始以新一轮的输出为准；最终结果与已产出的元素不一致时同样从第一个
+    不同的元素开始重新产出。
+    """
+
+    def __init__(self, return_type: Any, func_name: str) -> None:
+        self.return_type = return_type
+        self.func_name = func_name
+        self._is_list = _is_list_type(return_type)
+        self._is_model = _is_model_type(return_type)
+        root_name = expected_xml_root(return_type) if self._is_list or self._is_model else None
+        self._root_name = root_name
+        self._stream: Optional[XMLElementStream] = None
+        self._iteration: Optional[int] = None
+        self._failed = False
+        # 已产出的列表元素（按位置），用于在新一轮解析和 finish() 时对比
+        self._emitted: List[Any] = []
+        self._seen = 0
+        self._fields: List[str] = []
+
+    def feed(self, text: str, iteration: int = 0) -> List[Any]:
+        """追加一个片段，返回可以产出的部分结果"""
+        if self._root_name is None or self._failed or not text:
+            return []
+        if iteration != self._iteration:
+            # 新一轮 LLM 调用（如工具调用之后）重新开始解析
+            self._iteration = iteration
+            self._stream = XMLElementStream(self._root_name)
+            self._fields = []
+            self._seen = 0
+        assert self._stream is not None
+
+        elements = self._stream.feed(text)
+        if self._stream.error is not None:
+            push_debug(
+                f"LLM 函数 '{self.func_name}' 部分结果解析停止: {self._stream.error}",
+                location=get_location(),
+            )
+            self._failed = True
+            return []
+
+        outputs: List[Any] = []
+        for element in elements:
+            xml = ET.tostring(element, encoding="unicode")
+            try:
+                if self._is_list:
+                    outputs.extend(self._list_item(xml))
+                else:
+                    outputs.append(self._model_snapshot(xml))
+            except Exception as exc:
+                push_debug(
+                    f"LLM 函数 '{self.func_name}' 部分结果转换失败，等待完整响应: {exc}",
+                    location=get_location(),
+                )
+                self._failed = True
+                break
+        return outputs
+
+    def _list_item(self, xml: str) -> List[Any]:
+        items = convert_content_to_type(
+            f"<{self._root_name}>{xml}</{self._root_name}>", self.return_type, self.func_name
+        )
+        outputs: List[Any] = []
+        for item in items:
+            position = self._seen
+            self._seen += 1
+            # 重新开始解析后，与已产出元素相同的元素不再重复产出
+            if position < len(self._emitted) and self._emitted[position] == item:
+                continue
+            # 从第一个不同的元素开始，以本轮的输出为准
+            del self._emitted[position:]
+            self._emitted.append(item)
+            outputs.append(item)
+        return outputs
+
+    def _model_snapshot(self, xml: str) -> Any:
+        self._fields.append(xml)
+        data = xml_to_dict(f"<{self._root_name}>{''.join(self._fields)}</{self._root_name}>")
+        if not isinstance(data, dict):
+            raise ValueError(f"无法从 XML 中提取字段: {data}")
+        try:
+            return dict_to_pydantic(data, self.return_type)
+        except Exception:
+            model_fields = self.return_type.model_fields
+            values: Dict[str, Any] = {
+                name: _partial_field_value(model_fields[name].annotation, raw)
+                for name, raw in data.items()
+                if name in model_fields
+            }
+            return self.return_type.model_construct(_fields_set=set(values), **values)
+
+    def finish(self, result: Any) -> List[Any]:
+        """用完整解析（或修复后）的结果补齐剩余输出"""
+        if self._is_list and isinstance(result, list):
+            common = 0
+            for emitted, item in zip(self._emitted, result):
+                if emitted != item:
+                    break
+                common += 1
+            if common < len(self._emitted):
+                push_warning(
+                    f"LLM 函数 '{self.func_name}' 已产出的 {len(self._emitted) - common} 个元素"
+                    f"与最终结果不一致，从第 {common} 个元素开始重新产出",
+                    location=get_location(),
+                )
+            self._emitted = list(result)
+            return list(result[common:])
+        return [result]
+
+
+__all__ = [
+    "PartialResultBuilder",
+]
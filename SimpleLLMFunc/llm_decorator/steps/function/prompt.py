@@ -17,7 +17,10 @@ from SimpleLLMFunc.llm_decorator.steps.common.prompt import (
     extract_parameter_type_hints,
     process_docstring_template,
 )
-from SimpleLLMFunc.llm_decorator.steps.common.types import FunctionSignature
+from SimpleLLMFunc.llm_decorator.steps.common.types import (
+    FunctionMetadata,
+    FunctionSignature,
+)
 from SimpleLLMFunc.type.message import MessageList, MessageParam
 
 # Default prompt templates
@@ -60,6 +63,26 @@ Execution Requirements:
 3. Ensure all XML tags are properly closed
 """
 
+# output_mode="json_schema" 时复杂返回类型使用的模板：schema 通过 response_format 传递
+DEFAULT_SYSTEM_PROMPT_TEMPLATE_JSON = """
+Your task is to provide results that meet the requirements based on the **function description**
+and the user's request.
+
+- Function Description:
+    {function_description}
+
+- You will receive the following parameters:
+    {parameters_description}
+
+- The type of content you need to return:
+    {return_type_description}
+
+Execution Requirements:
+1. Use available tools to assist in completing the task if needed
+2. Return only a JSON object that conforms to the JSON schema given in the response format,
+   without any markdown formatting or code blocks
+"""
+
 DEFAULT_USER_PROMPT_TEMPLATE = """
 The parameters provided are:
     {parameters}
@@ -101,6 +124,14 @@ def build_parameter_type_descriptions(
     return descriptions
 
 
+def build_json_return_type_description(return_type: Any) -> str:
+    """构建 JSON 输出模式下的返回类型描述（不包含 schema 和示例）"""
+    return (
+        get_detailed_type_description(return_type)
+        + "\n    The exact JSON schema is provided through the response format."
+    )
+
+
 def build_return_type_description(return_type: Any) -> str:
     """构建返回类型描述
     
@@ -152,6 +183,15 @@ def build_return_type_description(return_type: Any) -> str:
         return get_detailed_type_description(return_type)
 
 
+def format_user_prompt(user_template: str, arguments: Dict[str, Any]) -> str:
+    """用参数值填充 user prompt 模板"""
+    user_param_values = [
+        f"  - {param_name}: {param_value}"
+        for param_name, param_value in arguments.items()
+    ]
+    return user_template.format(parameters="\n".join(user_param_values))
+
+
 def build_text_messages(
     processed_docstring: str,
     param_type_descriptions: List[str],
@@ -169,11 +209,7 @@ def build_text_messages(
     )
 
     # 构建 user prompt
-    user_param_values = [
-        f"  - {param_name}: {param_value}"
-        for param_name, param_value in arguments.items()
-    ]
-    user_prompt = user_template.format(parameters="\n".join(user_param_values))
+    user_prompt = format_user_prompt(user_template, arguments)
 
     messages: MessageList = [
         {"role": "system", "content": system_prompt.strip()},
@@ -210,78 +246,121 @@ def build_multimodal_messages(
     return messages
 
 
+class CompiledFunctionPrompt:
+    """llm_function 的提示骨架
+
+    参数类型描述、返回类型描述（包括 XML Schema 和示例）以及模板选择只依赖被装饰函数，
+    在装饰时构建一次；每次调用只绑定参数值。system prompt 在第一次使用时格式化并缓存，
+    只有传入 docstring 模板参数的调用才需要重新格式化。
+    """
+
+    def __init__(
+        self,
+        metadata: FunctionMetadata,
+        system_prompt_template: Optional[str] = None,
+        user_prompt_template: Optional[str] = None,
+        output_mode: str = "xml",
+    ) -> None:
+        self.docstring = metadata.docstring
+        self.type_hints = metadata.type_hints
+        self.return_type = metadata.return_type
+        self.parameters_description = "\n".join(
+            build_parameter_type_descriptions(
+                extract_parameter_type_hints(metadata.type_hints)
+            )
+        )
+        complex_return = _is_complex_return_type(metadata.return_type)
+        self.output_mode = output_mode
+        if output_mode == "json_schema" and complex_return:
+            self.return_type_description = build_json_return_type_description(
+                metadata.return_type
+            )
+            default_system_template = DEFAULT_SYSTEM_PROMPT_TEMPLATE_JSON
+        else:
+            self.return_type_description = build_return_type_description(metadata.return_type)
+            default_system_template = (
+                DEFAULT_SYSTEM_PROMPT_TEMPLATE_XML
+                if complex_return
+                else DEFAULT_SYSTEM_PROMPT_TEMPLATE_PLAIN
+            )
+        self.system_template = system_prompt_template or default_system_template
+        self.user_template = user_prompt_template or DEFAULT_USER_PROMPT_TEMPLATE
+        self._system_prompt: Optional[str] = None
+
+    def _format_system_prompt(self, function_description: str) -> str:
+        return self.system_template.format(
+            function_description=function_description,
+            parameters_description=self.parameters_description,
+            return_type_description=self.return_type_description,
+        ).strip()
+
+    def system_prompt(self, template_params: Optional[Dict[str, Any]] = None) -> str:
+        """格式化后的 system prompt"""
+        if template_params:
+            return self._format_system_prompt(
+                process_docstring_template(self.docstring, template_params)
+            )
+        if self._system_prompt is None:
+            self._system_prompt = self._format_system_prompt(self.docstring)
+        return self._system_prompt
+
+    def build_messages(
+        self,
+        arguments: Dict[str, Any],
+        template_params: Optional[Dict[str, Any]] = None,
+    ) -> MessageList:
+        """用本次调用的参数构建初始消息"""
+        system_prompt = self.system_prompt(template_params)
+
+        if has_multimodal_content(arguments, self.type_hints):
+            return build_multimodal_messages(system_prompt, arguments, self.type_hints)
+
+        user_prompt = format_user_prompt(self.user_template, arguments)
+        messages: MessageList = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt.strip()},
+        ]
+
+        push_debug(f"System prompt: {system_prompt}", location=get_location())
+        push_debug(f"User prompt: {user_prompt}", location=get_location())
+
+        return messages
+
+
+def compile_function_prompt(
+    metadata: FunctionMetadata,
+    system_prompt_template: Optional[str] = None,
+    user_prompt_template: Optional[str] = None,
+    output_mode: str = "xml",
+) -> CompiledFunctionPrompt:
+    """在装饰时编译提示骨架"""
+    return CompiledFunctionPrompt(
+        metadata, system_prompt_template, user_prompt_template, output_mode
+    )
+
+
 def build_initial_prompts(
     signature: FunctionSignature,
     system_prompt_template: Optional[str] = None,
     user_prompt_template: Optional[str] = None,
     template_params: Optional[Dict[str, Any]] = None,
+    compiled_prompt: Optional[CompiledFunctionPrompt] = None,
 ) -> MessageList:
-    """构建初始提示的完整流程"""
-    # 1. 处理 docstring 模板参数
-    processed_docstring = process_docstring_template(
-        signature.docstring,
-        template_params,
-    )
-
-    # 2. 提取参数类型提示
-    param_type_hints = extract_parameter_type_hints(signature.type_hints)
-
-    # 3. 构建参数类型描述
-    param_type_descriptions = build_parameter_type_descriptions(param_type_hints)
-
-    # 4. 构建返回类型描述
-    return_type_description = build_return_type_description(signature.return_type)
-
-    # 5. 检查多模态内容
-    has_multimodal = has_multimodal_content(
-        signature.bound_args.arguments,
-        signature.type_hints,
-    )
+    """构建初始提示的完整流程
 
-    # 6. 选择模板
-    if system_prompt_template:
-        system_template = system_prompt_template
-    else:
-        system_template = (
-            DEFAULT_SYSTEM_PROMPT_TEMPLATE_XML
-            if _is_complex_return_type(signature.return_type)
-            else DEFAULT_SYSTEM_PROMPT_TEMPLATE_PLAIN
-        )
-    user_template = user_prompt_template or DEFAULT_USER_PROMPT_TEMPLATE
-
-    # 7. 构建消息列表
-    if has_multimodal:
-        # 先构建文本 system prompt
-        text_messages = build_text_messages(
-            processed_docstring,
-            param_type_descriptions,
-            return_type_description,
-            signature.bound_args.arguments,
-            system_template,
-            user_template,
-        )
-        # 提取 system prompt 内容
-        system_prompt_content = text_messages[0].get("content", "")
-        if not isinstance(system_prompt_content, str):
-            system_prompt_content = str(system_prompt_content) if system_prompt_content else ""
-        system_prompt = system_prompt_content
-
-        # 构建多模态消息
-        messages = build_multimodal_messages(
-            system_prompt,
-            signature.bound_args.arguments,
-            signature.type_hints,
-        )
-    else:
-        # 构建文本消息
-        messages = build_text_messages(
-            processed_docstring,
-            param_type_descriptions,
-            return_type_description,
-            signature.bound_args.arguments,
-            system_template,
-            user_template,
+    传入装饰时编译好的 compiled_prompt 时，只需要格式化本次调用的参数值。
+    """
+    if compiled_prompt is None:
+        compiled_prompt = compile_function_prompt(
+            FunctionMetadata(
+                func_name=signature.func_name,
+                signature=signature.signature,
+                type_hints=signature.type_hints,
+                return_type=signature.return_type,
+                docstring=signature.docstring,
+            ),
+            system_prompt_template,
+            user_prompt_template,
         )
 
-    return messages
-
+    return compiled_prompt.build_messages(signature.bound_args.arguments, template_params)
@@ -6,29 +6,38 @@ import json
 from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Union, cast
 
 from SimpleLLMFunc.base.ReAct import execute_llm
+from SimpleLLMFunc.base.budget import BudgetTracker, RunBudget
+from SimpleLLMFunc.base.checkpoint import CheckpointStore
+from SimpleLLMFunc.base.context import ContextBudget
+from SimpleLLMFunc.base.tool_call import ToolOutputStore
 from SimpleLLMFunc.base.post_process import extract_content_from_response
 from SimpleLLMFunc.interface.llm_interface import LLM_Interface
 from SimpleLLMFunc.logger import push_debug, push_error, push_warning
-from SimpleLLMFunc.logger.logger import get_location, get_current_context_attribute
+from SimpleLLMFunc.logger.logger import get_location
 from SimpleLLMFunc.logger.context_manager import get_current_trace_id
 from SimpleLLMFunc.type import MessageList, ToolDefinitionList
 from SimpleLLMFunc.hooks.stream import ReactOutput, ResponseYield, is_response_yield, EventYield, is_event_yield
 
 
 from SimpleLLMFunc.tool import Tool
-from SimpleLLMFunc.utils import get_last_item_of_async_generator
-from SimpleLLMFunc.llm_decorator.utils import process_tools
+from SimpleLLMFunc.utils import check_deadline, get_last_item_of_async_generator
+from SimpleLLMFunc.llm_decorator.utils import ToolkitCache, process_tools
+from SimpleLLMFunc.llm_decorator.steps.common.pipeline import OutputPipeline
+from SimpleLLMFunc.llm_decorator.steps.function.response import StreamedResponseCollector
 
 
 def prepare_tools_for_execution(
     toolkit: Optional[List[Union[Tool, Callable[..., Awaitable[Any]]]]],
     func_name: str,
+    tool_cache: Optional[ToolkitCache] = None,
 ) -> tuple[ToolDefinitionList, Dict[str, Callable[..., Awaitable[Any]]]]:
-    """准备工具供执行使用"""
+    """准备工具供执行使用，提供 tool_cache 时复用装饰时生成的工具定义"""
+    if tool_cache is not None:
+        return tool_cache.get()
     return process_tools(toolkit, func_name)
 
 
-async def execute_llm_call(
+def execute_llm_call(
     llm_interface: LLM_Interface,
     messages: MessageList,
     tools: ToolDefinitionList,
@@ -38,17 +47,27 @@ async def execute_llm_call(
     enable_event: bool = False,
     trace_id: str = "",
     user_task_prompt: str = "",
+    context_budget: Optional[ContextBudget] = None,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    run_budget: Optional[RunBudget] = None,
+    budget_tracker: Optional[BudgetTracker] = None,
+    include_messages: bool = False,
+    stop_at_xml_root: Optional[str] = None,
     **llm_kwargs: Any,
 ) -> AsyncGenerator[Union[Any, ReactOutput], None]:
     """执行 LLM 调用
     
     当 enable_event=True 时，yield ReactOutput（包括事件和响应）
-    当 enable_event=False 时，yield response（向后兼容）
+    当 enable_event=False 时，yield response（向后兼容）；
+    include_messages=True 时 yield (response, messages)，messages 为发出该响应的请求所用的消息历史；
+    流式模式下设置 stop_at_xml_root 时，XML 根元素闭合后立即停止读取并取消请求
+
+    事件模式下直接返回 `execute_llm` 的生成器，不再逐条转发
     """
-    func_name = get_current_context_attribute("function_name") or "Unknown Function"
     current_trace_id = trace_id or get_current_trace_id() or ""
-    
-    async for output in execute_llm(
+
+    stream = execute_llm(
         llm_interface=llm_interface,
         messages=messages,
         tools=tools,
@@ -58,21 +77,31 @@ async def execute_llm_call(
         enable_event=enable_event,
         trace_id=current_trace_id,
         user_task_prompt=user_task_prompt,
+        context_budget=context_budget,
+        tool_output_store=tool_output_store,
+        checkpoint_store=checkpoint_store,
+        run_budget=run_budget,
+        budget_tracker=budget_tracker,
+        stop_at_xml_root=stop_at_xml_root,
         **llm_kwargs,
-    ):
-        if enable_event:
-            # 事件模式：yield 完整的 ReactOutput（包括事件和响应）
-            # output 此时是 ReactOutput
-            yield output
-        else:
-            # 向后兼容模式：只 yield response
-            # output 此时是 Tuple[Any, MessageList]
-            if isinstance(output, tuple):
-                response, _ = output
-                yield response
-            elif is_response_yield(output):
-                # 如果意外收到 ReactOutput，提取 response
-                yield output.response
+    )
+    if enable_event:
+        # 事件模式：ReactOutput（包括事件和响应）原样交给调用方
+        return stream
+    return _extract_responses(stream, include_messages)
+
+
+async def _extract_responses(
+    stream: AsyncGenerator[Any, None], include_messages: bool
+) -> AsyncGenerator[Any, None]:
+    """向后兼容模式：只 yield response（或 (response, messages)）"""
+    async for output in stream:
+        # output 此时是 Tuple[Any, MessageList]
+        if isinstance(output, tuple):
+            yield output if include_messages else output[0]
+        elif is_response_yield(output):
+            # 如果意外收到 ReactOutput，提取 response
+            yield (output.response, output.messages) if include_messages else output.response
 
 
 async def get_final_response(
@@ -106,6 +135,49 @@ def check_response_content_empty(response: Any, func_name: str) -> bool:
     return content == ""
 
 
+DEFAULT_EMPTY_RESPONSE_NUDGE = (
+    "Your previous reply was empty. Please provide the final answer now, "
+    "based on the conversation and tool results above."
+)
+"""空响应重试时可选追加的提示消息"""
+
+
+def build_retry_messages(
+    history: MessageList, nudge_message: Optional[str] = None
+) -> MessageList:
+    """基于失败尝试累积的消息历史构建重试请求的消息
+
+    history 已经包含之前所有的工具调用与结果，重试只需要重新发起最后一次 LLM 调用；
+    提供 nudge_message 时在末尾追加一条用户消息提示模型给出最终答案。
+    """
+    retry_messages = list(history)
+    if nudge_message:
+        retry_messages.append({"role": "user", "content": nudge_message})
+    return cast(MessageList, retry_messages)
+
+
+def _split_response_and_messages(
+    output: Any, fallback_messages: MessageList
+) -> tuple[Any, MessageList]:
+    """拆分 include_messages=True 时得到的 (response, messages)"""
+    if isinstance(output, tuple) and len(output) == 2:
+        return output[0], cast(MessageList, output[1])
+    return output, fallback_messages
+
+
+async def _collect_streamed_response(
+    response_stream: AsyncGenerator[Any, None],
+    collector: StreamedResponseCollector,
+    fallback_messages: MessageList,
+) -> tuple[Any, MessageList]:
+    """向后兼容模式的流式调用：消费 (response, messages) 并拼接最后一次调用的完整响应"""
+    final_messages = fallback_messages
+    async for output in response_stream:
+        response, final_messages = _split_response_and_messages(output, fallback_messages)
+        collector.add(response, final_messages)
+    return collector.response(), final_messages
+
+
 async def retry_llm_call(
     llm_interface: LLM_Interface,
     messages: MessageList,
@@ -117,22 +189,36 @@ async def retry_llm_call(
     enable_event: bool = False,
     trace_id: str = "",
     user_task_prompt: str = "",
+    context_budget: Optional[ContextBudget] = None,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    run_budget: Optional[RunBudget] = None,
+    budget_tracker: Optional[BudgetTracker] = None,
+    nudge_message: Optional[str] = None,
     **llm_kwargs: Any,
 ) -> Any:
-    """重试 LLM 调用"""
+    """空响应时重试 LLM 调用
+
+    messages 应为失败尝试中最后一次 LLM 请求所用的消息历史（已包含之前的工具调用与结果），
+    因此每次重试只重新发起最后一次 LLM 调用，而不是重跑整个 ReAct 流程。
+    """
     final_response = None
+    history = messages
 
     for attempt in range(retry_times + 1):
         if attempt > 0:
+            # 空响应重试同样受整体截止时间约束
+            check_deadline(f"{func_name} 空响应重试")
             push_debug(
                 f"Async LLM function '{func_name}' retry attempt {attempt}...",
                 location=get_location(),
             )
 
-        # 执行 LLM 调用
+        # 从累积的历史继续，只重新发起最后一次 LLM 调用
+        retry_messages = build_retry_messages(history, nudge_message)
         response_stream = execute_llm_call(
             llm_interface=llm_interface,
-            messages=messages,
+            messages=retry_messages,
             tools=tools,
             tool_map=tool_map,
             max_tool_calls=max_tool_calls,
@@ -140,11 +226,21 @@ async def retry_llm_call(
             enable_event=enable_event,
             trace_id=trace_id,
             user_task_prompt=user_task_prompt,
+            context_budget=context_budget,
+            tool_output_store=tool_output_store,
+            checkpoint_store=checkpoint_store,
+            run_budget=run_budget,
+            budget_tracker=budget_tracker,
+            include_messages=True,
             **llm_kwargs,
         )
 
-        # 获取最终响应
-        final_response = await get_final_response(response_stream)
+        # 获取最终响应；若模型在重试中又调用了工具，后续重试从新的历史继续
+        final_response, attempt_messages = _split_response_and_messages(
+            await get_final_response(response_stream), retry_messages
+        )
+        if len(attempt_messages) > len(retry_messages):
+            history = attempt_messages
 
         # 检查内容是否为空
         content = extract_content_from_response(final_response, func_name)
@@ -175,52 +271,78 @@ async def execute_react_loop(
     enable_event: bool = False,
     trace_id: str = "",
     user_task_prompt: str = "",
+    context_budget: Optional[ContextBudget] = None,
+    tool_output_store: Optional[ToolOutputStore] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    run_budget: Optional[RunBudget] = None,
+    budget_tracker: Optional[BudgetTracker] = None,
+    retry_nudge: Optional[str] = None,
+    pipeline: Optional[OutputPipeline] = None,
+    stream: bool = False,
+    stop_at_xml_root: Optional[str] = None,
+    tool_cache: Optional[ToolkitCache] = None,
 ) -> Union[Any, AsyncGenerator[ReactOutput, None]]:
     """执行 ReAct 循环的完整流程（包含重试）
     
     当 enable_event=True 时，返回事件流生成器
     当 enable_event=False 时，返回最终响应值（向后兼容）
+
+    最终响应内容为空时，重试会复用已累积的消息历史，只重新发起最后一次 LLM 调用；
+    retry_nudge 不为空时会在重试请求末尾追加该提示消息。
+
+    事件模式下 ReAct 循环的处理注册为 pipeline 上的一个阶段，调用方可以在开始迭代前
+    继续注册自己的阶段，整条链路只由一个驱动循环消费 `execute_llm` 的输出。
+
+    stream=True 时以流式方式请求 LLM，chunk 会被拼接为完整响应：事件模式下在 chunk 之后
+    额外 yield 一个包含完整响应的 ResponseYield。stop_at_xml_root 为 XML 根元素名称，
+    根元素闭合后立即停止读取并取消请求，拼接结果也只保留根元素部分。
+    tool_cache 为装饰时创建的 ToolkitCache，提供时不再在每次调用中重新生成工具定义。
+    budget_tracker 为本次装饰函数调用的花费记录，未提供时由 run_budget 创建一次。
     """
     # 1. 准备工具
-    tool_param, tool_map = prepare_tools_for_execution(toolkit, func_name)
+    tool_param, tool_map = prepare_tools_for_execution(toolkit, func_name, tool_cache)
+
+    # 首次调用与空响应重试共用同一份花费记录
+    if budget_tracker is None and run_budget is not None:
+        budget_tracker = run_budget.start(llm_interface.model_name)
 
     if enable_event:
-        # 事件模式：返回事件流生成器
-        async def event_stream() -> AsyncGenerator[ReactOutput, None]:
-            # 执行 LLM 调用
-            response_stream = execute_llm_call(
-                llm_interface=llm_interface,
-                messages=messages,
-                tools=tool_param,
-                tool_map=tool_map,
-                max_tool_calls=max_tool_calls,
-                stream=False,
-                enable_event=True,
-                trace_id=trace_id,
-                user_task_prompt=user_task_prompt,
-                **llm_kwargs,
-            )
-            
-            # 收集所有输出和最后一个响应
-            last_response = None
-            async for output in response_stream:
-                yield output
-                if is_response_yield(output):
-                    last_response = output.response
-            
+        # 事件模式：注册 ReAct 阶段并返回流水线生成器
+        pipeline = pipeline if pipeline is not None else OutputPipeline()
+        last_response: List[Any] = [None]
+        last_messages: List[MessageList] = [messages]
+        collector = StreamedResponseCollector(func_name, stop_at_xml_root) if stream else None
+
+        def track_response(output: ReactOutput) -> ReactOutput:
+            if is_response_yield(output):
+                last_response[0] = output.response
+                last_messages[0] = output.messages
+                if collector is not None:
+                    collector.add(output.response, output.messages)
+            return output
+
+        async def retry_if_empty() -> AsyncGenerator[ReactOutput, None]:
+            if collector is not None and last_response[0] is not None:
+                # 流式模式：把最后一次调用的 chunk 拼接为完整响应交给后续阶段
+                last_response[0] = collector.response()
+                yield ResponseYield(
+                    type="response",
+                    response=last_response[0],
+                    messages=last_messages[0],
+                )
+
             # 检查响应内容是否为空
-            if last_response and check_response_content_empty(last_response, func_name):
+            if last_response[0] and check_response_content_empty(last_response[0], func_name):
                 push_warning(
                     f"Async LLM function '{func_name}' returned empty response content, "
                     "will retry automatically.",
                     location=get_location(),
                 )
-                
-                # 重试 LLM 调用
-                retry_times = llm_kwargs.get("retry_times", 2)
+
+                # 重试 LLM 调用：从累积的历史继续，只重新发起最后一次调用
                 retry_stream = execute_llm_call(
                     llm_interface=llm_interface,
-                    messages=messages,
+                    messages=build_retry_messages(last_messages[0], retry_nudge),
                     tools=tool_param,
                     tool_map=tool_map,
                     max_tool_calls=max_tool_calls,
@@ -228,24 +350,48 @@ async def execute_react_loop(
                     enable_event=True,
                     trace_id=trace_id,
                     user_task_prompt=user_task_prompt,
+                    context_budget=context_budget,
+                    tool_output_store=tool_output_store,
+                    checkpoint_store=checkpoint_store,
+                    run_budget=run_budget,
+                    budget_tracker=budget_tracker,
                     **llm_kwargs,
                 )
-                
+
                 # Yield 重试的事件流
                 async for output in retry_stream:
-                    yield output
-                    if is_response_yield(output):
-                        last_response = output.response
-            
+                    yield track_response(output)
+
             # 记录最终响应
-            if last_response:
+            if last_response[0]:
                 push_debug(
                     f"Async LLM function '{func_name}' received response "
-                    f"{json.dumps(last_response, default=str, ensure_ascii=False, indent=2)}",
+                    f"{json.dumps(last_response[0], default=str, ensure_ascii=False, indent=2)}",
                     location=get_location(),
                 )
-        
-        return event_stream()
+
+        pipeline.add_stage(on_item=track_response, on_complete=retry_if_empty)
+
+        # 执行 LLM 调用
+        response_stream = execute_llm_call(
+            llm_interface=llm_interface,
+            messages=messages,
+            tools=tool_param,
+            tool_map=tool_map,
+            max_tool_calls=max_tool_calls,
+            stream=stream,
+            enable_event=True,
+            trace_id=trace_id,
+            user_task_prompt=user_task_prompt,
+            context_budget=context_budget,
+            tool_output_store=tool_output_store,
+            checkpoint_store=checkpoint_store,
+            run_budget=run_budget,
+            budget_tracker=budget_tracker,
+            stop_at_xml_root=stop_at_xml_root,
+            **llm_kwargs,
+        )
+        return pipeline.run(response_stream)
     else:
         # 向后兼容模式：返回最终响应值
         # 2. 执行 LLM 调用
@@ -255,15 +401,29 @@ async def execute_react_loop(
             tools=tool_param,
             tool_map=tool_map,
             max_tool_calls=max_tool_calls,
-            stream=False,
+            stream=stream,
             enable_event=False,
             trace_id=trace_id,
             user_task_prompt=user_task_prompt,
+            context_budget=context_budget,
+            tool_output_store=tool_output_store,
+            checkpoint_store=checkpoint_store,
+            run_budget=run_budget,
+            budget_tracker=budget_tracker,
+            include_messages=True,
+            stop_at_xml_root=stop_at_xml_root,
             **llm_kwargs,
         )
 
-        # 3. 获取最终响应
-        final_response = await get_final_response(response_stream, enable_event=False)
+        # 3. 获取最终响应及产生它的消息历史
+        if stream:
+            final_response, final_messages = await _collect_streamed_response(
+                response_stream, StreamedResponseCollector(func_name, stop_at_xml_root), messages
+            )
+        else:
+            final_response, final_messages = _split_response_and_messages(
+                await get_final_response(response_stream, enable_event=False), messages
+            )
 
         # 4. 检查响应内容是否为空
         if check_response_content_empty(final_response, func_name):
@@ -277,7 +437,7 @@ async def execute_react_loop(
             retry_times = llm_kwargs.get("retry_times", 2)
             final_response = await retry_llm_call(
                 llm_interface=llm_interface,
-                messages=messages,
+                messages=final_messages,
                 tools=tool_param,
                 tool_map=tool_map,
                 max_tool_calls=max_tool_calls,
@@ -286,6 +446,12 @@ async def execute_react_loop(
                 enable_event=False,
                 trace_id=trace_id,
                 user_task_prompt=user_task_prompt,
+                context_budget=context_budget,
+                tool_output_store=tool_output_store,
+                checkpoint_store=checkpoint_store,
+                run_budget=run_budget,
+                budget_tracker=budget_tracker,
+                nudge_message=retry_nudge,
                 **llm_kwargs,
             )
 
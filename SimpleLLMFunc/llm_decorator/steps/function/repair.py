@@ -0,0 +1,145 @@
+"""Targeted repair of structured outputs that fail to parse."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, cast
+
+from SimpleLLMFunc.base.budget import BudgetTracker
+from SimpleLLMFunc.base.messages import extract_usage_from_response
+from SimpleLLMFunc.base.post_process import extract_content_from_response
+from SimpleLLMFunc.interface.llm_interface import LLM_Interface
+from SimpleLLMFunc.llm_decorator.steps.function.response import parse_and_validate_response
+from SimpleLLMFunc.logger import push_warning
+from SimpleLLMFunc.logger.logger import get_location
+from SimpleLLMFunc.observability.langfuse_client import langfuse_client
+from SimpleLLMFunc.type.message import MessageList
+
+DEFAULT_REPAIR_PROMPT = (
+    "Your previous output could not be parsed into the required return type.\n\n"
+    "Error:\n{error}\n\n"
+    "Return the corrected result only, in exactly the format required above, "
+    "without any explanation."
+)
+"""修复请求中的提示模板，`{error}` 为解析或校验错误"""
+
+
+def describe_parse_error(error: BaseException) -> str:
+    """解析错误的完整描述（包含被包装的原始错误，如 Pydantic 的逐字段校验信息）"""
+    message = str(error)
+    cause = error.__cause__
+    if cause is not None and str(cause) and str(cause) not in message:
+        message += f"\n{cause}"
+    return message
+
+
+def build_repair_messages(
+    system_prompt: Optional[str],
+    failed_content: str,
+    error: BaseException,
+    repair_prompt: Optional[str] = None,
+) -> MessageList:
+    """构建修复请求：只包含输出格式要求、失败的输出和错误信息，不重复原始输入和工具结果"""
+    messages: MessageList = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "assistant", "content": failed_content})
+    # 只替换 {error}：模板中的其他花括号（如 JSON 示例）原样保留
+    messages.append(
+        {
+            "role": "user",
+            "content": (repair_prompt or DEFAULT_REPAIR_PROMPT).replace(
+                "{error}", describe_parse_error(error)
+            ),
+        }
+    )
+    return messages
+
+
+async def repair_response(
+    llm_interface: LLM_Interface,
+    system_prompt: Optional[str],
+    response: Any,
+    error: BaseException,
+    return_type: Any,
+    func_name: str,
+    attempts: int,
+    llm_kwargs: Dict[str, Any],
+    output_mode: str = "xml",
+    repair_prompt: Optional[str] = None,
+    budget_tracker: Optional[BudgetTracker] = None,
+) -> Any:
+    """把失败的输出和错误发回 LLM 并重新解析，最多 attempts 次
+
+    修复请求与 ReAct 循环中的调用一样记录到 Langfuse，并计入 `budget_tracker`；
+    下一次修复会超出花费预算时不再发起。全部失败时抛出最后一次的解析错误。
+    """
+    kwargs = {key: value for key, value in llm_kwargs.items() if key != "tool_choice"}
+    model_parameters = {key: value for key, value in kwargs.items() if key != "retry_times"}
+    max_completion_tokens = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens")
+    content = extract_content_from_response(response, func_name)
+    last_error = error
+
+    for attempt in range(1, attempts + 1):
+        push_warning(
+            f"LLM 函数 '{func_name}' 响应解析失败，发起第 {attempt}/{attempts} 次修复: "
+            f"{last_error}",
+            location=get_location(),
+        )
+        messages = build_repair_messages(system_prompt, content, last_error, repair_prompt)
+        request_messages = cast(List[Dict[str, Any]], messages)
+        if budget_tracker is not None and budget_tracker.would_exceed(
+            request_messages, None, max_completion_tokens
+        ):
+            push_warning(
+                f"LLM 函数 '{func_name}' 修复请求将超出花费预算，停止修复 "
+                f"(已用 {budget_tracker.total_tokens} tokens)",
+                location=get_location(),
+            )
+            break
+
+        with langfuse_client.start_as_current_observation(
+            as_type="generation",
+            name=f"{func_name}_repair_call",
+            input=request_messages,
+            model=llm_interface.model_name,
+            model_parameters=model_parameters,
+            metadata={"attempt": attempt, "attempts": attempts},
+        ) as generation_span:
+            repaired = await llm_interface.chat(messages=request_messages, **kwargs)
+            repaired_content = extract_content_from_response(repaired, func_name)
+            usage_info = extract_usage_from_response(repaired)
+            if budget_tracker is not None:
+                budget_tracker.record(usage_info, request_messages, repaired_content)
+            generation_span.update(
+                output={"content": repaired_content},
+                usage_details=(
+                    {
+                        "prompt_tokens": usage_info.prompt_tokens,
+                        "completion_tokens": usage_info.completion_tokens,
+                        "total_tokens": usage_info.total_tokens,
+                    }
+                    if usage_info
+                    else None
+                ),
+            )
+
+        try:
+            return parse_and_validate_response(
+                response=repaired,
+                return_type=return_type,
+                func_name=func_name,
+                output_mode=output_mode,
+            )
+        except Exception as exc:
+            last_error = exc
+            content = repaired_content
+
+    raise last_error
+
+
+__all__ = [
+    "DEFAULT_REPAIR_PROMPT",
+    "build_repair_messages",
+    "describe_parse_error",
+    "repair_response",
+]
@@ -2,9 +2,20 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, List, Optional, Sequence
 
-from SimpleLLMFunc.base.post_process import process_response
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+
+from SimpleLLMFunc.base.post_process import (
+    extract_content_from_stream_response,
+    process_response,
+)
+from SimpleLLMFunc.base.type_resolve.json_schema import parse_json_output
+from SimpleLLMFunc.base.type_resolve.xml_stream import XMLRootCloseDetector
+from SimpleLLMFunc.llm_decorator.steps.function.prompt import _is_complex_return_type
+from SimpleLLMFunc.logger import push_error
+from SimpleLLMFunc.logger.logger import get_location
 
 
 def extract_response_content(response: Any, func_name: str) -> str:
@@ -19,11 +30,91 @@ def parse_response_to_type(response: Any, return_type: Any) -> Any:
     return process_response(response, return_type)
 
 
+def parse_json_response(response: Any, return_type: Any, func_name: str) -> Any:
+    """按 JSON Schema 输出模式解析响应"""
+    content = extract_response_content(response, func_name)
+    try:
+        return parse_json_output(content, return_type)
+    except Exception as exc:
+        push_error(
+            f"LLM 函数 '{func_name}': JSON 解析失败: {str(exc)}, 内容: {content[:200]}",
+            location=get_location(),
+        )
+        raise ValueError(f"无法将 LLM 响应解析为 JSON: {str(exc)}") from exc
+
+
 def parse_and_validate_response(
     response: Any,
     return_type: Any,
     func_name: str,
+    output_mode: str = "xml",
 ) -> Any:
     """解析和验证响应的完整流程"""
+    if output_mode == "json_schema" and _is_complex_return_type(return_type):
+        return parse_json_response(response, return_type, func_name)
     return parse_response_to_type(response, return_type)
 
+
+
+def _is_stream_chunk(response: Any) -> bool:
+    choices = getattr(response, "choices", None)
+    return bool(choices) and getattr(choices[0], "delta", None) is not None
+
+
+class StreamedResponseCollector:
+    """流式模式下把同一次 LLM 调用的 chunk 拼接为完整响应
+
+    chunk 按所属请求的消息历史长度分组：消息数变化说明开始了新的一次 LLM 调用。
+    非流式响应（如达到工具调用上限后的最终调用）直接作为完整响应使用。
+    设置 xml_root 时，拼接结果只保留该 XML 根元素部分，丢弃根元素闭合后的多余内容。
+    """
+
+    def __init__(self, func_name: str, xml_root: Optional[str] = None) -> None:
+        self.func_name = func_name
+        self.xml_root = xml_root
+        self._parts: List[str] = []
+        self._last_chunk: Any = None
+        self._complete: Any = None
+        self._message_count = -1
+
+    def add(self, response: Any, messages: Sequence[Any]) -> None:
+        """记录一个响应（chunk 或完整响应）"""
+        if len(messages) != self._message_count:
+            self._message_count = len(messages)
+            self._parts = []
+            self._last_chunk = None
+        if _is_stream_chunk(response):
+            self._parts.append(extract_content_from_stream_response(response, self.func_name))
+            self._last_chunk = response
+            self._complete = None
+        else:
+            self._parts = []
+            self._last_chunk = None
+            self._complete = response
+
+    def response(self) -> Any:
+        """最近一次 LLM 调用的完整响应"""
+        if self._last_chunk is None:
+            return self._complete
+
+        content = "".join(self._parts)
+        if self.xml_root:
+            detector = XMLRootCloseDetector(self.xml_root)
+            detector.feed(content)
+            content = detector.trim(content)
+
+        chunk = self._last_chunk
+        return ChatCompletion(
+            id=getattr(chunk, "id", None) or "",
+            object="chat.completion",
+            created=getattr(chunk, "created", None) or 0,
+            model=getattr(chunk, "model", None) or "",
+            choices=[
+                Choice(
+                    index=0,
+                    finish_reason="stop",
+                    message=ChatCompletionMessage(role="assistant", content=content),
+                )
+            ],
+            usage=getattr(chunk, "usage", None),
+        )
@@ -2,6 +2,6 @@
 LLM 装饰器工具模块
 """
 
-from .tools import process_tools
+from .tools import ToolkitCache, process_tools
 
-__all__ = ["process_tools"]
+__all__ = ["ToolkitCache", "process_tools"]
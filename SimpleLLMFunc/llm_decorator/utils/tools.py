@@ -114,6 +114,49 @@ def process_tools(
     return tool_param_for_api, tool_map
 
 
+class ToolkitCache:
+    """缓存一个工具列表的 `process_tools` 结果
+
+    工具列表在装饰时确定，工具定义（包括每个参数的 JSON Schema）和工具映射只需要生成一次；
+    之后每次调用直接复用。工具列表在装饰后被修改（增删或替换工具）时自动重新生成。
+
+    Example:
+        ```python
+        tool_cache = ToolkitCache(toolkit, "my_func")
+        tool_param, tool_map = tool_cache.get()
+        ```
+    """
+
+    def __init__(
+        self,
+        toolkit: Optional[List[Union[Tool, Callable[..., Awaitable[Any]]]]],
+        func_name: str = "unknown_function",
+    ) -> None:
+        self.toolkit = toolkit
+        self.func_name = func_name
+        # 保留生成结果时的工具引用，保证比较用的 id 不会被新对象复用
+        self._snapshot: Optional[List[Any]] = None
+        self._result: Tuple[ToolDefinitionList, Dict[str, Callable[..., Awaitable[Any]]]] = (
+            None,
+            {},
+        )
+
+    def _is_current(self) -> bool:
+        if self._snapshot is None:
+            return False
+        toolkit = self.toolkit or []
+        return len(toolkit) == len(self._snapshot) and all(
+            current is cached for current, cached in zip(toolkit, self._snapshot)
+        )
+
+    def get(self) -> Tuple[ToolDefinitionList, Dict[str, Callable[..., Awaitable[Any]]]]:
+        """返回 (tool_param_for_api, tool_map)，工具列表未变化时直接复用"""
+        if not self._is_current():
+            self._result = process_tools(self.toolkit, self.func_name)
+            self._snapshot = list(self.toolkit or [])
+        return self._result
+
+
 def _process_tool_object(
     tool: Tool,
     func_name: str,
@@ -56,9 +56,15 @@ class Tool(ABC):
         name: str,
         description: str,
         func: Optional[Callable[..., Awaitable[Any]]] = None,
+        dedupe: bool = True,
+        background: bool = False,
     ):
         self.name = name
         self.description = description
+        # 同一批次中名称与参数完全相同的调用是否只执行一次；有副作用的工具应设为 False
+        self.dedupe = dedupe
+        # 后台工具：调用立即返回 job id，执行结果在完成后再注入对话
+        self.background = background
         if func is not None and not inspect.iscoroutinefunction(func):
             func_name = getattr(func, "__name__", repr(func))
             raise TypeError(
@@ -332,7 +338,7 @@ T = TypeVar("T")
 
 
 def tool(
-    name: str, description: str
+    name: str, description: str, dedupe: bool = True, background: bool = False
 ) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
     """
     工具装饰器，用于将函数转换为Tool对象。
@@ -371,6 +377,11 @@ def tool(
     Args:
         name: 工具名称，在LLM工具调用中使用
         description: 工具简短描述，更详细的内容可以在被装饰函数的docstring中给出
+        dedupe: 同一轮中模型重复发出名称和参数完全相同的调用时，是否只执行一次并共享结果。
+            默认为 True；对于有副作用的工具（写文件、发消息等）请设为 False
+        background: 是否作为后台工具执行。为 True 时调用立即返回包含 job id 的 pending 消息，
+            工具在后台继续执行，完成后结果会在下一次 LLM 调用前注入对话；模型也可以通过内置工具
+            `check_background_jobs` 查询或等待指定任务。适合耗时数分钟的爬取、报告生成等任务
 
     Returns:
         装饰器函数，保持原函数功能的同时添加_tool属性
@@ -432,7 +443,13 @@ def tool(
                 f"被 @tool 装饰的函数 '{func.__name__}' 必须是 async 函数"
             )
         # 创建工具对象
-        tool_obj = Tool(name=name, description=description, func=func)
+        tool_obj = Tool(
+            name=name,
+            description=description,
+            func=func,
+            dedupe=dedupe,
+            background=background,
+        )
 
         # 保留原始函数的功能，同时附加工具对象
         setattr(func, "_tool", tool_obj)
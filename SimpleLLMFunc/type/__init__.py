@@ -31,6 +31,7 @@ from SimpleLLMFunc.type.tool_call import (
     ToolDefinitionList,
     ToolCallFunctionInfo,
     AccumulatedToolCall,
+    ParsedToolCall,
     dict_to_tool_call,
     tool_call_to_dict,
 )
@@ -84,6 +85,7 @@ __all__ = [
     "ToolDefinitionList",
     "ToolCallFunctionInfo",
     "AccumulatedToolCall",
+    "ParsedToolCall",
     "dict_to_tool_call",
     "tool_call_to_dict",
     # LLM 响应类型
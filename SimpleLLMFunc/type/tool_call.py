@@ -5,7 +5,8 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Literal, TypeAlias, TypedDict
+import json
+from typing import Any, Dict, List, Optional, Literal, TypeAlias, TypedDict, cast
 from openai.types.chat.chat_completion_message_tool_call import (
     ChatCompletionMessageToolCall,
     Function as OpenAIFunction,
@@ -83,6 +84,98 @@ class AccumulatedToolCall(TypedDict):
     type: Optional[str]
     function: ToolCallFunctionInfo
 
+# ============================================================================
+# 解析后的工具调用
+# ============================================================================
+
+_UNPARSED: Any = object()
+
+
+class ParsedToolCall(Dict[str, Any]):
+    """
+    参数只解析一次的工具调用
+
+    结构与 OpenAI 工具调用字典完全相同（可以直接放入消息、写入检查点），
+    同时缓存解析后的参数、解析错误以及对应的 ToolCall 对象，
+    供工具执行、事件和 Langfuse 观测共享，避免对同一份参数重复 `json.loads`。
+
+    参数为空字符串时按 `{}` 处理。修改 `function.arguments` 后缓存会自动失效。
+    """
+
+    __slots__ = ("_arguments_source", "_arguments", "_arguments_error", "_typed")
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._arguments_source: Any = _UNPARSED
+        self._arguments: Optional[ToolCallArguments] = None
+        self._arguments_error: Optional[Exception] = None
+        self._typed: Optional[ToolCall] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ParsedToolCall":
+        """把工具调用字典包装为 ParsedToolCall，已经是 ParsedToolCall 时原样返回"""
+        return data if isinstance(data, cls) else cls(data)
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.get("id")
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.get("function", {}).get("name")
+
+    @property
+    def arguments_str(self) -> str:
+        """原始参数字符串（为空时为 `{}`）"""
+        return self.get("function", {}).get("arguments") or "{}"
+
+    def _ensure_parsed(self) -> None:
+        source = self.arguments_str
+        if source is self._arguments_source:
+            return
+        self._arguments_source = source
+        self._typed = None
+        try:
+            self._arguments = json.loads(source)
+            self._arguments_error = None
+        except (TypeError, ValueError) as exc:
+            self._arguments = None
+            self._arguments_error = exc
+
+    @property
+    def arguments(self) -> Optional[ToolCallArguments]:
+        """解析后的参数，解析失败时为 None"""
+        self._ensure_parsed()
+        return self._arguments
+
+    @property
+    def arguments_error(self) -> Optional[Exception]:
+        """参数解析错误，解析成功时为 None"""
+        self._ensure_parsed()
+        return self._arguments_error
+
+    def parse_arguments(self) -> ToolCallArguments:
+        """返回解析后的参数，解析失败时抛出缓存的解析错误"""
+        self._ensure_parsed()
+        if self._arguments_error is not None:
+            raise self._arguments_error
+        return cast(ToolCallArguments, self._arguments)
+
+    def to_tool_call(self) -> ToolCall:
+        """转换为 OpenAI SDK 的 ToolCall 对象（结果会被缓存）"""
+        self._ensure_parsed()
+        if self._typed is None:
+            self._typed = ChatCompletionMessageToolCall(
+                id=self["id"],
+                type=self.get("type", "function"),
+                function=OpenAIFunction(
+                    name=self["function"]["name"],
+                    arguments=self["function"]["arguments"],
+                ),
+            )
+        return self._typed
+
+
 # ============================================================================
 # 类型转换辅助函数
 # ============================================================================
@@ -97,6 +190,8 @@ def dict_to_tool_call(data: Dict[str, Any]) -> ToolCall:
     Returns:
         OpenAI SDK 的 ChatCompletionMessageToolCall 对象
     """
+    if isinstance(data, ParsedToolCall):
+        return data.to_tool_call()
     return ChatCompletionMessageToolCall(
         id=data["id"],
         type=data.get("type", "function"),
@@ -137,6 +232,8 @@ __all__ = [
     # 内部类型
     "ToolCallFunctionInfo",
     "AccumulatedToolCall",
+    # 解析后的工具调用
+    "ParsedToolCall",
     # 辅助函数
     "dict_to_tool_call",
     "tool_call_to_dict",
@@ -1,6 +1,9 @@
 """这个文件中包含各种在整个项目中被广泛使用的工具函数
 """
-from typing import Generator, TypeVar, AsyncGenerator
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Generator, Optional, TypeVar, AsyncGenerator
 
 T = TypeVar("T")
 
@@ -20,4 +23,129 @@ async def get_last_item_of_async_generator(generator: AsyncGenerator[T, None]) -
     last_item = None
     async for item in generator:
         last_item = item
-    return last_item
\ No newline at end of file
+    return last_item
+
+@asynccontextmanager
+async def aclosing_stream(stream: AsyncIterator[T]) -> AsyncGenerator[AsyncIterator[T], None]:
+    """离开作用域时立即关闭异步迭代器（兼容没有 `aclose()` 的迭代器）
+
+    外层异步生成器被 `aclose()` 或取消时，正在 `async for` 中迭代的内层生成器不会被自动关闭，
+    只能等待垃圾回收。调用链的每一层都用本函数包裹内层流，关闭就能立即传递到最底层的 HTTP 流。
+
+    Example:
+        >>> async with aclosing_stream(inner()) as stream:
+        ...     async for item in stream:
+        ...         yield item
+    """
+    try:
+        yield stream
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+# ===== 截止时间（deadline）传播 =====
+
+_deadline_var: ContextVar[Optional[float]] = ContextVar("simplellmfunc_deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    """调用超过了 llm_function / llm_chat 设置的整体截止时间"""
+
+
+def get_deadline() -> Optional[float]:
+    """获取当前上下文的截止时间（`time.monotonic()` 时间戳），未设置时返回 None"""
+    return _deadline_var.get()
+
+
+def remaining_time() -> Optional[float]:
+    """当前上下文距离截止时间的剩余秒数（可能为负），未设置截止时间时返回 None"""
+    deadline = _deadline_var.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def clamp_timeout(timeout: Optional[float]) -> Optional[float]:
+    """把单步超时限制在剩余时间以内"""
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    remaining = max(remaining, 0.0)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def check_deadline(stage: str = "") -> None:
+    """截止时间已过时抛出 DeadlineExceededError"""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        suffix = f"（{stage}）" if stage else ""
+        raise DeadlineExceededError(f"已超过调用截止时间{suffix}")
+
+
+def _effective_deadline(timeout: Optional[float], deadline: Optional[float]) -> Optional[float]:
+    """合并外层截止时间与本次的 timeout / deadline，取最早者"""
+    candidates = [d for d in (_deadline_var.get(),) if d is not None]
+    if timeout is not None:
+        candidates.append(time.monotonic() + timeout)
+    if deadline is not None:
+        candidates.append(time.monotonic() + (deadline - time.time()))
+    return min(candidates) if candidates else None
+
+
+@contextmanager
+def deadline_scope(
+    timeout: Optional[float] = None, deadline: Optional[float] = None
+) -> Generator[Optional[float], None, None]:
+    """在作用域内设置截止时间，嵌套时取更早的截止时间
+
+    只能用在普通函数或协程中：异步生成器内的作用域会在 yield 期间泄漏给消费方，
+    异步生成器请使用 `deadline_stream`。
+
+    Args:
+        timeout: 从现在起允许的秒数
+        deadline: 绝对截止时间（`time.time()` 时间戳）
+
+    Yields:
+        生效的截止时间（`time.monotonic()` 时间戳），两者都未提供且外层未设置时为 None
+
+    Example:
+        >>> with deadline_scope(timeout=30):
+        ...     result = await my_llm_function(...)
+    """
+    effective = _effective_deadline(timeout, deadline)
+    token = _deadline_var.set(effective)
+    try:
+        yield effective
+    finally:
+        _deadline_var.reset(token)
+
+
+async def deadline_stream(
+    stream: AsyncGenerator[T, None],
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+) -> AsyncGenerator[T, None]:
+    """让截止时间只作用于异步生成器 `stream` 本身
+
+    截止时间只在驱动 `stream` 的每一步期间生效，产出条目前即恢复，
+    不会泄漏给消费方（消费方在两次迭代之间发起的其他调用不受影响）。
+    设置与恢复总是发生在同一次 `await` 中，因此不会出现跨上下文重置。
+
+    Args:
+        stream: 需要受截止时间约束的异步生成器
+        timeout: 从第一次迭代起允许的秒数
+        deadline: 绝对截止时间（`time.time()` 时间戳）
+    """
+    effective = _effective_deadline(timeout, deadline)
+    async with aclosing_stream(stream):
+        while True:
+            token = _deadline_var.set(effective)
+            try:
+                item = await stream.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                _deadline_var.reset(token)
+            yield item
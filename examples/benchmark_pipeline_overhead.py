@@ -0,0 +1,81 @@
+"""
+基准测试：每个流式条目的转发开销
+
+对比两种把底层 ReAct 输出交给调用方的方式：
+- 嵌套转发：每一层都用 `async for ... yield` 再转发一次（旧的 llm_function 调用链约 5 层）
+- OutputPipeline：单个驱动循环消费底层生成器，各层注册为阶段回调
+
+运行：python examples/benchmark_pipeline_overhead.py
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncGenerator
+
+from SimpleLLMFunc.hooks import EventYield, ResponseYield
+from SimpleLLMFunc.hooks.stream import is_response_yield
+from SimpleLLMFunc.llm_decorator.steps.common import OutputPipeline
+
+CHUNKS = 200_000
+LAYERS = 5  # 旧调用链的嵌套层数
+STAGES = 2  # 新调用链中注册的阶段数（ReAct 循环 + 响应解析）
+
+
+async def source(n: int) -> AsyncGenerator[Any, None]:
+    event = EventYield(event=None)  # type: ignore[arg-type]
+    for _ in range(n - 1):
+        yield event
+    yield ResponseYield(response="done", messages=[])
+
+
+async def passthrough(stream: AsyncGenerator[Any, None]) -> AsyncGenerator[Any, None]:
+    async for item in stream:
+        if is_response_yield(item):
+            pass
+        yield item
+
+
+def nested(n: int, layers: int) -> AsyncGenerator[Any, None]:
+    stream = source(n)
+    for _ in range(layers):
+        stream = passthrough(stream)
+    return stream
+
+
+def pipelined(n: int, stages: int) -> AsyncGenerator[Any, None]:
+    pipeline = OutputPipeline()
+
+    def stage(item: Any) -> Any:
+        if is_response_yield(item):
+            pass
+        return item
+
+    for _ in range(stages):
+        pipeline.add_stage(on_item=stage)
+    # 与 llm_function 一致：驱动循环之外只有一层对外暴露的生成器
+    return passthrough(pipeline.run(source(n)))
+
+
+async def measure(name: str, stream: AsyncGenerator[Any, None], n: int) -> float:
+    start = time.perf_counter()
+    async for _ in stream:
+        pass
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed * 1e9 / n:8.1f} ns/chunk")
+    return elapsed
+
+
+async def main() -> None:
+    baseline = await measure("source only", source(CHUNKS), CHUNKS)
+    nested_time = await measure(f"nested x{LAYERS}", nested(CHUNKS, LAYERS), CHUNKS)
+    pipeline_time = await measure(
+        f"pipeline ({STAGES} stages) + edge", pipelined(CHUNKS, STAGES), CHUNKS
+    )
+    print(
+        f"\n转发开销（扣除 source）：嵌套 {(nested_time - baseline) * 1e9 / CHUNKS:.1f} ns/chunk，"
+        f"pipeline {(pipeline_time - baseline) * 1e9 / CHUNKS:.1f} ns/chunk"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
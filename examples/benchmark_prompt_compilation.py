@@ -0,0 +1,105 @@
+"""
+基准测试：llm_function 每次调用构建初始提示的开销
+
+对比两种方式：
+- 逐次构建：每次调用都执行 `inspect.signature` / `get_type_hints`，并重新生成参数类型描述、
+  返回类型的 XML Schema 与示例（旧的调用路径）
+- 装饰时编译：`compile_function_metadata` + `compile_function_prompt` 只执行一次，
+  每次调用只绑定参数并格式化参数值
+
+分别使用简单与复杂（多层嵌套）的返回模型，编译后的单次开销应与返回模型复杂度无关。
+
+运行：python examples/benchmark_prompt_compilation.py
+"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from SimpleLLMFunc.llm_decorator.steps.common import (
+    compile_function_metadata,
+    parse_function_signature,
+)
+from SimpleLLMFunc.llm_decorator.steps.function import (
+    build_initial_prompts,
+    compile_function_prompt,
+)
+
+CALLS = 2_000
+
+
+class Summary(BaseModel):
+    title: str
+
+
+class Address(BaseModel):
+    street: str = Field(..., description="街道")
+    city: str = Field(..., description="城市")
+    country: Optional[str] = Field(None, description="国家")
+
+
+class Contact(BaseModel):
+    name: str = Field(..., description="姓名")
+    emails: List[str] = Field(default_factory=list, description="邮箱列表")
+    address: Address = Field(..., description="地址")
+
+
+class Report(BaseModel):
+    title: str = Field(..., description="标题")
+    contacts: List[Contact] = Field(..., description="联系人")
+    tags: Dict[str, List[str]] = Field(default_factory=dict, description="标签")
+    owner: Contact = Field(..., description="负责人")
+
+
+async def summarize(text: str, style: str = "short") -> Summary:
+    """Summarize the text."""
+    ...
+
+
+async def build_report(text: str, style: str = "short") -> Report:
+    """Build a structured report from the text."""
+    ...
+
+
+def per_call(func: Callable) -> Callable[[], object]:
+    def run() -> object:
+        sig, template_params = parse_function_signature(func, ("some text",), {})
+        return build_initial_prompts(sig, template_params=template_params)
+
+    return run
+
+
+def compiled(func: Callable) -> Callable[[], object]:
+    metadata = compile_function_metadata(func)
+    prompt = compile_function_prompt(metadata)
+
+    def run() -> object:
+        sig, template_params = parse_function_signature(
+            func, ("some text",), {}, metadata=metadata
+        )
+        return build_initial_prompts(
+            sig, template_params=template_params, compiled_prompt=prompt
+        )
+
+    return run
+
+
+def measure(name: str, run: Callable[[], object]) -> float:
+    run()
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        run()
+    elapsed = (time.perf_counter() - start) / CALLS
+    print(f"{name:<32} {elapsed * 1e6:9.1f} us/call")
+    return elapsed
+
+
+def main() -> None:
+    for label, func in (("simple", summarize), ("complex", build_report)):
+        measure(f"per-call build ({label})", per_call(func))
+        measure(f"compiled ({label})", compiled(func))
+
+
+if __name__ == "__main__":
+    main()
@@ -69,24 +69,6 @@ async def translate_text(text: str, source_lang: str = "Chinese", target_lang: s
     return "Hello, world!"
 
 
-async def translate_single_text(text: str) -> Optional[str]:
-    """
-    Translate a single text with error handling.
-    
-    Args:
-        text: Text to translate
-        
-    Returns:
-        Translated text or None if translation failed
-    """
-    try:
-        result: str = await translate_text(text)
-        return result
-    except Exception as e:
-        logger.error(f"Failed to translate text '{text[:50]}...': {e}")
-        return None
-
-
 async def translate_batch_concurrent(texts: List[str], max_concurrent: int = 5) -> List[Optional[str]]:
     """
     Translate a batch of texts using structured concurrency.
@@ -98,18 +80,11 @@ async def translate_batch_concurrent(texts: List[str], max_concurrent: int = 5)
     Returns:
         List of translated texts (None for failed translations)
     """
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def translate_with_semaphore(text: str) -> Optional[str]:
-        async with semaphore:
-            return await translate_single_text(text)
-    
-    # Create tasks for all translations
-    tasks = [translate_with_semaphore(text) for text in texts]
-    
-    # Execute all tasks concurrently
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
+    # Bounded concurrency, retries and stats are handled by llm_function's batch()
+    results = await translate_text.batch(
+        texts, concurrency=max_concurrent, retries=2, return_exceptions=True
+    )
+
     # Convert exceptions to None
     processed_results: List[Optional[str]] = []
     for result in results:
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import inspect
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
 from unittest.mock import AsyncMock, MagicMock, Mock
 
 import pytest
@@ -41,15 +41,18 @@ def mock_api_key_pool() -> APIKeyPool:
     return mock
 
 
-@pytest.fixture
-def mock_chat_completion() -> ChatCompletion:
-    """Create a mock ChatCompletion response."""
+def build_chat_completion(
+    content: Optional[str],
+    tool_calls: Optional[List[ChatCompletionMessageToolCall]] = None,
+) -> ChatCompletion:
+    """Build a ChatCompletion with the given content and optional tool calls."""
     message = ChatCompletionMessage(
         role="assistant",
-        content="Test response",
+        content=content,
+        tool_calls=tool_calls,
     )
     choice = Choice(
-        finish_reason="stop",
+        finish_reason="tool_calls" if tool_calls else "stop",
         index=0,
         message=message,
     )
@@ -62,6 +65,18 @@ def mock_chat_completion() -> ChatCompletion:
     )
 
 
+@pytest.fixture
+def make_chat_completion() -> Callable[..., ChatCompletion]:
+    """Factory fixture: make_chat_completion(content, tool_calls=None)."""
+    return build_chat_completion
+
+
+@pytest.fixture
+def mock_chat_completion() -> ChatCompletion:
+    """Create a mock ChatCompletion response."""
+    return build_chat_completion("Test response")
+
+
 @pytest.fixture
 def mock_chat_completion_with_tool_calls() -> ChatCompletion:
     """Create a mock ChatCompletion response with tool calls."""
@@ -0,0 +1 @@
+"""Tests for base.budget module."""
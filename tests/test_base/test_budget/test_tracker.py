@@ -0,0 +1,118 @@
+"""Tests for base.budget module."""
+
+from __future__ import annotations
+
+import pytest
+from openai.types.completion_usage import CompletionUsage
+
+from SimpleLLMFunc.base.budget import (
+    ModelPrice,
+    RunBudget,
+    estimate_cost,
+    lookup_model_price,
+    resolve_run_budget,
+)
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> CompletionUsage:
+    return CompletionUsage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
+class TestPricing:
+    """Tests for the model price table."""
+
+    def test_lookup_prefers_longest_prefix(self) -> None:
+        prices = {"gpt-4o": ModelPrice(2.5, 10), "gpt-4o-mini": ModelPrice(0.15, 0.6)}
+
+        assert lookup_model_price("gpt-4o-mini-2024-07-18", prices) == prices["gpt-4o-mini"]
+        assert lookup_model_price("openai/gpt-4o", prices) == prices["gpt-4o"]
+        assert lookup_model_price("unknown-model", prices) is None
+
+    def test_estimate_cost(self) -> None:
+        prices = {"m": ModelPrice(1.0, 2.0)}
+
+        assert estimate_cost("m", _usage(1_000_000, 500_000), prices) == pytest.approx(2.0)
+        assert estimate_cost("other", _usage(10, 10), prices) is None
+
+
+class TestBudgetTracker:
+    """Tests for RunBudget / BudgetTracker."""
+
+    def test_token_budget(self) -> None:
+        tracker = RunBudget(token_budget=1_000).start("test-model")
+        tracker.record(_usage(800, 100))
+
+        messages = [{"role": "user", "content": "x" * 400}]
+        assert tracker.would_exceed(messages) is True
+        assert tracker.exhausted is True
+        assert tracker.snapshot()["total_tokens"] == 900
+
+    def test_within_budget(self) -> None:
+        tracker = RunBudget(token_budget=10_000).start("test-model")
+        tracker.record(_usage(100, 20))
+
+        assert tracker.would_exceed([{"role": "user", "content": "hi"}]) is False
+        assert tracker.exhausted is False
+
+    def test_cost_budget(self) -> None:
+        budget = RunBudget(cost_budget=0.01, prices={"priced": ModelPrice(10.0, 10.0)})
+        tracker = budget.start("priced")
+        tracker.record(_usage(900, 50))
+
+        assert tracker.cost == pytest.approx(0.0095)
+        assert tracker.would_exceed([{"role": "user", "content": "x" * 400}]) is True
+
+    def test_cost_budget_ignored_for_unknown_model(self) -> None:
+        tracker = RunBudget(cost_budget=0.01, prices={}).start("unknown")
+        tracker.record(_usage(1_000_000, 0))
+
+        assert tracker.would_exceed([{"role": "user", "content": "hi"}]) is False
+        assert tracker.snapshot()["cost"] is None
+
+    def test_missing_usage_is_estimated(self) -> None:
+        tracker = RunBudget(token_budget=1_000).start("test-model")
+        tracker.record(None, [{"role": "user", "content": "hello world"}], "answer")
+
+        snapshot = tracker.snapshot()
+        assert snapshot["estimated_calls"] == 1
+        assert snapshot["prompt_tokens"] > 0
+        assert snapshot["completion_tokens"] > 0
+
+    def test_completion_reserve_uses_max_tokens(self) -> None:
+        tracker = RunBudget(token_budget=1_000).start("test-model")
+
+        messages = [{"role": "user", "content": "hi"}]
+        assert tracker.would_exceed(messages, max_completion_tokens=100) is False
+        assert tracker.would_exceed(messages, max_completion_tokens=2_000) is True
+
+    def test_reserve_final_answer(self) -> None:
+        """Reserving the forced final call stops the tool loop earlier."""
+        tracker = RunBudget(token_budget=1_000).start("test-model")
+        tracker.record(_usage(300, 100))
+
+        messages = [{"role": "user", "content": "x" * 800}]
+        assert tracker.would_exceed(messages) is False
+        assert tracker.would_exceed(messages, reserve_final_answer=True) is True
+
+    def test_restore_from_snapshot(self) -> None:
+        tracker = RunBudget(token_budget=1_000).start("test-model")
+        tracker.record(_usage(300, 100))
+
+        restored = RunBudget(token_budget=1_000).start("test-model")
+        restored.restore(tracker.snapshot())
+        assert restored.total_tokens == 400
+        assert restored.llm_calls == 1
+        assert restored.would_exceed([], max_completion_tokens=None) is False
+        assert restored.snapshot()["max_completion_tokens"] == 100
+
+    def test_resolve_and_validation(self) -> None:
+        assert resolve_run_budget() is None
+        assert resolve_run_budget(token_budget=100).token_budget == 100
+        with pytest.raises(ValueError):
+            RunBudget(token_budget=0)
+        with pytest.raises(ValueError):
+            RunBudget(cost_budget=-1)
@@ -0,0 +1,74 @@
+"""Tests for base.checkpoint.store module."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from SimpleLLMFunc.base.checkpoint import (
+    CheckpointStore,
+    JSONLCheckpointStore,
+    ReActCheckpoint,
+    SQLiteCheckpointStore,
+)
+
+
+@pytest.fixture(params=["sqlite", "jsonl"])
+def store(request: pytest.FixtureRequest, tmp_path: Path) -> CheckpointStore:
+    if request.param == "sqlite":
+        return SQLiteCheckpointStore(tmp_path / "checkpoints.db")
+    return JSONLCheckpointStore(tmp_path / "checkpoints.jsonl")
+
+
+class TestCheckpointStores:
+    """Tests shared by all checkpoint store backends."""
+
+    @pytest.mark.asyncio
+    async def test_load_missing(self, store: CheckpointStore) -> None:
+        assert await store.load("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_save_overwrites_and_loads_latest(self, store: CheckpointStore) -> None:
+        messages = [{"role": "user", "content": "你好"}]
+        await store.save(ReActCheckpoint(trace_id="t1", messages=messages, call_count=1))
+        await store.save(
+            ReActCheckpoint(
+                trace_id="t1",
+                messages=messages + [{"role": "assistant", "content": "hi"}],
+                call_count=2,
+                pending_tool_calls=[{"id": "call_1"}],
+            )
+        )
+        await store.save(ReActCheckpoint(trace_id="t2", messages=[], call_count=7))
+
+        loaded = await store.load("t1")
+
+        assert loaded is not None
+        assert loaded.call_count == 2
+        assert loaded.messages[0]["content"] == "你好"
+        assert loaded.pending_tool_calls == [{"id": "call_1"}]
+
+    @pytest.mark.asyncio
+    async def test_delete(self, store: CheckpointStore) -> None:
+        await store.save(ReActCheckpoint(trace_id="t1", messages=[]))
+        await store.delete("t1")
+        assert await store.load("t1") is None
+
+
+class TestJSONLCheckpointStore:
+    """Tests specific to the JSONL backend."""
+
+    @pytest.mark.asyncio
+    async def test_ignores_truncated_last_line(self, tmp_path: Path) -> None:
+        """A partially written record from a crashed process is skipped."""
+        path = tmp_path / "checkpoints.jsonl"
+        store = JSONLCheckpointStore(path)
+        await store.save(ReActCheckpoint(trace_id="t1", messages=[], call_count=3))
+        with path.open("a", encoding="utf-8") as f:
+            f.write('{"trace_id": "t1", "call_co')
+
+        loaded = await store.load("t1")
+
+        assert loaded is not None
+        assert loaded.call_count == 3
@@ -0,0 +1,144 @@
+"""Tests for base.context.compaction module."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from SimpleLLMFunc.base.context import (
+    ContextBudget,
+    DropOldToolResults,
+    SummarizeOldTurns,
+    TruncateToolOutputs,
+    estimate_messages_tokens,
+    resolve_context_budget,
+)
+from SimpleLLMFunc.base.context.compaction import DROPPED_TOOL_RESULT_PLACEHOLDER
+
+
+def _tool_turn(index: int, result: str) -> list:
+    call_id = f"call_{index}"
+    return [
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": call_id,
+                    "type": "function",
+                    "function": {"name": "search", "arguments": "{}"},
+                }
+            ],
+        },
+        {"role": "tool", "tool_call_id": call_id, "content": result},
+    ]
+
+
+@pytest.fixture
+def long_history() -> list:
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "Research the topic."},
+    ]
+    for i in range(5):
+        messages.extend(_tool_turn(i, "x" * 4000))
+    return messages
+
+
+class TestContextBudget:
+    """Tests for ContextBudget."""
+
+    @pytest.mark.asyncio
+    async def test_under_budget_is_unchanged(self, sample_messages: list) -> None:
+        """Messages within the budget are returned as-is."""
+        budget = ContextBudget(max_tokens=10_000)
+        assert await budget.compact(sample_messages) is sample_messages
+
+    def test_split_keeps_head_and_tool_pairs(self, long_history: list) -> None:
+        """System and first user message are pinned; the tail never starts with a tool message."""
+        budget = ContextBudget(max_tokens=100, keep_last_messages=3)
+
+        head, middle, tail = budget.split(long_history)
+
+        assert [m["role"] for m in head] == ["system", "user"]
+        assert tail[0]["role"] == "assistant"
+        assert len(tail) == 4
+        assert head + middle + tail == long_history
+
+    @pytest.mark.asyncio
+    async def test_truncate_tool_outputs(self, long_history: list) -> None:
+        """Old tool outputs are truncated while the latest turns are kept intact."""
+        budget = ContextBudget(
+            max_tokens=2_000,
+            strategies=[TruncateToolOutputs(max_chars=100)],
+            keep_last_messages=2,
+        )
+
+        compacted = await budget.compact(long_history)
+
+        assert len(compacted) == len(long_history)
+        assert "[truncated 3900 chars]" in compacted[3]["content"]
+        assert compacted[-1]["content"] == "x" * 4000
+        # 原消息不被修改
+        assert long_history[3]["content"] == "x" * 4000
+        assert estimate_messages_tokens(compacted) <= 2_000
+
+    @pytest.mark.asyncio
+    async def test_drop_old_tool_results(self, long_history: list) -> None:
+        """Dropping replaces old tool results with a placeholder, keeping pairing intact."""
+        budget = ContextBudget(
+            max_tokens=1_500,
+            strategies=[DropOldToolResults()],
+            keep_last_messages=2,
+        )
+
+        compacted = await budget.compact(long_history)
+
+        tool_messages = [m for m in compacted if m["role"] == "tool"]
+        assert len(tool_messages) == 5
+        assert all(
+            m["content"] == DROPPED_TOOL_RESULT_PLACEHOLDER for m in tool_messages[:-1]
+        )
+        assert tool_messages[-1]["content"] == "x" * 4000
+
+    @pytest.mark.asyncio
+    async def test_summarize_old_turns(
+        self, long_history: list, mock_chat_completion: Any
+    ) -> None:
+        """The middle section is replaced with a single summary message."""
+        mock_chat_completion.choices[0].message.content = "searched five times"
+        summary_interface = MagicMock()
+        summary_interface.chat = AsyncMock(return_value=mock_chat_completion)
+
+        budget = ContextBudget(
+            max_tokens=1_500,
+            strategies=[SummarizeOldTurns(summary_interface)],
+            keep_last_messages=2,
+        )
+
+        compacted = await budget.compact(long_history)
+
+        summary_interface.chat.assert_awaited_once()
+        assert len(compacted) == 5
+        assert "searched five times" in compacted[2]["content"]
+        assert compacted[3:] == long_history[-2:]
+
+
+class TestResolveContextBudget:
+    """Tests for resolve_context_budget function."""
+
+    def test_resolve_int(self) -> None:
+        budget = resolve_context_budget(1000)
+        assert isinstance(budget, ContextBudget)
+        assert budget.max_tokens == 1000
+
+    def test_resolve_passthrough(self) -> None:
+        budget = ContextBudget(max_tokens=10)
+        assert resolve_context_budget(budget) is budget
+        assert resolve_context_budget(None) is None
+
+    def test_resolve_invalid_type(self) -> None:
+        with pytest.raises(TypeError):
+            resolve_context_budget("1000")  # type: ignore[arg-type]
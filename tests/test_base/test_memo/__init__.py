@@ -0,0 +1 @@
+"""Tests for base.memo module."""
@@ -0,0 +1,53 @@
+"""Tests for base.memo.key module."""
+
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from SimpleLLMFunc.base.memo import memo_key
+
+
+class _Query(BaseModel):
+    text: str
+
+
+def _key(**overrides: object) -> str:
+    params = dict(
+        docstring="Classify the text.",
+        template_params=None,
+        arguments={"query": _Query(text="hi"), "labels": ["a", "b"]},
+        return_type=List[str],
+        model="test-model",
+        extra={"llm_kwargs": {"temperature": 0}},
+    )
+    params.update(overrides)
+    return memo_key(**params)  # type: ignore[arg-type]
+
+
+def test_key_is_stable() -> None:
+    assert _key() == _key()
+    assert _key(arguments={"labels": ["a", "b"], "query": _Query(text="hi")}) == _key()
+
+
+def test_key_covers_every_component() -> None:
+    base = _key()
+
+    assert _key(docstring="Summarize the text.") != base
+    assert _key(template_params={"lang": "en"}) != base
+    assert _key(arguments={"query": _Query(text="hello"), "labels": ["a", "b"]}) != base
+    assert _key(return_type=List[int]) != base
+    assert _key(model="other-model") != base
+    assert _key(extra={"llm_kwargs": {"temperature": 1}}) != base
+
+
+def test_address_bearing_repr_is_rejected() -> None:
+    class Opaque:
+        pass
+
+    with pytest.raises(TypeError):
+        _key(arguments={"value": Opaque()})
+    with pytest.raises(TypeError):
+        _key(arguments={"values": {Opaque()}})
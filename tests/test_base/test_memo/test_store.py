@@ -0,0 +1,139 @@
+"""Tests for base.memo.store module."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from SimpleLLMFunc.base.memo import (
+    InMemoryMemoStore,
+    MemoStore,
+    SQLiteMemoStore,
+    resolve_memo_store,
+)
+
+
+class _Label(BaseModel):
+    name: str
+    score: float
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request: pytest.FixtureRequest, tmp_path: Path) -> MemoStore:
+    if request.param == "memory":
+        return InMemoryMemoStore()
+    return SQLiteMemoStore(tmp_path / "memo.db")
+
+
+class TestMemoStores:
+    """Tests shared by all memo store backends."""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self, store: MemoStore) -> None:
+        assert await store.get("k", List[_Label]) == (False, None)
+
+        value = [_Label(name="spam", score=0.9)]
+        await store.set("k", value, List[_Label])
+
+        assert await store.get("k", List[_Label]) == (True, value)
+        assert store.stats.hits == 1
+        assert store.stats.misses == 1
+        assert store.stats.hit_rate == 0.5
+
+    @pytest.mark.asyncio
+    async def test_hits_are_independent_copies(self, store: MemoStore) -> None:
+        """Mutating a returned result does not change what later hits return."""
+        value = [_Label(name="spam", score=0.9)]
+        await store.set("k", value, List[_Label])
+        value[0].name = "changed"
+
+        _, first = await store.get("k", List[_Label])
+        first[0].score = 0.1
+        _, second = await store.get("k", List[_Label])
+
+        assert second == [_Label(name="spam", score=0.9)]
+
+    @pytest.mark.asyncio
+    async def test_ttl_expires_entries(self, store: MemoStore, monkeypatch: pytest.MonkeyPatch) -> None:
+        store.ttl = 10
+        await store.set("k", "value", str)
+
+        import SimpleLLMFunc.base.memo.store as module
+
+        now = module.time.time()
+        monkeypatch.setattr(module.time, "time", lambda: now + 11)
+
+        assert await store.get("k", str) == (False, None)
+        assert store.stats.expired == 1
+
+    @pytest.mark.asyncio
+    async def test_clear(self, store: MemoStore) -> None:
+        await store.set("k", 1, int)
+        await store.clear()
+
+        assert await store.get("k", int) == (False, None)
+
+
+class TestInMemoryMemoStore:
+    """Tests for the LRU backend."""
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self) -> None:
+        store = InMemoryMemoStore(max_entries=2)
+        await store.set("a", 1, int)
+        await store.set("b", 2, int)
+        await store.get("a", int)
+        await store.set("c", 3, int)
+
+        assert (await store.get("b", int))[0] is False
+        assert (await store.get("a", int))[0] is True
+        assert store.stats.evictions == 1
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError):
+            InMemoryMemoStore(max_entries=0)
+        with pytest.raises(ValueError):
+            InMemoryMemoStore(ttl=0)
+
+
+class TestSQLiteMemoStore:
+    """Tests for the SQLite backend."""
+
+    @pytest.mark.asyncio
+    async def test_persists_across_instances(self, tmp_path: Path) -> None:
+        await SQLiteMemoStore(tmp_path / "memo.db").set("k", _Label(name="a", score=1), _Label)
+
+        hit, value = await SQLiteMemoStore(tmp_path / "memo.db").get("k", _Label)
+
+        assert hit is True
+        assert value == _Label(name="a", score=1)
+
+    @pytest.mark.asyncio
+    async def test_incompatible_entry_is_a_miss(self, tmp_path: Path) -> None:
+        store = SQLiteMemoStore(tmp_path / "memo.db")
+        await store.set("k", "not a label", str)
+
+        assert await store.get("k", _Label) == (False, None)
+        assert await store.get("k", str) == (False, None)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stats_are_counted(self, tmp_path: Path) -> None:
+        store = SQLiteMemoStore(tmp_path / "memo.db")
+        await asyncio.gather(*(store.set(f"k{i}", i, int) for i in range(20)))
+        await asyncio.gather(*(store.get(f"k{i}", int) for i in range(40)))
+
+        assert store.stats.writes == 20
+        assert (store.stats.hits, store.stats.misses) == (20, 20)
+
+
+def test_resolve_memo_store() -> None:
+    store = InMemoryMemoStore()
+
+    assert resolve_memo_store(None) is None
+    assert resolve_memo_store(False) is None
+    assert isinstance(resolve_memo_store(True), InMemoryMemoStore)
+    assert resolve_memo_store(store) is store
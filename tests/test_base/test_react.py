@@ -2,11 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from SimpleLLMFunc.base.ReAct import execute_llm
+from SimpleLLMFunc.base.budget import RunBudget
+from SimpleLLMFunc.base.checkpoint import SQLiteCheckpointStore
+from SimpleLLMFunc.base.context import ContextBudget, estimate_messages_tokens
+from SimpleLLMFunc.base.ReAct import _process_tool_calls_with_events_gen, execute_llm
+from SimpleLLMFunc.hooks.events import (
+    LLMChunkArriveEvent,
+    ReActEventType,
+    ReactEndEvent,
+    ToolCallArgumentsDeltaEvent,
+)
+from SimpleLLMFunc.hooks.stream import EventYield
+from SimpleLLMFunc.utils import DeadlineExceededError, deadline_scope
 
 
 class TestExecuteLLM:
@@ -174,6 +186,93 @@ class TestExecuteLLM:
 
         assert len(responses) >= 1
 
+    @pytest.mark.asyncio
+    async def test_copy_messages_false_yields_live_history(
+        self,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion_chunk: Any,
+    ) -> None:
+        """Test that copy_messages=False shares one history list across chunks."""
+
+        async def stream_generator(**kwargs):
+            yield mock_chat_completion_chunk
+            yield mock_chat_completion_chunk
+
+        mock_llm_interface.chat_stream = stream_generator
+
+        async def collect(copy_messages: bool) -> list:
+            return [
+                messages
+                async for _, messages in execute_llm(
+                    llm_interface=mock_llm_interface,
+                    messages=sample_messages,
+                    tools=None,
+                    tool_map={},
+                    max_tool_calls=5,
+                    stream=True,
+                    copy_messages=copy_messages,
+                )
+            ]
+
+        copied = await collect(True)
+        assert copied[0] is not copied[1]
+        live = await collect(False)
+        assert live[0] is live[1]
+        assert live[0] is not sample_messages
+
+    @pytest.mark.asyncio
+    async def test_context_budget_compacts_request_only(
+        self,
+        mock_llm_interface: Any,
+        mock_chat_completion: Any,
+    ) -> None:
+        """Test that compaction shrinks the request but not the yielded history."""
+        messages: list = [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": "Research the topic."},
+        ]
+        for i in range(5):
+            messages.extend(
+                [
+                    {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": f"call_{i}",
+                                "type": "function",
+                                "function": {"name": "search", "arguments": "{}"},
+                            }
+                        ],
+                    },
+                    {"role": "tool", "tool_call_id": f"call_{i}", "content": "x" * 4000},
+                ]
+            )
+        sent: list = []
+
+        async def chat(**kwargs: Any) -> Any:
+            sent.append(kwargs["messages"])
+            return mock_chat_completion
+
+        mock_llm_interface.chat = AsyncMock(side_effect=chat)
+
+        outputs = [
+            history
+            async for _, history in execute_llm(
+                llm_interface=mock_llm_interface,
+                messages=messages,
+                tools=None,
+                tool_map={},
+                max_tool_calls=5,
+                stream=False,
+                context_budget=ContextBudget(max_tokens=2_000),
+            )
+        ]
+
+        assert estimate_messages_tokens(sent[0]) < estimate_messages_tokens(messages)
+        assert outputs[-1][: len(messages)] == messages
+
     @pytest.mark.asyncio
     @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
     @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
@@ -250,3 +349,565 @@ class TestExecuteLLM:
 
         assert len(responses) == 1
 
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
+    @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
+    async def test_chunk_events_without_raw_chunks(
+        self,
+        mock_get_context: MagicMock,
+        mock_langfuse: MagicMock,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion_chunk: Any,
+    ) -> None:
+        """Chunk events omit raw chunks on request and accumulate content lazily."""
+        mock_get_context.return_value = "test_func"
+
+        async def stream_generator(**kwargs):
+            for _ in range(3):
+                yield mock_chat_completion_chunk
+
+        mock_llm_interface.chat_stream = stream_generator
+        mock_observation = MagicMock()
+        mock_observation.__enter__ = MagicMock(return_value=mock_observation)
+        mock_observation.__exit__ = MagicMock(return_value=None)
+        mock_langfuse.start_as_current_observation.return_value = mock_observation
+
+        chunk_events = []
+        async for output in execute_llm(
+            llm_interface=mock_llm_interface,
+            messages=sample_messages,
+            tools=None,
+            tool_map={},
+            max_tool_calls=5,
+            stream=True,
+            enable_event=True,
+            event_include_chunks=False,
+        ):
+            if isinstance(output, EventYield) and isinstance(output.event, LLMChunkArriveEvent):
+                chunk_events.append(output.event)
+
+        assert [event.chunk for event in chunk_events] == [None, None, None]
+        assert [event.accumulated_content for event in chunk_events] == [
+            "chunk",
+            "chunkchunk",
+            "chunkchunkchunk",
+        ]
+
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
+    @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
+    async def test_tool_call_argument_delta_events(
+        self,
+        mock_get_context: MagicMock,
+        mock_langfuse: MagicMock,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+    ) -> None:
+        """Streamed tool-call fragments are emitted as argument delta events."""
+        from openai.types.chat.chat_completion_chunk import (
+            ChatCompletionChunk,
+            Choice as ChunkChoice,
+            ChoiceDelta,
+            ChoiceDeltaToolCall,
+            ChoiceDeltaToolCallFunction,
+        )
+
+        def make_chunk(arguments: str, first: bool) -> ChatCompletionChunk:
+            tool_call = ChoiceDeltaToolCall(
+                index=0,
+                id="call_1" if first else None,
+                type="function" if first else None,
+                function=ChoiceDeltaToolCallFunction(
+                    name="write_file" if first else None, arguments=arguments
+                ),
+            )
+            return ChatCompletionChunk(
+                id="test",
+                choices=[ChunkChoice(delta=ChoiceDelta(tool_calls=[tool_call]), index=0)],
+                created=0,
+                model="test-model",
+                object="chat.completion.chunk",
+            )
+
+        fragments = ['{"path": "a.py", ', '"content": "print(', '1)"}']
+
+        async def stream_generator(**kwargs):
+            for index, fragment in enumerate(fragments):
+                yield make_chunk(fragment, index == 0)
+
+        mock_get_context.return_value = "test_func"
+        mock_llm_interface.chat_stream = stream_generator
+        mock_llm_interface.chat = AsyncMock(return_value=mock_chat_completion)
+        mock_observation = MagicMock()
+        mock_observation.__enter__ = MagicMock(return_value=mock_observation)
+        mock_observation.__exit__ = MagicMock(return_value=None)
+        mock_langfuse.start_as_current_observation.return_value = mock_observation
+
+        async def write_file(path: str, content: str) -> str:
+            return "ok"
+
+        delta_events = []
+        async for output in execute_llm(
+            llm_interface=mock_llm_interface,
+            messages=sample_messages,
+            tools=[{"type": "function", "function": {"name": "write_file"}}],
+            tool_map={"write_file": write_file},
+            max_tool_calls=1,
+            stream=True,
+            enable_event=True,
+        ):
+            if isinstance(output, EventYield) and isinstance(
+                output.event, ToolCallArgumentsDeltaEvent
+            ):
+                delta_events.append(output.event)
+
+        assert [event.arguments_delta for event in delta_events] == fragments
+        assert all(event.tool_name == "write_file" for event in delta_events)
+        assert all(event.tool_call_id == "call_1" for event in delta_events)
+        assert [event.partial_arguments for event in delta_events] == [
+            {"path": "a.py"},
+            {"path": "a.py", "content": "print("},
+            {"path": "a.py", "content": "print(1)"},
+        ]
+        assert delta_events[1].accumulated_arguments == "".join(fragments[:2])
+
+
+class TestProcessToolCallsWithEvents:
+    """Tests for the event-emitting tool call batch executor."""
+
+    @pytest.mark.asyncio
+    async def test_batch_end_reports_deduplicated_calls(self) -> None:
+        """Duplicate calls are executed once and counted in the batch end event."""
+        tool_calls = [
+            {
+                "id": f"call_{i}",
+                "type": "function",
+                "function": {"name": "search", "arguments": '{"q": "x"}'},
+            }
+            for i in range(3)
+        ]
+        search = AsyncMock(return_value="result")
+
+        outputs = []
+        async for item in _process_tool_calls_with_events_gen(
+            tool_calls=tool_calls,
+            messages=[{"role": "user", "content": "test"}],
+            tool_map={"search": search},
+            enable_event=True,
+            trace_id="trace",
+            func_name="test_func",
+            iteration=1,
+        ):
+            outputs.append(item)
+
+        search.assert_awaited_once()
+        batch_end = [
+            item.event
+            for item in outputs
+            if isinstance(item, EventYield)
+            and item.event.event_type == ReActEventType.TOOL_CALLS_BATCH_END
+        ][0]
+        assert batch_end.deduplicated_count == 2
+        assert len(batch_end.tool_results) == 3
+
+        final_messages = outputs[-1]
+        tool_ids = [m["tool_call_id"] for m in final_messages if m["role"] == "tool"]
+        assert tool_ids == ["call_0", "call_1", "call_2"]
+
+
+class TestExecuteLLMCheckpoint:
+    """Tests for checkpointing and resuming execute_llm."""
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
+    @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
+    async def test_resume_skips_completed_calls(
+        self,
+        mock_get_context: MagicMock,
+        mock_langfuse: MagicMock,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+        mock_chat_completion_with_tool_calls: Any,
+        tmp_path: Any,
+    ) -> None:
+        """A crashed run resumes after its last tool batch without repeating work."""
+        mock_get_context.return_value = "test_func"
+        mock_observation = MagicMock()
+        mock_observation.__enter__ = MagicMock(return_value=mock_observation)
+        mock_observation.__exit__ = MagicMock(return_value=None)
+        mock_langfuse.start_as_current_observation.return_value = mock_observation
+
+        store = SQLiteCheckpointStore(tmp_path / "checkpoints.db")
+        tools = [{"type": "function", "function": {"name": "test_tool"}}]
+        test_tool = AsyncMock(return_value="tool result")
+
+        # 第一次运行：工具执行完成后，第二次 LLM 调用时进程"崩溃"
+        mock_llm_interface.chat = AsyncMock(
+            side_effect=[mock_chat_completion_with_tool_calls, RuntimeError("worker died")]
+        )
+        with pytest.raises(RuntimeError):
+            async for _ in execute_llm(
+                llm_interface=mock_llm_interface,
+                messages=sample_messages,
+                tools=tools,
+                tool_map={"test_tool": test_tool},
+                max_tool_calls=5,
+                trace_id="run-1",
+                checkpoint_store=store,
+            ):
+                pass
+
+        checkpoint = await store.load("run-1")
+        assert checkpoint is not None
+        assert checkpoint.call_count == 1
+        assert checkpoint.pending_tool_calls == []
+        test_tool.assert_awaited_once()
+
+        # 第二次运行：从检查点恢复，只需要最后一次 LLM 调用
+        mock_llm_interface.chat = AsyncMock(return_value=mock_chat_completion)
+        responses = []
+        async for response, _ in execute_llm(
+            llm_interface=mock_llm_interface,
+            messages=[{"role": "user", "content": "ignored on resume"}],
+            tools=tools,
+            tool_map={"test_tool": test_tool},
+            max_tool_calls=5,
+            trace_id="run-1",
+            checkpoint_store=store,
+        ):
+            responses.append(response)
+
+        assert responses == [mock_chat_completion]
+        test_tool.assert_awaited_once()
+        sent_messages = mock_llm_interface.chat.call_args.kwargs["messages"]
+        assert sent_messages[0] == sample_messages[0]
+        assert any(m.get("tool_call_id") == "call_123" for m in sent_messages)
+        assert await store.load("run-1") is None
+
+
+    @pytest.mark.asyncio
+    async def test_resume_keeps_budget_spend(
+        self,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+        mock_chat_completion_with_tool_calls: Any,
+        tmp_path: Any,
+    ) -> None:
+        """Spend recorded before a crash is restored from the checkpoint."""
+        from openai.types.completion_usage import CompletionUsage
+
+        usage = CompletionUsage(prompt_tokens=100, completion_tokens=10, total_tokens=110)
+        store = SQLiteCheckpointStore(tmp_path / "checkpoints.db")
+        tools = [{"type": "function", "function": {"name": "test_tool"}}]
+        tool_map = {"test_tool": AsyncMock(return_value="tool result")}
+        budget = RunBudget(token_budget=100_000)
+
+        mock_llm_interface.chat = AsyncMock(
+            side_effect=[
+                mock_chat_completion_with_tool_calls.model_copy(update={"usage": usage}),
+                RuntimeError("worker died"),
+            ]
+        )
+        with pytest.raises(RuntimeError):
+            async for _ in execute_llm(
+                llm_interface=mock_llm_interface,
+                messages=sample_messages,
+                tools=tools,
+                tool_map=tool_map,
+                max_tool_calls=5,
+                trace_id="run-budget",
+                checkpoint_store=store,
+                run_budget=budget,
+            ):
+                pass
+
+        mock_llm_interface.chat = AsyncMock(
+            return_value=mock_chat_completion.model_copy(update={"usage": usage})
+        )
+        end_events = [
+            output.event
+            async for output in execute_llm(
+                llm_interface=mock_llm_interface,
+                messages=sample_messages,
+                tools=tools,
+                tool_map=tool_map,
+                max_tool_calls=5,
+                enable_event=True,
+                trace_id="run-budget",
+                checkpoint_store=store,
+                run_budget=budget,
+            )
+            if isinstance(output, EventYield) and isinstance(output.event, ReactEndEvent)
+        ]
+
+        assert end_events[0].budget["llm_calls"] == 2
+        assert end_events[0].budget["total_tokens"] == 220
+
+    @pytest.mark.asyncio
+    async def test_failing_store_does_not_break_run(
+        self,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+        mock_chat_completion_with_tool_calls: Any,
+    ) -> None:
+        """Errors from the checkpoint store are logged as warnings, not raised."""
+        store = MagicMock()
+        store.load = AsyncMock(return_value=None)
+        store.save = AsyncMock(side_effect=OSError("disk full"))
+        store.delete = AsyncMock(side_effect=OSError("disk full"))
+        mock_llm_interface.chat = AsyncMock(
+            side_effect=[mock_chat_completion_with_tool_calls, mock_chat_completion]
+        )
+        test_tool = AsyncMock(return_value="tool result")
+
+        with patch("SimpleLLMFunc.base.ReAct.push_warning") as mock_warning:
+            responses = [
+                response
+                async for response, _ in execute_llm(
+                    llm_interface=mock_llm_interface,
+                    messages=sample_messages,
+                    tools=[{"type": "function", "function": {"name": "test_tool"}}],
+                    tool_map={"test_tool": test_tool},
+                    max_tool_calls=5,
+                    trace_id="run-2",
+                    checkpoint_store=store,
+                )
+            ]
+
+        assert responses[-1] == mock_chat_completion
+        store.save.assert_awaited()
+        store.delete.assert_awaited_once_with("run-2")
+        assert mock_warning.call_count == store.save.await_count + 1
+
+
+class TestExecuteLLMDeadline:
+    """Tests for deadline and cancellation propagation."""
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline_stops_before_llm_call(
+        self, mock_llm_interface: Any, sample_messages: list
+    ) -> None:
+        """No LLM request is issued once the call deadline has passed."""
+        mock_llm_interface.chat = AsyncMock()
+
+        with deadline_scope(timeout=0):
+            with pytest.raises(DeadlineExceededError):
+                async for _ in execute_llm(
+                    llm_interface=mock_llm_interface,
+                    messages=sample_messages,
+                    tools=None,
+                    tool_map={},
+                    max_tool_calls=5,
+                ):
+                    pass
+
+        mock_llm_interface.chat.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_closing_event_stream_cancels_running_tools(self) -> None:
+        """Closing the event generator mid-batch cancels the tools still running."""
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow_tool() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "done"
+
+        tool_calls = [
+            {
+                "id": "call_0",
+                "type": "function",
+                "function": {"name": "slow_tool", "arguments": "{}"},
+            }
+        ]
+        stream = _process_tool_calls_with_events_gen(
+            tool_calls=tool_calls,
+            messages=[{"role": "user", "content": "test"}],
+            tool_map={"slow_tool": slow_tool},
+            enable_event=True,
+            trace_id="trace",
+            func_name="test_func",
+            iteration=1,
+        )
+
+        # 读取事件直到工具开始执行，然后关闭生成器
+        while not started.is_set():
+            await asyncio.wait_for(anext(stream), 1)
+        started_at = asyncio.get_running_loop().time()
+        await stream.aclose()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+        assert asyncio.get_running_loop().time() - started_at < 0.5
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
+    @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
+    async def test_closing_stream_closes_llm_stream(
+        self,
+        mock_get_context: MagicMock,
+        mock_langfuse: MagicMock,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion_chunk: Any,
+    ) -> None:
+        """Closing execute_llm early closes the underlying chat_stream before aclose returns."""
+        mock_get_context.return_value = "test_func"
+        mock_observation = MagicMock()
+        mock_observation.__enter__ = MagicMock(return_value=mock_observation)
+        mock_observation.__exit__ = MagicMock(return_value=None)
+        mock_langfuse.start_as_current_observation.return_value = mock_observation
+
+        closed_at: list = []
+
+        async def stream_generator(**kwargs):
+            try:
+                while True:
+                    yield mock_chat_completion_chunk
+                    await asyncio.sleep(0.01)
+            finally:
+                closed_at.append(asyncio.get_running_loop().time())
+
+        mock_llm_interface.chat_stream = stream_generator
+
+        stream = execute_llm(
+            llm_interface=mock_llm_interface,
+            messages=sample_messages,
+            tools=None,
+            tool_map={},
+            max_tool_calls=5,
+            stream=True,
+        )
+        for _ in range(3):
+            await asyncio.wait_for(anext(stream), 1)
+
+        started_at = asyncio.get_running_loop().time()
+        await stream.aclose()
+
+        assert len(closed_at) == 1
+        assert closed_at[0] - started_at < 0.1
+
+
+class TestExecuteLLMXMLEarlyStop:
+    """Tests for stopping the stream once the XML root element closes."""
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
+    @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
+    async def test_stops_reading_after_root_closes(
+        self,
+        mock_get_context: MagicMock,
+        mock_langfuse: MagicMock,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion_chunk: Any,
+    ) -> None:
+        """Chunks after `</result>` are never requested and the stream is closed."""
+        mock_get_context.return_value = "test_func"
+        mock_observation = MagicMock()
+        mock_observation.__enter__ = MagicMock(return_value=mock_observation)
+        mock_observation.__exit__ = MagicMock(return_value=None)
+        mock_langfuse.start_as_current_observation.return_value = mock_observation
+
+        pieces = ["<result><item>a</item>", "<item>b</item></res", "ult>", "\nHope", " this helps"]
+        pulled: list = []
+        closed: list = []
+
+        async def stream_generator(**kwargs):
+            try:
+                for piece in pieces:
+                    pulled.append(piece)
+                    delta = mock_chat_completion_chunk.choices[0].delta.model_copy(
+                        update={"content": piece}
+                    )
+                    choice = mock_chat_completion_chunk.choices[0].model_copy(update={"delta": delta})
+                    yield mock_chat_completion_chunk.model_copy(update={"choices": [choice]})
+            finally:
+                closed.append(True)
+
+        mock_llm_interface.chat_stream = stream_generator
+
+        outputs = []
+        async for output in execute_llm(
+            llm_interface=mock_llm_interface,
+            messages=sample_messages,
+            tools=None,
+            tool_map={},
+            max_tool_calls=5,
+            stream=True,
+            enable_event=True,
+            stop_at_xml_root="result",
+        ):
+            outputs.append(output)
+
+        assert pulled == pieces[:3]
+        assert closed == [True]
+        end_events = [
+            o.event for o in outputs if isinstance(o, EventYield) and isinstance(o.event, ReactEndEvent)
+        ]
+        assert len(end_events) == 1
+
+
+class TestExecuteLLMBudget:
+    """Tests for per-run token budgets."""
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
+    @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
+    async def test_exhausted_budget_forces_final_answer(
+        self,
+        mock_get_context: MagicMock,
+        mock_langfuse: MagicMock,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+        mock_chat_completion_with_tool_calls: Any,
+    ) -> None:
+        """Once the next call would exceed the budget, the final call is made without tools."""
+        from openai.types.completion_usage import CompletionUsage
+
+        mock_get_context.return_value = "test_func"
+        mock_observation = MagicMock()
+        mock_observation.__enter__ = MagicMock(return_value=mock_observation)
+        mock_observation.__exit__ = MagicMock(return_value=None)
+        mock_langfuse.start_as_current_observation.return_value = mock_observation
+
+        usage = CompletionUsage(prompt_tokens=1000, completion_tokens=50, total_tokens=1050)
+        tool_response = mock_chat_completion_with_tool_calls.model_copy(update={"usage": usage})
+        final_response = mock_chat_completion.model_copy(update={"usage": usage})
+        mock_llm_interface.chat = AsyncMock(side_effect=[tool_response, final_response])
+
+        async def test_tool(arg1: str) -> str:
+            return "result"
+
+        end_events = []
+        async for output in execute_llm(
+            llm_interface=mock_llm_interface,
+            messages=sample_messages,
+            tools=[{"type": "function", "function": {"name": "test_tool"}}],
+            tool_map={"test_tool": test_tool},
+            max_tool_calls=5,
+            enable_event=True,
+            run_budget=RunBudget(token_budget=1100),
+        ):
+            if isinstance(output, EventYield) and isinstance(output.event, ReactEndEvent):
+                end_events.append(output.event)
+
+        assert mock_llm_interface.chat.await_count == 2
+        assert "tools" not in mock_llm_interface.chat.await_args_list[1].kwargs
+        assert len(end_events) == 1
+        budget = end_events[0].budget
+        assert budget["exhausted"] is True
+        assert budget["total_tokens"] == 2100
+        assert budget["llm_calls"] == 2
@@ -0,0 +1,88 @@
+"""Tests for base.session.store module."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from SimpleLLMFunc.base.session import (
+    ChatSessionStore,
+    JSONLChatSessionStore,
+    SQLiteChatSessionStore,
+)
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def store(request: pytest.FixtureRequest, tmp_path: Path) -> ChatSessionStore:
+    if request.param == "jsonl":
+        return JSONLChatSessionStore(tmp_path / "sessions")
+    return SQLiteChatSessionStore(tmp_path / "sessions.db")
+
+
+class TestChatSessionStore:
+    """Tests shared by all session stores."""
+
+    @pytest.mark.asyncio
+    async def test_missing_session_is_empty(self, store: ChatSessionStore) -> None:
+        assert await store.load("missing") == []
+
+    @pytest.mark.asyncio
+    async def test_append_preserves_order(self, store: ChatSessionStore) -> None:
+        await store.append("s1", [{"role": "user", "content": "你好"}])
+        await store.append(
+            "s1",
+            [
+                {"role": "assistant", "content": "hi"},
+                {"role": "user", "content": "again"},
+            ],
+        )
+        await store.append("s2", [{"role": "user", "content": "other"}])
+
+        assert [m["content"] for m in await store.load("s1")] == ["你好", "hi", "again"]
+        assert [m["content"] for m in await store.load("s2")] == ["other"]
+
+    @pytest.mark.asyncio
+    async def test_append_empty_is_noop(self, store: ChatSessionStore) -> None:
+        await store.append("s1", [])
+        assert await store.load("s1") == []
+
+    @pytest.mark.asyncio
+    async def test_delete(self, store: ChatSessionStore) -> None:
+        await store.append("s1", [{"role": "user", "content": "a"}])
+        await store.append("s2", [{"role": "user", "content": "b"}])
+        await store.delete("s1")
+        await store.delete("missing")
+
+        assert await store.load("s1") == []
+        assert len(await store.load("s2")) == 1
+
+
+class TestJSONLChatSessionStore:
+    """Tests specific to the JSONL store."""
+
+    @pytest.mark.asyncio
+    async def test_unsafe_session_id(self, tmp_path: Path) -> None:
+        store = JSONLChatSessionStore(tmp_path)
+        await store.append("../user/1", [{"role": "user", "content": "a"}])
+        [path] = tmp_path.iterdir()
+        assert path.name.startswith(".._user_1-") and path.suffix == ".jsonl"
+        assert len(await store.load("../user/1")) == 1
+
+    @pytest.mark.asyncio
+    async def test_ids_with_same_sanitized_name_do_not_collide(self, tmp_path: Path) -> None:
+        store = JSONLChatSessionStore(tmp_path)
+        await store.append("a/b", [{"role": "user", "content": "slash"}])
+        await store.append("a_b", [{"role": "user", "content": "underscore"}])
+
+        assert len(list(tmp_path.iterdir())) == 2
+        assert await store.load("a/b") == [{"role": "user", "content": "slash"}]
+        assert await store.load("a_b") == [{"role": "user", "content": "underscore"}]
+
+    @pytest.mark.asyncio
+    async def test_skips_truncated_line(self, tmp_path: Path) -> None:
+        store = JSONLChatSessionStore(tmp_path)
+        await store.append("s1", [{"role": "user", "content": "a"}])
+        with store._path("s1").open("a", encoding="utf-8") as f:
+            f.write('{"role": "assist')
+        assert await store.load("s1") == [{"role": "user", "content": "a"}]
@@ -0,0 +1,274 @@
+"""Tests for base.tool_call.background module."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from SimpleLLMFunc.base.ReAct import execute_llm
+from SimpleLLMFunc.base.tool_call.background import (
+    BACKGROUND_JOBS_TOOL_NAME,
+    BackgroundJobManager,
+)
+from SimpleLLMFunc.base.tool_call.execution import process_tool_calls
+from SimpleLLMFunc.tool import tool
+
+
+def _make_tools(release: asyncio.Event) -> dict:
+    @tool(name="crawl", description="Slow crawl", background=True)
+    async def crawl(url: str) -> str:
+        await release.wait()
+        return f"crawled {url}"
+
+    @tool(name="echo", description="Fast echo")
+    async def echo(text: str) -> str:
+        return text
+
+    return {"crawl": crawl._tool.run, "echo": echo._tool.run}
+
+
+def _tool_call(call_id: str, name: str, arguments: dict) -> dict:
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+class TestBackgroundJobManager:
+    """Tests for BackgroundJobManager."""
+
+    def test_only_created_for_background_tools(self) -> None:
+        release = asyncio.Event()
+        tool_map = _make_tools(release)
+        assert BackgroundJobManager.for_tool_map({"echo": tool_map["echo"]}) is None
+        assert BackgroundJobManager.for_tool_map(tool_map) is not None
+
+    @pytest.mark.asyncio
+    async def test_background_call_returns_pending_and_injects_result(self) -> None:
+        """The batch does not wait for the background tool; its result is drained later."""
+        release = asyncio.Event()
+        tool_map = _make_tools(release)
+        manager = BackgroundJobManager(tool_map)
+
+        messages = await process_tool_calls(
+            tool_calls=[
+                _tool_call("call_1", "crawl", {"url": "a"}),
+                _tool_call("call_2", "echo", {"text": "hi"}),
+            ],
+            messages=[{"role": "user", "content": "go"}],
+            tool_map=tool_map,
+            background_jobs=manager,
+        )
+
+        pending = json.loads(messages[1]["content"])
+        assert pending["status"] == "pending"
+        assert json.loads(messages[2]["content"]) == "hi"
+        assert manager.drain_finished() == []
+
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        injected = manager.drain_finished()
+
+        assert len(injected) == 1
+        assert injected[0]["role"] == "user"
+        assert pending["job_id"] in injected[0]["content"]
+        assert "crawled a" in injected[0]["content"]
+        assert manager.drain_finished() == []
+        assert manager.pending_count == 0
+
+    @pytest.mark.asyncio
+    async def test_check_waits_for_jobs(self) -> None:
+        """The built-in tool can wait for specific jobs."""
+        release = asyncio.Event()
+        tool_map = _make_tools(release)
+        manager = BackgroundJobManager(tool_map)
+        pending = json.loads(
+            manager.submit(_tool_call("call_1", "crawl", {"url": "b"}))[0]["content"]
+        )
+
+        running = await manager.tool.run(job_ids=[pending["job_id"]])
+        assert running["jobs"][0]["status"] == "running"
+
+        asyncio.get_running_loop().call_later(0.01, release.set)
+        finished = await manager.tool.run(job_ids=[pending["job_id"], "job_x"], wait=True, timeout=1)
+
+        assert finished["jobs"][0]["status"] == "done"
+        assert "crawled b" in finished["jobs"][0]["result"]
+        assert finished["unknown_job_ids"] == ["job_x"]
+        # 已通过工具交付的结果不会再被注入
+        assert manager.drain_finished() == []
+
+    @pytest.mark.asyncio
+    async def test_cancel_all(self) -> None:
+        release = asyncio.Event()
+        manager = BackgroundJobManager(_make_tools(release))
+        manager.submit(_tool_call("call_1", "crawl", {"url": "c"}))
+        assert manager.cancel_all() == 1
+
+
+class TestExecuteLLMBackgroundTools:
+    """Background tools inside the ReAct loop."""
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
+    @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
+    async def test_model_polls_background_job(
+        self,
+        mock_get_context: MagicMock,
+        mock_langfuse: MagicMock,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+        mock_chat_completion_with_tool_calls: Any,
+    ) -> None:
+        mock_get_context.return_value = "test_func"
+        mock_observation = MagicMock()
+        mock_observation.__enter__ = MagicMock(return_value=mock_observation)
+        mock_observation.__exit__ = MagicMock(return_value=None)
+        mock_langfuse.start_as_current_observation.return_value = mock_observation
+
+        release = asyncio.Event()
+        tool_map = _make_tools(release)
+
+        start_crawl = mock_chat_completion_with_tool_calls.model_copy(deep=True)
+        start_crawl.choices[0].message.tool_calls[0].function.name = "crawl"
+        start_crawl.choices[0].message.tool_calls[0].function.arguments = '{"url": "x"}'
+        poll = mock_chat_completion_with_tool_calls.model_copy(deep=True)
+        poll.choices[0].message.tool_calls[0].id = "call_poll"
+        poll.choices[0].message.tool_calls[0].function.name = BACKGROUND_JOBS_TOOL_NAME
+        poll.choices[0].message.tool_calls[0].function.arguments = '{"wait": true, "timeout": 1}'
+
+        async def chat(**kwargs: Any) -> Any:
+            responses = [start_crawl, poll, mock_chat_completion]
+            call_index = chat.calls
+            chat.calls += 1
+            if call_index == 1:
+                # 模型继续工作期间，后台任务完成
+                asyncio.get_running_loop().call_later(0.01, release.set)
+            return responses[call_index]
+
+        chat.calls = 0  # type: ignore[attr-defined]
+        mock_llm_interface.chat = AsyncMock(side_effect=chat)
+
+        async for _ in execute_llm(
+            llm_interface=mock_llm_interface,
+            messages=sample_messages,
+            tools=[{"type": "function", "function": {"name": "crawl"}}],
+            tool_map=tool_map,
+            max_tool_calls=5,
+        ):
+            pass
+
+        first_call = mock_llm_interface.chat.call_args_list[0].kwargs
+        assert BACKGROUND_JOBS_TOOL_NAME in [t["function"]["name"] for t in first_call["tools"]]
+        final_messages = mock_llm_interface.chat.call_args_list[2].kwargs["messages"]
+        poll_result = next(
+            m for m in final_messages if m.get("tool_call_id") == "call_poll"
+        )
+        assert "crawled x" in poll_result["content"]
+
+    @pytest.mark.asyncio
+    async def test_answer_before_job_finishes_gets_another_round(
+        self,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        make_chat_completion: Any,
+        mock_chat_completion_with_tool_calls: Any,
+    ) -> None:
+        """A final answer given while a job is running waits for it and re-asks the model."""
+        release = asyncio.Event()
+        tool_map = _make_tools(release)
+
+        start_crawl = mock_chat_completion_with_tool_calls.model_copy(deep=True)
+        start_crawl.choices[0].message.tool_calls[0].function.name = "crawl"
+        start_crawl.choices[0].message.tool_calls[0].function.arguments = '{"url": "x"}'
+
+        async def chat(**kwargs: Any) -> Any:
+            chat.calls += 1
+            if chat.calls == 1:
+                return start_crawl
+            if chat.calls == 2:
+                # 模型在后台任务完成前就给出回答，任务随后完成
+                asyncio.get_running_loop().call_later(0.01, release.set)
+                return make_chat_completion("still waiting")
+            return make_chat_completion("crawl finished")
+
+        chat.calls = 0  # type: ignore[attr-defined]
+        mock_llm_interface.chat = AsyncMock(side_effect=chat)
+
+        responses = [
+            response
+            async for response, _ in execute_llm(
+                llm_interface=mock_llm_interface,
+                messages=sample_messages,
+                tools=[{"type": "function", "function": {"name": "crawl"}}],
+                tool_map=tool_map,
+                max_tool_calls=5,
+            )
+        ]
+
+        assert mock_llm_interface.chat.call_count == 3
+        final_messages = mock_llm_interface.chat.call_args_list[2].kwargs["messages"]
+        assert any(
+            m.get("role") == "user" and "crawled x" in str(m.get("content"))
+            for m in final_messages
+        )
+        assert responses[-1].choices[0].message.content == "crawl finished"
+
+    @pytest.mark.asyncio
+    async def test_llm_error_cancels_background_jobs(
+        self,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion_with_tool_calls: Any,
+    ) -> None:
+        """Jobs still running when the loop fails mid-way are cancelled."""
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        @tool(name="crawl", description="Slow crawl", background=True)
+        async def crawl(url: str) -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return url
+
+        start_crawl = mock_chat_completion_with_tool_calls.model_copy(deep=True)
+        start_crawl.choices[0].message.tool_calls[0].function.name = "crawl"
+        start_crawl.choices[0].message.tool_calls[0].function.arguments = '{"url": "x"}'
+        mock_llm_interface.chat = AsyncMock(side_effect=[start_crawl, RuntimeError("llm down")])
+
+        with pytest.raises(RuntimeError, match="llm down"):
+            async for _ in execute_llm(
+                llm_interface=mock_llm_interface,
+                messages=sample_messages,
+                tools=[{"type": "function", "function": {"name": "crawl"}}],
+                tool_map={"crawl": crawl._tool.run},
+                max_tool_calls=5,
+            ):
+                pass
+
+        assert started.is_set()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    def test_tool_without_background_attribute(self) -> None:
+        """Legacy Tool subclasses that skip Tool.__init__ are treated as foreground tools."""
+        from SimpleLLMFunc.tool import Tool
+
+        class LegacyTool(Tool):
+            def __init__(self) -> None:  # noqa: D401 - 故意不调用 super().__init__
+                self.name = "legacy"
+
+            async def run(self, **kwargs: Any) -> Any:
+                return "ok"
+
+        assert BackgroundJobManager.for_tool_map({"legacy": LegacyTool().run}) is None
@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from SimpleLLMFunc.base.tool_call.execution import (
     _execute_single_tool_call,
+    group_duplicate_tool_calls,
     process_tool_calls,
 )
+from SimpleLLMFunc.tool import Tool, tool
 from SimpleLLMFunc.type.multimodal import ImgPath, ImgUrl, Text
+from SimpleLLMFunc.utils import deadline_scope
 
 
 class TestExecuteSingleToolCall:
@@ -158,6 +163,56 @@ class TestExecuteSingleToolCall:
         assert "error" in json.loads(messages[0]["content"])
         assert is_multimodal is False
 
+    @pytest.mark.asyncio
+    async def test_execute_tool_exceeds_deadline(self) -> None:
+        """A tool still running at the call deadline is cancelled and reported as an error."""
+        cancelled = asyncio.Event()
+
+        async def slow_tool() -> str:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "done"
+
+        tool_call = {
+            "id": "call_123",
+            "type": "function",
+            "function": {"name": "slow_tool", "arguments": "{}"},
+        }
+
+        with deadline_scope(timeout=0.05):
+            _, messages, _ = await _execute_single_tool_call(
+                tool_call, {"slow_tool": slow_tool}
+            )
+
+        assert cancelled.is_set()
+        assert messages[0]["role"] == "tool"
+        assert "截止时间" in messages[0]["content"]
+
+    @pytest.mark.asyncio
+    async def test_tool_timeout_is_not_a_deadline(self) -> None:
+        """A TimeoutError raised by the tool itself stays an ordinary tool error."""
+
+        async def flaky_tool() -> str:
+            raise TimeoutError("upstream request timed out")
+
+        tool_call = {
+            "id": "call_123",
+            "type": "function",
+            "function": {"name": "flaky_tool", "arguments": "{}"},
+        }
+
+        with deadline_scope(timeout=10):
+            _, messages, _ = await _execute_single_tool_call(
+                tool_call, {"flaky_tool": flaky_tool}
+            )
+
+        content = json.loads(messages[0]["content"])["error"]
+        assert "upstream request timed out" in content
+        assert "截止时间" not in content
+
 
 class TestProcessToolCalls:
     """Tests for process_tool_calls function."""
@@ -245,3 +300,87 @@ class TestProcessToolCalls:
         user_messages = [msg for msg in result if msg["role"] == "user"]
         assert len(user_messages) >= 1
 
+
+
+class TestToolCallDeduplication:
+    """Tests for duplicate tool call merging within a batch."""
+
+    @staticmethod
+    def _call(call_id: str, name: str, arguments: str) -> dict:
+        return {
+            "id": call_id,
+            "type": "function",
+            "function": {"name": name, "arguments": arguments},
+        }
+
+    def test_group_canonicalizes_arguments(self) -> None:
+        """Argument key order and whitespace should not affect grouping."""
+        tool_calls = [
+            self._call("call_1", "search", '{"q": "x", "n": 1}'),
+            self._call("call_2", "search", '{"n":1,"q":"x"}'),
+            self._call("call_3", "search", '{"q": "y", "n": 1}'),
+        ]
+        tool_map = {"search": AsyncMock(return_value="ok")}
+
+        groups = group_duplicate_tool_calls(tool_calls, tool_map)
+
+        assert groups == [[0, 1], [2]]
+
+    def test_tool_without_dedupe_attribute(self) -> None:
+        """Tool subclasses that skip Tool.__init__ are not deduplicated."""
+
+        class LegacyTool(Tool):
+            def __init__(self) -> None:
+                self.name = "legacy"
+                self.description = "Legacy tool"
+
+            async def run(self, **kwargs: Any) -> str:
+                return "ok"
+
+        legacy = LegacyTool()
+        tool_calls = [
+            self._call("call_1", "legacy", "{}"),
+            self._call("call_2", "legacy", "{}"),
+        ]
+
+        groups = group_duplicate_tool_calls(tool_calls, {"legacy": legacy.run})
+
+        assert groups == [[0], [1]]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_calls_execute_once(self) -> None:
+        """Identical calls run once and every tool_call_id gets the result."""
+        tool_calls = [
+            self._call("call_1", "search", '{"q": "x"}'),
+            self._call("call_2", "search", '{"q": "x"}'),
+        ]
+        search = AsyncMock(return_value="result")
+        messages = [{"role": "user", "content": "test"}]
+
+        result = await process_tool_calls(tool_calls, messages, {"search": search})
+
+        search.assert_awaited_once()
+        tool_messages = [msg for msg in result if msg["role"] == "tool"]
+        assert [msg["tool_call_id"] for msg in tool_messages] == ["call_1", "call_2"]
+        assert tool_messages[0]["content"] == tool_messages[1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_dedupe_opt_out(self) -> None:
+        """Tools declared with dedupe=False run once per call."""
+        calls: list = []
+
+        @tool(name="send", description="Send a message", dedupe=False)
+        async def send(text: str) -> str:
+            calls.append(text)
+            return "sent"
+
+        tool_calls = [
+            self._call("call_1", "send", '{"text": "hi"}'),
+            self._call("call_2", "send", '{"text": "hi"}'),
+        ]
+        tool_map = {"send": getattr(send, "_tool").run}
+
+        result = await process_tool_calls(tool_calls, [], tool_map)
+
+        assert calls == ["hi", "hi"]
+        assert len([msg for msg in result if msg["role"] == "tool"]) == 2
@@ -15,6 +15,7 @@ from SimpleLLMFunc.base.tool_call.extraction import (
     extract_tool_calls,
     extract_tool_calls_from_stream_response,
 )
+from SimpleLLMFunc.type.tool_call import ParsedToolCall
 
 
 class TestExtractToolCalls:
@@ -26,6 +27,8 @@ class TestExtractToolCalls:
         assert len(result) == 1
         assert result[0]["id"] == "call_123"
         assert result[0]["function"]["name"] == "test_tool"
+        assert isinstance(result[0], ParsedToolCall)
+        assert result[0].arguments == {"arg1": "value1"}
 
     def test_extract_multiple_tool_calls(self) -> None:
         """Test extracting multiple tool calls."""
@@ -0,0 +1,93 @@
+"""Tests for base.tool_call.output_store module."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from SimpleLLMFunc.base.tool_call.execution import _execute_single_tool_call
+from SimpleLLMFunc.base.tool_call.output_store import (
+    READ_TOOL_OUTPUT_NAME,
+    ToolOutputStore,
+    with_tool_output_reader,
+)
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> ToolOutputStore:
+    return ToolOutputStore(directory=tmp_path, max_inline_chars=100, preview_chars=20)
+
+
+class TestToolOutputStore:
+    """Tests for ToolOutputStore."""
+
+    def test_put_is_content_addressed(self, store: ToolOutputStore) -> None:
+        """Identical content maps to the same handle and file."""
+        handle = store.put("a" * 500)
+        assert store.put("a" * 500) == handle
+        assert store.put("b" * 500) != handle
+        assert len(list(store.directory.glob("*.txt"))) == 2
+        assert store.read(handle, offset=10, length=5) == "aaaaa"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_put_same_content(self, store: ToolOutputStore) -> None:
+        """Concurrent writers of the same content do not clobber each other's temp file."""
+        content = "c" * 100_000
+        handles = await asyncio.gather(
+            *(asyncio.to_thread(store.put, content) for _ in range(8))
+        )
+        assert len(set(handles)) == 1
+        assert store.read(handles[0]) == content
+        assert list(store.directory.glob("*.tmp")) == []
+
+    def test_read_rejects_invalid_handle(self, store: ToolOutputStore) -> None:
+        with pytest.raises(ValueError):
+            store.read("../etc/passwd")
+
+    @pytest.mark.asyncio
+    async def test_small_output_is_inline(self, store: ToolOutputStore) -> None:
+        assert await store.spill("search", "short") == "short"
+
+    @pytest.mark.asyncio
+    async def test_read_tool_pages_through_output(self, store: ToolOutputStore) -> None:
+        """The built-in tool returns slices and never spills its own output."""
+        content = "".join(str(i % 10) for i in range(300))
+        preview = await store.spill("dump", content)
+        handle = preview.split("handle '")[1].split("'")[0]
+
+        page = await store.read_tool.run(handle=handle, offset=100, length=50)
+
+        assert page["content"] == content[100:150]
+        assert page["total_chars"] == 300
+        assert await store.spill(READ_TOOL_OUTPUT_NAME, content) == content
+
+    def test_with_tool_output_reader(self, store: ToolOutputStore) -> None:
+        assert with_tool_output_reader(None, None) is None
+        toolkit = with_tool_output_reader(None, store)
+        assert toolkit == [store.read_tool]
+
+
+class TestExecuteSingleToolCallSpill:
+    """Tests for the output-size policy in _execute_single_tool_call."""
+
+    @pytest.mark.asyncio
+    async def test_large_output_replaced_by_preview(self, store: ToolOutputStore) -> None:
+        tool_call = {
+            "id": "call_1",
+            "type": "function",
+            "function": {"name": "dump", "arguments": "{}"},
+        }
+        result = "x" * 1000
+        tool_map = {"dump": AsyncMock(return_value=result)}
+
+        _, messages, _ = await _execute_single_tool_call(tool_call, tool_map, store)
+
+        content = messages[0]["content"]
+        assert len(content) < 300
+        assert READ_TOOL_OUTPUT_NAME in content
+        handle = content.split("handle '")[1].split("'")[0]
+        assert json.loads(store.read(handle)) == result
@@ -0,0 +1,67 @@
+"""Tests for base.tool_call.partial_json module."""
+
+from __future__ import annotations
+
+import json
+
+from SimpleLLMFunc.base.tool_call.partial_json import PartialJSONParser
+
+
+class TestPartialJSONParser:
+    """Tests for PartialJSONParser."""
+
+    def test_partial_values_while_streaming(self) -> None:
+        """Open strings and containers are closed; incomplete keys are dropped."""
+        parser = PartialJSONParser()
+
+        parser.feed('{"path": "a.py", "con')
+        assert parser.partial() == {"path": "a.py"}
+
+        parser.feed('tent": "print(')
+        assert parser.partial() == {"path": "a.py", "content": "print("}
+
+        parser.feed('\\"hi\\")", "lines": [1, 2')
+        assert parser.partial() == {
+            "path": "a.py",
+            "content": 'print("hi")',
+            "lines": [1, 2],
+        }
+
+    def test_incomplete_scalars_and_escapes_are_dropped(self) -> None:
+        parser = PartialJSONParser()
+
+        parser.feed('{"ok": tr')
+        assert parser.partial() == {}
+
+        parser.feed('ue, "text": "caf\\u00')
+        assert parser.partial() == {"ok": True, "text": "caf"}
+
+    def test_snapshot_keeps_its_prefix(self) -> None:
+        """A snapshot resolves to the state at the time it was taken."""
+        parser = PartialJSONParser()
+        parser.feed('{"a": "x')
+        snapshot = parser.snapshot()
+        parser.feed('yz", "b": 1}')
+
+        assert snapshot.value == {"a": "x"}
+        assert snapshot.text == '{"a": "x'
+        assert parser.partial() == {"a": "xyz", "b": 1}
+        assert parser.is_complete
+
+    def test_character_by_character_matches_full_parse(self) -> None:
+        payload = {"items": [{"id": 1, "tags": ["a", "b"]}, None, -2.5e3], "flag": False}
+        text = json.dumps(payload)
+        parser = PartialJSONParser()
+        for char in text:
+            parser.feed(char)
+            assert parser.error is None
+
+        assert parser.partial() == payload
+        assert parser.text() == text
+
+    def test_invalid_json_sets_error(self) -> None:
+        parser = PartialJSONParser()
+        parser.feed('{"a": 1}}')
+
+        assert parser.error is not None
+        assert parser.partial() == {"a": 1}
@@ -0,0 +1,58 @@
+"""Tests for base.type_resolve.json_schema module."""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from SimpleLLMFunc.base.type_resolve.json_schema import (
+    build_response_format,
+    parse_json_output,
+    validate_output_mode,
+)
+
+
+class Person(BaseModel):
+    name: str
+    age: int
+
+
+class TestBuildResponseFormat:
+    """Tests for build_response_format function."""
+
+    def test_model_uses_its_own_schema(self) -> None:
+        response_format = build_response_format(Person)
+
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["name"] == "Person"
+        assert response_format["json_schema"]["schema"] == Person.model_json_schema()
+
+    def test_non_model_is_wrapped_in_result_object(self) -> None:
+        schema = build_response_format(List[Person])["json_schema"]["schema"]
+
+        assert schema["type"] == "object"
+        assert schema["required"] == ["result"]
+        assert schema["properties"]["result"]["type"] == "array"
+
+
+class TestParseJsonOutput:
+    """Tests for parse_json_output function."""
+
+    def test_parse_model(self) -> None:
+        assert parse_json_output('{"name": "Ann", "age": 3}', Person) == Person(name="Ann", age=3)
+
+    def test_parse_wrapped_types(self) -> None:
+        assert parse_json_output('{"result": [1, 2]}', List[int]) == [1, 2]
+        assert parse_json_output('```json\n{"result": {"a": 1}}\n```', Dict[str, int]) == {"a": 1}
+
+    def test_invalid_output_raises(self) -> None:
+        with pytest.raises(ValidationError):
+            parse_json_output('{"name": "Ann"}', Person)
+
+
+def test_validate_output_mode() -> None:
+    assert validate_output_mode("json_schema") == "json_schema"
+    with pytest.raises(ValueError):
+        validate_output_mode("yaml")
@@ -0,0 +1,123 @@
+"""Tests for base.type_resolve.xml_stream module."""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Union
+
+import pytest
+from pydantic import BaseModel
+
+from SimpleLLMFunc.base.type_resolve.xml_stream import (
+    XMLElementStream,
+    XMLRootCloseDetector,
+    expected_xml_root,
+)
+
+
+class Person(BaseModel):
+    name: str
+
+
+TEXT = (
+    "Here you go:\n<result>\n<item><result>nested</result></item>"
+    "<item>b</item>\n</result>\nHope this helps!"
+)
+ROOT = "<result>\n<item><result>nested</result></item><item>b</item>\n</result>"
+
+
+class TestExpectedXmlRoot:
+    """Tests for expected_xml_root function."""
+
+    def test_roots(self) -> None:
+        assert expected_xml_root(Person) == "Person"
+        assert expected_xml_root(List[str]) == "result"
+        assert expected_xml_root(Dict[str, int]) == "result"
+        assert expected_xml_root(str) is None
+        assert expected_xml_root(Optional[Person]) is None
+        assert expected_xml_root(Union[Person, List[str]]) is None
+
+
+class TestXMLRootCloseDetector:
+    """Tests for XMLRootCloseDetector."""
+
+    @pytest.mark.parametrize("step", [1, 2, 3, 7, len(TEXT)])
+    def test_detects_close_across_chunk_boundaries(self, step: int) -> None:
+        detector = XMLRootCloseDetector("result")
+        consumed = 0
+        for start in range(0, len(TEXT), step):
+            consumed = start + step
+            if detector.feed(TEXT[start:consumed]):
+                break
+
+        assert detector.closed is True
+        assert consumed < len(TEXT) or step == len(TEXT)
+        assert detector.trim(TEXT) == ROOT
+
+    def test_ignores_similar_tag_names(self) -> None:
+        detector = XMLRootCloseDetector("Person")
+
+        assert detector.feed("<PersonInfo>x</PersonInfo>") is False
+        assert detector.feed("<Person><name>a</name>") is False
+        assert detector.feed("</Person  ") is False
+        assert detector.feed(">\ntrailing") is True
+
+    @pytest.mark.parametrize("step", [1, 2, 5, 100])
+    def test_self_closing_root(self, step: int) -> None:
+        """An empty root written as <result/> closes the element immediately."""
+        text = 'Nothing found:\n<result items="0" />\nSorry.'
+        detector = XMLRootCloseDetector("result")
+        closed = False
+        for start in range(0, len(text), step):
+            if detector.feed(text[start : start + step]):
+                closed = True
+                break
+
+        assert closed is True
+        assert detector.trim(text) == '<result items="0" />'
+
+    def test_nested_self_closing_keeps_depth(self) -> None:
+        detector = XMLRootCloseDetector("result")
+
+        assert detector.feed("<result><item/><result/>") is False
+        assert detector.feed("</result> tail") is True
+        assert detector.trim("<result><item/><result/></result> tail") == (
+            "<result><item/><result/></result>"
+        )
+
+    def test_unclosed_root_is_returned_as_is(self) -> None:
+        detector = XMLRootCloseDetector("result")
+
+        assert detector.feed("<result><item>a</item>") is False
+        assert detector.trim("<result><item>a</item>") == "<result><item>a</item>"
+
+
+class TestXMLElementStream:
+    """Tests for XMLElementStream."""
+
+    @pytest.mark.parametrize("size", [1, 3, 7, len(TEXT)])
+    def test_yields_completed_children(self, size: int) -> None:
+        stream = XMLElementStream("result")
+        elements = []
+        for start in range(0, len(TEXT), size):
+            elements.extend(stream.feed(TEXT[start : start + size]))
+
+        assert [ET.tostring(element, encoding="unicode") for element in elements] == [
+            "<item><result>nested</result></item>",
+            "<item>b</item>",
+        ]
+        assert stream.closed
+        assert stream.error is None
+
+    def test_item_is_returned_as_soon_as_it_closes(self) -> None:
+        stream = XMLElementStream("result")
+
+        assert stream.feed("```xml\n<result><item>a</it") == []
+        assert [element.text for element in stream.feed("em><item>")] == ["a"]
+
+    def test_malformed_xml_sets_error(self) -> None:
+        stream = XMLElementStream("result")
+
+        assert stream.feed("<result><item>a & b</item>") == []
+        assert stream.error is not None
+        assert stream.feed("<item>c</item></result>") == []
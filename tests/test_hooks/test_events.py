@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import dataclasses
 from datetime import datetime, timezone
 
 import pytest
@@ -15,6 +16,7 @@ from openai.types.chat.chat_completion_message_tool_call import (
 )
 from openai.types.completion_usage import CompletionUsage
 
+from SimpleLLMFunc.base.tool_call.partial_json import PartialJSONParser
 from SimpleLLMFunc.hooks.events import (
     LLMCallEndEvent,
     LLMCallErrorEvent,
@@ -26,6 +28,8 @@ from SimpleLLMFunc.hooks.events import (
     ReactStartEvent,
     ReActEvent,
     ReActEventType,
+    StreamContentBuffer,
+    ToolCallArgumentsDeltaEvent,
     ToolCallEndEvent,
     ToolCallErrorEvent,
     ToolCallResult,
@@ -168,6 +172,129 @@ class TestLLMChunkArriveEvent:
         assert event.chunk_index == 0
 
 
+class TestStreamContentBuffer:
+    """Test StreamContentBuffer and lazy accumulated_content."""
+
+    def test_buffer_views_are_prefix_snapshots(self):
+        """Each view materializes only the parts appended before it was taken."""
+        buffer = StreamContentBuffer()
+        views = []
+        for part in ["Hel", "", "lo", " world"]:
+            buffer.append(part)
+            views.append(buffer.view())
+
+        assert [str(view) for view in views] == ["Hel", "Hel", "Hello", "Hello world"]
+        # 乱序访问旧视图也返回正确的前缀
+        assert str(views[0]) == "Hel"
+        assert buffer.text() == "Hello world"
+        assert len(buffer) == 3
+
+    def test_chunk_event_accepts_lazy_view(self):
+        """Events built from a shared buffer expose accumulated_content as a string."""
+        buffer = StreamContentBuffer()
+        events = []
+        for index, part in enumerate(["a", "b", "c"]):
+            buffer.append(part)
+            events.append(
+                LLMChunkArriveEvent(
+                    event_type=ReActEventType.LLM_CHUNK_ARRIVE,
+                    timestamp=datetime.now(timezone.utc),
+                    trace_id="test-trace-123",
+                    func_name="test_func",
+                    iteration=0,
+                    chunk=None,
+                    accumulated_content=buffer.view(),  # type: ignore[arg-type]
+                    chunk_index=index,
+                )
+            )
+
+        assert [event.accumulated_content for event in events] == ["a", "ab", "abc"]
+        assert isinstance(events[0].accumulated_content, str)
+        assert "accumulated_content='ab'" in repr(events[1])
+
+    def test_accumulated_content_declared_on_class(self):
+        """accumulated_content is a required dataclass field declared in the class body."""
+        fields = {f.name: f for f in dataclasses.fields(LLMChunkArriveEvent)}
+        assert fields["accumulated_content"].default is dataclasses.MISSING
+        assert "accumulated_content" in vars(LLMChunkArriveEvent)
+
+    def test_lazy_event_behaves_as_plain_dataclass(self):
+        """asdict() and replace() see the materialized string, not the buffer view."""
+        buffer = StreamContentBuffer()
+        buffer.append("ab")
+        event = LLMChunkArriveEvent(
+            event_type=ReActEventType.LLM_CHUNK_ARRIVE,
+            timestamp=datetime.now(timezone.utc),
+            trace_id="test-trace-123",
+            func_name="test_func",
+            iteration=0,
+            chunk=None,
+            accumulated_content=buffer.view(),  # type: ignore[arg-type]
+            chunk_index=0,
+        )
+        buffer.append("c")
+
+        assert dataclasses.asdict(event)["accumulated_content"] == "ab"
+        replaced = dataclasses.replace(event, chunk_index=1)
+        assert replaced.accumulated_content == "ab"
+        assert isinstance(replaced.accumulated_content, str)
+        event.accumulated_content = "xyz"
+        assert event.accumulated_content == "xyz"
+
+    def test_buffer_collapses_parts_on_read(self):
+        """Reading the buffer joins the pending parts once instead of concatenating."""
+        buffer = StreamContentBuffer()
+        for part in ["a", "b", "c"]:
+            buffer.append(part)
+        view = buffer.view()
+        buffer.append("d")
+
+        assert buffer.text() == "abcd"
+        assert buffer._parts == ["abcd"]
+        assert str(view) == "abc"
+        buffer.append("e")
+        assert buffer.text() == "abcde"
+
+
+class TestToolCallArgumentsDeltaEvent:
+    """Test ToolCallArgumentsDeltaEvent."""
+
+    def _event(self, **kwargs):
+        return ToolCallArgumentsDeltaEvent(
+            event_type=ReActEventType.TOOL_CALL_ARGUMENTS_DELTA,
+            timestamp=datetime.now(timezone.utc),
+            trace_id="test-trace-123",
+            func_name="test_func",
+            iteration=0,
+            tool_call_index=0,
+            tool_call_id="call_1",
+            tool_name="search",
+            arguments_delta='{"q": "he',
+            **kwargs,
+        )
+
+    def test_defaults(self):
+        event = self._event()
+        assert event.partial_arguments is None
+        assert event.accumulated_arguments == ""
+
+    def test_snapshot_is_materialized_on_read(self):
+        parser = PartialJSONParser()
+        parser.feed('{"q": "he')
+        snapshot = parser.snapshot()
+        event = self._event(partial_arguments=snapshot, accumulated_arguments=snapshot)
+        parser.feed('llo"}')
+
+        assert event.partial_arguments == {"q": "he"}
+        assert event.accumulated_arguments == '{"q": "he'
+
+    def test_fields_declared_on_class(self):
+        fields = {f.name for f in dataclasses.fields(ToolCallArgumentsDeltaEvent)}
+        assert {"partial_arguments", "accumulated_arguments"} <= fields
+        assert "partial_arguments" in vars(ToolCallArgumentsDeltaEvent)
+        assert "accumulated_arguments" in vars(ToolCallArgumentsDeltaEvent)
+
+
 class TestLLMCallEndEvent:
     """Test LLMCallEndEvent."""
 
@@ -0,0 +1,208 @@
+"""Tests for interface.cassette module."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from SimpleLLMFunc.base.ReAct import execute_llm
+from SimpleLLMFunc.interface.cassette import (
+    Cassette,
+    CassetteMissError,
+    RecordingLLMInterface,
+    ReplayLLMInterface,
+    record_tool_map,
+    replay_tool_map,
+)
+from SimpleLLMFunc.tool import tool
+
+
+class TestLLMCassette:
+    """Tests for recording and replaying LLM traffic."""
+
+    @pytest.mark.asyncio
+    async def test_record_and_replay_chat(
+        self,
+        tmp_path: Path,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+    ) -> None:
+        """Recorded responses are served from the file for identical requests."""
+        path = tmp_path / "run.cassette.jsonl"
+        mock_llm_interface.chat = AsyncMock(return_value=mock_chat_completion)
+        recorder = RecordingLLMInterface(mock_llm_interface, Cassette(path))
+
+        await recorder.chat(messages=sample_messages, temperature=0.2, trace_id="a")
+
+        replay = ReplayLLMInterface(Cassette.load(path))
+        response = await replay.chat(messages=sample_messages, temperature=0.2, trace_id="b")
+
+        assert response == mock_chat_completion
+        assert replay.model_name == "test-model"
+        with pytest.raises(CassetteMissError):
+            await replay.chat(messages=sample_messages, temperature=0.2)
+
+    @pytest.mark.asyncio
+    async def test_replay_miss_on_different_request(
+        self,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+    ) -> None:
+        cassette = Cassette()
+        mock_llm_interface.chat = AsyncMock(return_value=mock_chat_completion)
+        await RecordingLLMInterface(mock_llm_interface, cassette).chat(messages=sample_messages)
+
+        with pytest.raises(CassetteMissError):
+            await ReplayLLMInterface(cassette).chat(
+                messages=sample_messages + [{"role": "user", "content": "again"}]
+            )
+
+    @pytest.mark.asyncio
+    async def test_stream_replay_speed(
+        self,
+        tmp_path: Path,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion_chunk: Any,
+    ) -> None:
+        """Chunk timing is replayed at recorded speed, or skipped when as fast as possible."""
+
+        async def stream(**kwargs: Any):
+            for _ in range(3):
+                yield mock_chat_completion_chunk
+
+        mock_llm_interface.chat_stream = stream
+        path = tmp_path / "stream.cassette.jsonl"
+        recorder = RecordingLLMInterface(mock_llm_interface, Cassette(path))
+        recorded = [c async for c in recorder.chat_stream(messages=sample_messages)]
+
+        with patch(
+            "SimpleLLMFunc.interface.cassette.asyncio.sleep", new=AsyncMock()
+        ) as mock_sleep:
+            fast = ReplayLLMInterface(Cassette.load(path))
+            replayed = [c async for c in fast.chat_stream(messages=sample_messages)]
+            mock_sleep.assert_not_awaited()
+
+            realtime = ReplayLLMInterface(Cassette.load(path), replay_speed=1.0)
+            [c async for c in realtime.chat_stream(messages=sample_messages)]
+
+        assert replayed == recorded
+        offsets = [c[0] for c in Cassette.load(path).interactions[0]["chunks"]]
+        slept = sum(call.args[0] for call in mock_sleep.await_args_list)
+        assert slept == pytest.approx(offsets[-1])
+
+    @pytest.mark.asyncio
+    async def test_early_stopped_stream_replays(
+        self,
+        tmp_path: Path,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion_chunk: Any,
+    ) -> None:
+        """A stream closed early by stop_at_xml_root is recorded up to the stop point."""
+        pieces = ["<result>a</res", "ult>", "\nHope this helps"]
+
+        async def stream(**kwargs: Any):
+            for piece in pieces:
+                delta = mock_chat_completion_chunk.choices[0].delta.model_copy(
+                    update={"content": piece}
+                )
+                choice = mock_chat_completion_chunk.choices[0].model_copy(update={"delta": delta})
+                yield mock_chat_completion_chunk.model_copy(update={"choices": [choice]})
+
+        async def run(llm_interface: Any) -> list:
+            return [
+                response
+                async for response, _ in execute_llm(
+                    llm_interface=llm_interface,
+                    messages=sample_messages,
+                    tools=None,
+                    tool_map={},
+                    max_tool_calls=5,
+                    stream=True,
+                    stop_at_xml_root="result",
+                )
+            ]
+
+        mock_llm_interface.chat_stream = stream
+        path = tmp_path / "early.cassette.jsonl"
+        recorded = await run(RecordingLLMInterface(mock_llm_interface, Cassette(path)))
+
+        assert len(Cassette.load(path).interactions[0]["chunks"]) == 2
+        replayed = await run(ReplayLLMInterface(Cassette.load(path)))
+        assert replayed == recorded
+
+
+class TestToolMapCassette:
+    """Tests for recording and replaying tool calls."""
+
+    @pytest.mark.asyncio
+    async def test_record_and_replay_tools(self, tmp_path: Path) -> None:
+        calls: list = []
+
+        @tool(name="search", description="Search", dedupe=False)
+        async def search(query: str) -> dict:
+            calls.append(query)
+            return {"hits": [query]}
+
+        path = tmp_path / "tools.cassette.jsonl"
+        tool_map = {"search": getattr(search, "_tool").run}
+        recorded_map = record_tool_map(tool_map, Cassette(path))
+
+        assert await recorded_map["search"](query="x") == {"hits": ["x"]}
+        # 包装后仍能反查到 Tool 对象，去重配置保持生效
+        assert getattr(recorded_map["search"], "_tool").dedupe is False
+
+        replayed_map = replay_tool_map(Cassette.load(path), ["search"])
+        assert await replayed_map["search"](query="x") == {"hits": ["x"]}
+        assert calls == ["x"]
+
+    @pytest.mark.asyncio
+    async def test_replay_keeps_tool_identity(self) -> None:
+        """Replaying with the original tool_map keeps per-tool settings such as dedupe."""
+
+        @tool(name="search", description="Search", dedupe=False)
+        async def search(query: str) -> dict:
+            return {"hits": [query]}
+
+        tool_map = {"search": getattr(search, "_tool").run}
+        cassette = Cassette()
+        await record_tool_map(tool_map, cassette)["search"](query="x")
+
+        replayed_map = replay_tool_map(cassette, tool_map)
+        assert getattr(replayed_map["search"], "_tool") is getattr(search, "_tool")
+        assert await replayed_map["search"](query="x") == {"hits": ["x"]}
+        # 只传名称时没有可保留的 Tool 对象
+        assert not hasattr(replay_tool_map(cassette, ["search"])["search"], "_tool")
+
+    @pytest.mark.asyncio
+    async def test_non_json_result_replays_as_string(self, tmp_path: Path) -> None:
+        class Opaque:
+            def __str__(self) -> str:
+                return "opaque result"
+
+        path = tmp_path / "tools.cassette.jsonl"
+        cassette = Cassette(path)
+        recorded_map = record_tool_map({"fetch": AsyncMock(return_value=Opaque())}, cassette)
+        assert isinstance(await recorded_map["fetch"](x=1), Opaque)
+
+        in_memory = await replay_tool_map(cassette, ["fetch"])["fetch"](x=1)
+        from_disk = await replay_tool_map(Cassette.load(path), ["fetch"])["fetch"](x=1)
+        assert in_memory == from_disk == "opaque result"
+
+    @pytest.mark.asyncio
+    async def test_replay_tool_error(self) -> None:
+        cassette = Cassette()
+        recorded_map = record_tool_map(
+            {"boom": AsyncMock(side_effect=ValueError("bad input"))}, cassette
+        )
+        with pytest.raises(ValueError):
+            await recorded_map["boom"](x=1)
+
+        with pytest.raises(RuntimeError, match="bad input"):
+            await replay_tool_map(cassette, ["boom"])["boom"](x=1)
@@ -0,0 +1 @@
+"""Tests for llm_decorator package."""
@@ -0,0 +1,126 @@
+"""Tests for llm_decorator.batch module."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+
+from SimpleLLMFunc.hooks.stream import ResponseYield
+from SimpleLLMFunc.llm_decorator.batch import (
+    CallArgs,
+    attach_batch_methods,
+    default_concurrency,
+)
+
+
+def _make_func(delays: Dict[int, float], failures: Dict[int, int] | None = None) -> Any:
+    """被装饰函数的替身：按输入设置延迟，并在前 N 次调用时失败"""
+    failures = dict(failures or {})
+    state = {"running": 0, "max_running": 0, "calls": 0}
+
+    async def func(value: int, scale: int = 1) -> int:
+        state["calls"] += 1
+        state["running"] += 1
+        state["max_running"] = max(state["max_running"], state["running"])
+        try:
+            await asyncio.sleep(delays.get(value, 0))
+            if failures.get(value, 0) > 0:
+                failures[value] -= 1
+                raise ValueError(f"failed {value}")
+            return value * scale
+        finally:
+            state["running"] -= 1
+
+    attach_batch_methods(func)
+    func.state = state  # type: ignore[attr-defined]
+    return func
+
+
+class TestMap:
+    """Tests for the map() method."""
+
+    @pytest.mark.asyncio
+    async def test_ordered_results_with_bounded_concurrency(self) -> None:
+        func = _make_func({0: 0.03, 1: 0.01, 2: 0.02, 3: 0.0, 4: 0.01})
+
+        run = func.map(range(5), concurrency=2)
+        results = [result async for result in run]
+
+        assert results == [0, 1, 2, 3, 4]
+        assert func.state["max_running"] == 2
+        assert run.stats.total == 5
+        assert run.stats.succeeded == 5
+        assert len(run.stats.latencies) == 5
+        assert run.stats.throughput > 0
+
+    @pytest.mark.asyncio
+    async def test_unordered_yields_in_completion_order(self) -> None:
+        func = _make_func({0: 0.05, 1: 0.0, 2: 0.0})
+
+        results = [item async for item in func.map([0, 1, 2], concurrency=3, ordered=False)]
+
+        assert results[-1] == (0, 0)
+        assert sorted(results) == [(0, 0), (1, 1), (2, 2)]
+
+    @pytest.mark.asyncio
+    async def test_retries_failed_items(self) -> None:
+        func = _make_func({}, failures={1: 2})
+
+        run = func.map([0, 1], concurrency=2, retries=2, retry_delay=0)
+        results = [result async for result in run]
+
+        assert results == [0, 1]
+        assert run.stats.retries == 2
+        assert run.stats.failed == 0
+
+    @pytest.mark.asyncio
+    async def test_return_exceptions(self) -> None:
+        func = _make_func({}, failures={1: 5})
+
+        results = await func.batch([0, 1, 2], retries=1, retry_delay=0, return_exceptions=True)
+
+        assert results[0] == 0 and results[2] == 2
+        assert isinstance(results[1], ValueError)
+
+    @pytest.mark.asyncio
+    async def test_failure_raises_and_cancels_remaining(self) -> None:
+        func = _make_func({1: 10}, failures={0: 1})
+
+        with pytest.raises(ValueError):
+            await func.batch([0, 1], concurrency=2)
+
+        await asyncio.sleep(0)
+        assert func.state["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_call_args_and_async_iterable(self) -> None:
+        func = _make_func({})
+
+        async def items():
+            for value in range(3):
+                yield CallArgs(value, scale=10)
+
+        assert await func.batch(items()) == [0, 10, 20]
+
+    @pytest.mark.asyncio
+    async def test_event_mode_function_uses_final_response(self) -> None:
+        async def event_func(value: int):
+            yield ResponseYield(type="response", response=value + 1, messages=[])
+
+        attach_batch_methods(event_func)
+
+        assert await event_func.batch([1, 2]) == [2, 3]
+
+
+class TestDefaultConcurrency:
+    """Tests for default_concurrency."""
+
+    def test_uses_token_bucket_capacity(self) -> None:
+        interface = MagicMock()
+        interface.token_bucket.capacity = 3
+
+        assert default_concurrency(interface) == 3
+        assert default_concurrency(None) == 8
@@ -0,0 +1,237 @@
+"""Tests for llm_chat sessions (func.session(...))."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+from openai.types.chat.chat_completion_message_tool_call import (
+    ChatCompletionMessageToolCall,
+    Function,
+)
+
+from SimpleLLMFunc.base.session import JSONLChatSessionStore
+from SimpleLLMFunc.hooks.stream import is_response_yield
+from SimpleLLMFunc.llm_decorator import ChatSession, llm_chat
+from SimpleLLMFunc.tool import tool
+
+
+@tool(name="lookup", description="Look up a value")
+async def lookup(key: str) -> str:
+    """Look up a value.
+
+    Args:
+        key: The key to look up
+    """
+    return f"value of {key}"
+
+
+def _chunk(content: str) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="chunk-id",
+        choices=[ChunkChoice(index=0, delta=ChoiceDelta(content=content), finish_reason=None)],
+        created=1234567890,
+        model="test-model",
+        object="chat.completion.chunk",
+    )
+
+
+def _recording_chat(responses: List[ChatCompletion], sent: List[List[Dict[str, Any]]]) -> AsyncMock:
+    """记录每次请求时的消息快照（ReAct 循环之后会继续向同一个列表追加消息）"""
+    replies = iter(responses)
+
+    async def chat(**kwargs: Any) -> ChatCompletion:
+        sent.append(list(kwargs["messages"]))
+        return next(replies)
+
+    return AsyncMock(side_effect=chat)
+
+
+class TestChatSession:
+    """Tests for ChatSession."""
+
+    @pytest.mark.asyncio
+    async def test_turns_accumulate_history(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        sent_requests: List[List[Dict[str, Any]]] = []
+        mock_llm_interface.chat = _recording_chat(
+            [make_chat_completion("hello!"), make_chat_completion("fine, thanks")], sent_requests
+        )
+
+        @llm_chat(llm_interface=mock_llm_interface)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        session = assistant.session()
+        assert isinstance(session, ChatSession)
+
+        first = [output async for output in session.send("hi")]
+        assert "hello!" in first
+        assert all(isinstance(output, str) for output in first)
+
+        await _drain(session.send(message="how are you?"))
+        sent = sent_requests[-1]
+        assert [m["role"] for m in sent] == ["system", "user", "assistant", "user"]
+        assert sent[0]["content"] == "You are helpful."
+        assert sent[2]["content"] == "hello!"
+        assert sent[3]["content"] == "message: how are you?"
+
+        assert [m["content"] for m in session.history] == [
+            "message: hi",
+            "hello!",
+            "message: how are you?",
+            "fine, thanks",
+        ]
+        assert [m["role"] for m in session.last_turn] == ["user", "assistant"]
+
+    @pytest.mark.asyncio
+    async def test_tool_calls_recorded(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        tool_call = ChatCompletionMessageToolCall(
+            id="call_1",
+            type="function",
+            function=Function(name="lookup", arguments='{"key": "a"}'),
+        )
+        mock_llm_interface.chat = AsyncMock(
+            side_effect=[
+                make_chat_completion(None, [tool_call]),
+                make_chat_completion("a is value of a"),
+            ]
+        )
+
+        @llm_chat(llm_interface=mock_llm_interface, toolkit=[lookup])
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        session = assistant.session()
+        assert session.system_prompt is not None and "lookup" in session.system_prompt
+
+        await _drain(session.send("what is a?"))
+
+        roles = [m["role"] for m in session.last_turn]
+        assert roles == ["user", "assistant", "tool", "assistant"]
+        assert "value of a" in session.last_turn[2]["content"]
+        assert session.last_turn[-1]["content"] == "a is value of a"
+
+    @pytest.mark.asyncio
+    async def test_stream_final_reply(self, mock_llm_interface: Any) -> None:
+        async def chat_stream(**kwargs: Any):
+            for piece in ["Hel", "lo", "!"]:
+                yield _chunk(piece)
+
+        mock_llm_interface.chat_stream = chat_stream
+
+        @llm_chat(llm_interface=mock_llm_interface, stream=True)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        session = assistant.session()
+        chunks = [output async for output in session.send("hi")]
+        assert "".join(chunks) == "Hello!"
+        assert session.history[-1] == {"role": "assistant", "content": "Hello!"}
+
+    @pytest.mark.asyncio
+    async def test_event_mode(self, mock_llm_interface: Any, make_chat_completion: Any) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("hello!"))
+
+        @llm_chat(llm_interface=mock_llm_interface, enable_event=True)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        session = assistant.session()
+        outputs = [output async for output in session.send("hi")]
+        assert any(is_response_yield(output) for output in outputs)
+        assert [m["content"] for m in session.history] == ["message: hi", "hello!"]
+
+    @pytest.mark.asyncio
+    async def test_failed_turn_leaves_history_unchanged(self, mock_llm_interface: Any) -> None:
+        mock_llm_interface.chat = AsyncMock(side_effect=RuntimeError("boom"))
+
+        @llm_chat(llm_interface=mock_llm_interface)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        session = assistant.session(history=[{"role": "user", "content": "earlier"}])
+        with pytest.raises(RuntimeError):
+            await _drain(session.send("hi"))
+        assert session.history == [{"role": "user", "content": "earlier"}]
+
+    @pytest.mark.asyncio
+    async def test_history_argument_rejected(self, mock_llm_interface: Any) -> None:
+        @llm_chat(llm_interface=mock_llm_interface)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        with pytest.raises(ValueError):
+            await _drain(assistant.session().send("hi", history=[]))
+
+    @pytest.mark.asyncio
+    async def test_store_persists_deltas(
+        self, mock_llm_interface: Any, make_chat_completion: Any, tmp_path: Path
+    ) -> None:
+        sent_requests: List[List[Dict[str, Any]]] = []
+        mock_llm_interface.chat = _recording_chat(
+            [make_chat_completion("one"), make_chat_completion("two")], sent_requests
+        )
+        store = JSONLChatSessionStore(tmp_path)
+
+        @llm_chat(llm_interface=mock_llm_interface)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        await _drain(assistant.session(session_id="s1", store=store).send("first"))
+        assert len(await store.load("s1")) == 2
+
+        reopened = assistant.session(session_id="s1", store=store)
+        await _drain(reopened.send("second"))
+        assert [m["content"] for m in sent_requests[-1][1:]] == ["message: first", "one", "message: second"]
+        assert [m["content"] for m in await store.load("s1")] == [
+            "message: first",
+            "one",
+            "message: second",
+            "two",
+        ]
+
+        await reopened.clear()
+        assert reopened.history == []
+        assert await store.load("s1") == []
+
+    @pytest.mark.asyncio
+    async def test_stored_history_follows_constructor_history(
+        self, mock_llm_interface: Any, make_chat_completion: Any, tmp_path: Path
+    ) -> None:
+        sent_requests: List[List[Dict[str, Any]]] = []
+        mock_llm_interface.chat = _recording_chat(
+            [make_chat_completion("one"), make_chat_completion("two")], sent_requests
+        )
+        store = JSONLChatSessionStore(tmp_path)
+        prefix = [
+            {"role": "user", "content": "example question"},
+            {"role": "assistant", "content": "example answer"},
+        ]
+
+        @llm_chat(llm_interface=mock_llm_interface)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        await _drain(assistant.session(session_id="s1", history=prefix, store=store).send("first"))
+        # 构造时传入的历史不写入存储
+        assert [m["content"] for m in await store.load("s1")] == ["message: first", "one"]
+
+        reopened = assistant.session(session_id="s1", history=prefix, store=store)
+        await _drain(reopened.send("second"))
+        expected = ["example question", "example answer", "message: first", "one", "message: second"]
+        assert [m["content"] for m in sent_requests[-1][1:]] == expected
+        assert [m["content"] for m in reopened.history] == expected + ["two"]
+
+
+async def _drain(stream: Any) -> None:
+    async for _ in stream:
+        pass
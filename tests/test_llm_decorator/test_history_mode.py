@@ -0,0 +1,122 @@
+"""Tests for llm_chat(history_mode=...)."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from openai.types.chat.chat_completion_message_tool_call import (
+    ChatCompletionMessageToolCall,
+    Function,
+)
+
+from SimpleLLMFunc.llm_decorator import llm_chat
+from SimpleLLMFunc.tool import tool
+
+
+@tool(name="lookup", description="Look up a value")
+async def lookup(key: str) -> str:
+    """Look up a value.
+
+    Args:
+        key: The key to look up
+    """
+    return f"value of {key}"
+
+
+class TestHistoryMode:
+    """Tests for llm_chat(history_mode=...)."""
+
+    @pytest.mark.asyncio
+    async def test_delta_mode_builds_next_history(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("hello!"))
+
+        @llm_chat(llm_interface=mock_llm_interface, history_mode="delta")
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        history: List[Dict[str, Any]] = []
+        async for _, delta in assistant("hi", history=history):
+            history.extend(delta)
+        assert history == [
+            {"role": "user", "content": "message: hi"},
+            {"role": "assistant", "content": "hello!"},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_delta_mode_traces_whole_turn(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("hello!"))
+
+        @llm_chat(llm_interface=mock_llm_interface, history_mode="delta")
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        client = MagicMock()
+        with patch("SimpleLLMFunc.llm_decorator.llm_chat_decorator.langfuse_client", client):
+            async for _ in assistant("hi", history=[]):
+                pass
+
+        span = client.start_as_current_observation.return_value.__enter__.return_value
+        traced = span.update.call_args.kwargs["output"]["final_history"]
+        assert [m["content"] for m in traced] == ["message: hi", "hello!"]
+
+    @pytest.mark.asyncio
+    async def test_final_mode(self, mock_llm_interface: Any, make_chat_completion: Any) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("hello!"))
+
+        @llm_chat(llm_interface=mock_llm_interface, history_mode="final")
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        outputs = [output async for output in assistant("hi", history=[])]
+        assert outputs[0] == ("hello!", None)
+        assert [m["role"] for m in outputs[-1][1]] == ["system", "user", "assistant"]
+
+    @pytest.mark.asyncio
+    async def test_full_mode_closing_history_is_last_snapshot(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        """Full mode keeps its original closing tuple; only "final" appends the reply."""
+        tool_call = ChatCompletionMessageToolCall(
+            id="call_1",
+            type="function",
+            function=Function(name="lookup", arguments='{"key": "a"}'),
+        )
+        closing = {}
+        for mode in ("full", "final"):
+            mock_llm_interface.chat = AsyncMock(
+                side_effect=[
+                    make_chat_completion(None, [tool_call]),
+                    make_chat_completion("a is value of a"),
+                ]
+            )
+
+            @llm_chat(llm_interface=mock_llm_interface, toolkit=[lookup], history_mode=mode)
+            async def assistant(message: str, history: List[Dict[str, str]]):
+                """You are helpful."""
+
+            outputs = [output async for output in assistant("what is a?", history=[])]
+            assert outputs[-1][0] == ""
+            closing[mode] = outputs
+
+        full_outputs = closing["full"]
+        assert full_outputs[-1][1] == full_outputs[-2][1]
+        assert [m["role"] for m in full_outputs[-1][1]] == ["system", "user", "assistant", "tool"]
+        assert [m["role"] for m in closing["final"][-1][1]] == [
+            "system",
+            "user",
+            "assistant",
+            "tool",
+            "assistant",
+        ]
+
+    def test_invalid_history_mode(self, mock_llm_interface: Any) -> None:
+        with pytest.raises(ValueError):
+            llm_chat(llm_interface=mock_llm_interface, history_mode="partial")  # type: ignore[arg-type]
+        with pytest.raises(ValueError):
+            llm_chat(llm_interface=mock_llm_interface, enable_event=True, history_mode="delta")
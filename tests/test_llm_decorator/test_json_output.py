@@ -0,0 +1,57 @@
+"""Tests for llm_function(output_mode="json_schema")."""
+
+from __future__ import annotations
+
+from typing import Any, List
+from unittest.mock import AsyncMock
+
+import pytest
+from pydantic import BaseModel
+
+from SimpleLLMFunc.llm_decorator import llm_function
+
+
+class Label(BaseModel):
+    name: str
+    score: float
+
+
+class TestJsonSchemaOutput:
+    """Tests for JSON schema structured outputs."""
+
+    @pytest.mark.asyncio
+    async def test_sends_response_format_and_parses_json(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(
+            return_value=make_chat_completion('{"result": [{"name": "spam", "score": 0.9}]}')
+        )
+
+        @llm_function(llm_interface=mock_llm_interface, output_mode="json_schema")
+        async def classify(text: str) -> List[Label]:
+            """Classify the text."""
+
+        assert await classify("buy now") == [Label(name="spam", score=0.9)]
+
+        kwargs = mock_llm_interface.chat.call_args.kwargs
+        assert kwargs["response_format"]["type"] == "json_schema"
+        assert "XML" not in kwargs["messages"][0]["content"]
+
+    @pytest.mark.asyncio
+    async def test_simple_return_types_are_unaffected(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("hello"))
+
+        @llm_function(llm_interface=mock_llm_interface, output_mode="json_schema")
+        async def greet(name: str) -> str:
+            """Greet the person."""
+
+        assert await greet("Ann") == "hello"
+        assert "response_format" not in mock_llm_interface.chat.call_args.kwargs
+
+    def test_invalid_combinations(self, mock_llm_interface: Any) -> None:
+        with pytest.raises(ValueError):
+            llm_function(llm_interface=mock_llm_interface, output_mode="yaml")
+        with pytest.raises(ValueError):
+            llm_function(llm_interface=mock_llm_interface, output_mode="json_schema", pack=True)
@@ -0,0 +1,53 @@
+"""Tests for llm_decorator.llm_chat_decorator module."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock
+
+import pytest
+
+from SimpleLLMFunc.llm_decorator import llm_chat
+from SimpleLLMFunc.utils import get_deadline
+
+
+class TestLLMChatDeadline:
+    """Tests for llm_chat(timeout=..., deadline=...)."""
+
+    @pytest.mark.asyncio
+    async def test_without_deadline_returns_chat_stream(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("hello!"))
+
+        @llm_chat(llm_interface=mock_llm_interface)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        stream = assistant("hi", history=[])
+        # 未设置截止时间时不再额外包一层转发
+        assert stream.__name__ == "_chat_call"
+        outputs = [output async for output in stream]
+        assert outputs[0][0] == "hello!"
+
+    @pytest.mark.asyncio
+    async def test_deadline_scoped_to_chat_call(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        seen: List[Any] = []
+
+        async def chat(**kwargs: Any) -> Any:
+            seen.append(get_deadline())
+            return make_chat_completion("hello!")
+
+        mock_llm_interface.chat = chat
+
+        @llm_chat(llm_interface=mock_llm_interface, timeout=30)
+        async def assistant(message: str, history: List[Dict[str, str]]):
+            """You are helpful."""
+
+        async for _ in assistant("hi", history=[]):
+            # 截止时间不泄漏给迭代生成器的调用方
+            assert get_deadline() is None
+
+        assert len(seen) == 1 and seen[0] is not None
@@ -0,0 +1,135 @@
+"""Tests for llm_function(memoize=...)."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+
+from SimpleLLMFunc.base.memo import InMemoryMemoStore, SQLiteMemoStore
+from SimpleLLMFunc.hooks.stream import is_response_yield
+from SimpleLLMFunc.llm_decorator import llm_function
+
+
+class TestMemoize:
+    """Tests for memoized llm_function calls."""
+
+    @pytest.mark.asyncio
+    async def test_hit_skips_llm_call(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("positive"))
+
+        @llm_function(llm_interface=mock_llm_interface, memoize=True, temperature=0)
+        async def classify(text: str) -> str:
+            """Classify the sentiment of the text."""
+
+        assert await classify("great") == "positive"
+        assert await classify(text="great") == "positive"
+        await classify("awful")
+
+        assert mock_llm_interface.chat.await_count == 2
+        assert classify.memo_store.stats.hits == 1  # type: ignore[attr-defined]
+        assert classify.memo_store.stats.misses == 2  # type: ignore[attr-defined]
+
+    @pytest.mark.asyncio
+    async def test_event_mode_yields_cached_response(
+        self, mock_llm_interface: Any, make_chat_completion: Any, tmp_path: Path
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("42"))
+        store = SQLiteMemoStore(tmp_path / "memo.db")
+
+        @llm_function(llm_interface=mock_llm_interface, memoize=store, enable_event=True)
+        async def answer(question: str) -> int:
+            """Answer the question with a number."""
+
+        for _ in range(2):
+            outputs = [output async for output in answer("meaning of life")]
+            responses = [output.response for output in outputs if is_response_yield(output)]
+            assert responses == [42]
+
+        assert mock_llm_interface.chat.await_count == 1
+        assert len(outputs) == 1
+
+    @pytest.mark.asyncio
+    async def test_parameter_named_like_internal_flag(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        """The memo switch is not a keyword argument of the decorated callable."""
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("ok"))
+
+        @llm_function(llm_interface=mock_llm_interface, memoize=True, enable_event=True)
+        async def lookup(_use_memo: bool) -> str:
+            """Look something up."""
+
+        for _ in range(2):
+            outputs = [output async for output in lookup(_use_memo=False)]
+            assert [o.response for o in outputs if is_response_yield(o)] == ["ok"]
+
+        assert mock_llm_interface.chat.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_packed_calls_are_memoized(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(
+            return_value=make_chat_completion(
+                '<results><item index="0">A</item><item index="1">B</item></results>'
+            )
+        )
+
+        @llm_function(llm_interface=mock_llm_interface, memoize=True, pack=True)
+        async def shout(text: str) -> str:
+            """Convert the text to upper case."""
+
+        assert await asyncio.gather(shout("a"), shout("b")) == ["A", "B"]
+        assert await shout("b") == "B"
+        assert mock_llm_interface.chat.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_packed_fallback_looks_up_once(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(
+            side_effect=[
+                make_chat_completion("I cannot do that."),
+                make_chat_completion("A"),
+                make_chat_completion("B"),
+            ]
+        )
+        store = InMemoryMemoStore()
+        store_get = AsyncMock(wraps=store.get)
+        store_set = AsyncMock(wraps=store.set)
+        setattr(store, "get", store_get)
+        setattr(store, "set", store_set)
+
+        @llm_function(llm_interface=mock_llm_interface, memoize=store, pack=True)
+        async def shout(text: str) -> str:
+            """Convert the text to upper case."""
+
+        assert sorted(await asyncio.gather(shout("a"), shout("b"))) == ["A", "B"]
+        assert store_get.await_count == 2
+        assert store_set.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_unstable_arguments_skip_memo(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        class Opaque:
+            def __str__(self) -> str:
+                return "opaque"
+
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("ok"))
+
+        @llm_function(llm_interface=mock_llm_interface, memoize=True)
+        async def describe(value: Any) -> str:
+            """Describe the value."""
+
+        value = Opaque()
+        assert await describe(value) == "ok"
+        assert await describe(value) == "ok"
+        assert mock_llm_interface.chat.await_count == 2
+        assert describe.memo_store.stats.lookups == 0  # type: ignore[attr-defined]
@@ -0,0 +1,267 @@
+"""Tests for llm_decorator.packing module."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock
+
+import pytest
+from pydantic import BaseModel
+
+from SimpleLLMFunc.llm_decorator import llm_function
+from SimpleLLMFunc.llm_decorator.packing import (
+    MicroBatcher,
+    PackConfig,
+    PackedCall,
+    build_packed_messages,
+    parse_packed_content,
+    resolve_pack_config,
+    resolve_packed_calls,
+)
+from SimpleLLMFunc.llm_decorator.steps.common import compile_function_metadata
+from SimpleLLMFunc.llm_decorator.steps.function import compile_function_prompt
+
+
+class _Entry(BaseModel):
+    word: str
+    count: int
+
+
+class TestPackConfig:
+    """Tests for PackConfig and resolve_pack_config."""
+
+    def test_resolve(self) -> None:
+        assert resolve_pack_config(None) is None
+        assert resolve_pack_config(False) is None
+        assert resolve_pack_config(True).max_items == 16  # type: ignore[union-attr]
+        assert resolve_pack_config(4).max_items == 4  # type: ignore[union-attr]
+
+    def test_invalid(self) -> None:
+        with pytest.raises(ValueError):
+            PackConfig(max_items=1)
+        with pytest.raises(ValueError):
+            PackConfig(max_wait=-1)
+
+
+class TestPackedPrompt:
+    """Tests for build_packed_messages and parse_packed_content."""
+
+    def test_build_packed_messages(self) -> None:
+        async def translate(text: str) -> str:
+            """Translate the text into English."""
+
+        prompt = compile_function_prompt(compile_function_metadata(translate))
+        messages = build_packed_messages(prompt, [{"text": "你好"}, {"text": "再见"}])
+
+        assert len(messages) == 2
+        assert messages[0]["content"].startswith(prompt.system_prompt())
+        assert "<results>" in messages[0]["content"]
+        assert "[request 0]\n  - text: 你好" in messages[1]["content"]
+        assert "[request 1]\n  - text: 再见" in messages[1]["content"]
+
+    def test_parse_text_items(self) -> None:
+        content = (
+            "Sure!\n<results>\n"
+            '  <item index="1"><![CDATA[Bye <3]]></item>\n'
+            '  <item index="0">Hello</item>\n'
+            "</results>\nDone."
+        )
+
+        assert parse_packed_content(content, 2, str, "translate") == {0: "Hello", 1: "Bye <3"}
+
+    def test_parse_model_items_skips_invalid(self) -> None:
+        content = (
+            "<results>"
+            '<item index="0"><_Entry><word>a</word><count>1</count></_Entry></item>'
+            '<item index="1"><_Entry><word>b</word><count>oops</count></_Entry></item>'
+            '<item index="7"><_Entry><word>c</word><count>3</count></_Entry></item>'
+            '<item index="2"><_Entry><word>d</word><count>4</count></_Entry></item>'
+            "</results>"
+        )
+
+        results = parse_packed_content(content, 3, _Entry, "count_words")
+
+        assert sorted(results) == [0, 2]
+        assert results[0] == _Entry(word="a", count=1)
+        assert results[2] == _Entry(word="d", count=4)
+
+    def test_parse_without_root_raises(self) -> None:
+        with pytest.raises(ValueError):
+            parse_packed_content("no xml here", 1, str, "translate")
+
+
+class TestMicroBatcher:
+    """Tests for MicroBatcher windows."""
+
+    @pytest.mark.asyncio
+    async def test_collects_calls_within_window(self) -> None:
+        batches: List[List[Any]] = []
+
+        async def flush(calls: List[PackedCall]) -> None:
+            batches.append([call.args[0] for call in calls])
+            for call in calls:
+                call.future.set_result(call.args[0] * 2)
+
+        batcher = MicroBatcher(PackConfig(max_items=10, max_wait=0.02), flush)
+        results = await asyncio.gather(*(batcher.submit((i,), {}, {}) for i in range(3)))
+
+        assert results == [0, 2, 4]
+        assert batches == [[0, 1, 2]]
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_full(self) -> None:
+        batches: List[List[Any]] = []
+
+        async def flush(calls: List[PackedCall]) -> None:
+            batches.append([call.args[0] for call in calls])
+            for call in calls:
+                call.future.set_result(call.args[0])
+
+        batcher = MicroBatcher(PackConfig(max_items=2, max_wait=10), flush)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit((i,), {}, {}) for i in range(4))), timeout=1
+        )
+
+        assert results == [0, 1, 2, 3]
+        assert batches == [[0, 1], [2, 3]]
+
+    @pytest.mark.asyncio
+    async def test_flush_error_reaches_callers(self) -> None:
+        async def flush(calls: List[PackedCall]) -> None:
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(PackConfig(max_items=2, max_wait=0), flush)
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await batcher.submit((0,), {}, {})
+
+
+    @pytest.mark.asyncio
+    async def test_calls_keep_caller_context(self) -> None:
+        caller: contextvars.ContextVar[str] = contextvars.ContextVar("caller", default="none")
+        seen: Dict[str, Any] = {}
+
+        async def flush(calls: List[PackedCall]) -> None:
+            seen["packed"] = caller.get()
+
+            async def packed(batch: List[PackedCall]) -> Dict[int, Any]:
+                return {}
+
+            async def single(call: PackedCall) -> Any:
+                return caller.get()
+
+            await resolve_packed_calls(calls, packed, single, "func")
+
+        batcher = MicroBatcher(PackConfig(max_items=3, max_wait=10), flush)
+
+        async def submit(name: str) -> Any:
+            caller.set(name)
+            return await batcher.submit((name,), {}, {})
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(submit(name) for name in ["a", "b", "c"])), timeout=1
+        )
+
+        # 合并请求在第一个调用的上下文中执行（即使由最后一个调用触发发送）
+        assert seen["packed"] == "a"
+        assert results == ["a", "b", "c"]
+
+
+class TestResolvePackedCalls:
+    """Tests for result distribution and per-item fallback."""
+
+    @staticmethod
+    def _calls(count: int) -> List[PackedCall]:
+        loop = asyncio.get_running_loop()
+        return [PackedCall((i,), {}, {}, loop.create_future()) for i in range(count)]
+
+    @pytest.mark.asyncio
+    async def test_missing_items_fall_back(self) -> None:
+        calls = self._calls(3)
+        single = AsyncMock(side_effect=lambda call: f"single-{call.args[0]}")
+
+        async def packed(batch: List[PackedCall]) -> Dict[int, Any]:
+            return {0: "packed-0", 2: "packed-2"}
+
+        await resolve_packed_calls(calls, packed, single, "func")
+
+        assert [call.future.result() for call in calls] == ["packed-0", "single-1", "packed-2"]
+        assert single.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_packed_failure_falls_back_for_all(self) -> None:
+        calls = self._calls(2)
+
+        async def packed(batch: List[PackedCall]) -> Dict[int, Any]:
+            raise ValueError("unparseable")
+
+        async def single(call: PackedCall) -> Any:
+            if call.args[0] == 1:
+                raise KeyError("single failed")
+            return "ok"
+
+        await resolve_packed_calls(calls, packed, single, "func")
+
+        assert calls[0].future.result() == "ok"
+        with pytest.raises(KeyError):
+            calls[1].future.result()
+
+
+class TestPackedLLMFunction:
+    """End-to-end tests for llm_function(pack=...)."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_request(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(
+            return_value=make_chat_completion(
+                '<results><item index="0">HELLO</item><item index="1">BYE</item></results>'
+            )
+        )
+
+        @llm_function(llm_interface=mock_llm_interface, pack=PackConfig(max_wait=0.01))
+        async def shout(text: str) -> str:
+            """Convert the text to upper case."""
+
+        results = await asyncio.gather(shout("hello"), shout(text="bye"))
+
+        assert results == ["HELLO", "BYE"]
+        assert mock_llm_interface.chat.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_bad_packed_output_falls_back(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        responses = iter(
+            [
+                make_chat_completion("I cannot do that."),
+                make_chat_completion("A"),
+                make_chat_completion("B"),
+            ]
+        )
+        mock_llm_interface.chat = AsyncMock(side_effect=lambda *a, **k: next(responses))
+
+        @llm_function(llm_interface=mock_llm_interface, pack=2)
+        async def shout(text: str) -> str:
+            """Convert the text to upper case."""
+
+        results = await asyncio.gather(shout("a"), shout("b"))
+
+        assert sorted(results) == ["A", "B"]
+        assert mock_llm_interface.chat.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_argument_errors_raise_immediately(self, mock_llm_interface: Any) -> None:
+        @llm_function(llm_interface=mock_llm_interface, pack=True)
+        async def shout(text: str) -> str:
+            """Convert the text to upper case."""
+
+        with pytest.raises(TypeError):
+            await shout("a", "b")
+
+    def test_rejects_event_mode(self, mock_llm_interface: Any) -> None:
+        with pytest.raises(ValueError):
+            llm_function(llm_interface=mock_llm_interface, pack=True, enable_event=True)
@@ -0,0 +1,70 @@
+"""Tests for llm_function(stream_partial=True)."""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+
+from SimpleLLMFunc.llm_decorator import llm_function
+
+
+def _chunk(content: str) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="chunk-id",
+        choices=[Choice(index=0, delta=ChoiceDelta(content=content), finish_reason=None)],
+        created=1234567890,
+        model="test-model",
+        object="chat.completion.chunk",
+    )
+
+
+class TestStreamPartial:
+    """Tests for partial structured outputs."""
+
+    @pytest.mark.asyncio
+    async def test_list_items_arrive_before_stream_ends(self, mock_llm_interface: Any) -> None:
+        pieces = ["<result><item>1</item>", "<item>2</item>", "<item>3</item></result>"]
+        pulled: List[str] = []
+        seen_when_yielded: List[int] = []
+
+        async def chat_stream(**kwargs: Any):
+            for piece in pieces:
+                pulled.append(piece)
+                yield _chunk(piece)
+
+        mock_llm_interface.chat_stream = chat_stream
+
+        @llm_function(llm_interface=mock_llm_interface, stream_partial=True)
+        async def numbers(count: int) -> List[int]:
+            """Return the first numbers."""
+
+        results = []
+        async for item in numbers(3):
+            seen_when_yielded.append(len(pulled))
+            results.append(item)
+
+        assert results == [1, 2, 3]
+        assert seen_when_yielded[0] == 1
+
+    def test_rejects_event_mode(self, mock_llm_interface: Any) -> None:
+        with pytest.raises(ValueError):
+            llm_function(llm_interface=mock_llm_interface, stream_partial=True, enable_event=True)
+
+    @pytest.mark.asyncio
+    async def test_batch_collects_final_results(self, mock_llm_interface: Any) -> None:
+        """map()/batch() on a partial function return each call's complete result."""
+
+        async def chat_stream(**kwargs: Any):
+            yield _chunk("<result><item>1</item>")
+            yield _chunk("<item>2</item></result>")
+
+        mock_llm_interface.chat_stream = chat_stream
+
+        @llm_function(llm_interface=mock_llm_interface, stream_partial=True)
+        async def numbers(count: int) -> List[int]:
+            """Return the first numbers."""
+
+        assert await numbers.batch([2, 2]) == [[1, 2], [1, 2]]  # type: ignore[attr-defined]
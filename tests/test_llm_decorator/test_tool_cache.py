@@ -0,0 +1,90 @@
+"""Tests for ToolkitCache and its use in the decorators."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from SimpleLLMFunc.llm_decorator import llm_function
+from SimpleLLMFunc.llm_decorator.utils import ToolkitCache, process_tools
+from SimpleLLMFunc.tool import tool
+
+
+@tool(name="lookup", description="Look up a value")
+async def lookup(key: str) -> str:
+    """Look up a value.
+
+    Args:
+        key: The key to look up
+    """
+    return key
+
+
+@tool(name="echo", description="Echo the input")
+async def echo(text: str) -> str:
+    """Echo the input.
+
+    Args:
+        text: The text to echo
+    """
+    return text
+
+
+class TestToolkitCache:
+    """Tests for ToolkitCache."""
+
+    def test_reuses_processed_tools(self) -> None:
+        cache = ToolkitCache([lookup], "f")
+        with patch(
+            "SimpleLLMFunc.llm_decorator.utils.tools.process_tools", wraps=process_tools
+        ) as mock_process:
+            first = cache.get()
+            second = cache.get()
+        assert first is second
+        assert mock_process.call_count == 1
+        assert first[0] is not None and [t["function"]["name"] for t in first[0]] == ["lookup"]
+        assert set(first[1]) == {"lookup"}
+
+    def test_invalidated_when_toolkit_changes(self) -> None:
+        toolkit: list = [lookup]
+        cache = ToolkitCache(toolkit, "f")
+        first = cache.get()
+
+        toolkit.append(echo)
+        second = cache.get()
+        assert second is not first
+        assert set(second[1]) == {"lookup", "echo"}
+
+        toolkit.pop()
+        assert set(cache.get()[1]) == {"lookup"}
+
+    def test_empty_toolkit(self) -> None:
+        tool_param, tool_map = ToolkitCache(None, "f").get()
+        assert tool_param is None
+        assert tool_map == {}
+
+
+class TestDecoratorToolCache:
+    """llm_function 只在首次调用时处理工具列表"""
+
+    @pytest.mark.asyncio
+    async def test_tools_processed_once(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("ok"))
+
+        @llm_function(llm_interface=mock_llm_interface, toolkit=[lookup])
+        async def answer(question: str) -> str:
+            """Answer the question."""
+            return ""
+
+        with patch(
+            "SimpleLLMFunc.llm_decorator.utils.tools.process_tools", wraps=process_tools
+        ) as mock_process:
+            assert await answer("a") == "ok"
+            assert await answer("b") == "ok"
+        assert mock_process.call_count == 1
+        tools = mock_llm_interface.chat.call_args.kwargs["tools"]
+        assert [t["function"]["name"] for t in tools] == ["lookup"]
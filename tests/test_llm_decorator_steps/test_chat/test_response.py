@@ -5,8 +5,12 @@ from __future__ import annotations
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
 
 from SimpleLLMFunc.llm_decorator.steps.chat.response import (
+    ChatTurn,
     extract_stream_response_content,
     process_chat_response_stream,
     process_single_chat_response,
@@ -102,3 +106,137 @@ class TestProcessChatResponseStream:
         
         assert len(results) >= 1
 
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.llm_decorator.steps.chat.response.process_single_chat_response")
+    @patch("SimpleLLMFunc.llm_decorator.steps.chat.response.app_log")
+    async def test_aclose_closes_upstream_stream(
+        self, mock_app_log: Any, mock_process: Any, sample_messages: list
+    ) -> None:
+        """Closing the processed stream closes the upstream stream immediately."""
+        import asyncio
+
+        mock_process.return_value = "content"
+        closed = []
+
+        async def mock_stream():
+            try:
+                while True:
+                    yield "response", sample_messages.copy()
+                    await asyncio.sleep(0.01)
+            finally:
+                closed.append(True)
+
+        stream = process_chat_response_stream(
+            mock_stream(), "text", sample_messages, "test_func", True
+        )
+        await anext(stream)
+        await stream.aclose()
+
+        assert closed == [True]
+
+
+def _chunk(content: str) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="chunk-id",
+        choices=[ChunkChoice(index=0, delta=ChoiceDelta(content=content), finish_reason=None)],
+        created=1234567890,
+        model="test-model",
+        object="chat.completion.chunk",
+    )
+
+
+def _live_stream(initial: list):
+    """模拟 copy_messages=False 的 ReAct 循环：一轮工具调用后流式输出最终回复"""
+    tool_call = {"role": "assistant", "content": None, "tool_calls": [{"id": "c1"}]}
+    tool_result = {"role": "tool", "tool_call_id": "c1", "content": "42"}
+
+    async def stream():
+        live = list(initial)
+        yield _chunk(""), live
+        live.extend([tool_call, tool_result])
+        for piece in ["The answer", " is 42"]:
+            yield _chunk(piece), live
+        live.append({"role": "assistant", "content": "The answer is 42"})
+
+    return stream(), [tool_call, tool_result]
+
+
+class TestChatTurn:
+    """Tests for ChatTurn."""
+
+    def test_tracks_appended_messages_and_reply(self) -> None:
+        user = {"role": "user", "content": "q"}
+        initial = [{"role": "system", "content": "s"}, user]
+        turn = ChatTurn(initial, user, "f", stream=True)
+        snapshot = list(initial)
+
+        assert turn.observe(_chunk("ignored"), snapshot) == []
+        snapshot.append({"role": "tool", "content": "r"})
+        assert turn.observe(_chunk("a"), snapshot) == [snapshot[-1]]
+        assert turn.observe(_chunk("b"), snapshot) == []
+
+        assert turn.final_reply() == [{"role": "assistant", "content": "ab"}]
+        assert turn.new_messages() == [user, snapshot[-1], {"role": "assistant", "content": "ab"}]
+
+    def test_falls_back_to_initial_length(self) -> None:
+        user = {"role": "user", "content": "q"}
+        turn = ChatTurn([user], user, "f", stream=True)
+        # 从检查点恢复的消息是新的对象
+        restored = [dict(user), {"role": "tool", "content": "r"}]
+        assert turn.observe(_chunk(""), restored) == [restored[1]]
+
+
+class TestHistoryModes:
+    """Tests for process_chat_response_stream(history_mode=...)."""
+
+    @pytest.mark.asyncio
+    async def test_final_mode(self) -> None:
+        user = {"role": "user", "content": "q"}
+        initial = [{"role": "system", "content": "s"}, user]
+        stream, added = _live_stream(initial)
+
+        outputs = [
+            output
+            async for output in process_chat_response_stream(
+                stream, "text", initial, "f", stream=True, history_mode="final"
+            )
+        ]
+        assert [history for _, history in outputs[:-1]] == [None, None, None]
+        content, history = outputs[-1]
+        assert content == ""
+        assert history == [*initial, *added, {"role": "assistant", "content": "The answer is 42"}]
+
+    @pytest.mark.asyncio
+    async def test_delta_mode(self) -> None:
+        user = {"role": "user", "content": "q"}
+        initial = [{"role": "system", "content": "s"}, user]
+        stream, added = _live_stream(initial)
+
+        outputs = [
+            output
+            async for output in process_chat_response_stream(
+                stream, "text", initial, "f", stream=True, history_mode="delta"
+            )
+        ]
+        assert "".join(content for content, _ in outputs) == "The answer is 42"
+        assert [delta for _, delta in outputs] == [
+            [user],
+            added,
+            [],
+            [{"role": "assistant", "content": "The answer is 42"}],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_raw_mode_end_marker(self) -> None:
+        user = {"role": "user", "content": "q"}
+        stream, _ = _live_stream([user])
+
+        outputs = [
+            output
+            async for output in process_chat_response_stream(
+                stream, "raw", [user], "f", stream=True, history_mode="final"
+            )
+        ]
+        assert outputs[-1][0] is None
+        assert isinstance(outputs[0][0], ChatCompletionChunk)
@@ -0,0 +1,76 @@
+"""Tests for llm_decorator.steps.common.pipeline module."""
+
+from __future__ import annotations
+
+from typing import Any, AsyncGenerator, List
+
+import pytest
+
+from SimpleLLMFunc.llm_decorator.steps.common.pipeline import DROP, OutputPipeline
+
+
+async def _source(items: List[Any]) -> AsyncGenerator[Any, None]:
+    for item in items:
+        yield item
+
+
+class TestOutputPipeline:
+    """Tests for OutputPipeline."""
+
+    @pytest.mark.asyncio
+    async def test_stages_transform_and_drop(self) -> None:
+        """Items pass through every stage in order; DROP removes them."""
+        pipeline = OutputPipeline()
+        seen: List[int] = []
+
+        def record(item: int) -> int:
+            seen.append(item)
+            return item
+
+        pipeline.add_stage(on_item=record)
+        pipeline.add_stage(on_item=lambda item: DROP if item % 2 else item * 10)
+
+        outputs = [item async for item in pipeline.run(_source([1, 2, 3, 4]))]
+
+        assert seen == [1, 2, 3, 4]
+        assert outputs == [20, 40]
+
+    @pytest.mark.asyncio
+    async def test_completion_items_only_reach_downstream_stages(self) -> None:
+        """Follow-up items from on_complete skip the producing stage and earlier ones."""
+        pipeline = OutputPipeline()
+        first: List[str] = []
+        second: List[str] = []
+
+        async def retry() -> AsyncGenerator[str, None]:
+            yield "retry"
+
+        async def final() -> AsyncGenerator[str, None]:
+            yield "final"
+
+        pipeline.add_stage(on_item=lambda item: first.append(item) or item, on_complete=retry)
+        pipeline.add_stage(on_item=lambda item: second.append(item) or item, on_complete=final)
+
+        outputs = [item async for item in pipeline.run(_source(["a"]))]
+
+        assert outputs == ["a", "retry", "final"]
+        assert first == ["a"]
+        assert second == ["a", "retry"]
+
+    @pytest.mark.asyncio
+    async def test_closing_pipeline_closes_source(self) -> None:
+        """Closing the edge generator closes the underlying source immediately."""
+        closed: List[bool] = []
+
+        async def source() -> AsyncGenerator[int, None]:
+            try:
+                for i in range(10):
+                    yield i
+            finally:
+                closed.append(True)
+
+        stream = OutputPipeline().run(source())
+        assert await stream.__anext__() == 0
+        await stream.aclose()
+
+        assert closed == [True]
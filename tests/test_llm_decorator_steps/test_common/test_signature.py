@@ -11,6 +11,7 @@ import pytest
 from SimpleLLMFunc.llm_decorator.steps.common.signature import (
     bind_function_arguments,
     build_function_signature,
+    compile_function_metadata,
     extract_function_metadata,
     extract_template_params,
     generate_trace_id,
@@ -200,3 +201,20 @@ class TestParseFunctionSignature:
         assert template_params == {"key": "value"}
         assert "_template_params" not in kwargs
 
+    @patch("SimpleLLMFunc.llm_decorator.steps.common.signature.get_type_hints")
+    def test_parse_signature_with_compiled_metadata(self, mock_get_type_hints: Any) -> None:
+        """Compiled metadata is reused; only argument binding runs per call."""
+
+        def test_func(param1: str, param2: int = 1) -> str:
+            """Test function."""
+            return "result"
+
+        mock_get_type_hints.return_value = {"param1": str, "param2": int, "return": str}
+        metadata = compile_function_metadata(test_func)
+        mock_get_type_hints.reset_mock()
+
+        signature, _ = parse_function_signature(test_func, ("a",), {}, metadata=metadata)
+
+        mock_get_type_hints.assert_not_called()
+        assert signature.return_type is str
+        assert signature.bound_args.arguments == {"param1": "a", "param2": 1}
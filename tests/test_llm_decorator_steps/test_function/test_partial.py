@@ -0,0 +1,81 @@
+"""Tests for llm_decorator.steps.function.partial module."""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from SimpleLLMFunc.llm_decorator.steps.function.partial import PartialResultBuilder
+
+
+class _Article(BaseModel):
+    title: str
+    tags: List[str]
+    summary: Optional[str] = None
+
+
+def _feed_all(builder: PartialResultBuilder, text: str, size: int = 4, iteration: int = 0) -> list:
+    outputs = []
+    for start in range(0, len(text), size):
+        outputs.extend(builder.feed(text[start : start + size], iteration))
+    return outputs
+
+
+class TestPartialResultBuilder:
+    """Tests for PartialResultBuilder."""
+
+    def test_list_items_are_yielded_as_they_close(self) -> None:
+        builder = PartialResultBuilder(List[int], "numbers")
+
+        assert builder.feed("<result><item>1</item><item>2") == [1]
+        assert builder.feed("</item><item>3</item></result>") == [2, 3]
+        assert builder.finish([1, 2, 3]) == []
+
+    def test_finish_yields_items_missing_from_partial_parse(self) -> None:
+        builder = PartialResultBuilder(List[str], "words")
+
+        assert _feed_all(builder, "<result><item>a</item><item>b & c</item></result>") == ["a"]
+        assert builder.finish(["a", "b & c"]) == ["b & c"]
+
+    def test_new_iteration_does_not_repeat_items(self) -> None:
+        builder = PartialResultBuilder(List[str], "words")
+
+        assert builder.feed("<result><item>a</item>", iteration=0) == ["a"]
+        assert builder.feed("<result><item>a</item><item>b</item>", iteration=1) == ["b"]
+
+    def test_new_iteration_with_different_items(self) -> None:
+        builder = PartialResultBuilder(List[str], "words")
+
+        assert builder.feed("<result><item>a</item><item>b</item>", iteration=0) == ["a", "b"]
+        assert _feed_all(
+            builder, "<result><item>a</item><item>x</item><item>y</item></result>", iteration=1
+        ) == ["x", "y"]
+        assert builder.finish(["a", "x", "y"]) == []
+
+    def test_finish_follows_repaired_result(self) -> None:
+        builder = PartialResultBuilder(List[str], "words")
+
+        assert builder.feed("<result><item>a</item><item>b</item>") == ["a", "b"]
+        assert builder.finish(["a", "c", "d"]) == ["c", "d"]
+
+    def test_model_snapshots(self) -> None:
+        builder = PartialResultBuilder(_Article, "article")
+        text = (
+            "<_Article><title>Hello</title><tags><item>x</item><item>y</item></tags>"
+            "<summary>short</summary></_Article>"
+        )
+
+        snapshots = _feed_all(builder, text)
+
+        assert len(snapshots) == 3
+        assert snapshots[0].title == "Hello"
+        assert snapshots[0].model_fields_set == {"title"}
+        assert snapshots[1] == _Article(title="Hello", tags=["x", "y"])
+        assert snapshots[2].summary == "short"
+
+    def test_plain_types_only_yield_final_value(self) -> None:
+        builder = PartialResultBuilder(str, "text")
+
+        assert builder.feed("<result><item>a</item></result>") == []
+        assert builder.finish("done") == ["done"]
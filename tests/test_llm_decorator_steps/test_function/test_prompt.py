@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+from typing import List
 from unittest.mock import patch
 
 import pytest
+from pydantic import BaseModel
 
 from SimpleLLMFunc.llm_decorator.steps.function.prompt import (
     build_initial_prompts,
@@ -166,3 +168,67 @@ class TestBuildInitialPrompts:
         assert len(result) >= 2
         mock_build_multimodal.assert_called()
 
+
+
+class _Item(BaseModel):
+    name: str
+
+
+def _extract_items(text: str) -> List[_Item]:
+    """Extract items from {source}."""
+    return []
+
+
+class TestCompiledFunctionPrompt:
+    """Tests for CompiledFunctionPrompt."""
+
+    def _metadata(self) -> Any:
+        from SimpleLLMFunc.llm_decorator.steps.common.signature import (
+            compile_function_metadata,
+        )
+
+        return compile_function_metadata(_extract_items)
+
+    def test_skeleton_is_built_once(self) -> None:
+        """Return type descriptions are built at compile time only."""
+        from SimpleLLMFunc.llm_decorator.steps.function.prompt import (
+            build_return_type_description as real_build,
+            compile_function_prompt,
+        )
+
+        with patch(
+            "SimpleLLMFunc.llm_decorator.steps.function.prompt.build_return_type_description",
+            side_effect=real_build,
+        ) as mock_build:
+            compiled = compile_function_prompt(self._metadata())
+            first = compiled.build_messages({"text": "a"})
+            second = compiled.build_messages({"text": "b"})
+
+        mock_build.assert_called_once()
+        assert "XML Schema" in first[0]["content"]
+        assert first[0]["content"] is second[0]["content"]
+        assert "text: a" in first[1]["content"]
+        assert "text: b" in second[1]["content"]
+
+    def test_template_params_reformat_system_prompt(self) -> None:
+        """Docstring template parameters are applied per call."""
+        from SimpleLLMFunc.llm_decorator.steps.function.prompt import compile_function_prompt
+
+        compiled = compile_function_prompt(self._metadata())
+
+        messages = compiled.build_messages({"text": "a"}, {"source": "emails"})
+        assert "Extract items from emails." in messages[0]["content"]
+        assert "{source}" in compiled.system_prompt()
+
+    def test_json_schema_mode_omits_xml_schema(self) -> None:
+        """JSON schema mode leaves the schema to response_format."""
+        from SimpleLLMFunc.llm_decorator.steps.function.prompt import compile_function_prompt
+
+        xml_prompt = compile_function_prompt(self._metadata()).system_prompt()
+        json_prompt = compile_function_prompt(
+            self._metadata(), output_mode="json_schema"
+        ).system_prompt()
+
+        assert "XML" not in json_prompt
+        assert "JSON schema" in json_prompt
+        assert len(json_prompt) < len(xml_prompt)
@@ -6,7 +6,10 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from SimpleLLMFunc.base.budget import RunBudget
 from SimpleLLMFunc.llm_decorator.steps.function.react import (
+    DEFAULT_EMPTY_RESPONSE_NUDGE,
+    build_retry_messages,
     check_response_content_empty,
     execute_llm_call,
     execute_react_loop,
@@ -26,6 +29,15 @@ class TestPrepareToolsForExecution:
         result = prepare_tools_for_execution([], "test_func")
         mock_process_tools.assert_called_once_with([], "test_func")
 
+    @patch("SimpleLLMFunc.llm_decorator.steps.function.react.process_tools")
+    def test_prepare_tools_uses_cache(self, mock_process_tools: MagicMock) -> None:
+        """Test that a tool cache replaces per-call processing."""
+        tool_cache = MagicMock()
+        tool_cache.get.return_value = ([{"name": "tool1"}], {})
+        result = prepare_tools_for_execution([], "test_func", tool_cache)
+        assert result == ([{"name": "tool1"}], {})
+        mock_process_tools.assert_not_called()
+
 
 class TestExecuteLLMCall:
     """Tests for execute_llm_call function."""
@@ -160,3 +172,95 @@ class TestExecuteReactLoop:
         
         assert result is not None
 
+
+
+class TestEmptyResponseRetryFromHistory:
+    """Empty-response retries resume from the accumulated history."""
+
+    def test_build_retry_messages(self, sample_messages: list) -> None:
+        """The nudge is appended without mutating the history."""
+        assert build_retry_messages(sample_messages) == sample_messages
+        retry_messages = build_retry_messages(sample_messages, "answer now")
+        assert retry_messages[-1] == {"role": "user", "content": "answer now"}
+        assert len(sample_messages) == len(retry_messages) - 1
+
+    @pytest.mark.asyncio
+    @patch("SimpleLLMFunc.base.ReAct.langfuse_client")
+    @patch("SimpleLLMFunc.base.ReAct.get_current_context_attribute")
+    async def test_retry_reissues_only_final_call(
+        self,
+        mock_get_context: MagicMock,
+        mock_langfuse: MagicMock,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+        mock_chat_completion_with_tool_calls: Any,
+    ) -> None:
+        """Tools are not re-run and the retry carries the tool results plus the nudge."""
+        mock_get_context.return_value = "test_func"
+        mock_observation = MagicMock()
+        mock_observation.__enter__ = MagicMock(return_value=mock_observation)
+        mock_observation.__exit__ = MagicMock(return_value=None)
+        mock_langfuse.start_as_current_observation.return_value = mock_observation
+
+        empty_completion = mock_chat_completion.model_copy(deep=True)
+        empty_completion.choices[0].message.content = ""
+        mock_llm_interface.chat = AsyncMock(
+            side_effect=[
+                mock_chat_completion_with_tool_calls,
+                empty_completion,
+                mock_chat_completion,
+            ]
+        )
+        test_tool = AsyncMock(return_value="tool result")
+
+        with patch(
+            "SimpleLLMFunc.llm_decorator.steps.function.react.prepare_tools_for_execution",
+            return_value=(
+                [{"type": "function", "function": {"name": "test_tool"}}],
+                {"test_tool": test_tool},
+            ),
+        ):
+            result = await execute_react_loop(
+                mock_llm_interface,
+                sample_messages,
+                None,
+                5,
+                {},
+                "test_func",
+                retry_nudge=DEFAULT_EMPTY_RESPONSE_NUDGE,
+            )
+
+        assert result is mock_chat_completion
+        assert mock_llm_interface.chat.await_count == 3
+        test_tool.assert_awaited_once()
+        retry_messages = mock_llm_interface.chat.call_args.kwargs["messages"]
+        assert any(m.get("tool_call_id") == "call_123" for m in retry_messages)
+        assert {"role": "user", "content": DEFAULT_EMPTY_RESPONSE_NUDGE} in retry_messages
+
+    @pytest.mark.asyncio
+    async def test_retry_shares_budget_tracker(
+        self,
+        mock_llm_interface: Any,
+        sample_messages: list,
+        mock_chat_completion: Any,
+    ) -> None:
+        """The empty-response retry records its spend on the same tracker."""
+        empty_completion = mock_chat_completion.model_copy(deep=True)
+        empty_completion.choices[0].message.content = ""
+        mock_llm_interface.chat = AsyncMock(side_effect=[empty_completion, mock_chat_completion])
+        tracker = RunBudget(token_budget=100_000).start("test-model")
+
+        result = await execute_react_loop(
+            mock_llm_interface,
+            sample_messages,
+            None,
+            5,
+            {},
+            "test_func",
+            run_budget=tracker.budget,
+            budget_tracker=tracker,
+        )
+
+        assert result is mock_chat_completion
+        assert tracker.llm_calls == 2
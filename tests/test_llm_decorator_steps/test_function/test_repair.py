@@ -0,0 +1,182 @@
+"""Tests for llm_decorator.steps.function.repair module."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+from pydantic import BaseModel
+
+from SimpleLLMFunc.base.budget import RunBudget
+from SimpleLLMFunc.llm_decorator import llm_function
+from SimpleLLMFunc.llm_decorator.steps.function.repair import (
+    build_repair_messages,
+    describe_parse_error,
+    repair_response,
+)
+
+
+class Person(BaseModel):
+    name: str
+    age: int
+
+
+BAD = "<Person><name>Ann</name><age>three</age></Person>"
+GOOD = "<Person><name>Ann</name><age>3</age></Person>"
+
+
+class TestBuildRepairMessages:
+    """Tests for build_repair_messages function."""
+
+    def test_contains_only_format_output_and_error(self) -> None:
+        error = ValueError("age: Input should be a valid integer")
+
+        messages = build_repair_messages("Return a Person as XML.", BAD, error)
+
+        assert [message["role"] for message in messages] == ["system", "assistant", "user"]
+        assert messages[1]["content"] == BAD
+        assert "age: Input should be a valid integer" in messages[2]["content"]
+
+    def test_custom_prompt_keeps_other_braces(self) -> None:
+        prompt = 'Return JSON like {"name": "...", "age": 0}.\nError: {error}'
+
+        messages = build_repair_messages(None, BAD, ValueError("bad age"), prompt)
+
+        assert messages[-1]["content"] == (
+            'Return JSON like {"name": "...", "age": 0}.\nError: bad age'
+        )
+
+    def test_describe_includes_cause(self) -> None:
+        try:
+            try:
+                raise KeyError("inner detail")
+            except KeyError as inner:
+                raise ValueError("outer") from inner
+        except ValueError as exc:
+            assert describe_parse_error(exc) == "outer\n'inner detail'"
+
+
+class TestRepairResponse:
+    """Tests for repair_response function."""
+
+    @pytest.mark.asyncio
+    async def test_repairs_on_second_attempt(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(
+            side_effect=[make_chat_completion(BAD), make_chat_completion(GOOD)]
+        )
+
+        result = await repair_response(
+            llm_interface=mock_llm_interface,
+            system_prompt="Return a Person as XML.",
+            response=make_chat_completion(BAD),
+            error=ValueError("age is not an integer"),
+            return_type=Person,
+            func_name="person",
+            attempts=2,
+            llm_kwargs={"temperature": 0, "tool_choice": "auto"},
+        )
+
+        assert result == Person(name="Ann", age=3)
+        assert mock_llm_interface.chat.await_count == 2
+        second_call = mock_llm_interface.chat.call_args_list[1].kwargs
+        assert "tool_choice" not in second_call
+        assert "Input should be a valid integer" in second_call["messages"][-1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_raises_last_error_when_exhausted(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion("not xml"))
+
+        with pytest.raises(ValueError, match="Pydantic"):
+            await repair_response(
+                llm_interface=mock_llm_interface,
+                system_prompt=None,
+                response=make_chat_completion(BAD),
+                error=ValueError("bad"),
+                return_type=Person,
+                func_name="person",
+                attempts=1,
+                llm_kwargs={},
+            )
+
+
+    @pytest.mark.asyncio
+    async def test_repair_is_recorded_in_budget(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion(GOOD))
+        tracker = RunBudget(token_budget=10_000).start("test-model")
+
+        await repair_response(
+            llm_interface=mock_llm_interface,
+            system_prompt=None,
+            response=make_chat_completion(BAD),
+            error=ValueError("bad"),
+            return_type=Person,
+            func_name="person",
+            attempts=1,
+            llm_kwargs={},
+            budget_tracker=tracker,
+        )
+
+        assert tracker.llm_calls == 1
+        assert tracker.total_tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_stops_when_budget_is_exhausted(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion(GOOD))
+
+        with pytest.raises(ValueError, match="bad"):
+            await repair_response(
+                llm_interface=mock_llm_interface,
+                system_prompt=None,
+                response=make_chat_completion(BAD),
+                error=ValueError("bad"),
+                return_type=Person,
+                func_name="person",
+                attempts=2,
+                llm_kwargs={},
+                budget_tracker=RunBudget(token_budget=1).start("test-model"),
+            )
+        mock_llm_interface.chat.assert_not_awaited()
+
+
+class TestLLMFunctionRepair:
+    """End-to-end tests for llm_function(repair_attempts=...)."""
+
+    @pytest.mark.asyncio
+    async def test_parse_failure_is_repaired(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(
+            side_effect=[make_chat_completion(BAD), make_chat_completion(GOOD)]
+        )
+
+        @llm_function(llm_interface=mock_llm_interface, repair_attempts=1)
+        async def extract_person(text: str) -> Person:
+            """Extract the person mentioned in the text."""
+
+        assert await extract_person("Ann is three") == Person(name="Ann", age=3)
+
+        repair_messages = mock_llm_interface.chat.call_args_list[1].kwargs["messages"]
+        assert all("Ann is three" not in str(message["content"]) for message in repair_messages)
+
+    @pytest.mark.asyncio
+    async def test_without_repair_parse_failure_raises(
+        self, mock_llm_interface: Any, make_chat_completion: Any
+    ) -> None:
+        mock_llm_interface.chat = AsyncMock(return_value=make_chat_completion(BAD))
+
+        @llm_function(llm_interface=mock_llm_interface)
+        async def extract_person(text: str) -> Person:
+            """Extract the person mentioned in the text."""
+
+        with pytest.raises(ValueError):
+            await extract_person("Ann is three")
+        assert mock_llm_interface.chat.await_count == 1
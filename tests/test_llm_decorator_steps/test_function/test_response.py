@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, List
 from unittest.mock import patch
 
 import pytest
 
 from SimpleLLMFunc.llm_decorator.steps.function.response import (
+    StreamedResponseCollector,
     extract_response_content,
     parse_and_validate_response,
     parse_response_to_type,
@@ -53,3 +54,68 @@ class TestParseAndValidateResponse:
         assert result == "result"
         mock_parse.assert_called_once_with(mock_chat_completion, str)
 
+
+
+def _chunk(template: Any, content: str) -> Any:
+    delta = template.choices[0].delta.model_copy(update={"content": content})
+    choice = template.choices[0].model_copy(update={"delta": delta})
+    return template.model_copy(update={"choices": [choice]})
+
+
+class TestStreamedResponseCollector:
+    """Tests for StreamedResponseCollector."""
+
+    def test_assembles_chunks_of_last_call(self, mock_chat_completion_chunk: Any) -> None:
+        collector = StreamedResponseCollector("test_func")
+        first_call = [{"role": "user", "content": "hi"}]
+        second_call = first_call + [{"role": "tool", "content": "result"}]
+
+        collector.add(_chunk(mock_chat_completion_chunk, "thinking"), first_call)
+        collector.add(_chunk(mock_chat_completion_chunk, "Hello, "), second_call)
+        collector.add(_chunk(mock_chat_completion_chunk, "world"), second_call)
+
+        response = collector.response()
+        assert response.choices[0].message.content == "Hello, world"
+        assert response.model == "test-model"
+
+    def test_trims_to_xml_root(self, mock_chat_completion_chunk: Any) -> None:
+        collector = StreamedResponseCollector("test_func", xml_root="result")
+        messages = [{"role": "user", "content": "hi"}]
+        for piece in ["<result><item>a</item>", "</result>", "\nDone!"]:
+            collector.add(_chunk(mock_chat_completion_chunk, piece), messages)
+
+        content = collector.response().choices[0].message.content
+        assert content == "<result><item>a</item></result>"
+        assert parse_response_to_type(collector.response(), List[str]) == ["a"]
+
+    def test_complete_response_is_used_as_is(self, mock_chat_completion: Any) -> None:
+        collector = StreamedResponseCollector("test_func")
+        collector.add(mock_chat_completion, [])
+
+        assert collector.response() is mock_chat_completion
+
+
+class TestParseJsonResponse:
+    """Tests for output_mode="json_schema" parsing."""
+
+    def test_json_mode_parses_with_model_validate_json(self, mock_chat_completion: Any) -> None:
+        from pydantic import BaseModel
+
+        class Label(BaseModel):
+            name: str
+
+        message = mock_chat_completion.choices[0].message.model_copy(
+            update={"content": '{"name": "spam"}'}
+        )
+        choice = mock_chat_completion.choices[0].model_copy(update={"message": message})
+        response = mock_chat_completion.model_copy(update={"choices": [choice]})
+
+        result = parse_and_validate_response(response, Label, "label", output_mode="json_schema")
+
+        assert result == Label(name="spam")
+
+    def test_json_mode_invalid_output_raises_value_error(self, mock_chat_completion: Any) -> None:
+        with pytest.raises(ValueError, match="JSON"):
+            parse_and_validate_response(
+                mock_chat_completion, List[int], "numbers", output_mode="json_schema"
+            )
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import json
+from unittest.mock import patch
+
 import pytest
 from openai.types.chat.chat_completion_message_tool_call import (
     ChatCompletionMessageToolCall,
@@ -10,6 +13,7 @@ from openai.types.chat.chat_completion_message_tool_call import (
 
 from SimpleLLMFunc.type.tool_call import (
     AccumulatedToolCall,
+    ParsedToolCall,
     ToolCall,
     ToolCallArguments,
     ToolCallFunction,
@@ -225,3 +229,53 @@ class TestToolCallConversion:
         assert converted_data == original_data
 
 
+
+
+class TestParsedToolCall:
+    """Test ParsedToolCall caching."""
+
+    def _data(self, arguments: str = '{"arg1": "value1"}') -> dict:
+        return {
+            "id": "call_123",
+            "type": "function",
+            "function": {"name": "test_tool", "arguments": arguments},
+        }
+
+    def test_is_plain_tool_call_dict(self):
+        """ParsedToolCall keeps the OpenAI dict shape and serializes as a dict."""
+        parsed = ParsedToolCall(self._data())
+        assert parsed == self._data()
+        assert json.loads(json.dumps(parsed)) == self._data()
+        assert parsed.id == "call_123"
+        assert parsed.name == "test_tool"
+
+    def test_arguments_parsed_once(self):
+        """Arguments are parsed on first access and reused afterwards."""
+        parsed = ParsedToolCall(self._data())
+        with patch("SimpleLLMFunc.type.tool_call.json.loads", wraps=json.loads) as loads:
+            assert parsed.parse_arguments() == {"arg1": "value1"}
+            assert parsed.arguments == {"arg1": "value1"}
+            assert parsed.to_tool_call() is parsed.to_tool_call()
+            assert dict_to_tool_call(parsed) is parsed.to_tool_call()
+        assert loads.call_count == 1
+
+    def test_parse_error_is_cached(self):
+        """Invalid JSON keeps the parse error and raises it on demand."""
+        parsed = ParsedToolCall(self._data("{not json"))
+        assert parsed.arguments is None
+        assert isinstance(parsed.arguments_error, ValueError)
+        with pytest.raises(ValueError):
+            parsed.parse_arguments()
+
+    def test_empty_arguments_and_invalidation(self):
+        """Empty arguments parse as {}; changing the arguments re-parses them."""
+        parsed = ParsedToolCall(self._data(""))
+        assert parsed.parse_arguments() == {}
+
+        parsed["function"]["arguments"] = '{"arg1": 2}'
+        assert parsed.parse_arguments() == {"arg1": 2}
+
+    def test_from_dict_reuses_instance(self):
+        parsed = ParsedToolCall(self._data())
+        assert ParsedToolCall.from_dict(parsed) is parsed
+        assert isinstance(ParsedToolCall.from_dict(self._data()), ParsedToolCall)
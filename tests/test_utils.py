@@ -0,0 +1,108 @@
+"""Tests for SimpleLLMFunc.utils deadline helpers."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from SimpleLLMFunc.utils import (
+    DeadlineExceededError,
+    check_deadline,
+    clamp_timeout,
+    deadline_scope,
+    deadline_stream,
+    get_deadline,
+    remaining_time,
+)
+
+
+class TestDeadlineScope:
+    """Tests for deadline_scope and related helpers."""
+
+    def test_no_deadline_by_default(self) -> None:
+        assert get_deadline() is None
+        assert remaining_time() is None
+        assert clamp_timeout(30.0) == 30.0
+        check_deadline()
+
+    def test_scope_sets_and_restores_deadline(self) -> None:
+        with deadline_scope(timeout=10) as effective:
+            assert effective is not None
+            assert get_deadline() == effective
+            assert 9 < remaining_time() <= 10
+            assert clamp_timeout(30.0) <= 10
+            assert clamp_timeout(1.0) == 1.0
+        assert get_deadline() is None
+
+    def test_nested_scope_keeps_earlier_deadline(self) -> None:
+        with deadline_scope(timeout=5) as outer:
+            with deadline_scope(timeout=60) as inner:
+                assert inner == outer
+            with deadline_scope(timeout=1) as inner:
+                assert inner < outer
+            assert get_deadline() == outer
+
+    def test_absolute_deadline(self) -> None:
+        with deadline_scope(deadline=time.time() + 3):
+            assert 2 < remaining_time() <= 3
+
+    def test_check_deadline_raises_when_expired(self) -> None:
+        with deadline_scope(timeout=0):
+            assert clamp_timeout(None) == 0.0
+            with pytest.raises(DeadlineExceededError, match="LLM 调用"):
+                check_deadline("LLM 调用")
+
+    def test_deadline_error_is_timeout_error(self) -> None:
+        assert issubclass(DeadlineExceededError, TimeoutError)
+
+
+class TestDeadlineStream:
+    """Tests for deadline_stream."""
+
+    @pytest.mark.asyncio
+    async def test_deadline_only_visible_inside_stream(self) -> None:
+        seen = []
+
+        async def inner():
+            for i in range(3):
+                seen.append(get_deadline())
+                yield i
+
+        items = []
+        async for item in deadline_stream(inner(), timeout=10):
+            # 消费方在两次迭代之间看不到内层的截止时间
+            assert get_deadline() is None
+            items.append(item)
+
+        assert items == [0, 1, 2]
+        assert all(d is not None for d in seen)
+        assert len(set(seen)) == 1
+
+    @pytest.mark.asyncio
+    async def test_outer_deadline_is_kept_when_earlier(self) -> None:
+        async def inner():
+            yield get_deadline()
+
+        with deadline_scope(timeout=1) as outer:
+            assert [d async for d in deadline_stream(inner(), timeout=60)] == [outer]
+            assert get_deadline() == outer
+
+    @pytest.mark.asyncio
+    async def test_close_from_another_task(self) -> None:
+        """Closing the stream from a different task neither raises nor leaks."""
+        closed = []
+
+        async def inner():
+            try:
+                while True:
+                    yield get_deadline()
+            finally:
+                closed.append(True)
+
+        stream = deadline_stream(inner(), timeout=10)
+        assert await stream.__anext__() is not None
+        await asyncio.create_task(stream.aclose())
+        assert closed == [True]
+        assert get_deadline() is None